@@ -0,0 +1,379 @@
+"""
+进程内生成测试报告：替代 aomaker 收尾时调用的 `allure generate`（需要 JVM），
+把 allure 结果转成静态 HTML 与 JSON 汇总，写到 reports/html/
+
+运行中 ReportIndexer 订阅 allure 的 report_result 钩子，每条用例结果在写盘的同时追加一行精简记录到
+<alluredir>/.index/index-<pid>.jsonl；运行结束只需合并这些索引，索引条数与结果文件数不一致时
+（例如用例进程被中断）才回退为逐个解析结果文件
+
+输出：
+    reports/html/index.html              静态报告
+    reports/html/data/results.json       每个用例的最终结果（重试取最后一次）
+    reports/html/widgets/summary.json    与 allure 相同格式的汇总，aomaker-report.html 沿用
+    reports/results.jsonl                结构化结果：首行为汇总（用例数、起止时间），其后每行一个用例，
+                                         失败在前；飞书通知等只需读取首行
+
+python run.py report [--results reports/json] [--output reports/html]
+设置 APEX_REPORT_ENGINE=allure 时仍使用 allure 命令行
+"""
+import argparse
+import glob
+import html
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import allure_commons
+import attr
+from aomaker._constants import Allure
+from aomaker.utils.gen_allure_report import time_format, timestamp_to_standard
+from rich.console import Console
+
+from Tools.run_stats import RUN_ID_ENV
+
+console = Console()
+
+ENGINE_ENV = "APEX_REPORT_ENGINE"
+NATIVE = "native"
+INDEX_DIR = ".index"
+RESULTS_FILE = os.path.join("reports", "results.jsonl")
+STATUSES = ("passed", "failed", "broken", "skipped", "unknown")
+REPORT_TITLE = "Apex API 自动化测试报告"
+# 单条用例保留的堆栈长度，避免大量失败时报告过大
+MAX_TRACE = 8000
+LABELS = ("parentSuite", "suite", "subSuite", "epic", "feature", "story", "severity")
+
+
+def to_record(result: dict) -> dict:
+    """allure 结果（result.json 的内容）转为报告用的精简记录"""
+    details = result.get("statusDetails") or {}
+    labels: Dict[str, object] = {}
+    tags = []
+    for label in result.get("labels") or ():
+        name, value = label.get("name"), label.get("value")
+        if name == "tag":
+            tags.append(value)
+        elif name in LABELS and name not in labels:
+            labels[name] = value
+    start = result.get("start") or 0
+    return {
+        "uuid": result.get("uuid"),
+        "historyId": result.get("historyId") or result.get("uuid"),
+        "name": result.get("name", ""),
+        "fullName": result.get("fullName", ""),
+        "status": result.get("status") or "unknown",
+        "start": start,
+        "stop": result.get("stop") or start,
+        "description": result.get("description", ""),
+        "message": details.get("message", ""),
+        "trace": (details.get("trace") or "")[:MAX_TRACE],
+        "labels": labels,
+        "tags": tags,
+        "parameters": [{"name": p.get("name"), "value": p.get("value")} for p in result.get("parameters") or ()],
+        "attachments": [{"name": a.get("name"), "source": a.get("source")} for a in _attachments(result)],
+    }
+
+
+def _attachments(node: dict) -> Iterable[dict]:
+    """用例及其各层步骤上的附件（aomaker 的请求日志挂在步骤上）"""
+    yield from node.get("attachments") or ()
+    for step in node.get("steps") or ():
+        yield from _attachments(step)
+
+
+class ReportIndex:
+    """用例结果索引：按 historyId 去重，重试时保留开始时间最晚的一次"""
+
+    def __init__(self):
+        self.results: Dict[str, dict] = {}
+        self.uuids = set()
+
+    def add(self, record: dict):
+        if record["uuid"] in self.uuids:
+            return
+        self.uuids.add(record["uuid"])
+        key = record["historyId"]
+        current = self.results.get(key)
+        attempts = current["attempts"] + 1 if current else 1
+        if current is None or record["start"] >= current["start"]:
+            self.results[key] = record
+        self.results[key]["attempts"] = attempts
+
+    def load_shards(self, directory: str) -> int:
+        """读取运行中写入的索引，返回读取的记录数"""
+        count = 0
+        for path in sorted(glob.glob(os.path.join(directory, "index-*.jsonl"))):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 进程中断时最后一行可能不完整
+                        continue
+                    self.add(record)
+                    count += 1
+        return count
+
+    def scan(self, results_dir: str) -> int:
+        """解析索引中缺失的结果文件，返回新增的记录数"""
+        before = len(self.uuids)
+        for path in result_files(results_dir):
+            with open(path, encoding="utf-8") as f:
+                try:
+                    result = json.load(f)
+                except ValueError:
+                    continue
+            if result.get("uuid") not in self.uuids:
+                self.add(to_record(result))
+        return len(self.uuids) - before
+
+    def cases(self) -> List[dict]:
+        return sorted(self.results.values(), key=lambda r: (r["labels"].get("suite", ""), r["fullName"], r["name"]))
+
+    def statistic(self) -> Dict[str, int]:
+        stat = dict.fromkeys(STATUSES, 0)
+        for record in self.results.values():
+            stat[record["status"] if record["status"] in stat else "unknown"] += 1
+        stat["total"] = len(self.results)
+        return stat
+
+    def timing(self) -> Dict[str, int]:
+        if not self.results:
+            return {}
+        durations = [r["stop"] - r["start"] for r in self.results.values()]
+        start = min(r["start"] for r in self.results.values())
+        stop = max(r["stop"] for r in self.results.values())
+        return {"start": start, "stop": stop, "duration": stop - start, "minDuration": min(durations),
+                "maxDuration": max(durations), "sumDuration": sum(durations)}
+
+
+def result_files(results_dir: str) -> Iterable[str]:
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith("-result.json"):
+                yield entry.path
+
+
+class ReportIndexer:
+    """pytest 插件：用例结果上报时追加到本进程的索引文件，报告生成时无需再解析结果文件"""
+
+    def __init__(self):
+        self._file = None
+        self._lock = threading.Lock()
+
+    def pytest_configure(self, config):
+        results_dir = getattr(config.option, "allure_report_dir", None)
+        if not results_dir:
+            return
+        directory = os.path.join(results_dir, INDEX_DIR)
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(os.path.join(directory, f"index-{os.getpid()}.jsonl"), "a", encoding="utf-8")
+        allure_commons.plugin_manager.register(self)
+
+    def pytest_unconfigure(self, config):
+        if self._file is None:
+            return
+        allure_commons.plugin_manager.unregister(self)
+        self._file.close()
+        self._file = None
+
+    @allure_commons.hookimpl
+    def report_result(self, result):
+        # 与 allure 写 result.json 时相同的字段过滤
+        data = attr.asdict(result, filter=lambda a, value: not (type(value) != bool and not bool(value)))
+        line = json.dumps(to_record(data), ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+
+def build_index(results_dir: str) -> ReportIndex:
+    """合并运行中写入的索引，索引不完整时补充解析结果文件"""
+    index = ReportIndex()
+    indexed = index.load_shards(os.path.join(results_dir, INDEX_DIR))
+    if os.path.isdir(results_dir) and indexed < sum(1 for _ in result_files(results_dir)):
+        index.scan(results_dir)
+    return index
+
+
+_STYLE = """
+body{font-family:-apple-system,"Segoe UI","PingFang SC","Microsoft YaHei",sans-serif;margin:24px;color:#222}
+h1{font-size:22px}.cards{display:flex;gap:12px;margin:16px 0}
+.card{padding:10px 18px;border-radius:6px;background:#f4f5f7;min-width:80px}.card b{display:block;font-size:22px}
+table{border-collapse:collapse;width:100%;font-size:13px}th,td{border-bottom:1px solid #e5e5e5;padding:6px 8px;
+text-align:left;vertical-align:top}th{background:#fafafa}.s{font-weight:bold;text-transform:uppercase}
+.passed{color:#2e7d32}.failed{color:#c62828}.broken{color:#ef6c00}.skipped{color:#757575}.unknown{color:#6a1b9a}
+pre{white-space:pre-wrap;margin:4px 0;font-size:12px;background:#fafafa;padding:6px}
+"""
+
+
+def _case_row(record: dict) -> str:
+    status = record["status"]
+    duration = (record["stop"] - record["start"]) / 1000
+    name = html.escape(record["name"])
+    if record["parameters"]:
+        name += " <small>[" + html.escape(", ".join(f"{p['name']}={p['value']}" for p in record["parameters"])) + "]</small>"
+    detail = ""
+    if record["message"] or record["trace"]:
+        detail = (f"<details><summary>{html.escape(record['message'][:200] or '堆栈')}</summary>"
+                  f"<pre>{html.escape(record['trace'])}</pre></details>")
+    links = " ".join(f"<a href='data/attachments/{html.escape(a['source'])}'>{html.escape(a['name'] or a['source'])}</a>"
+                     for a in record.get("attachments") or ())
+    if links:
+        detail += f"<div>{links}</div>"
+    retries = f" (重试 {record['attempts'] - 1} 次)" if record.get("attempts", 1) > 1 else ""
+    suite = html.escape(record["labels"].get("feature") or record["labels"].get("suite", ""))
+    return (f"<tr><td class='s {status}'>{status}</td><td>{suite}</td><td>{name}{retries}"
+            f"<br><small>{html.escape(record['fullName'])}</small>{detail}</td><td>{duration:.2f}s</td></tr>")
+
+
+def render_html(index: ReportIndex, title: str = REPORT_TITLE) -> str:
+    stat, timing = index.statistic(), index.timing()
+    order = {status: i for i, status in enumerate(("failed", "broken", "unknown", "skipped", "passed"))}
+    # 失败用例排在前面
+    cases = sorted(index.cases(), key=lambda r: order.get(r["status"], 0))
+    cards = "".join(f"<div class='card {status}'><b>{stat[status]}</b>{status}</div>"
+                    for status in STATUSES if stat[status] or status != "unknown")
+    period = ""
+    if timing:
+        period = (f"<p>开始：{timestamp_to_standard(timing['start'])}　结束：{timestamp_to_standard(timing['stop'])}"
+                  f"　耗时：{time_format(timing['duration'] / 1000)}</p>")
+    rows = "\n".join(_case_row(record) for record in cases)
+    return (f"<!DOCTYPE html><html lang='zh-CN'><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+            f"<style>{_STYLE}</style></head><body><h1>{html.escape(title)}</h1>{period}"
+            f"<div class='cards'><div class='card'><b>{stat['total']}</b>total</div>{cards}</div>"
+            f"<table><thead><tr><th>状态</th><th>模块</th><th>用例</th><th>耗时</th></tr></thead>"
+            f"<tbody>\n{rows}\n</tbody></table></body></html>")
+
+
+def copy_attachments(index: ReportIndex, results_dir: str, output_dir: str):
+    """把报告引用的附件放到 output_dir/data/attachments，同一文件系统上用硬链接代替复制"""
+    target_dir = os.path.join(output_dir, "data", "attachments")
+    os.makedirs(target_dir, exist_ok=True)
+    for record in index.results.values():
+        for attachment in record.get("attachments") or ():
+            source = os.path.join(results_dir, attachment["source"])
+            target = os.path.join(target_dir, attachment["source"])
+            if not os.path.exists(source) or os.path.exists(target):
+                continue
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+
+
+def write_report(index: ReportIndex, output_dir: str, clean: bool = True, title: str = REPORT_TITLE):
+    if clean:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(os.path.join(output_dir, "widgets"), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "data"), exist_ok=True)
+    summary = {"reportName": title, "testRuns": [], "statistic": index.statistic(), "time": index.timing()}
+    # json.dumps 走 C 编码器，json.dump 写文件时逐块编码，慢数倍
+    with open(os.path.join(output_dir, "widgets", "summary.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(summary, ensure_ascii=False))
+    with open(os.path.join(output_dir, "data", "results.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(index.cases(), ensure_ascii=False))
+    with open(os.path.join(output_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(render_html(index, title))
+
+
+def export_results(index: ReportIndex, path: str = RESULTS_FILE, run_id: Optional[str] = None) -> str:
+    """写出结构化结果文件，先写临时文件再替换，读取方不会读到半个文件"""
+    stat, timing = index.statistic(), index.timing()
+    summary = {"run_id": run_id, "stats": stat,
+               "pass_rate": round(stat["passed"] / stat["total"] * 100, 2) if stat["total"] else 0}
+    if timing:
+        summary["time"] = {"start": timestamp_to_standard(timing["start"]), "end": timestamp_to_standard(timing["stop"]),
+                           "duration": time_format(timing["duration"] / 1000), "start_ms": timing["start"],
+                           "stop_ms": timing["stop"], "duration_ms": timing["duration"]}
+    order = {status: i for i, status in enumerate(("failed", "broken", "unknown", "skipped", "passed"))}
+    lines = [json.dumps(summary, ensure_ascii=False)]
+    for record in sorted(index.cases(), key=lambda r: order.get(r["status"], 0)):
+        lines.append(json.dumps({"name": record["name"], "fullName": record["fullName"], "status": record["status"],
+                                 "duration_ms": record["stop"] - record["start"], "attempts": record.get("attempts", 1),
+                                 "message": record["message"]}, ensure_ascii=False))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_summary(path: str = RESULTS_FILE) -> dict:
+    """只读取结果文件首行的汇总"""
+    with open(path, encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def read_cases(path: str = RESULTS_FILE, status: Optional[Iterable[str]] = None,
+               limit: Optional[int] = None) -> List[dict]:
+    """按顺序读取用例行；只要失败用例时读到第一个不匹配的状态即停止"""
+    status = set(status) if status is not None else None
+    # 失败与阻塞排在文件最前
+    failures_only = status is not None and status <= {"failed", "broken"}
+    cases = []
+    with open(path, encoding="utf-8") as f:
+        f.readline()
+        for line in f:
+            if limit is not None and len(cases) >= limit:
+                break
+            case = json.loads(line)
+            if status is not None and case["status"] not in status:
+                if failures_only:
+                    break
+                continue
+            cases.append(case)
+    return cases
+
+
+def build_report(results_dir: str = Allure.JSON_DIR, output_dir: str = Allure.HTML_DIR,
+                 clean: bool = True) -> ReportIndex:
+    """由 allure 结果生成 output_dir 下的静态报告"""
+    index = build_index(results_dir)
+    write_report(index, output_dir, clean)
+    copy_attachments(index, results_dir, output_dir)
+    return index
+
+
+def gen_allure(is_clear: bool = True) -> bool:
+    """与 aomaker.runner.reporting.gen_allure 签名一致的进程内实现"""
+    from aomaker.utils.gen_allure_report import rewrite_summary
+    start = time.perf_counter()
+    index = build_report(Allure.JSON_DIR, Allure.HTML_DIR, is_clear)
+    export_results(index, run_id=os.environ.get(RUN_ID_ENV))
+    # 与 allure 命令行路径一致：补充 aomaker 的按标记成功率
+    rewrite_summary()
+    console.print(f"[cyan]测试报告已生成到 {Allure.HTML_DIR}/index.html，"
+                  f"{len(index.results)} 个用例，耗时 {time.perf_counter() - start:.2f}s[/cyan]")
+    return True
+
+
+def use_native_report():
+    """aomaker 收尾生成报告时改用进程内实现；APEX_REPORT_ENGINE=allure 时保留 allure 命令行"""
+    if os.environ.get(ENGINE_ENV, NATIVE) != NATIVE:
+        return
+    from aomaker.runner import reporting
+    reporting.gen_allure = gen_allure
+
+
+def main(argv: Optional[List[str]] = None) -> ReportIndex:
+    """命令行入口: python run.py report [--results DIR] [--output DIR]"""
+    parser = argparse.ArgumentParser(prog="run.py report", description="由 allure 结果生成静态测试报告")
+    parser.add_argument("--results", default=Allure.JSON_DIR, help="allure 结果目录")
+    parser.add_argument("--output", default=Allure.HTML_DIR, help="报告输出目录")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    index = build_report(args.results, args.output)
+    stat = index.statistic()
+    console.print(f"[green]报告已生成: {os.path.join(args.output, 'index.html')}[/green] "
+                  f"共 {stat['total']} 个用例，通过 {stat['passed']}，失败 {stat['failed']}，阻塞 {stat['broken']}，"
+                  f"跳过 {stat['skipped']}，耗时 {time.perf_counter() - start:.2f}s")
+    return index
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Apex API 客户端构建，供 conftest 的 api_client fixture 与压测等工具共用
+
+apexpro 的签名依赖(web3、eth_account、sympy 等)导入耗时以秒计，在首次创建客户端时才导入，
+收集用例、只运行工具类用例的 worker 不为此付出启动时间
+"""
+import os
+from typing import TYPE_CHECKING, Optional
+
+from Tools.cassette import RECORD, REPLAY, cassette_mode, install_cassette
+from Tools.rate_limit import install_rate_limiter
+from Tools.transport import mount_pooled_transport
+from Tools.ref_cache import enable_reference_cache
+from Tools.signing import enable_signing_engine
+
+if TYPE_CHECKING:
+    from apexpro.http_private_sign import HttpPrivateSign
+
+
+def get_env_or_fail(key: str) -> str:
+    """获取环境变量，如果不存在则抛出异常"""
+    value = os.getenv(key)
+    if not value:
+        raise ValueError(f"Environment variable {key} is not set")
+    return value
+
+
+def create_api_client(endpoint: Optional[str] = None, reference_cache: bool = True,
+                      signing_engine: bool = True) -> "HttpPrivateSign":
+    """创建API客户端，reference_cache 控制是否缓存 configs_v3 / get_account_v3，
+    signing_engine 控制下单是否复用派生好的签名密钥"""
+    if cassette_mode() == REPLAY:
+        # 回放不校验签名，未配置凭证时使用占位凭证离线运行
+        from Tools.stub_server import STUB_CREDENTIALS
+        for key, value in STUB_CREDENTIALS.items():
+            os.environ.setdefault(key, value)
+
+    # 从环境变量获取敏感信息
+    api_key = get_env_or_fail("APEX_API_KEY")
+    api_secret = get_env_or_fail("APEX_API_SECRET")
+    api_passphrase = get_env_or_fail("APEX_API_PASSPHRASE")
+    seeds = get_env_or_fail("APEX_SEEDS")
+    l2_key = get_env_or_fail("APEX_L2_KEY")
+
+    from apexpro.http_private_sign import HttpPrivateSign
+    from apexpro.constants import NETWORKID_MAIN, APEX_OMNI_HTTP_MAIN
+
+    # 创建客户端
+    client = HttpPrivateSign(
+        endpoint or APEX_OMNI_HTTP_MAIN,
+        network_id=NETWORKID_MAIN,
+        zk_seeds=seeds,
+        zk_l2Key=l2_key,
+        api_key_credentials={
+            "key": api_key,
+            "secret": api_secret,
+            "passphrase": api_passphrase
+        }
+    )
+    # 池化连接，同一worker内的调用复用长连接
+    mount_pooled_transport(client.client)
+    # APEX_CASSETTE_MODE=record|replay 时录制/回放请求
+    install_cassette(client.client)
+    # 同一 API key 的各进程共享限流预算，回放时不访问网络不需要限流
+    if cassette_mode() != REPLAY:
+        install_rate_limiter(client.client, api_key)
+    # 录制时不走参考数据缓存，保证 configs_v3 / get_account_v3 都录进磁带
+    if reference_cache and cassette_mode() != RECORD:
+        enable_reference_cache(client)
+    # 签名密钥只派生一次，下单请求与 create_order_v3 一致
+    if signing_engine:
+        enable_signing_engine(client)
+    return client
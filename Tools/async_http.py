@@ -0,0 +1,108 @@
+"""
+异步HTTP客户端：基于 aiohttp，在单个事件循环内并发发送 API 对象的请求
+"""
+import asyncio
+import json
+import time
+import weakref
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+DEFAULT_CONNECTION_LIMIT = 100
+
+
+class AsyncResponse:
+    """与 aomaker CachedResponse 接口一致的异步响应（响应体已完整读取）"""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes, url: str, elapsed: float):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.elapsed = timedelta(seconds=elapsed)
+        self._cached_json = None
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self, **kwargs) -> Any:
+        if self._cached_json is None:
+            self._cached_json = json.loads(self.content, **kwargs)
+        return self._cached_json
+
+
+def _query_value(value: Any) -> Any:
+    # aiohttp 只接受 str/int/float 作为查询参数，其余按 requests 的方式转成字符串
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return str(value)
+    return value
+
+
+class AsyncHTTPClient:
+    """每个事件循环一个实例，内部复用 aiohttp 连接池"""
+
+    def __init__(self, limit: int = DEFAULT_CONNECTION_LIMIT, headers: Optional[Dict[str, str]] = None):
+        self.limit = limit
+        self.headers = dict(headers or {})
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+        return self._session
+
+    async def send_request(self, request: Dict[str, Any], **kwargs) -> AsyncResponse:
+        """发送由 RequestConverter 生成的请求字典；含 files 的 multipart 请求由 BaseAPI.asend 回退到同步 send"""
+        request = {**request, **kwargs}
+        request.pop("_api_meta", None)
+        if request.get("files"):
+            raise ValueError("multipart 文件上传请通过 BaseAPI.asend 发送")
+
+        params = request.get("params")
+        if params:
+            params = {k: _query_value(v) for k, v in params.items()}
+
+        start = time.perf_counter()
+        async with self.session.request(
+                request["method"],
+                request["url"],
+                headers=request.get("headers"),
+                params=params,
+                json=request.get("json"),
+                data=request.get("data"),
+        ) as resp:
+            content = await resp.read()
+        return AsyncResponse(resp.status, dict(resp.headers), content, str(resp.url), time.perf_counter() - start)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncHTTPClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncHTTPClient:
+    """获取当前事件循环的异步客户端，全局请求头与同步客户端保持一致"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        from aomaker.storage import cache
+        client = _clients[loop] = AsyncHTTPClient(headers=cache.get("headers") or {})
+    return client
+
+
+async def close_async_client():
+    """关闭当前事件循环的异步客户端"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
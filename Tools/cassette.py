@@ -0,0 +1,304 @@
+"""
+录制/回放传输层：把 api_client 的请求与响应录制到磁带文件，回放时不访问网络，按原始耗时或零延迟返回
+
+- 请求匹配：方法 + 路径 + 查询参数 + 表单/JSON 请求体，忽略请求头（APEX-SIGNATURE、APEX-TIMESTAMP 等）
+  与 VOLATILE_FIELDS 中每次都会变化的字段（timestampSeconds、expiration、clientId、signature ...）
+- 同一请求录制多次时按顺序回放，超出后重复最后一次
+- 磁带文件：响应体按 sha256 内容寻址去重并压缩，索引在文件末尾；读取时 mmap 映射，只解压实际回放的响应体
+- 多个测试进程录制时在文件锁内与已有磁带合并，新录制的请求覆盖同一请求的旧记录
+
+APEX_CASSETTE_MODE=record|replay 开启（默认 off），APEX_CASSETTE 指定磁带路径，
+APEX_CASSETTE_LATENCY=original 回放时按录制时的耗时等待（默认 zero）
+
+查看磁带：python run.py cassette [--path testcases/cassettes/order.cassette]
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+MODE_ENV = "APEX_CASSETTE_MODE"
+PATH_ENV = "APEX_CASSETTE"
+LATENCY_ENV = "APEX_CASSETTE_LATENCY"
+OFF, RECORD, REPLAY = "off", "record", "replay"
+DEFAULT_PATH = os.path.join("testcases", "cassettes", "order.cassette")
+
+MAGIC = b"APEXCAS1"
+FOOTER = struct.Struct("<Q8s")
+# 压缩后小于原文该比例才按压缩存储
+COMPRESS_RATIO = 0.9
+
+# 每次请求都会变化、不参与匹配的请求字段
+VOLATILE_FIELDS = frozenset({
+    "timestampSeconds", "timestamp", "expiration", "nonce",
+    "clientId", "clientOrderId", "signature",
+    "slClientOrderId", "slExpiration", "slSignature",
+    "tpClientOrderId", "tpExpiration", "tpSignature",
+})
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """回放时磁带中没有匹配的请求"""
+
+
+def cassette_mode() -> str:
+    return os.environ.get(MODE_ENV, OFF).lower() or OFF
+
+
+def _body_fields(request: requests.PreparedRequest) -> List[Tuple[str, str]]:
+    body = request.body
+    if not body:
+        return []
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    content_type = request.headers.get("Content-Type", "")
+    if "json" in content_type:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return [("", body)]
+        if isinstance(data, dict):
+            return [(key, json.dumps(value, sort_keys=True)) for key, value in data.items()]
+        return [("", json.dumps(data, sort_keys=True))]
+    return parse_qsl(body, keep_blank_values=True)
+
+
+def describe_request(request: requests.PreparedRequest, volatile=VOLATILE_FIELDS) -> str:
+    """去掉易变字段后的规范化请求，既用于匹配也便于查看磁带内容"""
+    parts = urlsplit(request.url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in volatile)
+    body = sorted((k, v) for k, v in _body_fields(request) if k not in volatile)
+    text = f"{request.method} {parts.path}"
+    if query:
+        text += "?" + "&".join(f"{k}={v}" for k, v in query)
+    if body:
+        text += " " + "&".join(f"{k}={v}" for k, v in body)
+    return text
+
+
+def request_key(description: str) -> str:
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """磁带内容：请求 -> 录制的响应列表，响应体按内容寻址"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # key -> [{"request", "status", "reason", "content_type", "blob", "elapsed"}]
+        self.interactions: Dict[str, List[dict]] = {}
+        # digest -> (offset, length, compressed)，指向 mmap 中的位置
+        self.blobs: Dict[str, Tuple[int, int, bool]] = {}
+        # 本次录制新增、尚未写入文件的响应体
+        self.pending: Dict[str, bytes] = {}
+        self._map: Optional[mmap.mmap] = None
+        self._cache: Dict[str, bytes] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        cassette = cls(path)
+        if not os.path.exists(path) or os.path.getsize(path) < len(MAGIC) + FOOTER.size:
+            return cassette
+        with open(path, "rb") as f:
+            cassette._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        index_offset, magic = FOOTER.unpack_from(cassette._map, len(cassette._map) - FOOTER.size)
+        if magic != MAGIC or cassette._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} 不是磁带文件")
+        index = json.loads(cassette._map[index_offset:len(cassette._map) - FOOTER.size])
+        cassette.interactions = index["interactions"]
+        cassette.blobs = {digest: tuple(location) for digest, location in index["blobs"].items()}
+        return cassette
+
+    def body(self, digest: str) -> bytes:
+        content = self._cache.get(digest)
+        if content is not None:
+            return content
+        content = self.pending.get(digest)
+        if content is None:
+            offset, length, compressed = self.blobs[digest]
+            content = self._map[offset:offset + length]
+            if compressed:
+                content = zlib.decompress(content)
+            self._cache[digest] = content
+        return content
+
+    def add(self, description: str, response: requests.Response, elapsed: float) -> dict:
+        content = response.content or b""
+        digest = hashlib.sha256(content).hexdigest()
+        if digest not in self.blobs:
+            self.pending.setdefault(digest, content)
+        entry = {"request": description, "status": response.status_code, "reason": response.reason,
+                 "content_type": response.headers.get("Content-Type"), "blob": digest,
+                 "elapsed": round(elapsed, 6)}
+        self.interactions.setdefault(request_key(description), []).append(entry)
+        return entry
+
+    def write(self, path: Optional[str] = None):
+        """写出完整磁带（先写临时文件再替换）"""
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        used = {entry["blob"] for entries in self.interactions.values() for entry in entries}
+        blobs = {}
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(MAGIC)
+            for digest in sorted(used):
+                if digest in self.pending:
+                    content = self.pending[digest]
+                    packed = zlib.compress(content, 6)
+                    compressed = len(packed) < len(content) * COMPRESS_RATIO
+                    data = packed if compressed else content
+                else:
+                    offset, length, compressed = self.blobs[digest]
+                    data = self._map[offset:offset + length]
+                blobs[digest] = (f.tell(), len(data), compressed)
+                f.write(data)
+            index_offset = f.tell()
+            f.write(json.dumps({"version": 1, "interactions": self.interactions, "blobs": blobs},
+                               ensure_ascii=False, sort_keys=True).encode("utf-8"))
+            f.write(FOOTER.pack(index_offset, MAGIC))
+        os.replace(f"{path}.tmp", path)
+
+    def stats(self) -> dict:
+        entries = [entry for entries in self.interactions.values() for entry in entries]
+        sizes = {digest: location[1] for digest, location in self.blobs.items()}
+        return {"requests": len(self.interactions), "interactions": len(entries), "blobs": len(self.blobs),
+                "stored_bytes": sum(sizes.values()),
+                "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0}
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    requests 传输适配器：record 模式下转发给 inner 并录制，replay 模式下只从磁带返回；
+    挂载到 api_client 的 session 上，对 apexpro 客户端透明
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, mode: str = REPLAY, inner: Optional[BaseAdapter] = None,
+                 latency: Optional[str] = None, volatile=VOLATILE_FIELDS):
+        super().__init__()
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"不支持的磁带模式: {mode}")
+        if mode == RECORD and inner is None:
+            raise ValueError("录制模式需要转发请求的 inner 适配器")
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.original_latency = (latency or os.environ.get(LATENCY_ENV, "zero")).lower() == "original"
+        self.volatile = volatile
+        self.cassette = Cassette(path) if mode == RECORD else Cassette.load(path)
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        description = describe_request(request, self.volatile)
+        if self.mode == RECORD:
+            # Session 在适配器返回后才设置 response.elapsed，这里自行计时
+            start = time.perf_counter()
+            response = self.inner.send(request, **kwargs)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.cassette.add(description, response, elapsed)
+            return response
+
+        key = request_key(description)
+        entries = self.cassette.interactions.get(key)
+        if not entries:
+            raise CassetteMiss(f"磁带 {self.path} 中没有匹配的请求: {description}", request=request)
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        entry = entries[min(position, len(entries) - 1)]
+        if self.original_latency and entry["elapsed"]:
+            time.sleep(entry["elapsed"])
+        return self._build_response(request, entry)
+
+    def _build_response(self, request: requests.PreparedRequest, entry: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry["reason"]
+        response._content = self.cassette.body(entry["blob"])
+        response.headers = CaseInsensitiveDict({"Content-Type": entry["content_type"] or "application/json"})
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def save(self):
+        """录制模式：在文件锁内与已有磁带合并后写出"""
+        if self.mode != RECORD or not self.cassette.interactions:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            merged = Cassette.load(self.path)
+            merged.interactions.update(self.cassette.interactions)
+            merged.pending.update(self.cassette.pending)
+            merged.write(self.path)
+        console.print(f"[cyan]已录制 {len(self.cassette.interactions)} 个请求到 {self.path}[/cyan]")
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
+
+
+_recorders: List[CassetteAdapter] = []
+
+
+def install_cassette(session: requests.Session, mode: Optional[str] = None,
+                     path: Optional[str] = None) -> Optional[CassetteAdapter]:
+    """按 APEX_CASSETTE_MODE 为 session 挂载录制/回放适配器，off 时不做任何改动"""
+    mode = mode or cassette_mode()
+    if mode == OFF:
+        return None
+    path = path or os.environ.get(PATH_ENV) or DEFAULT_PATH
+    adapter = CassetteAdapter(path, mode, inner=session.get_adapter("https://") if mode == RECORD else None)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if mode == RECORD:
+        _recorders.append(adapter)
+    console.print(f"[yellow]磁带{'录制' if mode == RECORD else '回放'}模式: {path}[/yellow]")
+    return adapter
+
+
+def save_cassettes():
+    """写出本进程录制的磁带，由 conftest 在会话结束时调用"""
+    while _recorders:
+        _recorders.pop().save()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python run.py cassette", description="查看录制的磁带")
+    parser.add_argument("--path", default=os.environ.get(PATH_ENV) or DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    cassette = Cassette.load(args.path)
+    if not cassette.interactions:
+        console.print(f"[yellow]{args.path} 不存在或为空[/yellow]")
+        return
+    table = Table(title=args.path, show_header=True, header_style="bold magenta")
+    for column in ("请求", "次数", "状态码", "平均耗时(ms)", "响应体"):
+        table.add_column(column)
+    for entries in cassette.interactions.values():
+        table.add_row(entries[0]["request"][:120], str(len(entries)),
+                      ",".join(sorted({str(entry["status"]) for entry in entries})),
+                      f"{sum(entry['elapsed'] for entry in entries) / len(entries) * 1000:.1f}",
+                      str(len({entry["blob"] for entry in entries})))
+    console.print(table)
+    stats = cassette.stats()
+    console.print(f"请求 {stats['requests']}，录制 {stats['interactions']} 次，去重后响应体 {stats['blobs']} 个，"
+                  f"文件 {stats['file_bytes'] / 1024:.1f}KB")
@@ -0,0 +1,243 @@
+"""
+列式模型列表：把 List[User]/List[Product] 等按字段存成列，数值与时间列使用 array 紧凑存储，
+逐条访问时返回与原模型同名属性的行视图；适合长时间压测中保留完整结果集做断言
+"""
+import sys
+import typing
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+import attrs
+
+from .deserializers import compile_field, _field_keys
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _encode_datetime(value: datetime) -> int:
+    # 只接受不带时区的 datetime，带时区的整列退化为对象存储
+    if value.tzinfo is not None:
+        raise TypeError("aware datetime")
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _decode_datetime(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class Column:
+    """对象列：原样保存值，字符串做驻留以便重复值共享同一对象"""
+    __slots__ = ("data",)
+
+    def __init__(self):
+        self.data: list = []
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def extend(self, values: List[Any]):
+        self.data.extend(sys.intern(v) if v.__class__ is str else v for v in values)
+
+    def values(self) -> Sequence:
+        return self.data
+
+
+class ArrayColumn(Column):
+    """定长类型列：数据放在 array 中；遇到无法编码的值（如 None、超出范围）整列退化为对象列"""
+    __slots__ = ("typecode", "encode", "decode")
+
+    def __init__(self, typecode: str, encode: Optional[Callable] = None, decode: Optional[Callable] = None):
+        super().__init__()
+        self.typecode = typecode
+        self.encode = encode
+        self.decode = decode
+        self.data = array(typecode)
+
+    def __getitem__(self, index):
+        if self.decode is None:
+            return self.data[index]
+        return self.decode(self.data[index])
+
+    def extend(self, values: List[Any]):
+        if isinstance(self.data, array):
+            try:
+                encoded = values if self.encode is None else map(self.encode, values)
+                self.data.extend(array(self.typecode, encoded))
+                return
+            except (TypeError, ValueError, OverflowError):
+                self.data = list(self.values())
+                self.decode = None
+        self.data.extend(values)
+
+    def values(self) -> Sequence:
+        """数值列直接返回 array（零拷贝），时间列返回解码后的列表"""
+        if self.decode is None:
+            return self.data
+        return [self.decode(v) for v in self.data]
+
+
+def _make_column(tp) -> Column:
+    if typing.get_origin(tp) is typing.Union:
+        # Optional[X] 按 X 建列，出现 None 时再退化
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        tp = args[0] if len(args) == 1 else tp
+    if tp is bool:
+        return ArrayColumn("b", decode=bool)
+    if tp is int:
+        return ArrayColumn("q")
+    if tp is float:
+        return ArrayColumn("d")
+    if tp is datetime:
+        return ArrayColumn("q", encode=_encode_datetime, decode=_decode_datetime)
+    return Column()
+
+
+class _Schema:
+    """每个模型类的列定义与行视图类，只构建一次"""
+    _cache: Dict[type, "_Schema"] = {}
+
+    def __init__(self, cls: Type):
+        hints = typing.get_type_hints(cls)
+        keys = _field_keys(cls)
+        fields = [a for a in attrs.fields(cls) if a.init]
+        self.cls = cls
+        self.names = tuple(a.name for a in fields)
+        self.types = tuple(hints.get(a.name, Any) for a in fields)
+        self.keys = tuple(keys[a.name] for a in fields)
+        self.converters = tuple(compile_field(tp) for tp in self.types)
+        self.defaults = tuple(a.default for a in fields)
+        self.row_cls = _row_class(cls, self.names)
+
+    @classmethod
+    def of(cls, model_cls: Type) -> "_Schema":
+        schema = cls._cache.get(model_cls)
+        if schema is None:
+            schema = cls._cache[model_cls] = cls(model_cls)
+        return schema
+
+    def new_columns(self) -> tuple:
+        return tuple(_make_column(tp) for tp in self.types)
+
+
+class Row:
+    """行视图基类：属性读取转发到所属列"""
+    __slots__ = ("_cols", "_i")
+    _model: type = None
+    _fields: tuple = ()
+
+    def __init__(self, cols: tuple, index: int):
+        self._cols = cols
+        self._i = index
+
+    def to_model(self):
+        """转换为原 attrs 模型实例"""
+        return self._model(**{name: col[self._i] for name, col in zip(self._fields, self._cols)})
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Row):
+            other = other.to_model()
+        if isinstance(other, self._model):
+            return self.to_model() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.to_model())
+
+
+def _row_class(cls: Type, names: tuple) -> type:
+    namespace = {"__slots__": (), "_model": cls, "_fields": names}
+    for index, name in enumerate(names):
+        namespace[name] = property(lambda self, _k=index: self._cols[_k][self._i])
+    return type(f"{cls.__name__}Row", (Row,), namespace)
+
+
+def _default(default: Any) -> Any:
+    if isinstance(default, attrs.Factory):
+        return default.factory()
+    return default
+
+
+class ColumnarList(Sequence):
+    """按列存储的模型列表，元素为只读行视图，可通过 extend 持续追加后续分页"""
+
+    def __init__(self, cls: Type):
+        self._schema = _Schema.of(cls)
+        self._cols = self._schema.new_columns()
+        self._len = 0
+
+    @classmethod
+    def from_records(cls, model_cls: Type, records: Iterable[dict]) -> "ColumnarList":
+        """由接口返回的原始字典列表构建"""
+        columns = cls(model_cls)
+        columns.extend(records)
+        return columns
+
+    @property
+    def model(self) -> type:
+        return self._schema.cls
+
+    def extend(self, items: Iterable[Any]):
+        """追加原始字典、模型实例、行视图或另一个 ColumnarList"""
+        if isinstance(items, ColumnarList):
+            if items.model is not self.model:
+                raise TypeError(f"不能把 {items.model.__name__} 列表追加到 {self.model.__name__} 列表")
+            for col, other in zip(self._cols, items._cols):
+                col.extend(list(other.values()))
+            self._len += len(items)
+            return
+        items = list(items)
+        if not items:
+            return
+        schema = self._schema
+        if isinstance(items[0], dict):
+            for col, key, convert, default in zip(self._cols, schema.keys, schema.converters, schema.defaults):
+                if default is attrs.NOTHING:
+                    col.extend([convert(item[key]) for item in items])
+                else:
+                    col.extend([convert(item[key]) if key in item else _default(default) for item in items])
+        else:
+            for col, name in zip(self._cols, schema.names):
+                col.extend([getattr(item, name) for item in items])
+        self._len += len(items)
+
+    def append(self, item: Any):
+        self.extend([item])
+
+    def column(self, name: str) -> Sequence:
+        """取整列数据，数值列为 array，便于直接做 sum/min/max 等断言"""
+        return self._cols[self._schema.names.index(name)].values()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("list index out of range")
+        return self._schema.row_cls(self._cols, index)
+
+    def __iter__(self):
+        row_cls, cols = self._schema.row_cls, self._cols
+        for i in range(self._len):
+            yield row_cls(cols, i)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, Sequence)) and not isinstance(other, (str, bytes)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def to_list(self) -> list:
+        """全部转换为原 attrs 模型实例"""
+        return [row.to_model() for row in self]
+
+    def __repr__(self) -> str:
+        return f"ColumnarList[{self.model.__name__}](len={self._len})"
@@ -0,0 +1,242 @@
+"""
+响应模型预编译：为 attrs 响应模型生成专用的结构化函数，替代 cattrs 逐字段分派；
+datetime 解析带缓存，惰性模式下嵌套的模型列表在访问时才逐个转换
+"""
+import functools
+import typing
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+import attrs
+
+Structure = Callable[[Any], Any]
+
+# 模型列表的三种形态：立即转换、访问时转换、按列存储（见 Tools/columnar.py）
+EAGER = "eager"
+LAZY = "lazy"
+COLUMNAR = "columnar"
+MODES = (EAGER, LAZY, COLUMNAR)
+
+# 每个类型按 (类型, 模式) 只编译一次
+_compiled: Dict[Tuple[type, str], Structure] = {}
+_PRIMITIVES = (int, float, str, bool)
+_MISSING = object()
+
+
+# ISO 时间字符串 -> datetime 的缓存，列表中重复出现的时间只解析一次；容量较小，避免流式解析时随页大小增长
+DATETIME_CACHE_SIZE = 1024
+_datetime_cache: Dict[Any, datetime] = {}
+
+
+def _parse_datetime_miss(value: Any) -> datetime:
+    if isinstance(value, str):
+        result = datetime.fromisoformat(value)
+    elif isinstance(value, (int, float)):
+        result = datetime.utcfromtimestamp(value)
+    else:
+        raise ValueError(f"无法将 {value} 转换为 datetime")
+    if len(_datetime_cache) >= DATETIME_CACHE_SIZE:
+        _datetime_cache.clear()
+    _datetime_cache[value] = result
+    return result
+
+
+def parse_datetime(value: Any) -> datetime:
+    """带缓存的 datetime 解析，支持 ISO 字符串与时间戳"""
+    return _datetime_cache.get(value) or _parse_datetime_miss(value)
+
+
+class LazyList(Sequence):
+    """惰性列表：保存原始数据，元素在首次访问时才转换为模型"""
+    __slots__ = ("_raw", "_convert", "_items")
+
+    def __init__(self, raw: list, convert: Structure):
+        self._raw = raw
+        self._convert = convert
+        self._items = None
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def _item(self, index: int) -> Any:
+        if self._items is None:
+            self._items = [_MISSING] * len(self._raw)
+        item = self._items[index]
+        if item is _MISSING:
+            item = self._items[index] = self._convert(self._raw[index])
+        return item
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(*index.indices(len(self._raw)))]
+        if index < 0:
+            index += len(self._raw)
+        if not 0 <= index < len(self._raw):
+            raise IndexError("list index out of range")
+        return self._item(index)
+
+    def __iter__(self):
+        for i in range(len(self._raw)):
+            yield self._item(i)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, LazyList)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    @property
+    def materialized(self) -> int:
+        """已转换的元素个数"""
+        return 0 if self._items is None else sum(item is not _MISSING for item in self._items)
+
+    def to_list(self) -> list:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"LazyList(len={len(self._raw)}, materialized={self.materialized})"
+
+
+def _fallback(tp) -> Structure:
+    from aomaker.core.converters import cattrs_converter
+    return functools.partial(cattrs_converter.structure, cl=tp)
+
+
+class _Compiler:
+    """把类型注解翻译成内联的 Python 表达式"""
+
+    def __init__(self, mode: str = EAGER):
+        self.mode = mode
+        self.namespace: Dict[str, Any] = {
+            "_LazyList": LazyList,
+            "_dt_get": _datetime_cache.get,
+            "_dt_miss": _parse_datetime_miss,
+        }
+
+    def ref(self, obj: Any) -> str:
+        name = f"_r{len(self.namespace)}"
+        self.namespace[name] = obj
+        return name
+
+    def expr(self, tp, value: str) -> str:
+        if tp is Any or tp is typing.Any:
+            return value
+        if tp in _PRIMITIVES:
+            # 与 cattrs 一致：原生类型走一次构造转换
+            return f"{tp.__name__}({value})"
+        if tp is datetime:
+            return f"(_dt_get({value}) or _dt_miss({value}))"
+        if attrs.has(tp):
+            return f"{self.ref(compile_structure(tp, self.mode))}({value})"
+
+        origin, args = typing.get_origin(tp), typing.get_args(tp)
+        if origin is typing.Union and len(args) == 2 and type(None) in args:
+            inner = args[0] if args[1] is type(None) else args[1]
+            return f"(None if {value} is None else {self.expr(inner, value)})"
+        if origin in (list, List, Sequence) and args:
+            item_tp = args[0]
+            if self.mode == LAZY and attrs.has(item_tp):
+                return f"_LazyList({value}, {self.ref(compile_structure(item_tp, LAZY))})"
+            if self.mode == COLUMNAR and attrs.has(item_tp):
+                from .columnar import ColumnarList
+                return f"{self.ref(ColumnarList.from_records)}({self.ref(item_tp)}, {value})"
+            item = self.expr(item_tp, "_i")
+            return f"list({value})" if item == "_i" else f"[{item} for _i in {value}]"
+        if origin is dict and len(args) == 2:
+            if args[0] in (str, Any) and args[1] is Any:
+                return f"dict({value})"
+            key, val = self.expr(args[0], "_k"), self.expr(args[1], "_v")
+            return f"{{{key}: {val} for _k, _v in {value}.items()}}"
+        if tp is list or tp is dict:
+            return f"{tp.__name__}({value})"
+        # Union、Enum、date 等少见类型交给 aomaker 的 cattrs 转换器
+        return f"{self.ref(_fallback(tp))}({value})"
+
+
+def _field_keys(cls) -> Dict[str, str]:
+    """字段名到 JSON 键名的映射，别名规则与 aomaker 保持一致"""
+    from aomaker.core.converters import _get_keyword_alias_fields
+    aliases = _get_keyword_alias_fields(cls)
+    return {a.name: aliases.get(a.name, a.name) for a in attrs.fields(cls) if a.init}
+
+
+def compile_field(tp, mode: str = EAGER) -> Structure:
+    """单个字段类型的转换函数"""
+    compiler = _Compiler(mode)
+    exec(f"def convert(v):\n    return {compiler.expr(tp, 'v')}", compiler.namespace)
+    return compiler.namespace["convert"]
+
+
+def compile_structure(cls: Type, mode: str = EAGER) -> Structure:
+    """为 attrs 类生成结构化函数（结果缓存）"""
+    if mode not in MODES:
+        raise ValueError(f"未知的解析模式: {mode}")
+    key = (cls, mode)
+    if key in _compiled:
+        return _compiled[key]
+
+    compiler = _Compiler(mode)
+    compiler.namespace["_cls"] = cls
+    # 先占位，允许自引用的模型
+    _compiled[key] = lambda data: _compiled[key](data)
+    hints = typing.get_type_hints(cls)
+    keys = _field_keys(cls)
+    args = []
+    for a in attrs.fields(cls):
+        if not a.init:
+            continue
+        json_key = keys[a.name]
+        value = f"o[{json_key!r}]"
+        expr = compiler.expr(hints.get(a.name, Any), value)
+        if a.default is attrs.NOTHING:
+            args.append(f"{a.alias}={expr}")
+        elif isinstance(a.default, attrs.Factory):
+            if a.default.takes_self:
+                raise TypeError(f"{cls.__name__}.{a.name}: 不支持 takes_self 的默认值")
+            args.append(f"{a.alias}=({expr} if {json_key!r} in o else {compiler.ref(a.default.factory)}())")
+        elif expr == value:
+            args.append(f"{a.alias}=o.get({json_key!r}, {compiler.ref(a.default)})")
+        else:
+            args.append(f"{a.alias}=({expr} if {json_key!r} in o else {compiler.ref(a.default)})")
+    source = f"def structure_{cls.__name__}(o):\n    return _cls({', '.join(args)})"
+    exec(source, compiler.namespace)
+    func = compiler.namespace[f"structure_{cls.__name__}"]
+    func.__source__ = source
+    _compiled[key] = func
+    return func
+
+
+def register(cls: Type) -> Structure:
+    """
+    编译 cls 并注册到 aomaker 的 cattrs 转换器，send()/asend() 的响应解析自动走编译路径；
+    数据不符合模型时回退到 cattrs 原有实现，保持其报错信息
+    """
+    import cattrs
+    from aomaker.core.converters import cattrs_converter, _get_keyword_alias_fields
+
+    # 只看类自身，避免继承父类（如 GenericResponse）的注册结果
+    if cls.__dict__.get("_compiled_structure") is not None:
+        return cls._compiled_structure
+    fast = compile_structure(cls)
+    overrides = {name: cattrs.override(rename=alias) for name, alias in _get_keyword_alias_fields(cls).items()}
+    slow = cattrs.gen.make_dict_structure_fn(cls, cattrs_converter, **overrides)
+
+    def hook(data, _type=None):
+        try:
+            return fast(data)
+        except Exception:
+            return slow(data, cls)
+
+    # 按类型精确匹配注册：按类注册会经 singledispatch 作用到未注册的子类上
+    cattrs_converter.register_structure_hook_func(lambda tp: tp is cls, hook)
+    # 已自行处理字段别名，避免 aomaker 覆盖该 hook
+    cls._aomaker_field_alias_configured = True
+    cls._compiled_structure = hook
+    return hook
+
+
+def structure(data: Any, cls: Type, mode: str = EAGER) -> Any:
+    """按预编译函数结构化，mode 决定嵌套模型列表为 list、LazyList 还是 ColumnarList"""
+    if data is None:
+        return None
+    return compile_structure(cls, mode)(data)
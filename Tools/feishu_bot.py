@@ -1,54 +1,29 @@
 import json
-import re
 import os
-from typing import Dict
-import requests
+from typing import Dict, List, Optional
 from datetime import datetime
 from rich.console import Console
 
+from Tools.allure_report import RESULTS_FILE, read_cases, read_summary
+from Tools.notifier import Notifier, get_notifier
+from Tools.result_stream import live_summary
+from Tools.run_stats import current_run_id
+
 console = Console()
 
 def get_test_results() -> Dict:
-    """从aomaker-report.html中获取测试结果"""
+    """读取测试汇总：本进程运行过用例时取结果缓冲区的实时汇总，否则读结构化结果文件 reports/results.jsonl 的首行"""
     try:
-        # 读取aomaker-report.html
-        with open("reports/aomaker-report.html", "r", encoding="utf-8") as f:
-            content = f.read()
-            
-        # 查找legend-value中的数字
-        legend_pattern = r'<span class="legend-value">(\d+)</span>'
-        stats = re.findall(legend_pattern, content)
-        
-        if len(stats) >= 4:
-            passed = int(stats[0])  # 第一个是通过数
-            failed = int(stats[1])  # 第二个是失败数
-            broken = int(stats[2])  # 第三个是阻塞数
-            skipped = int(stats[3])  # 第四个是跳过数
-            total = passed + failed + broken + skipped
-            
-            # 获取时间信息
-            start_time_pattern = r'开始时间:</span>\s*<span[^>]*>([^<]+)</span>'
-            end_time_pattern = r'结束时间:</span>\s*<span[^>]*>([^<]+)</span>'
-            duration_pattern = r'运行时长:</span>\s*<span[^>]*>([^<]+)</span>'
-            
-            start_time = re.search(start_time_pattern, content)
-            end_time = re.search(end_time_pattern, content)
-            duration = re.search(duration_pattern, content)
-            
-            return {
-                "stats": {
-                    "total": total,
-                    "passed": passed,
-                    "failed": failed,
-                    "broken": broken,
-                    "skipped": skipped
-                },
-                "time": {
-                    "start": start_time.group(1) if start_time else "未知",
-                    "end": end_time.group(1) if end_time else "未知",
-                    "duration": duration.group(1) if duration else "未知"
-                }
+        summary = live_summary() or read_summary(RESULTS_FILE)
+        time_info = summary.get("time") or {}
+        return {
+            "stats": {key: summary["stats"][key] for key in ("total", "passed", "failed", "broken", "skipped")},
+            "time": {
+                "start": time_info.get("start", "未知"),
+                "end": time_info.get("end", "未知"),
+                "duration": time_info.get("duration", "未知")
             }
+        }
     except Exception as e:
         console.print(f"[red]Error reading test results: {str(e)}[/red]")
         return {
@@ -66,6 +41,14 @@ def get_test_results() -> Dict:
             }
         }
 
+def get_failed_cases(limit: int = 5) -> List[Dict]:
+    """结果文件中失败与阻塞的用例排在最前，只读取前 limit 条"""
+    try:
+        return read_cases(RESULTS_FILE, status=("failed", "broken"), limit=limit)
+    except Exception as e:
+        console.print(f"[red]Error reading failed cases: {str(e)}[/red]")
+        return []
+
 def create_status_tag(count: int, type_name: str, color: str) -> Dict:
     """创建状态标签"""
     return {
@@ -84,152 +67,256 @@ def create_status_tag(count: int, type_name: str, color: str) -> Dict:
         }
     }
 
-def send_feishu_report():
-    """发送测试报告到飞书"""
-    try:
-        # 获取测试结果
-        results = get_test_results()
-        stats = results["stats"]
-        times = results["time"]
-        
-        # 计算通过率
-        total = stats["total"]
-        passed = stats["passed"]
-        failed = stats["failed"]
-        broken = stats["broken"]
-        skipped = stats["skipped"]
-        
-        pass_rate = (passed / total * 100) if total > 0 else 0
-        
-        # 获取 GitHub Pages URL
-        report_url = os.getenv('GITHUB_PAGES_URL', '')
-        if report_url:
-            # 确保URL末尾没有斜杠
-            report_url = report_url.rstrip('/')
-            # 添加报告文件路径
-            aomaker_report_url = f"{report_url}/reports/aomaker-report.html"
-            allure_report_url = f"{report_url}/allure/index.html"
-        
-        # 构建消息卡片
-        message = {
-            "msg_type": "interactive",
-            "card": {
-                "header": {
-                    "title": {
-                        "tag": "plain_text",
-                        "content": "🎯 自动化测试报告"
-                    },
-                    "template": "blue" if pass_rate == 100 else "orange" if pass_rate >= 80 else "red"
+def build_feishu_report() -> Dict:
+    """由结构化结果构建飞书消息卡片"""
+    # 获取测试结果
+    results = get_test_results()
+    stats = results["stats"]
+    times = results["time"]
+
+    # 计算通过率
+    total = stats["total"]
+    passed = stats["passed"]
+    failed = stats["failed"]
+    broken = stats["broken"]
+    skipped = stats["skipped"]
+
+    pass_rate = (passed / total * 100) if total > 0 else 0
+
+    # 获取 GitHub Pages URL
+    report_url = os.getenv('GITHUB_PAGES_URL', '')
+    if report_url:
+        # 确保URL末尾没有斜杠
+        report_url = report_url.rstrip('/')
+        # 添加报告文件路径
+        aomaker_report_url = f"{report_url}/reports/aomaker-report.html"
+        allure_report_url = f"{report_url}/allure/index.html"
+
+    # 构建消息卡片
+    message = {
+        "msg_type": "interactive",
+        "card": {
+            "header": {
+                "title": {
+                    "tag": "plain_text",
+                    "content": "🎯 自动化测试报告"
+                },
+                "template": "blue" if pass_rate == 100 else "orange" if pass_rate >= 80 else "red"
+            },
+            "elements": [
+                {
+                    "tag": "div",
+                    "text": {
+                        "tag": "lark_md",
+                        "content": f"**⏱️ 执行时间**\n开始：{times['start']}\n结束：{times['end']}\n耗时：{times['duration']}"
+                    }
                 },
-                "elements": [
-                    {
-                        "tag": "div",
-                        "text": {
-                            "tag": "lark_md",
-                            "content": f"**⏱️ 执行时间**\n开始：{times['start']}\n结束：{times['end']}\n耗时：{times['duration']}"
+                {
+                    "tag": "hr"
+                },
+                {
+                    "tag": "div",
+                    "fields": [
+                        {
+                            "is_short": True,
+                            "text": {
+                                "tag": "lark_md",
+                                "content": f"**📊 总用例数**\n{total}"
+                            }
+                        },
+                        {
+                            "is_short": True,
+                            "text": {
+                                "tag": "lark_md",
+                                "content": f"**✨ 通过率**\n{pass_rate:.1f}%"
+                            }
                         }
-                    },
-                    {
-                        "tag": "hr"
-                    },
-                    {
-                        "tag": "div",
-                        "fields": [
-                            {
-                                "is_short": True,
-                                "text": {
-                                    "tag": "lark_md",
-                                    "content": f"**📊 总用例数**\n{total}"
-                                }
-                            },
-                            {
-                                "is_short": True,
-                                "text": {
-                                    "tag": "lark_md",
-                                    "content": f"**✨ 通过率**\n{pass_rate:.1f}%"
-                                }
+                    ]
+                },
+                {
+                    "tag": "div",
+                    "fields": [
+                        {
+                            "is_short": True,
+                            "text": {
+                                "tag": "lark_md",
+                                "content": f"**✅ 通过**\n{passed}"
                             }
-                        ]
-                    },
-                    {
-                        "tag": "div",
-                        "fields": [
-                            {
-                                "is_short": True,
-                                "text": {
-                                    "tag": "lark_md",
-                                    "content": f"**✅ 通过**\n{passed}"
-                                }
-                            },
-                            {
-                                "is_short": True,
-                                "text": {
-                                    "tag": "lark_md",
-                                    "content": f"**❌ 失败**\n{failed}"
-                                }
+                        },
+                        {
+                            "is_short": True,
+                            "text": {
+                                "tag": "lark_md",
+                                "content": f"**❌ 失败**\n{failed}"
                             }
-                        ]
-                    },
-                    {
-                        "tag": "div",
-                        "fields": [
-                            {
-                                "is_short": True,
-                                "text": {
-                                    "tag": "lark_md",
-                                    "content": f"**⚠️ 阻塞**\n{broken}"
-                                }
-                            },
-                            {
-                                "is_short": True,
-                                "text": {
-                                    "tag": "lark_md",
-                                    "content": f"**⏭️ 跳过**\n{skipped}"
-                                }
+                        }
+                    ]
+                },
+                {
+                    "tag": "div",
+                    "fields": [
+                        {
+                            "is_short": True,
+                            "text": {
+                                "tag": "lark_md",
+                                "content": f"**⚠️ 阻塞**\n{broken}"
                             }
-                        ]
-                    }
-                ]
-            }
+                        },
+                        {
+                            "is_short": True,
+                            "text": {
+                                "tag": "lark_md",
+                                "content": f"**⏭️ 跳过**\n{skipped}"
+                            }
+                        }
+                    ]
+                }
+            ]
         }
+    }
 
-        # 如果有报告链接，添加查看按钮
-        if report_url:
-            message["card"]["elements"].append({
-                "tag": "action",
-                "actions": [
-                    {
-                        "tag": "button",
-                        "text": {
-                            "tag": "plain_text",
-                            "content": "📊 完整测试报告"
-                        },
-                        "type": "primary",
-                        "url": aomaker_report_url
+    # 列出前几个失败用例
+    failed_cases = get_failed_cases() if failed or broken else []
+    if failed_cases:
+        lines = [f"- {case['name']}：{(case['message'] or case['status']).splitlines()[0][:100]}"
+                 for case in failed_cases]
+        message["card"]["elements"].append({
+            "tag": "div",
+            "text": {
+                "tag": "lark_md",
+                "content": "**❌ 失败用例**\n" + "\n".join(lines)
+            }
+        })
+
+    # 如果有报告链接，添加查看按钮
+    if report_url:
+        message["card"]["elements"].append({
+            "tag": "action",
+            "actions": [
+                {
+                    "tag": "button",
+                    "text": {
+                        "tag": "plain_text",
+                        "content": "📊 完整测试报告"
                     },
-                    {
-                        "tag": "button",
-                        "text": {
-                            "tag": "plain_text",
-                            "content": "📈 Allure测试报告"
-                        },
-                        "type": "primary",
-                        "url": allure_report_url
+                    "type": "primary",
+                    "url": aomaker_report_url
+                },
+                {
+                    "tag": "button",
+                    "text": {
+                        "tag": "plain_text",
+                        "content": "📈 Allure测试报告"
+                    },
+                    "type": "primary",
+                    "url": allure_report_url
+                }
+            ]
+        })
+
+    return message
+
+def send_feishu_report(notifier: Optional[Notifier] = None):
+    """把测试报告加入通知队列，由后台线程发送到飞书；同一次运行重复调用时只发送最后一张卡片"""
+    try:
+        (notifier or get_notifier()).notify("feishu", build_feishu_report(), key=f"report:{current_run_id()}")
+        console.print("[cyan]测试报告已加入飞书通知队列[/cyan]")
+    except Exception as e:
+        console.print(f"[red]Error sending message to Feishu: {str(e)}[/red]")
+
+def build_no_tests_card(reason: str, changed_files: List[str], limit: int = 10) -> Dict:
+    """增量运行没有受影响用例时的通知卡片"""
+    files = "\n".join(f"- `{path}`" for path in changed_files[:limit])
+    if len(changed_files) > limit:
+        files += f"\n- … 共 {len(changed_files)} 个"
+    return {
+        "msg_type": "interactive",
+        "card": {
+            "header": {
+                "title": {
+                    "tag": "plain_text",
+                    "content": "ℹ️ 没有受影响的用例，本次未运行测试"
+                },
+                "template": "grey"
+            },
+            "elements": [
+                {
+                    "tag": "div",
+                    "text": {
+                        "tag": "lark_md",
+                        "content": f"**增量运行** {reason}，{len(changed_files)} 个改动文件\n{files or '无改动文件'}"
                     }
-                ]
-            })
-        
-        # 发送消息
-        webhook_url = os.getenv('FEISHU_WEBHOOK_URL', 'https://open.feishu.cn/open-apis/bot/v2/hook/4184dbcd-2483-412e-9b88-330009114d69')
-        headers = {'Content-Type': 'application/json'}
-        
-        response = requests.post(webhook_url, json=message, headers=headers, timeout=10)
-        response_json = response.json()
-        
-        if response.status_code == 200 and response_json.get("code") == 0:
-            console.print("[green]Successfully sent test report to Feishu[/green]")
-        else:
-            console.print(f"[red]Failed to send message to Feishu. Status: {response.status_code}, Response: {response.text}[/red]")
-            
+                }
+            ]
+        }
+    }
+
+def send_feishu_no_tests(reason: str, changed_files: List[str], notifier: Optional[Notifier] = None):
+    """增量运行没有选中用例时仍发送一条通知，说明本次未运行测试"""
+    try:
+        (notifier or get_notifier()).notify("feishu", build_no_tests_card(reason, changed_files),
+                                            key=f"report:{current_run_id()}")
+        console.print("[cyan]没有受影响的用例，已加入飞书通知队列[/cyan]")
     except Exception as e:
-        console.print(f"[red]Error sending message to Feishu: {str(e)}[/red]")
\ No newline at end of file
+        console.print(f"[red]Error sending message to Feishu: {str(e)}[/red]")
+
+def build_progress_card(progress, finished: bool = False) -> Dict:
+    """运行进度卡片：累计结果、当前吞吐与最慢接口；update_multi 允许原地更新"""
+    counts = progress.counts
+    minutes, seconds = divmod(int(progress.elapsed), 60)
+    hours, minutes = divmod(minutes, 60)
+    lines = [f"- `{row['endpoint_id']}` p99 {row['p99_ms']:.0f}ms，p50 {row['p50_ms']:.0f}ms，"
+             f"调用 {row['calls']}，错误 {row['errors']}" for row in progress.slowest()]
+    has_failure = counts["failed"] or counts["broken"]
+    return {
+        "msg_type": "interactive",
+        "card": {
+            "config": {
+                "wide_screen_mode": True,
+                "update_multi": True
+            },
+            "header": {
+                "title": {
+                    "tag": "plain_text",
+                    "content": "✅ 测试运行已完成" if finished else "⏳ 测试运行中"
+                },
+                "template": "red" if has_failure else ("green" if finished else "blue")
+            },
+            "elements": [
+                {
+                    "tag": "div",
+                    "text": {
+                        "tag": "lark_md",
+                        "content": f"**⏱️ 已运行** {hours:02d}:{minutes:02d}:{seconds:02d}　"
+                                   f"**更新于** {datetime.now().strftime('%H:%M:%S')}"
+                    }
+                },
+                {
+                    "tag": "div",
+                    "text": {
+                        "tag": "lark_md",
+                        "content": f"**📊 已完成** {progress.finished}　✅ {counts['passed']}　❌ {counts['failed']}　"
+                                   f"⚠️ {counts['broken']}　⏭️ {counts['skipped']}"
+                    }
+                },
+                {
+                    "tag": "div",
+                    "text": {
+                        "tag": "lark_md",
+                        "content": f"**🚀 吞吐** {progress.tests_per_min:.1f} 用例/分钟，"
+                                   f"{progress.requests_per_sec:.1f} 请求/秒（请求 {progress.calls}，错误 {progress.errors}）"
+                    }
+                },
+                {
+                    "tag": "hr"
+                },
+                {
+                    "tag": "div",
+                    "text": {
+                        "tag": "lark_md",
+                        "content": "**🐢 最慢接口**\n" + ("\n".join(lines) if lines else "暂无接口调用")
+                    }
+                }
+            ]
+        }
+    }
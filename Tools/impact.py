@@ -0,0 +1,543 @@
+"""
+按改动选择用例：解析项目源码得到"符号 -> 被引用符号"的依赖图（API类、模型、Tools 函数、fixture、conftest 钩子），
+结合运行时记录的"用例 -> 实际调用的 API 类/endpoint_id"，找出受 git diff 影响的用例；
+只改了某个接口定义时只重跑引用它的用例，定时任务、配置或依赖变更时回退为全量运行
+
+python run.py impact                 # 相对 APEX_DIFF_BASE（默认 HEAD~1）查看受影响的用例
+python run.py impact --base origin/main
+"""
+import argparse
+import ast
+import fnmatch
+import os
+import subprocess
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from aomaker.database.sqlite import SQLiteDB, lock
+from rich.console import Console
+
+from Tools.storage import run_db_path
+
+console = Console()
+
+DIFF_BASE_ENV = "APEX_DIFF_BASE"
+FULL_RUN_ENV = "APEX_FULL_RUN"
+
+# 不影响用例结果的文件
+IGNORED_PATTERNS = ("*.md", "benchmarks/*", "logs/*", "reports/*", "database/*", "requests.jsonl", ".gitignore",
+                    "run.py")
+# 改动后必须全量运行的文件：配置、依赖、中间件与会话钩子 hooks.py（由 aomaker 动态加载，不经 import）
+FULL_RUN_PATTERNS = ("conf/*", "config.yaml", "pytest.ini", "requirements.txt", "middlewares/*", ".github/*",
+                     "hooks.py")
+
+MODULE_NODE = "<module>"
+FILE_NODE = "*"
+
+
+def _match(path: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+
+
+def is_test_file(path: str) -> bool:
+    name = os.path.basename(path)
+    return fnmatch.fnmatch(name, "test_*.py") or fnmatch.fnmatch(name, "*_test.py")
+
+
+def _names(node: ast.AST) -> Set[str]:
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+
+
+def _is_fixture(node: ast.AST) -> bool:
+    return any("fixture" in ast.unparse(d) for d in getattr(node, "decorator_list", ()))
+
+
+def _is_autouse(node: ast.AST) -> bool:
+    return any("autouse=True" in ast.unparse(d) for d in getattr(node, "decorator_list", ()))
+
+
+def _args(node: ast.AST) -> List[str]:
+    args = node.args
+    return [a.arg for a in args.posonlyargs + args.args + args.kwonlyargs if a.arg not in ("self", "cls")]
+
+
+class Symbol:
+    """依赖图节点：模块内的顶层定义、导入名、测试方法，或整个模块"""
+    __slots__ = ("key", "source", "refs", "deps", "fixture_args", "is_test", "is_fixture", "autouse")
+
+    def __init__(self, key: str, source: str = "", refs: Optional[Set[str]] = None):
+        self.key = key
+        self.source = source
+        self.refs = refs or set()
+        self.deps: Set[str] = set()
+        self.fixture_args: List[str] = []
+        self.is_test = False
+        self.is_fixture = False
+        self.autouse = False
+
+
+class ModuleSymbols:
+    """单个源文件的符号表，key 形如 apis/mock/apis.py::GetUsersAPI 或 testcases/test_x.py::TestX::test_y"""
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.symbols: Dict[str, Symbol] = {}
+        # 本模块可见的名字 -> 节点key
+        self.names: Dict[str, str] = {}
+        # 导入名 -> [(模块名, 导入的名字或 None 表示整个模块)]
+        self.imports: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        self._module = self._add(MODULE_NODE)
+        self._parse(ast.parse(source), source)
+
+    @property
+    def module_name(self) -> str:
+        parts = self.path[:-3].split("/")
+        return ".".join(parts[:-1] if parts[-1] == "__init__" else parts)
+
+    @property
+    def package(self) -> str:
+        name = self.module_name
+        return name if self.path.endswith("__init__.py") else name.rpartition(".")[0]
+
+    def key(self, *names: str) -> str:
+        return "::".join((self.path,) + names)
+
+    def _add(self, *names: str, source: str = "", refs: Optional[Set[str]] = None) -> Symbol:
+        key = self.key(*names)
+        symbol = self.symbols.get(key)
+        if symbol is None:
+            symbol = self.symbols[key] = Symbol(key)
+        symbol.source += source
+        symbol.refs |= refs or set()
+        return symbol
+
+    def _resolve_from(self, node: ast.ImportFrom) -> str:
+        if not node.level:
+            return node.module or ""
+        base = self.package.split(".") if self.package else []
+        base = base[:len(base) - node.level + 1]
+        return ".".join(base + ([node.module] if node.module else []))
+
+    def _parse(self, tree: ast.Module, source: str):
+        test_module = is_test_file(self.path)
+        lines = source.splitlines()
+        for index, stmt in enumerate(tree.body):
+            first = min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", ())])
+            segment = "\n".join(lines[first - 1:stmt.end_lineno])
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                if test_module and isinstance(stmt, ast.ClassDef) and stmt.name.startswith("Test"):
+                    self._parse_test_class(stmt, lines)
+                    continue
+                symbol = self._add(stmt.name, source=segment, refs=_names(stmt))
+                self.names[stmt.name] = symbol.key
+                if not isinstance(stmt, ast.ClassDef):
+                    symbol.is_fixture = _is_fixture(stmt)
+                    symbol.autouse = _is_autouse(stmt)
+                    symbol.is_test = test_module and stmt.name.startswith("test")
+                    if symbol.is_fixture or symbol.is_test:
+                        symbol.fixture_args = _args(stmt)
+            elif isinstance(stmt, (ast.Import, ast.ImportFrom)):
+                for alias in stmt.names:
+                    if isinstance(stmt, ast.Import):
+                        local = alias.asname or alias.name.split(".")[0]
+                        target = (alias.name, None)
+                    else:
+                        local = alias.asname or alias.name
+                        target = (self._resolve_from(stmt), alias.name)
+                    symbol = self._add(local, source=f"import {target[0]}:{target[1]}\n")
+                    self.names[local] = symbol.key
+                    self.imports.setdefault(local, []).append(target)
+            elif isinstance(stmt, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+                names = [n.id for t in targets for n in ast.walk(t) if isinstance(n, ast.Name)]
+                for name in names:
+                    symbol = self._add(name, source=segment, refs=_names(stmt) - {name})
+                    self.names[name] = symbol.key
+                if not names:
+                    self._module.source += segment
+                    self._module.refs |= _names(stmt)
+            elif not (index == 0 and isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant)):
+                # 模块文档字符串以外的其他顶层语句，视为影响本模块所有符号
+                self._module.source += segment
+                self._module.refs |= _names(stmt)
+
+    def _parse_test_class(self, cls: ast.ClassDef, lines: List[str]):
+        """测试类按方法拆成独立节点，改一个用例只影响它自己；用例依赖类中所有非用例方法（辅助方法、fixture）"""
+        methods = [n for n in cls.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        skipped: Set[int] = set()
+        for method in methods:
+            first = min([method.lineno] + [d.lineno for d in method.decorator_list])
+            segment = "\n".join(lines[first - 1:method.end_lineno])
+            skipped.update(range(first, method.end_lineno + 1))
+            symbol = self._add(cls.name, method.name, source=segment, refs=_names(method))
+            symbol.deps.add(self.key(cls.name))
+            symbol.is_test = method.name.startswith("test")
+            symbol.is_fixture = _is_fixture(method)
+            symbol.autouse = _is_autouse(method)
+            if symbol.is_test or symbol.is_fixture:
+                symbol.fixture_args = _args(method)
+        helpers = {self.key(cls.name, m.name) for m in methods if not m.name.startswith("test")}
+        for method in methods:
+            if method.name.startswith("test"):
+                self.symbols[self.key(cls.name, method.name)].deps |= helpers
+        first = min([cls.lineno] + [d.lineno for d in cls.decorator_list])
+        shell = "\n".join(line for number, line in enumerate(lines[first - 1:cls.end_lineno], first)
+                          if number not in skipped)
+        refs = set()
+        for node in cls.bases + cls.decorator_list + [n for n in cls.body if n not in methods]:
+            refs |= _names(node)
+        self.names[cls.name] = self._add(cls.name, source=shell, refs=refs).key
+
+
+class ProjectGraph:
+    """整个项目的符号依赖图"""
+
+    def __init__(self, modules: Dict[str, ModuleSymbols]):
+        self.modules = modules
+        self.by_name = {module.module_name: module for module in modules.values()}
+        self.symbols: Dict[str, Symbol] = {}
+        for module in modules.values():
+            self.symbols.update(module.symbols)
+            self.symbols[module.key(FILE_NODE)] = file_node = Symbol(module.key(FILE_NODE))
+            file_node.deps = set(module.symbols)
+        for module in modules.values():
+            self._link(module)
+
+    @classmethod
+    def from_tree(cls, root: str = ".", read=None) -> "ProjectGraph":
+        """解析 root 下的所有 .py 文件；read(path) 可替换为读取历史版本"""
+        modules = {}
+        for path in _project_files(root):
+            source = read(path) if read else open(os.path.join(root, path), encoding="utf-8").read()
+            if source is None:
+                continue
+            try:
+                modules[path] = ModuleSymbols(path, source)
+            except SyntaxError:
+                continue
+        return cls(modules)
+
+    def _module_file(self, name: str) -> Optional[ModuleSymbols]:
+        return self.by_name.get(name)
+
+    def _link(self, module: ModuleSymbols):
+        module_key = module.key(MODULE_NODE)
+        for key, symbol in module.symbols.items():
+            if key != module_key:
+                symbol.deps.add(module_key)
+            symbol.deps |= {module.names[name] for name in symbol.refs if name in module.names} - {key}
+        for local, targets in module.imports.items():
+            symbol = module.symbols[module.key(local)]
+            for target, name in targets:
+                imported = self._module_file(target)
+                submodule = self._module_file(f"{target}.{name}") if name else None
+                if submodule is not None:
+                    symbol.deps.add(submodule.key(FILE_NODE))
+                elif imported is not None:
+                    symbol.deps.add(imported.names.get(name) or imported.key(FILE_NODE) if name
+                                    else imported.key(FILE_NODE))
+        for symbol in module.symbols.values():
+            if symbol.is_test or symbol.is_fixture:
+                symbol.deps |= {key for name in symbol.fixture_args
+                                for key in [self._fixture(module, name)] if key}
+            if symbol.is_test:
+                symbol.deps |= self._conftest_implicit(module.path)
+
+    def _conftests(self, path: str) -> List[ModuleSymbols]:
+        """path 所在目录及上级目录中的 conftest.py，由近及远"""
+        result = []
+        directory = os.path.dirname(path)
+        while True:
+            conftest = self.modules.get(f"{directory}/conftest.py" if directory else "conftest.py")
+            if conftest is not None:
+                result.append(conftest)
+            if not directory:
+                return result
+            directory = os.path.dirname(directory)
+
+    def _fixture(self, module: ModuleSymbols, name: str) -> Optional[str]:
+        for candidate in [module] + self._conftests(module.path):
+            key = candidate.names.get(name)
+            if key and candidate.symbols[key].is_fixture:
+                return key
+        return None
+
+    def _conftest_implicit(self, path: str) -> Set[str]:
+        """conftest 中的钩子函数、autouse fixture 与模块级代码作用于其下所有用例"""
+        deps = set()
+        for conftest in self._conftests(path):
+            deps.add(conftest.key(MODULE_NODE))
+            deps |= {key for key, symbol in conftest.symbols.items()
+                     if symbol.autouse or key.rpartition("::")[2].startswith("pytest_")}
+        return deps
+
+    @property
+    def tests(self) -> List[str]:
+        return sorted(key for key, symbol in self.symbols.items() if symbol.is_test)
+
+    def dependencies(self, key: str) -> Set[str]:
+        """key 直接或间接依赖的全部节点"""
+        seen, queue = {key}, deque([key])
+        while queue:
+            for dep in self.symbols[queue.popleft()].deps:
+                if dep in self.symbols and dep not in seen:
+                    seen.add(dep)
+                    queue.append(dep)
+        return seen
+
+    def affected_tests(self, changed: Set[str]) -> Set[str]:
+        """依赖了任一改动节点的用例（沿反向边遍历）"""
+        reverse: Dict[str, Set[str]] = {}
+        for key, symbol in self.symbols.items():
+            for dep in symbol.deps:
+                reverse.setdefault(dep, set()).add(key)
+        seen, queue = set(changed), deque(changed)
+        while queue:
+            for dependant in reverse.get(queue.popleft(), ()):
+                if dependant not in seen:
+                    seen.add(dependant)
+                    queue.append(dependant)
+        return {key for key in seen if key in self.symbols and self.symbols[key].is_test}
+
+
+def _project_files(root: str) -> List[str]:
+    files = []
+    for directory, dirs, names in os.walk(root):
+        rel = os.path.relpath(directory, root).replace(os.sep, "/")
+        rel = "" if rel == "." else rel
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__"
+                         and not _match(f"{rel}/{d}/x".lstrip("/"), IGNORED_PATTERNS))
+        for name in sorted(names):
+            path = f"{rel}/{name}".lstrip("/")
+            if name.endswith(".py") and not _match(path, IGNORED_PATTERNS):
+                files.append(path)
+    return files
+
+
+def changed_symbols(path: str, old_source: Optional[str], new_source: Optional[str]) -> Set[str]:
+    """同一文件两个版本间内容不同（含新增、删除）的符号；任一版本有语法错误时抛出 SyntaxError"""
+    def parse(source):
+        if source is None:
+            return {}
+        return {key: symbol.source for key, symbol in ModuleSymbols(path, source).symbols.items()}
+    old, new = parse(old_source), parse(new_source)
+    return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+
+class ImpactStore(SQLiteDB):
+    """用例与其依赖的映射：static 为源码分析结果，dynamic 为运行时实际调用的 API 类与 endpoint_id"""
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or run_db_path())
+        self.table = "test_impact"
+        self.create_table()
+
+    def create_table(self):
+        self.execute_sql(f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                nodeid TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                target TEXT NOT NULL,
+                updated_at TIMESTAMP,
+                UNIQUE(nodeid, kind, target)
+            );""")
+
+    def replace(self, kind: str, mapping: Dict[str, Set[str]]):
+        """批量覆盖 mapping 中各用例的 kind 类映射"""
+        now = datetime.now().isoformat(timespec="seconds")
+        with lock, self.connection:
+            self.connection.executemany(f"DELETE FROM {self.table} WHERE nodeid = ? AND kind = ?",
+                                        [(nodeid, kind) for nodeid in mapping])
+            self.connection.executemany(
+                f"INSERT OR IGNORE INTO {self.table} (nodeid, kind, target, updated_at) VALUES (?, ?, ?, ?)",
+                [(nodeid, kind, target, now) for nodeid, targets in mapping.items() for target in targets])
+
+    def tests_touching(self, targets: Iterable[str], kind: str = "dynamic") -> Set[str]:
+        targets = list(targets)
+        if not targets:
+            return set()
+        rows = self.query(f"SELECT DISTINCT nodeid FROM {self.table} WHERE kind = ? AND target IN "
+                          f"({', '.join('?' * len(targets))})", (kind, *targets))
+        return {row["nodeid"] for row in rows}
+
+    def targets(self, nodeid: str) -> Dict[str, List[str]]:
+        result: Dict[str, List[str]] = {}
+        for row in self.query(f"SELECT kind, target FROM {self.table} WHERE nodeid = ? ORDER BY kind, target",
+                              (nodeid,)):
+            result.setdefault(row["kind"], []).append(row["target"])
+        return result
+
+
+class ImpactRecorder:
+    """pytest 插件：记录每个用例运行期间发出的 API 请求（类与 endpoint_id），会话结束时批量写入"""
+
+    _local = threading.local()
+    # 用例内另起线程（并发批量请求）时 thread-local 取不到，退回到最近一次开始的用例
+    _last: Optional[str] = None
+    active: Optional["ImpactRecorder"] = None
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.touched: Dict[str, Set[str]] = {}
+        ImpactRecorder.active = self
+
+    @classmethod
+    def current_test(cls) -> Optional[str]:
+        return getattr(cls._local, "nodeid", None) or cls._last
+
+    def pytest_runtest_setup(self, item):
+        ImpactRecorder._local.nodeid = ImpactRecorder._last = item.nodeid.split("[", 1)[0]
+        self.touched.setdefault(ImpactRecorder._last, set())
+
+    def pytest_runtest_teardown(self, item):
+        ImpactRecorder._local.nodeid = None
+
+    def touch(self, *targets: str):
+        nodeid = self.current_test()
+        if nodeid is not None:
+            self.touched.setdefault(nodeid, set()).update(t for t in targets if t)
+
+    def pytest_sessionfinish(self, session):
+        ImpactRecorder.active = None
+        touched = {nodeid: targets for nodeid, targets in self.touched.items() if targets}
+        if not touched:
+            return
+        store = ImpactStore(self.db_path)
+        try:
+            store.replace("dynamic", touched)
+        finally:
+            store.close()
+
+
+def api_target(api_meta: dict) -> List[str]:
+    """请求的 _api_meta 对应的映射目标：API 类所在源码节点与 endpoint_id"""
+    targets = []
+    module, class_name = api_meta.get("module"), api_meta.get("class_name")
+    if module and class_name:
+        targets.append(f"{module.replace('.', '/')}.py::{class_name}")
+    if api_meta.get("endpoint_id"):
+        targets.append(f"endpoint:{api_meta['endpoint_id']}")
+    return targets
+
+
+class Selection:
+    """用例选择结果：full 为 True 表示全量运行，否则只运行 nodeids"""
+
+    def __init__(self, full: bool, reason: str, nodeids: Optional[List[str]] = None,
+                 changed_files: Optional[List[str]] = None):
+        self.full = full
+        self.reason = reason
+        self.nodeids = nodeids or []
+        self.changed_files = changed_files or []
+
+    def print(self):
+        if self.full:
+            console.print(f"[cyan]全量运行：{self.reason}[/cyan]")
+            return
+        console.print(f"[cyan]增量运行：{self.reason}，{len(self.changed_files)} 个改动文件，"
+                      f"{len(self.nodeids)} 个受影响用例[/cyan]")
+        for nodeid in self.nodeids:
+            console.print(f"  {nodeid}")
+
+
+def _git(*args: str, root: str = ".") -> Optional[str]:
+    try:
+        result = subprocess.run(["git", *args], cwd=root, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout
+
+
+def _changed_files(base: str, root: str) -> Optional[List[str]]:
+    diff = _git("diff", "--name-only", base, "--", root=root)
+    untracked = _git("ls-files", "--others", "--exclude-standard", root=root)
+    if diff is None or untracked is None:
+        return None
+    return sorted({line for line in (diff + untracked).splitlines() if line})
+
+
+def _full_run_reason(base: Optional[str]) -> Optional[str]:
+    if os.environ.get(FULL_RUN_ENV) == "1":
+        return f"{FULL_RUN_ENV}=1"
+    if os.environ.get("GITHUB_EVENT_NAME") in ("schedule", "workflow_dispatch"):
+        return f"{os.environ['GITHUB_EVENT_NAME']} 触发"
+    if not base or set(base) == {"0"}:
+        return "没有可对比的基准提交"
+    return None
+
+
+def filter_by_marker(nodeids: List[str], markexpr: str, root: str = ".") -> Optional[Set[str]]:
+    """在子进程中以 -m markexpr 收集 nodeids 所在的文件，返回其中会被运行的用例；收集失败返回 None"""
+    files = sorted({nodeid.split("::", 1)[0] for nodeid in nodeids})
+    result = subprocess.run([sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider",
+                             "-m", markexpr, *files], cwd=root, capture_output=True, text=True)
+    if result.returncode not in (0, 5):
+        return None
+    collected = {line.strip().split("[", 1)[0] for line in result.stdout.splitlines() if "::" in line}
+    return {nodeid for nodeid in nodeids if nodeid in collected}
+
+
+def select_tests(base: Optional[str] = None, root: str = ".", store: Optional[ImpactStore] = None,
+                 markexpr: Optional[str] = None) -> Selection:
+    """按 base 与当前工作区的差异选择受影响的用例，无法判断时返回全量运行；
+    markexpr 为运行时的 -m 标记表达式，只保留匹配它的用例，否则选中的用例会在运行时被全部取消"""
+    base = base or os.environ.get(DIFF_BASE_ENV) or "HEAD~1"
+    reason = _full_run_reason(base)
+    if reason:
+        return Selection(True, reason)
+    if _git("rev-parse", "--verify", f"{base}^{{commit}}", root=root) is None:
+        return Selection(True, f"基准提交 {base} 不存在")
+    files = _changed_files(base, root)
+    if files is None:
+        return Selection(True, "无法获取 git 差异")
+
+    full = [path for path in files if _match(path, FULL_RUN_PATTERNS)]
+    if full:
+        return Selection(True, f"{full[0]} 等配置/依赖文件有改动", changed_files=files)
+    unknown = [path for path in files if not path.endswith(".py") and not _match(path, IGNORED_PATTERNS)]
+    if unknown:
+        return Selection(True, f"{unknown[0]} 无法分析影响范围", changed_files=files)
+
+    changed: Set[str] = set()
+    for path in files:
+        if path.endswith(".py") and not _match(path, IGNORED_PATTERNS):
+            new_path = os.path.join(root, path)
+            new = open(new_path, encoding="utf-8").read() if os.path.exists(new_path) else None
+            try:
+                changed |= changed_symbols(path, _git("show", f"{base}:{path}", root=root), new)
+            except SyntaxError:
+                return Selection(True, f"{path} 存在语法错误，无法分析影响范围", changed_files=files)
+
+    graph = ProjectGraph.from_tree(root)
+    selected = graph.affected_tests(changed)
+    own_store = store is None
+    store = store or ImpactStore()
+    try:
+        store.replace("static", {test: graph.dependencies(test) - {test} for test in graph.tests})
+        # 运行时记录的映射：调用了改动 API 类的用例，即便源码中没有直接引用
+        selected |= store.tests_touching(changed) & set(graph.tests)
+    finally:
+        if own_store:
+            store.close()
+    reason = f"对比 {base}"
+    if markexpr and selected:
+        matched = filter_by_marker(sorted(selected), markexpr, root)
+        if matched is None:
+            console.print(f"[yellow]按 -m {markexpr} 收集受影响用例失败，不做标记过滤[/yellow]")
+        elif len(matched) < len(selected):
+            reason += f"，{len(selected) - len(matched)} 个受影响用例不匹配 -m {markexpr}"
+            selected = matched
+    return Selection(False, reason, sorted(selected), files)
+
+
+def main(argv: Optional[List[str]] = None) -> Selection:
+    """命令行入口: python run.py impact [--base REF]"""
+    parser = argparse.ArgumentParser(prog="run.py impact", description="查看受 git 改动影响的用例")
+    parser.add_argument("--base", default=None, help=f"对比的基准提交，默认取 {DIFF_BASE_ENV} 或 HEAD~1")
+    parser.add_argument("-m", dest="markexpr", default=None, help="只保留匹配该标记表达式的用例，run_tests 使用 order")
+    args = parser.parse_args(argv)
+    selection = select_tests(args.base, markexpr=args.markexpr)
+    selection.print()
+    return selection
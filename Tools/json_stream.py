@@ -0,0 +1,181 @@
+"""
+流式 JSON 解析：从响应体分块中逐个解析列表响应 data 数组的元素，
+不需要先读完整个响应体，峰值内存与单个元素（加一个分块）相当
+"""
+import codecs
+import json
+import re
+import typing
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .deserializers import compile_field
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WS = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = ",]} \t\n\r"
+
+# 解析状态
+_START, _KEY, _COLON, _VALUE, _AFTER_VALUE, _ITEM_FIRST, _ITEM, _ITEM_SEP, _DONE = range(9)
+
+
+class ArrayStreamParser:
+    """
+    增量解析形如 {"ret_code": 0, "data": [...], "total": 10} 的响应：
+    feed() 每喂入一块字节，返回其中已完整的 data 元素；其余顶层字段收集在 meta 中
+    """
+
+    def __init__(self, key: str = "data"):
+        self.key = key
+        self.meta: Dict[str, Any] = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._state = _START
+        self._current_key: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> List[Any]:
+        """输入结束，返回剩余元素；响应体不完整时抛出 ValueError"""
+        self._buf = self._buf[self._pos:] + self._decoder.decode(b"", final=True)
+        self._pos = 0
+        items = self._parse(final=True)
+        if self._state != _DONE:
+            raise ValueError("响应体不完整，JSON 在解析完成前结束")
+        return items
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def _decode(self, buf: str, pos: int, final: bool):
+        try:
+            value, end = self._json.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None
+        # 数字后面没有分隔符时，后续分块可能还有数字的剩余部分（如 "3" | ".14"）
+        if (not final and isinstance(value, (int, float)) and not isinstance(value, bool)
+                and (end == len(buf) or buf[end] not in _DELIMITERS)):
+            return None
+        return value, end
+
+    def _expect(self, ch: str, expected: str, pos: int):
+        if ch not in expected:
+            raise ValueError(f"位置 {pos} 处应为 {expected!r}，实际为 {ch!r}")
+
+    def _parse(self, final: bool) -> List[Any]:
+        items = []
+        buf = self._buf
+        while True:
+            pos = _WS.match(buf, self._pos).end()
+            self._pos = pos
+            if pos >= len(buf):
+                return items
+            ch = buf[pos]
+            state = self._state
+
+            if state in (_ITEM_FIRST, _ITEM):
+                if state == _ITEM_FIRST and ch == "]":
+                    self._state, self._pos = _AFTER_VALUE, pos + 1
+                    continue
+                decoded = self._decode(buf, pos, final)
+                if decoded is None:
+                    return items
+                items.append(decoded[0])
+                self._state, self._pos = _ITEM_SEP, decoded[1]
+            elif state == _ITEM_SEP:
+                self._expect(ch, ",]", pos)
+                self._state, self._pos = (_ITEM if ch == "," else _AFTER_VALUE), pos + 1
+            elif state == _START:
+                self._expect(ch, "{", pos)
+                self._state, self._pos = _KEY, pos + 1
+            elif state == _KEY:
+                if ch == "}":
+                    self._state, self._pos = _DONE, pos + 1
+                    continue
+                decoded = self._decode(buf, pos, final)
+                if decoded is None:
+                    return items
+                self._current_key = decoded[0]
+                self._state, self._pos = _COLON, decoded[1]
+            elif state == _COLON:
+                self._expect(ch, ":", pos)
+                self._state, self._pos = _VALUE, pos + 1
+            elif state == _VALUE:
+                if self._current_key == self.key and ch == "[":
+                    self._state, self._pos = _ITEM_FIRST, pos + 1
+                    continue
+                decoded = self._decode(buf, pos, final)
+                if decoded is None:
+                    return items
+                self.meta[self._current_key] = decoded[0]
+                self._state, self._pos = _AFTER_VALUE, decoded[1]
+            elif state == _AFTER_VALUE:
+                self._expect(ch, ",}", pos)
+                self._state, self._pos = (_KEY if ch == "," else _DONE), pos + 1
+            else:
+                raise ValueError(f"位置 {pos} 处存在多余数据")
+
+
+def iter_array_items(chunks: Iterable[bytes], key: str = "data",
+                     meta: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """从字节分块中逐个产出 key 数组的原始元素；传入 meta 时结束后写入其余顶层字段"""
+    parser = ArrayStreamParser(key)
+    for chunk in chunks:
+        if chunk:
+            yield from parser.feed(chunk)
+    yield from parser.close()
+    if meta is not None:
+        meta.update(parser.meta)
+
+
+def list_item_type(response_cls: type, key: str = "data") -> type:
+    """列表响应模型中 key 字段的元素类型，如 CommentListResponse -> Comment"""
+    tp = typing.get_type_hints(response_cls).get(key)
+    if typing.get_origin(tp) not in (list, List) or not typing.get_args(tp):
+        raise TypeError(f"{response_cls.__name__}.{key} 不是列表字段，不能流式解析")
+    return typing.get_args(tp)[0]
+
+
+class StreamedItems:
+    """流式列表响应：迭代产出 data 中的模型实例，迭代结束后 meta 为其余顶层字段（ret_code/message/total）"""
+
+    def __init__(self, response, item_cls: type, key: str = "data", chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.response = response
+        self.item_cls = item_cls
+        self.key = key
+        self.chunk_size = chunk_size
+        self.meta: Dict[str, Any] = {}
+        self._consumed = False
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._consumed:
+            raise RuntimeError("流式响应只能迭代一次")
+        self._consumed = True
+        convert = compile_field(self.item_cls)
+        try:
+            chunks = self.response.iter_content(chunk_size=self.chunk_size)
+            for item in iter_array_items(chunks, self.key, self.meta):
+                yield convert(item)
+        finally:
+            self.response.close()
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self) -> "StreamedItems":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,118 @@
+"""
+延迟直方图：HDR风格的对数-线性分桶，记录O(1)，分位数误差约1%
+"""
+import threading
+from typing import Dict, Optional
+
+# 每个数量级(2的幂)内的子桶数 = 2^SUB_BUCKET_BITS，决定精度
+SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+
+
+def _bucket_index(value_us: int) -> int:
+    """微秒值 -> 桶下标"""
+    if value_us < _SUB_BUCKET_COUNT:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return shift * _SUB_BUCKET_HALF + (value_us >> shift)
+
+
+def _bucket_value(index: int) -> float:
+    """桶下标 -> 桶内代表值(微秒，取桶中点)"""
+    if index < _SUB_BUCKET_COUNT:
+        return float(index)
+    shift = index // _SUB_BUCKET_HALF - 1
+    sub = index - shift * _SUB_BUCKET_HALF
+    lower = sub << shift
+    return lower + ((1 << shift) - 1) / 2
+
+
+class LatencyHistogram:
+    """延迟直方图（记录单位为秒，内部按微秒分桶）"""
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """记录一次耗时"""
+        value_us = int(seconds * 1_000_000) if seconds > 0 else 0
+        index = _bucket_index(value_us)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.total += 1
+            self.sum += seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if self.max is None or seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """返回第p百分位的耗时(秒)，p取值0~100"""
+        with self._lock:
+            if not self.total:
+                return 0.0
+            target = max(1, int(round(self.total * p / 100.0 + 0.4999999)))
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                if seen >= target:
+                    value = _bucket_value(index) / 1_000_000
+                    # 不超出实际观测到的最大/最小值
+                    return min(max(value, self.min), self.max)
+            return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """合并另一个直方图（原地）"""
+        with self._lock:
+            for index, count in other.counts.items():
+                self.counts[index] = self.counts.get(index, 0) + count
+            self.total += other.total
+            self.sum += other.sum
+            if other.min is not None and (self.min is None or other.min < self.min):
+                self.min = other.min
+            if other.max is not None and (self.max is None or other.max > self.max):
+                self.max = other.max
+        return self
+
+    def summary(self) -> Dict[str, float]:
+        """常用分位数汇总(毫秒)"""
+        return {
+            "count": self.total,
+            "mean_ms": self.mean * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "p999_ms": self.percentile(99.9) * 1000,
+            "max_ms": (self.max or 0.0) * 1000,
+        }
+
+    def to_dict(self) -> dict:
+        """序列化为可JSON化的稀疏结构"""
+        with self._lock:
+            return {
+                "counts": {str(k): v for k, v in self.counts.items()},
+                "total": self.total,
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max,
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts = {int(k): v for k, v in data.get("counts", {}).items()}
+        histogram.total = data.get("total", 0)
+        histogram.sum = data.get("sum", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
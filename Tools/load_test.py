@@ -0,0 +1,263 @@
+"""
+下单压测：复用 api_client 的 HttpPrivateSign 客户端，按目标速率(开环)或固定并发(闭环)驱动 create_order_v3；
+--sign-workers 大于 0 时由签名进程池预签名订单，压测线程只负责发送
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from Tools.latency import LatencyHistogram
+
+console = Console()
+
+Sender = Callable[[], Any]
+
+
+def classify_result(result: Any) -> Optional[str]:
+    """判断一次调用是否出错，返回错误类别；成功返回None"""
+    if isinstance(result, dict) and result.get("data") is None and result.get("code") not in (None, 0):
+        return f"code {result.get('code')}"
+    return None
+
+
+class SecondStats:
+    """单秒内的统计"""
+
+    def __init__(self):
+        self.ok = 0
+        self.errors: Counter = Counter()
+        self.histogram = LatencyHistogram()
+
+
+class LoadReport:
+    """压测结果：整体延迟分位数、吞吐及逐秒错误分布"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.histogram = LatencyHistogram()
+        self.errors: Counter = Counter()
+        self.seconds: Dict[int, SecondStats] = {}
+        self.started_at = time.perf_counter()
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, finished_at: float, latency: float, error: Optional[str] = None):
+        second = int(finished_at - self.started_at)
+        with self._lock:
+            stats = self.seconds.get(second)
+            if stats is None:
+                stats = self.seconds[second] = SecondStats()
+            if error:
+                stats.errors[error] += 1
+                self.errors[error] += 1
+            else:
+                stats.ok += 1
+        self.histogram.record(latency)
+        stats.histogram.record(latency)
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started_at
+
+    @property
+    def total(self) -> int:
+        return self.histogram.total
+
+    @property
+    def throughput(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "elapsed_s": self.elapsed,
+            "total": self.total,
+            "errors": dict(self.errors),
+            "throughput_rps": self.throughput,
+            "latency": self.histogram.summary(),
+            "per_second": [
+                {
+                    "second": second,
+                    "ok": stats.ok,
+                    "errors": dict(stats.errors),
+                    "p50_ms": stats.histogram.percentile(50) * 1000,
+                    "p99_ms": stats.histogram.percentile(99) * 1000,
+                }
+                for second, stats in sorted(self.seconds.items())
+            ],
+        }
+
+    def print(self):
+        data = self.to_dict()
+        latency = data["latency"]
+        console.print(f"[bold cyan]压测模式: {self.mode}  总请求: {self.total}  "
+                      f"耗时: {self.elapsed:.2f}s  吞吐: {self.throughput:.1f} req/s[/bold cyan]")
+        console.print(f"延迟(ms) p50={latency['p50_ms']:.2f} p90={latency['p90_ms']:.2f} "
+                      f"p99={latency['p99_ms']:.2f} p99.9={latency['p999_ms']:.2f} max={latency['max_ms']:.2f}")
+
+        table = Table(title="逐秒统计", show_header=True, header_style="bold magenta")
+        for column in ("秒", "成功", "错误", "p50(ms)", "p99(ms)", "错误分布"):
+            table.add_column(column)
+        for row in data["per_second"]:
+            table.add_row(str(row["second"]), str(row["ok"]), str(sum(row["errors"].values())),
+                          f"{row['p50_ms']:.2f}", f"{row['p99_ms']:.2f}",
+                          ", ".join(f"{k}: {v}" for k, v in row["errors"].items()))
+        console.print(table)
+
+
+def _call(send: Sender, report: LoadReport, started: float):
+    error = None
+    try:
+        error = classify_result(send())
+    except Exception as e:
+        error = type(e).__name__
+    finished = time.perf_counter()
+    report.record(finished, finished - started, error)
+
+
+def run_open_loop(send: Sender, rate: float, duration: float, max_in_flight: int = 64) -> LoadReport:
+    """开环压测：按固定速率发起请求，延迟从计划发起时刻起算（规避协调遗漏）"""
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    report = LoadReport(mode=f"open-loop {rate:g}/s")
+    interval = 1.0 / rate
+    total = int(rate * duration)
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load") as pool:
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_call, send, report, scheduled)
+    report.finish()
+    return report
+
+
+def run_closed_loop(send: Sender, concurrency: int, duration: float) -> LoadReport:
+    """闭环压测：固定并发数，每个工作线程收到响应后立即发起下一次请求"""
+    if concurrency <= 0:
+        raise ValueError("concurrency must be positive")
+    report = LoadReport(mode=f"closed-loop x{concurrency}")
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            _call(send, report, time.perf_counter())
+
+    threads = [threading.Thread(target=worker, name=f"load-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.finish()
+    return report
+
+
+def order_sender(client, symbol: str = "BTC-USDT", side: str = "BUY", type: str = "MARKET",
+                 size: str = "0.001", price: str = "100000") -> Sender:
+    """构造下单函数，与 test_create_market_buy_order 的下单参数一致"""
+    # 与用例相同，先拉取配置与账户信息
+    client.configs_v3()
+    client.accountV3 = client.get_account_v3()
+
+    def send():
+        return client.create_order_v3(
+            symbol=symbol,
+            side=side,
+            type=type,
+            size=size,
+            timestampSeconds=time.time(),
+            price=price,
+        )
+
+    return send
+
+
+def presigned_sender(client, presigned) -> Sender:
+    """发送 PresignedOrders 中预签名的订单，签名不占用压测线程"""
+    from Tools.signing import post_signed_order
+
+    def send():
+        return post_signed_order(client, presigned.get())
+
+    return send
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="run.py load", description="Apex 下单压测")
+    parser.add_argument("--mode", choices=["open", "closed"], default="open", help="开环(目标速率)或闭环(固定并发)")
+    parser.add_argument("--rate", type=float, default=10.0, help="开环模式的目标下单速率(单/秒)")
+    parser.add_argument("--concurrency", type=int, default=4, help="闭环模式的并发数")
+    parser.add_argument("--duration", type=float, default=10.0, help="持续时间(秒)")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="开环模式最大在途请求数")
+    parser.add_argument("--symbol", default="BTC-USDT")
+    parser.add_argument("--side", default="BUY")
+    parser.add_argument("--type", default="MARKET")
+    parser.add_argument("--size", default="0.001")
+    parser.add_argument("--price", default="100000")
+    parser.add_argument("--sign-workers", type=int, default=0, help="签名进程数，大于0时预签名订单")
+    parser.add_argument("--presign", type=int, default=256, help="预签名队列长度")
+    parser.add_argument("--stub", action="store_true", help="使用本地桩服务，离线运行")
+    parser.add_argument("--output", default="reports/load-test.json", help="结果JSON输出路径")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> LoadReport:
+    """命令行入口: python run.py load --mode open --rate 20 --duration 30"""
+    from Tools.apex_client import create_api_client
+
+    args = _parse_args(argv)
+    server = None
+    endpoint = None
+    pool = presigned = None
+    if args.stub:
+        from Tools.stub_server import apex_stub_server, STUB_CREDENTIALS
+        server = apex_stub_server().start()
+        endpoint = server.url
+        for key, value in STUB_CREDENTIALS.items():
+            os.environ.setdefault(key, value)
+        # 本地桩服务不受交易所限流约束
+        from Tools.rate_limit import LIMITS_ENV
+        os.environ.setdefault(LIMITS_ENV, "off")
+        console.print(f"[yellow]使用本地桩服务: {endpoint}[/yellow]")
+
+    try:
+        client = create_api_client(endpoint)
+        send = order_sender(client, symbol=args.symbol, side=args.side, type=args.type,
+                            size=args.size, price=args.price)
+        if args.sign_workers > 0:
+            from Tools.signing import PresignedOrders, SigningPool, order_context
+            pool = SigningPool(client.zk_seeds, workers=args.sign_workers)
+            pool.warm_up()
+            template = {"symbol": args.symbol, "side": args.side, "type": args.type,
+                        "size": args.size, "price": args.price}
+            presigned = PresignedOrders(pool, order_context(client.configV3, client.accountV3, args.symbol),
+                                        template, size=args.presign)
+            send = presigned_sender(client, presigned)
+            console.print(f"[yellow]签名进程池: {pool.workers} 个进程，预签名队列 {args.presign}[/yellow]")
+        if args.mode == "open":
+            report = run_open_loop(send, rate=args.rate, duration=args.duration, max_in_flight=args.max_in_flight)
+        else:
+            report = run_closed_loop(send, concurrency=args.concurrency, duration=args.duration)
+    finally:
+        if presigned is not None:
+            presigned.close()
+        if pool is not None:
+            pool.close()
+        if server is not None:
+            server.stop()
+
+    report.print()
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+    return report
@@ -0,0 +1,671 @@
+"""
+本地 mock 服务：由 apis/mock/apis.py 中 router.get/post/put/patch/delete 声明的路由和 attrs 模型生成，
+基于 asyncio 的 HTTP/1.1 长连接服务，数据按种子生成并保存在内存中，可注入延迟与错误
+
+路由行为由声明推断：
+- 响应 data 为列表的 GET：按 QueryParams 过滤（同名字段精确匹配，描述含"模糊"的字符串字段子串匹配，
+  min_<字段> 为下限）后按 offset/limit 分页
+- 路径以 {参数} 结尾、响应 data 为资源模型的 GET/PUT：按路径参数查询/更新
+- 响应 data 为资源模型的 POST：按 RequestBodyModel 校验必填字段后写入
+- 响应只有 ret_code/message 的 PUT/DELETE：按 {<资源>_id} 更新/删除对应资源
+- 其余（登录、系统状态、头像上传）：按响应模型生成数据，与请求体、路径参数同名的字段取请求值，
+  <资源>_count 字段取当前资源数量
+
+python run.py mock --port 9999 --latency 0.005 --jitter 0.005 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import typing
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import attrs
+from rich.console import Console
+
+console = Console()
+
+DEFAULT_SIZE = 100
+# 单个请求头的上限，超过时返回 431 并断开
+MAX_HEADER_SIZE = 64 * 1024
+SEED_TIME = datetime(2024, 1, 1)
+# 按字段名取值的种子数据
+FIELD_CHOICES = {
+    "status": ["pending", "paid", "shipped", "completed", "cancelled"],
+    "category": ["电子产品", "图书", "服装", "食品", "家居"],
+    "tags": ["vip", "new", "active", "premium"],
+    "token_type": ["bearer"],
+    "file_type": ["image/png", "image/jpeg"],
+}
+CONTENT_TYPE = b"Content-Type: application/json\r\n"
+STATUS_LINES = {status.value: f"HTTP/1.1 {status.value} {status.phrase}\r\n".encode("latin-1")
+                for status in HTTPStatus}
+
+MockResult = Tuple[int, bytes]
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _unwrap(tp) -> Any:
+    """Optional[X] -> X"""
+    if typing.get_origin(tp) is typing.Union:
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        return args[0] if len(args) == 1 else Any
+    return tp
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _error(status: int, message: str) -> MockResult:
+    return status, _dumps({"ret_code": status, "message": message})
+
+
+class FaultConfig:
+    """延迟与错误注入：固定延迟加 [0, jitter) 的均匀抖动，按 error_rate 返回 error_status"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 500):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay(self, rng: random.Random) -> float:
+        return self.latency + (rng.random() * self.jitter if self.jitter else 0.0)
+
+    def inject(self, rng: random.Random) -> bool:
+        return bool(self.error_rate) and rng.random() < self.error_rate
+
+
+class Collection:
+    """内存中的一类资源，同时缓存每条记录编码后的 JSON"""
+
+    def __init__(self, model: type, key: Callable[[dict], Any]):
+        self.model = model
+        self.name = _snake(model.__name__)
+        self.key = key
+        self.items: Dict[Any, dict] = {}
+        self.encoded: Dict[Any, bytes] = {}
+        # 精确匹配过滤用的索引：字段 -> 值 -> 主键(有序)，首次按该字段过滤时建立
+        self.indexes: Dict[str, Dict[Any, Dict[Any, None]]] = {}
+
+    def put(self, item: dict) -> Any:
+        key = self.key(item)
+        old = self.items.get(key)
+        for name, index in self.indexes.items():
+            if old is not None and old.get(name) != item.get(name):
+                index[old.get(name)].pop(key, None)
+            index.setdefault(item.get(name), {})[key] = None
+        self.items[key] = item
+        self.encoded[key] = _dumps(item)
+        return key
+
+    def delete(self, key: Any) -> bool:
+        item = self.items.pop(key, None)
+        if item is None:
+            return False
+        del self.encoded[key]
+        for name, index in self.indexes.items():
+            index[item.get(name)].pop(key, None)
+        return True
+
+    def lookup(self, name: str, value: Any) -> Dict[Any, None]:
+        index = self.indexes.get(name)
+        if index is None:
+            index = self.indexes[name] = {}
+            for key, item in self.items.items():
+                index.setdefault(item.get(name), {})[key] = None
+        return index.get(value, {})
+
+
+def _model_key(model: type) -> Callable[[dict], Any]:
+    """资源主键：id 字段；没有时取 <x>_id 字段，或嵌套资源模型的 id（如 ProductDetail.basic_info.id）"""
+    fields = attrs.fields_dict(model)
+    if "id" in fields:
+        return lambda item: item["id"]
+    for name, field in fields.items():
+        if name.endswith("_id"):
+            return lambda item, name=name: item[name]
+    for name, field in fields.items():
+        nested = _unwrap(field.type)
+        if attrs.has(nested) and "id" in attrs.fields_dict(nested):
+            return lambda item, name=name: item[name]["id"]
+    raise ValueError(f"{model.__name__} 没有可作为主键的字段")
+
+
+class MockData:
+    """按种子生成的内存数据"""
+
+    def __init__(self, seed: int = 0, size: int = DEFAULT_SIZE):
+        self.seed = seed
+        self.size = size
+        self.rng = random.Random(seed)
+        self.collections: Dict[type, Collection] = {}
+        self._sequence = 0
+
+    def add(self, model: type) -> Collection:
+        collection = self.collections.get(model)
+        if collection is None:
+            collection = self.collections[model] = Collection(model, _model_key(model))
+        return collection
+
+    def by_name(self, name: str) -> Optional[Collection]:
+        for collection in self.collections.values():
+            if collection.name == name:
+                return collection
+        return None
+
+    def seed_all(self):
+        # 被其他资源嵌套引用的模型先生成，嵌套字段直接复用同序号的记录
+        nested = {_unwrap(field.type) for model in self.collections for field in attrs.fields(model)}
+        for model in sorted(self.collections, key=lambda model: model not in nested):
+            collection = self.collections[model]
+            for i in range(1, self.size + 1):
+                collection.put(self.fake(model, i))
+
+    def fake(self, model: type, i: int, values: Optional[dict] = None) -> dict:
+        """按 attrs 模型生成一条记录，values 中的同名字段优先"""
+        values = values or {}
+        fields = attrs.fields_dict(model)
+        key_field = None if "id" in fields else next((name for name, field in fields.items()
+                                                      if name.endswith("_id") and field.type is int), None)
+        item = {}
+        for name, field in fields.items():
+            if name in values:
+                item[name] = values[name]
+            elif name == "id" or name == key_field:
+                item[name] = i
+            elif isinstance(field.default, str) and field.default:
+                item[name] = field.default
+            else:
+                item[name] = self._fake_value(field.type, name, i)
+        return item
+
+    def _fake_value(self, tp, name: str, i: int) -> Any:
+        rng = self.rng
+        tp = _unwrap(tp)
+        origin = typing.get_origin(tp)
+        if attrs.has(tp):
+            collection = self.collections.get(tp)
+            if collection is not None and i in collection.items:
+                return collection.items[i]
+            return self.fake(tp, i)
+        if origin in (list, List):
+            (inner,) = typing.get_args(tp) or (Any,)
+            inner = _unwrap(inner)
+            if name in FIELD_CHOICES:
+                return rng.sample(FIELD_CHOICES[name], 2)
+            if inner is int:
+                return sorted(rng.sample(range(1, self.size + 1), min(3, self.size)))
+            if typing.get_origin(inner) in (dict, Dict):
+                return [{"product_id": rng.randint(1, self.size), "quantity": rng.randint(1, 5)}
+                        for _ in range(rng.randint(1, 3))]
+            return []
+        if origin in (dict, Dict):
+            return {}
+        if tp is bool:
+            return rng.random() < 0.9
+        if tp is int:
+            if name.endswith("_id"):
+                return rng.randint(1, self.size)
+            if name.endswith("_count"):
+                collection = self.by_name(name[:-len("_count")])
+                if collection is not None:
+                    return len(collection.items)
+            if name == "rating":
+                return rng.randint(1, 5)
+            return rng.randint(0, 1000)
+        if tp is float:
+            if name.endswith("_usage"):
+                return round(rng.uniform(0, 100), 1)
+            return round(rng.uniform(1, 1000), 2)
+        if tp is datetime:
+            return (SEED_TIME + timedelta(minutes=i)).isoformat()
+        if tp is str:
+            if name in FIELD_CHOICES:
+                return rng.choice(FIELD_CHOICES[name])
+            if name == "email":
+                return f"user{i}@example.com"
+            if name == "phone":
+                return f"138{i:08d}"
+            if "token" in name or name.endswith("_id"):
+                return uuid.UUID(int=rng.getrandbits(128)).hex
+            if name.endswith("_url"):
+                return f"https://example.com/files/{i}"
+            return f"{name}_{i}"
+        return None
+
+    def next_id(self) -> int:
+        self._sequence += 1
+        return self._sequence
+
+
+def _coerce(tp, value: str) -> Any:
+    if tp is bool:
+        return value.lower() in ("1", "true", "yes")
+    if tp in (int, float):
+        return tp(value)
+    return value
+
+
+def _data_type(response_model: type) -> Tuple[Optional[type], bool]:
+    """响应模型 data 字段的元素类型，以及是否为列表"""
+    field = attrs.fields_dict(response_model).get("data")
+    if field is None:
+        return None, False
+    tp = _unwrap(field.type)
+    if typing.get_origin(tp) in (list, List):
+        (inner,) = typing.get_args(tp)
+        return _unwrap(inner), True
+    return (tp, False) if attrs.has(tp) else (None, False)
+
+
+class MockRoute:
+    """由一个 API 类生成的路由"""
+
+    def __init__(self, api_class: type):
+        config = api_class._endpoint_config
+        fields = attrs.fields_dict(api_class)
+        self.api_class = api_class
+        self.method = config.method.value if hasattr(config.method, "value") else str(config.method)
+        self.path = config.route
+        self.route_params = list(config.route_params)
+        self.key = f"{self.method} {self.path}"
+        self.pattern = re.compile("^" + re.sub(r"{(\w+)}", r"(?P<\1>[^/]+)", self.path) + "$") \
+            if self.route_params else None
+        self.path_types = self._types(getattr(api_class, "PathParams", None))
+        self.query_class = getattr(api_class, "QueryParams", None)
+        self.query_types = self._types(self.query_class)
+        self.query_defaults = {field.name: field.default for field in attrs.fields(self.query_class)
+                               if field.default is not attrs.NOTHING} if self.query_class else {}
+        self.body_class = getattr(api_class, "RequestBodyModel", None)
+        self.response_model = fields["response"].default if "response" in fields else None
+        self.model, self.is_list = _data_type(self.response_model) if self.response_model else (None, False)
+        self.fuzzy = {field.name for field in attrs.fields(self.query_class)
+                      if "模糊" in field.metadata.get("description", "")} if self.query_class else set()
+        self.handler: Callable[["MockRoute", dict, dict, Any], MockResult] = None
+
+    @staticmethod
+    def _types(cls) -> Dict[str, Any]:
+        return {field.name: _unwrap(field.type) for field in attrs.fields(cls)} if cls is not None else {}
+
+    @property
+    def ends_with_param(self) -> bool:
+        return bool(self.route_params) and self.path.endswith("}")
+
+
+class MockApp:
+    """路由匹配与处理，与传输层无关"""
+
+    def __init__(self, module: Optional[ModuleType] = None, seed: int = 0, size: int = DEFAULT_SIZE,
+                 fault: Optional[FaultConfig] = None, faults: Optional[Dict[str, FaultConfig]] = None):
+        if module is None:
+            from apis.mock import apis as module
+        self.data = MockData(seed, size)
+        self.fault = fault or FaultConfig()
+        # 按 "METHOD /path/{param}" 单独配置的延迟与错误
+        self.faults = dict(faults or {})
+        self.rng = random.Random(seed)
+        self.request_count = 0
+        self.routes = self._build_routes(module)
+        self.static: Dict[Tuple[str, str], MockRoute] = {(r.method, r.path): r for r in self.routes if not r.pattern}
+        self.dynamic: Dict[str, List[MockRoute]] = {}
+        for route in self.routes:
+            if route.pattern:
+                self.dynamic.setdefault(route.method, []).append(route)
+        self.data.seed_all()
+        self.data._sequence = size
+
+    def _build_routes(self, module: ModuleType) -> List[MockRoute]:
+        routes = [MockRoute(obj) for obj in vars(module).values()
+                  if isinstance(obj, type) and hasattr(obj, "_endpoint_config") and attrs.has(obj)]
+        # 资源模型：出现在列表响应或"GET 路径以参数结尾"的响应中
+        for route in routes:
+            if route.model and route.method == "GET" and (route.is_list or route.ends_with_param):
+                self.data.add(route.model)
+        for route in routes:
+            route.handler = self._choose_handler(route)
+        return routes
+
+    def _choose_handler(self, route: MockRoute):
+        collection = self.data.collections.get(route.model)
+        if collection is not None:
+            if route.is_list:
+                return self._list
+            if route.method == "POST":
+                return self._create
+            if route.ends_with_param and route.method in ("GET", "PUT"):
+                return self._get if route.method == "GET" else self._replace
+        if route.model is None and route.route_params and route.method in ("PUT", "PATCH", "DELETE"):
+            return self._delete if route.method == "DELETE" else self._update
+        return self._generate
+
+    def match(self, method: str, path: str) -> Tuple[Optional[MockRoute], Dict[str, str]]:
+        route = self.static.get((method, path))
+        if route is not None:
+            return route, {}
+        for route in self.dynamic.get(method, ()):
+            matched = route.pattern.match(path)
+            if matched:
+                return route, matched.groupdict()
+        return None, {}
+
+    def handle(self, method: str, target: str, body: bytes) -> Tuple[int, bytes, float]:
+        """处理一次请求，返回 (状态码, 响应体, 注入的延迟)"""
+        self.request_count += 1
+        path, _, query_string = target.partition("?")
+        route, path_values = self.match(method, path)
+        if route is None:
+            return (*_error(404, f"no mock route for {method} {path}"), 0.0)
+        fault = self.faults.get(route.key, self.fault)
+        delay = fault.delay(self.rng)
+        if fault.inject(self.rng):
+            return (*_error(fault.error_status, "mock injected error"), delay)
+        try:
+            params = {name: _coerce(route.path_types.get(name, str), value) for name, value in path_values.items()}
+            query = dict(route.query_defaults)
+            query.update((name, _coerce(route.query_types[name], value))
+                         for name, value in parse_qsl(query_string) if name in route.query_types)
+            payload = json.loads(body) if body else None
+        except ValueError as e:
+            return (*_error(422, f"invalid request: {e}"), delay)
+        return (*route.handler(route, params, query, payload), delay)
+
+    def _check_body(self, route: MockRoute, payload: Any) -> Optional[MockResult]:
+        if route.body_class is None:
+            return None
+        if not isinstance(payload, dict):
+            return _error(422, "request body must be a JSON object")
+        missing = [field.name for field in attrs.fields(route.body_class)
+                   if field.default is attrs.NOTHING and field.name not in payload]
+        if missing:
+            return _error(422, f"missing fields: {', '.join(missing)}")
+        return None
+
+    @staticmethod
+    def _ok(data: bytes) -> MockResult:
+        return 200, b'{"ret_code":0,"message":"success","data":' + data + b"}"
+
+    def _list(self, route: MockRoute, params: dict, query: dict, payload: Any) -> MockResult:
+        collection = self.data.collections[route.model]
+        offset = query.pop("offset", 0)
+        limit = query.pop("limit", len(collection.items))
+        exact, filters = [], []
+        for name, value in query.items():
+            if value is None:
+                continue
+            if name.startswith("min_"):
+                filters.append(lambda item, name=name[4:], value=value: item.get(name) is not None
+                               and item[name] >= value)
+            elif name in route.fuzzy:
+                filters.append(lambda item, name=name, value=value: value in str(item.get(name, "")))
+            else:
+                exact.append((name, value))
+        # 精确匹配从命中最少的索引出发，其余条件逐条检查
+        candidates = min((collection.lookup(name, value) for name, value in exact), key=len, default=None)
+        filters += [lambda item, name=name, value=value: item.get(name) == value for name, value in exact]
+        if candidates is None and not filters:
+            total, page = len(collection.items), itertools.islice(collection.encoded, offset, offset + limit)
+        else:
+            items = collection.items
+            keys = [key for key in (items if candidates is None else candidates)
+                    if all(check(items[key]) for check in filters)]
+            total, page = len(keys), keys[offset:offset + limit]
+        data = b",".join(collection.encoded[key] for key in page)
+        return 200, b'{"ret_code":0,"message":"success","data":[' + data + b'],"total":%d}' % total
+
+    def _path_key(self, params: dict) -> Any:
+        return params[next(reversed(params))] if params else None
+
+    def _get(self, route: MockRoute, params: dict, query: dict, payload: Any) -> MockResult:
+        collection = self.data.collections[route.model]
+        encoded = collection.encoded.get(self._path_key(params))
+        if encoded is None:
+            return _error(404, f"{collection.name} not found")
+        return self._ok(encoded)
+
+    def _create(self, route: MockRoute, params: dict, query: dict, payload: Any) -> MockResult:
+        invalid = self._check_body(route, payload)
+        if invalid:
+            return invalid
+        collection = self.data.collections[route.model]
+        item = self.data.fake(route.model, self.data.next_id(), {**params, **payload})
+        return self._ok(collection.encoded[collection.put(item)])
+
+    def _replace(self, route: MockRoute, params: dict, query: dict, payload: Any) -> MockResult:
+        invalid = self._check_body(route, payload)
+        if invalid:
+            return invalid
+        collection = self.data.collections[route.model]
+        key = self._path_key(params)
+        if key not in collection.items:
+            return _error(404, f"{collection.name} not found")
+        item = {**collection.items[key], **payload}
+        if collection.key(item) != key:
+            return _error(400, "path parameter does not match request body")
+        return self._ok(collection.encoded[collection.put(item)])
+
+    def _resource(self, params: dict) -> Tuple[Optional[Collection], Any]:
+        name = next(reversed(params))
+        return self.data.by_name(name[:-len("_id")] if name.endswith("_id") else name), params[name]
+
+    def _update(self, route: MockRoute, params: dict, query: dict, payload: Any) -> MockResult:
+        invalid = self._check_body(route, payload)
+        if invalid:
+            return invalid
+        collection, key = self._resource(params)
+        if collection is None or key not in collection.items:
+            return _error(404, "resource not found")
+        collection.put({**collection.items[key], **(payload or {})})
+        return 200, b'{"ret_code":0,"message":"success"}'
+
+    def _delete(self, route: MockRoute, params: dict, query: dict, payload: Any) -> MockResult:
+        collection, key = self._resource(params)
+        if collection is None or not collection.delete(key):
+            return _error(404, "resource not found")
+        return 200, b'{"ret_code":0,"message":"success"}'
+
+    def _generate(self, route: MockRoute, params: dict, query: dict, payload: Any) -> MockResult:
+        invalid = self._check_body(route, payload)
+        if invalid:
+            return invalid
+        if route.model is None:
+            return 200, b'{"ret_code":0,"message":"success"}'
+        values = {**params, **(payload if isinstance(payload, dict) else {})}
+        return self._ok(_dumps(self.data.fake(route.model, self.data.next_id(), values)))
+
+
+class _HTTPProtocol(asyncio.Protocol):
+    """HTTP/1.1 长连接；支持管线化请求，注入延迟时仍按请求顺序写回响应"""
+
+    def __init__(self, app: MockApp):
+        self.app = app
+        self.transport: Optional[asyncio.Transport] = None
+        self.buffer = bytearray()
+        self.pending: deque = deque()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        buffer = self.buffer
+        buffer += data
+        while buffer:
+            end = buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(buffer) > MAX_HEADER_SIZE:
+                    self._send(*_error(431, "request header too large"), keep_alive=False)
+                return
+            lines = bytes(buffer[:end]).decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                self._send(*_error(400, "malformed request line"), keep_alive=False)
+                return
+            length = 0
+            keep_alive = version == "HTTP/1.1"
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                name = name.lower()
+                if name == "content-length":
+                    length = int(value)
+                elif name == "connection":
+                    token = value.strip().lower()
+                    keep_alive = token == "keep-alive" if version == "HTTP/1.0" else token != "close"
+                elif name == "transfer-encoding":
+                    self._send(*_error(501, "chunked request body is not supported"), keep_alive=False)
+                    return
+            if len(buffer) < end + 4 + length:
+                return
+            body = bytes(buffer[end + 4:end + 4 + length])
+            del buffer[:end + 4 + length]
+            status, payload, delay = self.app.handle(method, target, body)
+            if delay or self.pending:
+                entry = [status, payload, keep_alive, not delay]
+                self.pending.append(entry)
+                if delay:
+                    asyncio.get_running_loop().call_later(delay, self._ready, entry)
+            else:
+                self._send(status, payload, keep_alive)
+            if not keep_alive:
+                return
+
+    def _ready(self, entry: list):
+        entry[3] = True
+        while self.pending and self.pending[0][3]:
+            status, payload, keep_alive, _ = self.pending.popleft()
+            self._send(status, payload, keep_alive)
+
+    def _send(self, status: int, payload: bytes, keep_alive: bool):
+        if self.transport.is_closing():
+            return
+        head = STATUS_LINES[status] + CONTENT_TYPE + (b"" if keep_alive else b"Connection: close\r\n")
+        self.transport.write(head + b"Content-Length: %d\r\n\r\n" % len(payload) + payload)
+        if not keep_alive:
+            self.transport.close()
+
+    def pause_writing(self):
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+
+class MockServer:
+    """mock 服务：start()/with 语句在后台线程的事件循环中运行，serve_forever() 在当前线程阻塞运行"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, app: Optional[MockApp] = None, **kwargs):
+        self.host = host
+        self.port = port
+        self.app = app or MockApp(**kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def request_count(self) -> int:
+        return self.app.request_count
+
+    async def serve(self) -> asyncio.AbstractServer:
+        """在当前事件循环中开始监听"""
+        self._loop = asyncio.get_running_loop()
+        self._server = await self._loop.create_server(lambda: _HTTPProtocol(self.app), self.host, self.port,
+                                                      backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    def serve_forever(self):
+        async def run():
+            server = await self.serve()
+            console.print(f"[cyan]mock 服务已启动: {self.url}，{len(self.app.routes)} 个路由[/cyan]")
+            async with server:
+                await server.serve_forever()
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            pass
+
+    def start(self) -> "MockServer":
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.serve())
+            started.set()
+            loop.run_forever()
+            self._server.close()
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def parse_faults(values: List[str]) -> Dict[str, FaultConfig]:
+    """--route "GET /api/orders=0.05,0,0.1" 形式：延迟,抖动,错误率[,状态码]"""
+    faults = {}
+    for value in values or ():
+        key, _, spec = value.rpartition("=")
+        numbers = [float(part) for part in spec.split(",")]
+        if not key or not 1 <= len(numbers) <= 4:
+            raise argparse.ArgumentTypeError(f"无法解析路由故障配置: {value}")
+        numbers += [0.0] * (3 - len(numbers))
+        faults[key.strip()] = FaultConfig(*numbers[:3], error_status=int(numbers[3]) if len(numbers) > 3 else 500)
+    return faults
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python run.py mock", description="apis/mock 接口的本地 mock 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--seed", type=int, default=0, help="生成数据的随机种子")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="每类资源生成的记录数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个响应的固定延迟(秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="在固定延迟上叠加的均匀抖动上限(秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回错误的比例")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--route", action="append", metavar="'METHOD /path=延迟,抖动,错误率[,状态码]'",
+                        help="按路由单独配置延迟与错误，可重复")
+    args = parser.parse_args(argv)
+
+    fault = FaultConfig(args.latency, args.jitter, args.error_rate, args.error_status)
+    app = MockApp(seed=args.seed, size=args.size, fault=fault, faults=parse_faults(args.route))
+    for route in app.routes:
+        console.print(f"  {route.method:<6} {route.path}  [dim]{route.handler.__name__.lstrip('_')}[/dim]")
+    MockServer(args.host, args.port, app=app).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,425 @@
+"""
+通知分发：消息先写入运行数据库(database/run_data.db)的 notifications 表，由后台线程发送，调用方不等待网络请求
+
+- 合并：同一 (sink, key) 的消息在发送前只保留最后一条，多个进程同时上报同一张卡片时只发送一次；
+  新消息到达后等待 coalesce_window 秒再发送，把一阵突发合并为一次
+- 重试：网络错误、429、5xx 及通道返回的限流错误码按指数退避（带抖动）重试，其余错误不重试
+- 落盘：重试用尽或运行结束时仍未发出的消息标记为 failed 保留在表中，
+  python run.py notify retry 重新投递，python run.py notify list 查看
+
+新增通道：继承 Sink 实现 check()，在 create_sinks() 中按配置注册
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import requests
+import yaml
+from aomaker.database.sqlite import SQLiteDB, lock
+from rich.console import Console
+from rich.table import Table
+
+from Tools.storage import run_db_path
+
+console = Console()
+
+UTILS_CONF = os.path.join("conf", "utils.yaml")
+FEISHU_WEBHOOK_ENV = "FEISHU_WEBHOOK_URL"
+DEFAULT_FEISHU_WEBHOOK = "https://open.feishu.cn/open-apis/bot/v2/hook/4184dbcd-2483-412e-9b88-330009114d69"
+WECHAT_WEBHOOK_ENV = "WECHAT_WEBHOOK_URL"
+# 飞书应用凭证与目标群，配置后进度卡片可原地更新
+FEISHU_APP_ENVS = ("FEISHU_APP_ID", "FEISHU_APP_SECRET", "FEISHU_CHAT_ID")
+FEISHU_API_BASE = "https://open.feishu.cn"
+
+PENDING, SENT, FAILED = "pending", "sent", "failed"
+
+
+class NotifyError(Exception):
+    """发送失败；retryable 为 False 时不再重试"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class Sink:
+    """通知通道：把消息 POST 到 webhook，由 check() 判断响应是否成功"""
+    name = ""
+
+    def __init__(self, webhook_url: str, timeout: float = 5.0):
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _request(self, method: str, url: str, **kwargs) -> dict:
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise NotifyError(f"{type(e).__name__}: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise NotifyError(f"HTTP {response.status_code}: {response.text[:200]}")
+        try:
+            body = response.json()
+        except ValueError:
+            raise NotifyError(f"HTTP {response.status_code}，响应不是 JSON: {response.text[:200]}", retryable=False)
+        # 4xx 且响应中没有通道错误码时不重试；有错误码的交给 check() 判断
+        if response.status_code >= 400 and not (isinstance(body, dict) and (body.get("code") or body.get("errcode"))):
+            raise NotifyError(f"HTTP {response.status_code}: {response.text[:200]}", retryable=False)
+        return body
+
+    def send(self, payload: dict, key: Optional[str] = None):
+        body = self._request("POST", self.webhook_url, json=payload)
+        self.check(body)
+
+    def check(self, body: dict):
+        pass
+
+
+class FeishuSink(Sink):
+    """飞书群机器人"""
+    name = "feishu"
+    # 频率限制，稍后可重试
+    RETRY_CODES = {9499, 11232, 11233}
+
+    def check(self, body: dict):
+        code = body.get("code", body.get("StatusCode", 0))
+        if code != 0:
+            raise NotifyError(f"飞书返回 code={code}: {body.get('msg')}", retryable=code in self.RETRY_CODES)
+
+
+class WeChatSink(Sink):
+    """企业微信群机器人"""
+    name = "wechat"
+    RETRY_CODES = {-1, 45009}
+
+    def check(self, body: dict):
+        code = body.get("errcode", 0)
+        if code != 0:
+            raise NotifyError(f"企业微信返回 errcode={code}: {body.get('errmsg')}",
+                              retryable=code in self.RETRY_CODES)
+
+
+class FeishuAppSink(FeishuSink):
+    """
+    飞书应用机器人：同一 key 的消息首次发送到群聊，之后按 message_id 原地更新卡片；
+    自定义机器人 webhook 只能发新消息，进度卡片需要配置应用凭证才能原地更新
+    """
+    name = "feishu_app"
+    RETRY_CODES = FeishuSink.RETRY_CODES | {99991400}
+    TOKEN_CODES = {99991661, 99991663, 99991668}
+
+    def __init__(self, app_id: str, app_secret: str, chat_id: str, base_url: str = FEISHU_API_BASE,
+                 timeout: float = 5.0):
+        super().__init__(base_url.rstrip("/"), timeout)
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.chat_id = chat_id
+        self.message_ids: Dict[str, str] = {}
+        self._token: Optional[str] = None
+        self._token_expire = 0.0
+
+    def _tenant_token(self) -> str:
+        if self._token is None or time.time() >= self._token_expire:
+            body = self._request("POST", f"{self.webhook_url}/open-apis/auth/v3/tenant_access_token/internal",
+                                 json={"app_id": self.app_id, "app_secret": self.app_secret})
+            self.check(body)
+            self._token = body["tenant_access_token"]
+            # 提前一分钟刷新
+            self._token_expire = time.time() + body.get("expire", 7200) - 60
+        return self._token
+
+    def _api(self, method: str, path: str, **kwargs) -> dict:
+        headers = {"Authorization": f"Bearer {self._tenant_token()}"}
+        body = self._request(method, f"{self.webhook_url}{path}", headers=headers, **kwargs)
+        if body.get("code") in self.TOKEN_CODES:
+            self._token = None
+            raise NotifyError(f"飞书 tenant_access_token 失效 code={body['code']}")
+        self.check(body)
+        return body
+
+    def send(self, payload: dict, key: Optional[str] = None):
+        content = json.dumps(payload["card"], ensure_ascii=False)
+        message_id = self.message_ids.get(key) if key else None
+        if message_id:
+            self._api("PATCH", f"/open-apis/im/v1/messages/{message_id}", json={"content": content})
+            return
+        body = self._api("POST", "/open-apis/im/v1/messages", params={"receive_id_type": "chat_id"},
+                         json={"receive_id": self.chat_id, "msg_type": "interactive", "content": content})
+        if key:
+            self.message_ids[key] = body["data"]["message_id"]
+
+
+def create_sinks() -> Dict[str, Sink]:
+    """按环境变量与 conf/utils.yaml 创建通道；企业微信、飞书应用未配置时不启用"""
+    sinks: Dict[str, Sink] = {"feishu": FeishuSink(os.getenv(FEISHU_WEBHOOK_ENV, DEFAULT_FEISHU_WEBHOOK))}
+    app = [os.getenv(name) for name in FEISHU_APP_ENVS]
+    if all(app):
+        sinks["feishu_app"] = FeishuAppSink(*app, base_url=os.getenv("FEISHU_API_BASE", FEISHU_API_BASE))
+    wechat_url = os.getenv(WECHAT_WEBHOOK_ENV)
+    if not wechat_url and os.path.exists(UTILS_CONF):
+        with open(UTILS_CONF, encoding="utf-8") as f:
+            wechat_url = ((yaml.safe_load(f) or {}).get("wechat") or {}).get("webhook")
+    if wechat_url:
+        sinks["wechat"] = WeChatSink(wechat_url)
+    return sinks
+
+
+class NotificationStore(SQLiteDB):
+    """待发送与发送失败的消息；version 在消息被合并覆盖时递增，发送结果只作用于发出的那个版本"""
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or run_db_path())
+        self.table = "notifications"
+        self.create_table()
+
+    def create_table(self):
+        self.execute_sql(f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sink TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                UNIQUE (sink, key)
+            );""")
+
+    def put(self, sink: str, key: str, payload: dict, delay: float = 0.0):
+        """写入或覆盖同 key 的消息；覆盖待发送的消息时保留原定的发送时间，突发不会无限推迟发送"""
+        now = time.time()
+        stamp = datetime.now().isoformat(timespec="seconds")
+        sql = f"""INSERT INTO {self.table} (sink, key, payload, status, next_attempt, created_at, updated_at)
+                  VALUES (?, ?, ?, '{PENDING}', ?, ?, ?)
+                  ON CONFLICT(sink, key) DO UPDATE SET
+                      payload = excluded.payload,
+                      version = version + 1,
+                      attempts = CASE WHEN status = '{PENDING}' THEN attempts ELSE 0 END,
+                      next_attempt = CASE WHEN status = '{PENDING}' THEN next_attempt ELSE excluded.next_attempt END,
+                      status = '{PENDING}',
+                      updated_at = excluded.updated_at"""
+        with lock, self.connection:
+            self.connection.execute(sql, (sink, key, json.dumps(payload, ensure_ascii=False), now + delay,
+                                          stamp, stamp))
+
+    def due(self, sinks, now: Optional[float] = None, limit: int = 50) -> List[dict]:
+        sinks = list(sinks)
+        if not sinks:
+            return []
+        placeholders = ", ".join("?" * len(sinks))
+        return self.query(
+            f"""SELECT * FROM {self.table} WHERE status = '{PENDING}' AND next_attempt <= ?
+                AND sink IN ({placeholders}) ORDER BY next_attempt LIMIT ?""",
+            (time.time() if now is None else now, *sinks, limit),
+        )
+
+    def pending(self, sinks) -> int:
+        sinks = list(sinks)
+        if not sinks:
+            return 0
+        placeholders = ", ".join("?" * len(sinks))
+        rows = self.query(f"SELECT COUNT(*) AS n FROM {self.table} WHERE status = '{PENDING}' "
+                          f"AND sink IN ({placeholders})", tuple(sinks))
+        return rows[0]["n"]
+
+    def _update(self, row: dict, **values):
+        values["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with lock, self.connection:
+            self.connection.execute(f"UPDATE {self.table} SET {assignments} WHERE id = ? AND version = ?",
+                                    (*values.values(), row["id"], row["version"]))
+
+    def mark_sent(self, row: dict):
+        self._update(row, status=SENT, attempts=row["attempts"] + 1, last_error=None)
+
+    def mark_retry(self, row: dict, next_attempt: float, error: str):
+        self._update(row, attempts=row["attempts"] + 1, next_attempt=next_attempt, last_error=error)
+
+    def mark_failed(self, row: dict, error: Optional[str] = None):
+        values = {"status": FAILED}
+        if error is not None:
+            values.update(attempts=row["attempts"] + 1, last_error=error)
+        self._update(row, **values)
+
+    def fail_pending(self, sinks):
+        """运行结束时仍未发出的消息转入失败，等待手动重试"""
+        for row in self.query(f"SELECT * FROM {self.table} WHERE status = '{PENDING}'"):
+            if row["sink"] in sinks:
+                self.mark_failed(row)
+
+    def failed(self, sink: Optional[str] = None) -> List[dict]:
+        if sink:
+            return self.query(f"SELECT * FROM {self.table} WHERE status = '{FAILED}' AND sink = ?", (sink,))
+        return self.query(f"SELECT * FROM {self.table} WHERE status = '{FAILED}'")
+
+    def requeue_failed(self, sinks) -> int:
+        """把失败的消息重新置为待发送，只处理 sinks 中的通道"""
+        rows = [row for row in self.failed() if row["sink"] in sinks]
+        with lock, self.connection:
+            self.connection.executemany(
+                f"UPDATE {self.table} SET status = '{PENDING}', attempts = 0, next_attempt = ? WHERE id = ?",
+                [(time.time(), row["id"]) for row in rows])
+        return len(rows)
+
+
+class Notifier:
+    """后台发送线程；notify() 只写表，任何进程都可以调用"""
+
+    def __init__(self, sinks: Optional[Dict[str, Sink]] = None, db_path=None, coalesce_window: float = 0.5,
+                 max_attempts: int = 5, backoff: float = 1.0, max_backoff: float = 30.0, poll_interval: float = 0.2):
+        self.sinks = create_sinks() if sinks is None else sinks
+        self.db_path = db_path
+        self.coalesce_window = coalesce_window
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.store = NotificationStore(db_path)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._idle = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def notify(self, sink: str, payload: dict, key: Optional[str] = None):
+        """加入发送队列；key 相同的消息合并为最后一条，不传 key 时不合并"""
+        self.store.put(sink, key or uuid.uuid4().hex, payload, delay=self.coalesce_window)
+        self._idle.clear()
+        self._wakeup.set()
+
+    def start(self) -> "Notifier":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+            self._thread.start()
+        return self
+
+    def _delay(self, attempts: int) -> float:
+        return min(self.max_backoff, self.backoff * 2 ** attempts) * random.uniform(0.5, 1.0)
+
+    def _send(self, store: NotificationStore, row: dict):
+        try:
+            self.sinks[row["sink"]].send(json.loads(row["payload"]), row["key"])
+        except NotifyError as e:
+            if e.retryable and row["attempts"] + 1 < self.max_attempts:
+                store.mark_retry(row, time.time() + self._delay(row["attempts"]), str(e))
+            else:
+                store.mark_failed(row, str(e))
+                console.print(f"[red]{row['sink']} 通知发送失败，已保存待重试: {e}[/red]")
+        else:
+            store.mark_sent(row)
+
+    def _run(self):
+        # 发送线程使用独立连接
+        store = NotificationStore(self.db_path)
+        try:
+            while True:
+                rows = store.due(self.sinks)
+                for row in rows:
+                    self._send(store, row)
+                if not rows:
+                    if not store.pending(self.sinks):
+                        self._idle.set()
+                    if self._stopping.is_set():
+                        return
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+        finally:
+            store.close()
+
+    def flush(self, timeout: float = 15.0) -> bool:
+        """等待已入队的消息发出（或转入失败），超时返回 False"""
+        if self._thread is None:
+            self.start()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.store.pending(self.sinks) == 0:
+                return True
+            self._wakeup.set()
+            self._idle.wait(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+        return self.store.pending(self.sinks) == 0
+
+    def close(self, timeout: float = 15.0) -> bool:
+        """等待发送完成后停止；仍未发出的消息转入失败保存"""
+        delivered = self.flush(timeout)
+        if not delivered:
+            self.store.fail_pending(self.sinks)
+            console.print("[yellow]部分通知在超时前未发出，已保存，可执行 python run.py notify retry 重发[/yellow]")
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            # 最多等待正在进行的一次请求
+            self._thread.join(timeout=max([sink.timeout for sink in self.sinks.values()], default=0) + 1)
+            self._thread = None
+        self.store.close()
+        return delivered
+
+
+_notifier: Optional[Notifier] = None
+_notifier_pid: Optional[int] = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> Notifier:
+    """进程内共享的通知器，首次调用时启动发送线程；fork 出的子进程中重新创建"""
+    global _notifier, _notifier_pid
+    with _notifier_lock:
+        if _notifier is None or _notifier_pid != os.getpid():
+            _notifier, _notifier_pid = Notifier().start(), os.getpid()
+        return _notifier
+
+
+def close_notifier(timeout: float = 15.0) -> bool:
+    global _notifier
+    with _notifier_lock:
+        notifier, _notifier = _notifier, None
+    return notifier.close(timeout) if notifier is not None else True
+
+
+def _print_failed(rows: List[dict]):
+    table = Table(title="发送失败的通知", show_header=True, header_style="bold magenta")
+    for column in ("id", "通道", "key", "尝试次数", "最后错误", "时间"):
+        table.add_column(column)
+    for row in rows:
+        table.add_row(str(row["id"]), row["sink"], row["key"], str(row["attempts"]), row["last_error"] or "-",
+                      str(row["updated_at"]))
+    console.print(table)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口: python run.py notify list|retry [--sink NAME]"""
+    parser = argparse.ArgumentParser(prog="run.py notify", description="查看、重发发送失败的通知")
+    parser.add_argument("--db", default=None, help="数据库路径，默认 database/run_data.db")
+    parser.add_argument("command", choices=("list", "retry"))
+    parser.add_argument("--sink", default=None, help="只处理指定通道")
+    parser.add_argument("--timeout", type=float, default=30.0, help="重发时最长等待秒数")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        store = NotificationStore(args.db)
+        try:
+            _print_failed(store.failed(args.sink))
+        finally:
+            store.close()
+        return 0
+
+    notifier = Notifier(db_path=args.db, coalesce_window=0)
+    sinks = [args.sink] if args.sink else notifier.sinks
+    count = notifier.store.requeue_failed([name for name in sinks if name in notifier.sinks])
+    console.print(f"[cyan]重新投递 {count} 条通知[/cyan]")
+    delivered = notifier.close(args.timeout)
+    remaining = NotificationStore(args.db)
+    try:
+        failed = remaining.failed(args.sink)
+    finally:
+        remaining.close()
+    if failed:
+        _print_failed(failed)
+    return 0 if delivered and not failed else 1
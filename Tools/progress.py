@@ -0,0 +1,228 @@
+"""
+运行进度：长时间的稳定性/压测运行中按固定间隔把累计通过/失败数、吞吐与最慢接口更新到飞书卡片
+
+- ProgressAggregator（pytest 插件，每个测试进程一个）：用例结束时按与结果缓冲区、allure 相同的方式判定状态，只做计数和一次时间比较，
+  距上次写出超过 SNAPSHOT_INTERVAL 秒才把快照写到 reports/progress/progress-<pid>.json；
+  接口耗时直接取计时中间件已在进程内累计的直方图，不额外记录
+- ProgressReporter（run_tests 主进程中的后台线程）：每 interval 秒合并各进程快照，经通知队列以同一个 key 发出；
+  需要飞书应用凭证(FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_CHAT_ID)以原地更新同一张卡片；
+  自定义机器人 webhook 每次都是新消息，未配置应用凭证时不发送进度
+
+APEX_PROGRESS_INTERVAL 设置更新间隔(秒)，默认 300，设为 0 关闭
+"""
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pytest
+from rich.console import Console
+
+from middlewares import timing_middleware
+from Tools.latency import LatencyHistogram
+from Tools.notifier import FEISHU_APP_ENVS, Notifier, get_notifier
+from Tools.result_stream import StatusTracker, live_summary
+from Tools.run_stats import RUN_ID_ENV, current_run_id
+
+console = Console()
+
+PROGRESS_DIR = os.path.join("reports", "progress")
+INTERVAL_ENV = "APEX_PROGRESS_INTERVAL"
+DEFAULT_INTERVAL = 300.0
+# 测试进程写快照的间隔(秒)
+SNAPSHOT_INTERVAL = 10.0
+STATUSES = ("passed", "failed", "broken", "skipped")
+
+
+def progress_interval() -> float:
+    return float(os.environ.get(INTERVAL_ENV, DEFAULT_INTERVAL) or 0)
+
+
+def progress_enabled() -> bool:
+    """开启了进度间隔且配置了飞书应用凭证；webhook 无法原地更新卡片，只有它时不推送进度，测试进程也不写快照"""
+    return progress_interval() > 0 and all(os.getenv(name) for name in FEISHU_APP_ENVS)
+
+
+class ProgressAggregator:
+    """pytest 插件：按状态累计已完成的用例，定期写出本进程的进度快照"""
+
+    def __init__(self, directory: str = PROGRESS_DIR, interval: float = SNAPSHOT_INTERVAL,
+                 stats: Optional[timing_middleware.TimingStats] = None, name: Optional[str] = None):
+        self.directory = directory
+        self.interval = interval
+        self.stats = stats
+        self.name = name or str(os.getpid())
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.started = time.time()
+        self.tracker = StatusTracker()
+        self._next_dump = time.monotonic() + interval
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        self.record(outcome.get_result(), call)
+
+    def record(self, report, call):
+        """逐阶段传入报告，用例 teardown 结束时计数"""
+        finished = self.tracker.update(report, call)
+        if finished is None:
+            return
+        self.counts[finished[0]] = self.counts.get(finished[0], 0) + 1
+        if time.monotonic() >= self._next_dump:
+            self.dump()
+
+    def pytest_sessionfinish(self, session):
+        self.dump()
+
+    def snapshot(self) -> dict:
+        stats = self.stats or timing_middleware.timing_stats
+        endpoints = {endpoint_id: {"calls": timing.calls, "errors": timing.errors,
+                                   "total": timing.phases["total"].to_dict()}
+                     for endpoint_id, timing in list(stats.endpoints.items())}
+        return {"run_id": os.environ.get(RUN_ID_ENV), "started": self.started, "updated": time.time(),
+                "counts": dict(self.counts), "endpoints": endpoints}
+
+    def dump(self):
+        self._next_dump = time.monotonic() + self.interval
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"progress-{self.name}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.snapshot()))
+        os.replace(f"{path}.tmp", path)
+
+
+class Progress:
+    """合并后的运行进度"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.started: Optional[float] = None
+        self.updated: Optional[float] = None
+        self.calls = 0
+        self.errors = 0
+        self.endpoints: Dict[str, dict] = {}
+        # 由 ProgressReporter 按相邻两次合并的差值计算
+        self.tests_per_min = 0.0
+        self.requests_per_sec = 0.0
+
+    @property
+    def finished(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def elapsed(self) -> float:
+        return (self.updated or 0) - (self.started or 0)
+
+    def slowest(self, limit: int = 5) -> List[dict]:
+        """按 p99 从慢到快的接口"""
+        rows = [{"endpoint_id": endpoint_id, "calls": data["calls"], "errors": data["errors"],
+                 "p50_ms": data["total"].percentile(50) * 1000, "p99_ms": data["total"].percentile(99) * 1000}
+                for endpoint_id, data in self.endpoints.items() if data["total"].total]
+        return sorted(rows, key=lambda row: -row["p99_ms"])[:limit]
+
+
+def merge_progress(directory: str = PROGRESS_DIR, run_id: Optional[str] = None) -> Progress:
+    """合并各测试进程的快照，只取 run_id 对应的运行"""
+    progress = Progress()
+    for path in sorted(glob.glob(os.path.join(directory, "progress-*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if run_id and snapshot.get("run_id") not in (None, run_id):
+            continue
+        for status, count in snapshot["counts"].items():
+            progress.counts[status] = progress.counts.get(status, 0) + count
+        progress.started = min(filter(None, (progress.started, snapshot["started"])))
+        progress.updated = max(filter(None, (progress.updated, snapshot["updated"])))
+        for endpoint_id, data in snapshot["endpoints"].items():
+            merged = progress.endpoints.setdefault(endpoint_id, {"calls": 0, "errors": 0,
+                                                                 "total": LatencyHistogram()})
+            merged["calls"] += data["calls"]
+            merged["errors"] += data["errors"]
+            merged["total"].merge(LatencyHistogram.from_dict(data["total"]))
+            progress.calls += data["calls"]
+            progress.errors += data["errors"]
+    return progress
+
+
+class ProgressReporter:
+    """后台线程：定时合并进度并更新飞书卡片"""
+
+    def __init__(self, notifier: Optional[Notifier] = None, interval: Optional[float] = None,
+                 directory: str = PROGRESS_DIR):
+        self.interval = progress_interval() if interval is None else interval
+        self.directory = directory
+        self._notifier = notifier
+        self.run_id: Optional[str] = None
+        self.sink: Optional[str] = None
+        self._last: Optional[Progress] = None
+        self._last_time = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def start(self) -> "ProgressReporter":
+        if not self.enabled:
+            return self
+        self._notifier = self._notifier or get_notifier()
+        if "feishu_app" not in self._notifier.sinks:
+            # webhook 无法更新已发出的消息，定时发送只会刷屏
+            console.print(f"[yellow]运行进度卡片需要飞书应用凭证 {'/'.join(FEISHU_APP_ENVS)}，未配置，不推送进度[/yellow]")
+            self.interval = 0
+            return self
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.run_id = current_run_id()
+        self.sink = "feishu_app"
+        self._thread = threading.Thread(target=self._run, name="progress-reporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except Exception as e:
+                console.print(f"[red]更新运行进度失败: {e}[/red]")
+
+    def collect(self) -> Progress:
+        progress = merge_progress(self.directory, self.run_id)
+        # 用例数以结果缓冲区的实时汇总为准，快照最多滞后 SNAPSHOT_INTERVAL 秒
+        live = live_summary()
+        if live:
+            progress.counts = {status: live["stats"][status] for status in STATUSES}
+        now = time.monotonic()
+        if self._last is not None and now > self._last_time:
+            minutes = (now - self._last_time) / 60
+            progress.tests_per_min = (progress.finished - self._last.finished) / minutes
+            progress.requests_per_sec = (progress.calls - self._last.calls) / (minutes * 60)
+        elif progress.elapsed > 0:
+            progress.tests_per_min = progress.finished / (progress.elapsed / 60)
+            progress.requests_per_sec = progress.calls / progress.elapsed
+        self._last, self._last_time = progress, now
+        return progress
+
+    def publish(self, finished: bool = False) -> Optional[Progress]:
+        """合并进度并加入通知队列；尚无用例完成时不发送"""
+        from Tools.feishu_bot import build_progress_card
+        progress = self.collect()
+        if not progress.finished:
+            return None
+        self._notifier.notify(self.sink, build_progress_card(progress, finished), key=f"progress:{self.run_id}")
+        return progress
+
+    def stop(self):
+        """停止定时更新，把卡片置为已完成"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.publish(finished=True)
@@ -0,0 +1,293 @@
+"""
+客户端限流：按接口类别(公共配置 public / 私有账户 private / 下单撤单 order)分配令牌桶预算，
+同一 API key 的所有进程通过 database/ 下的共享内存文件(mmap + 文件锁)协调
+
+- 令牌桶按 GCRA 实现：每次取令牌原子地预约下一个可用时刻，调用方按预约顺序排队等待，
+  跨进程、跨线程先到先得，不轮询也不会饿死；拿不到令牌时等待而不是失败
+- 收到 429 时按 Retry-After(缺省 1 秒)推迟该类别后续所有预约，并重新排队重发
+- 等待时间按类别记录：进程内为延迟直方图，跨进程累计写在共享文件中，python run.py ratelimit 查看
+
+预算由环境变量 APEX_RATE_LIMITS 配置，如 "order=5,private=10:20,public=20"(每秒请求数[:突发数])，off 关闭；
+create_api_client 在非回放模式下为 api_client 的 session 挂载限流适配器
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+from rich.console import Console
+from rich.table import Table
+
+from Tools.latency import LatencyHistogram
+from Tools.shared_map import SharedMapping
+
+console = Console()
+
+LIMITS_ENV = "APEX_RATE_LIMITS"
+STATE_DIR = "database"
+PUBLIC, PRIVATE, ORDER = "public", "private", "order"
+# 每秒请求数, 突发数
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    PUBLIC: (20.0, 20.0),
+    PRIVATE: (10.0, 10.0),
+    ORDER: (5.0, 5.0),
+}
+PUBLIC_PATHS = ("/v3/symbols", "/v3/time", "/v3/depth", "/v3/trades", "/v3/klines", "/v3/ticker",
+                "/v3/history-funding")
+MAX_RETRIES = 3
+DEFAULT_RETRY_AFTER = 1.0
+# 预约时刻超出当前时间太多视为残留状态(如系统时钟回拨)，重新计时
+MAX_HORIZON = 3600.0
+
+MAGIC = b"APEXRL01"
+SLOTS = 16
+# 类别名, 理论到达时刻(TAT), 取令牌次数, 等待次数, 等待总时长, 最长等待
+SLOT = struct.Struct("<24sdQQdd")
+HEADER_SIZE = len(MAGIC)
+FILE_SIZE = HEADER_SIZE + SLOTS * SLOT.size
+
+
+def classify(method: str, path: str) -> str:
+    """按请求路径归类：写操作且路径含 order 为下单撤单，行情与配置为公共接口，其余为私有接口"""
+    path = path.split("?", 1)[0]
+    if method.upper() != "GET" and "order" in path:
+        return ORDER
+    if path.endswith(PUBLIC_PATHS):
+        return PUBLIC
+    return PRIVATE
+
+
+def parse_limits(value: Optional[str]) -> Optional[Dict[str, Tuple[float, float]]]:
+    """解析 APEX_RATE_LIMITS；未设置时用默认预算，off 返回 None"""
+    if value is None or not value.strip():
+        return dict(DEFAULT_LIMITS)
+    if value.strip().lower() == "off":
+        return None
+    limits = dict(DEFAULT_LIMITS)
+    for part in value.split(","):
+        name, _, spec = part.strip().partition("=")
+        rate, _, burst = spec.partition(":")
+        try:
+            rate, burst = float(rate), float(burst or rate)
+        except ValueError:
+            raise ValueError(f"无法解析限流配置: {part}") from None
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"限流配置需要正的速率且突发数不小于 1: {part}")
+        limits[name.strip()] = (rate, burst)
+    return limits
+
+
+def state_path(api_key: str = "", directory: str = STATE_DIR) -> str:
+    """共享状态文件：预算按 API key 计，不同 key 使用不同文件"""
+    digest = hashlib.sha1(api_key.encode()).hexdigest()[:12]
+    return os.path.join(directory, f"rate_limit_{digest}.bin")
+
+
+class SharedBuckets(SharedMapping):
+    """mmap 映射的共享状态文件，读写都在文件锁内"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        super().__init__(path)
+
+    def _map_file(self, fd: int, create: bool) -> mmap.mmap:
+        if os.fstat(fd).st_size < FILE_SIZE:
+            os.ftruncate(fd, FILE_SIZE)
+        mapped = mmap.mmap(fd, FILE_SIZE)
+        if mapped[:HEADER_SIZE] != MAGIC:
+            mapped[:] = bytes(FILE_SIZE)
+            mapped[:HEADER_SIZE] = MAGIC
+        self._slots: Dict[str, int] = {}
+        return mapped
+
+    def _slot(self, name: str) -> int:
+        """类别所在槽位的偏移，首次使用时占用空槽；调用方持有锁"""
+        encoded = name.encode()[:24].ljust(24, b"\0")
+        offset = self._slots.get(name)
+        # 其他进程 reset 后缓存的偏移可能已失效
+        if offset is not None and self._map[offset:offset + 24] == encoded:
+            return offset
+        for i in range(SLOTS):
+            offset = HEADER_SIZE + i * SLOT.size
+            current = self._map[offset:offset + 24]
+            if current == encoded or current == bytes(24):
+                if current != encoded:
+                    SLOT.pack_into(self._map, offset, encoded, 0.0, 0, 0, 0.0, 0.0)
+                self._slots[name] = offset
+                return offset
+        raise RuntimeError(f"限流状态文件 {self.path} 的槽位已用完")
+
+    def reserve(self, name: str, interval: float, tolerance: float, now: float) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._locked():
+            offset = self._slot(name)
+            _, tat, acquired, waited, wait_total, wait_max = SLOT.unpack_from(self._map, offset)
+            if tat - now > MAX_HORIZON:
+                tat = now
+            wait = max(0.0, tat - tolerance - now)
+            tat = max(tat, now) + interval
+            SLOT.pack_into(self._map, offset, name.encode()[:24], tat, acquired + 1, waited + (wait > 0),
+                           wait_total + wait, max(wait_max, wait))
+            return wait
+
+    def delay(self, name: str, until: float):
+        """把类别的预约时刻推迟到 until 之后(收到 429 时)"""
+        with self._locked():
+            offset = self._slot(name)
+            values = list(SLOT.unpack_from(self._map, offset))
+            values[1] = max(values[1], until)
+            SLOT.pack_into(self._map, offset, *values)
+
+    def read(self) -> Dict[str, dict]:
+        """各类别的跨进程累计统计"""
+        with self._locked():
+            stats = {}
+            for i in range(SLOTS):
+                name, tat, acquired, waited, wait_total, wait_max = SLOT.unpack_from(
+                    self._map, HEADER_SIZE + i * SLOT.size)
+                if name != bytes(24):
+                    stats[name.rstrip(b"\0").decode()] = {"acquired": acquired, "waited": waited,
+                                                          "wait_total_s": wait_total, "wait_max_s": wait_max}
+            return stats
+
+    def reset(self):
+        with self._locked():
+            self._map[HEADER_SIZE:] = bytes(FILE_SIZE - HEADER_SIZE)
+            self._slots.clear()
+
+
+class RateLimiter:
+    """按类别的跨进程令牌桶"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None, path: Optional[str] = None):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.buckets = SharedBuckets(path or state_path())
+        # 本进程内各类别的等待时间分布
+        self.waits: Dict[str, LatencyHistogram] = {}
+
+    def acquire(self, name: str) -> float:
+        """取一个令牌，按预约顺序等待，返回等待的秒数；未配置预算的类别不限流"""
+        if name not in self.limits:
+            return 0.0
+        rate, burst = self.limits[name]
+        interval = 1.0 / rate
+        wait = self.buckets.reserve(name, interval, (burst - 1) * interval, time.time())
+        if wait > 0:
+            time.sleep(wait)
+        histogram = self.waits.get(name)
+        if histogram is None:
+            histogram = self.waits.setdefault(name, LatencyHistogram())
+        histogram.record(wait)
+        return wait
+
+    def back_off(self, name: str, seconds: float):
+        """服务端限流时，该类别之后的预约都推迟 seconds 秒"""
+        if name in self.limits:
+            rate, burst = self.limits[name]
+            self.buckets.delay(name, time.time() + seconds + (burst - 1) / rate)
+
+    def stats(self) -> Dict[str, dict]:
+        """本进程各类别的等待统计(毫秒)"""
+        return _wait_stats(self.waits)
+
+
+def _wait_stats(waits: Dict[str, LatencyHistogram]) -> Dict[str, dict]:
+    return {name: {**histogram.summary(), "wait_total_ms": histogram.sum * 1000} for name, histogram in waits.items()}
+
+
+def retry_after(response: requests.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER)))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+class RateLimitedAdapter(BaseAdapter):
+    """requests 传输适配器：发送前按类别取令牌，429 时推迟该类别并重新排队，最多重试 MAX_RETRIES 次"""
+
+    def __init__(self, limiter: RateLimiter, inner: BaseAdapter, max_retries: int = MAX_RETRIES):
+        super().__init__()
+        self.limiter = limiter
+        self.inner = inner
+        self.max_retries = max_retries
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        name = classify(request.method, request.path_url)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(name)
+            response = self.inner.send(request, **kwargs)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            self.limiter.back_off(name, retry_after(response))
+            response.close()
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+# 状态文件路径 -> 限流器，同一 API key 的客户端共享一个
+_limiters: Dict[str, RateLimiter] = {}
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str = "") -> Optional[RateLimiter]:
+    """进程内按 API key 共享的限流器，APEX_RATE_LIMITS=off 时返回 None"""
+    limits = parse_limits(os.environ.get(LIMITS_ENV))
+    if limits is None:
+        return None
+    path = state_path(api_key)
+    with _limiter_lock:
+        limiter = _limiters.get(path)
+        if limiter is None:
+            limiter = _limiters[path] = RateLimiter(limits, path)
+        return limiter
+
+
+def rate_limit_stats() -> Dict[str, dict]:
+    """本进程各限流器按类别合并的等待统计，未启用时为空"""
+    waits: Dict[str, LatencyHistogram] = {}
+    for limiter in list(_limiters.values()):
+        for name, histogram in list(limiter.waits.items()):
+            waits.setdefault(name, LatencyHistogram()).merge(histogram)
+    return _wait_stats(waits)
+
+
+def install_rate_limiter(session: requests.Session, api_key: str = "",
+                         limiter: Optional[RateLimiter] = None) -> Optional[RateLimitedAdapter]:
+    """为 session 当前的传输适配器套上限流"""
+    limiter = limiter or get_rate_limiter(api_key)
+    if limiter is None:
+        return None
+    adapter = RateLimitedAdapter(limiter, session.get_adapter("https://"))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python run.py ratelimit", description="查看各进程累计的限流等待")
+    parser.add_argument("--api-key", default=os.environ.get("APEX_API_KEY", ""), help="默认取 APEX_API_KEY")
+    parser.add_argument("--reset", action="store_true", help="清零累计统计与预约状态")
+    args = parser.parse_args(argv)
+
+    buckets = SharedBuckets(state_path(args.api_key))
+    if args.reset:
+        buckets.reset()
+        console.print(f"[green]已清零 {buckets.path}[/green]")
+        return
+    limits = parse_limits(os.environ.get(LIMITS_ENV)) or {}
+    table = Table(title=f"限流等待 ({buckets.path})", show_header=True, header_style="bold magenta")
+    for column in ("类别", "预算(次/秒:突发)", "取令牌", "等待次数", "等待总时长(s)", "最长等待(ms)"):
+        table.add_column(column)
+    for name, row in buckets.read().items():
+        rate, burst = limits.get(name, (0, 0))
+        table.add_row(name, f"{rate:g}:{burst:g}" if rate else "-", str(row["acquired"]), str(row["waited"]),
+                      f"{row['wait_total_s']:.2f}", f"{row['wait_max_s'] * 1000:.1f}")
+    console.print(table)
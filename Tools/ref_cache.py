@@ -0,0 +1,121 @@
+"""
+参考数据缓存：configs_v3 / get_account_v3 结果按TTL缓存，进程内优先，
+并写入运行数据库(database/run_data.db)的 cache 表供多进程下的其他worker复用，不写入纳入版本管理的 aomaker.db
+"""
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 跨worker共享的记录统一写在该worker名下
+SHARED_WORKER = "_shared"
+VAR_PREFIX = "_ref_cache."
+
+# 各接口默认TTL(秒)：交易对配置几乎不变，账户信息较短
+DEFAULT_TTLS = {
+    "configs_v3": 300,
+    "get_account_v3": 60,
+}
+
+
+class ReferenceCache:
+    """带TTL与显式失效的参考数据缓存"""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, store=None):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._store = store
+        self._local: Dict[str, Tuple[float, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            from aomaker.storage import Cache
+            from Tools.storage import run_db_path
+            self._store = Cache(run_db_path())
+        return self._store
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Optional[Any]:
+        """读取未过期的缓存，先查进程内再查cache表"""
+        now = time.time()
+        entry = self._local.get(name)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        rows = self.store.query(
+            f"SELECT value FROM {self.store.table} WHERE var_name = ? AND worker = ?",
+            (VAR_PREFIX + name, SHARED_WORKER),
+        )
+        if not rows:
+            return None
+        try:
+            record = json.loads(rows[0]["value"])
+        except (KeyError, TypeError, json.JSONDecodeError):
+            return None
+        if record.get("expires_at", 0) <= now:
+            return None
+        self._local[name] = (record["expires_at"], record["value"])
+        return record["value"]
+
+    def set(self, name: str, value: Any):
+        expires_at = time.time() + self.ttls.get(name, 0)
+        self._local[name] = (expires_at, value)
+        data = {
+            "var_name": VAR_PREFIX + name,
+            "value": json.dumps({"expires_at": expires_at, "value": value}),
+            "worker": SHARED_WORKER,
+        }
+        self.store.upsert_data(self.store.table, data, conflict_target="var_name, worker")
+
+    def invalidate(self, name: Optional[str] = None):
+        """使指定接口(缺省为全部)的缓存失效"""
+        names = [name] if name else list(self.ttls)
+        for item in names:
+            self._local.pop(item, None)
+            self.store.delete_data(self.store.table, where={"var_name": VAR_PREFIX + item, "worker": SHARED_WORKER})
+
+    def get_or_fetch(self, name: str, fetch: Callable[[], Any]) -> Any:
+        value = self.get(name)
+        if value is not None:
+            return value
+        # 同一进程内并发未命中时只请求一次
+        with self._lock_for(name):
+            value = self.get(name)
+            if value is None:
+                value = fetch()
+                if value is not None:
+                    self.set(name, value)
+        return value
+
+
+def enable_reference_cache(client, cache: Optional[ReferenceCache] = None) -> ReferenceCache:
+    """为客户端的 configs_v3 / get_account_v3 加上缓存，命中时同样更新客户端上的配置与账户属性"""
+    cache = cache or ReferenceCache()
+    configs_v3 = client.configs_v3
+    get_account_v3 = client.get_account_v3
+
+    def cached_configs_v3(**kwargs):
+        if kwargs:
+            return configs_v3(**kwargs)
+        configs = cache.get_or_fetch("configs_v3", configs_v3)
+        client.configV3 = configs["data"]
+        return configs
+
+    def cached_get_account_v3(**kwargs):
+        if kwargs:
+            return get_account_v3(**kwargs)
+        account = cache.get_or_fetch("get_account_v3", get_account_v3)
+        if account is not None:
+            client.accountV3 = account
+            client.default_address = account.get("ethereumAddress")
+        return account
+
+    client.configs_v3 = cached_configs_v3
+    client.get_account_v3 = cached_get_account_v3
+    client.ref_cache = cache
+    return cache
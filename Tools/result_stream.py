@@ -0,0 +1,284 @@
+"""
+多进程运行时的用例结果实时汇总：各测试进程把每条用例的结果与耗时写入共享内存环形缓冲区，
+run_tests 主进程中的 ResultAggregator 后台线程持续取出并累计，运行中即可得到总数，结束时无需再读回结果文件合并
+
+- 环形缓冲区是 /dev/shm 下的 mmap 文件(没有 /dev/shm 时放在临时目录)，路径经环境变量 APEX_RESULT_STREAM 传给测试进程；
+  每条记录定长 256 字节(序号、开始时间、耗时、pid、状态、nodeid)，写入与取出都在文件锁内，只拷贝一条记录
+- 缓冲区满时写入方等待汇总线程取走，超过 PUBLISH_TIMEOUT 仍无空位则丢弃并计数，汇总中 dropped 非零表示总数不完整
+- ResultStreamWriter(pytest 插件)由 conftest 在设置了 APEX_RESULT_STREAM 时注册；
+  run.py、Tools/feishu_bot.py 通过 live_summary() 读取汇总，格式与 reports/results.jsonl 的首行一致
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from aomaker.utils.gen_allure_report import time_format, timestamp_to_standard
+from rich.console import Console
+from rich.table import Table
+
+from Tools.shared_map import SharedMapping
+
+console = Console()
+
+STREAM_ENV = "APEX_RESULT_STREAM"
+DEFAULT_CAPACITY = 4096
+# 汇总线程取记录的间隔(秒)
+DRAIN_INTERVAL = 0.2
+# 缓冲区满时写入方最多等待的时长(秒)
+PUBLISH_TIMEOUT = 2.0
+STATUSES = ("passed", "failed", "broken", "skipped", "unknown")
+
+MAGIC = b"APEXRS01"
+# 魔数, 容量, 已写入序号, 已取出序号, 丢弃数
+HEADER = struct.Struct("<8sQQQQ")
+HEADER_SIZE = 64
+# 序号, 开始时间, 耗时, pid, 状态, nodeid 长度, nodeid
+RECORD = struct.Struct("<QddIBH225s")
+NODEID_SIZE = 225
+
+
+def stream_path() -> Optional[str]:
+    return os.environ.get(STREAM_ENV) or None
+
+
+def _default_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"apex_results_{os.getpid()}_{int(time.time() * 1000)}.ring")
+
+
+class ResultRing(SharedMapping):
+    """定长记录的共享环形缓冲区：多个进程写入，一个进程取出"""
+    mode = 0o600
+
+    def __init__(self, path: str, capacity: Optional[int] = None):
+        """capacity 不为空时创建(或清空)缓冲区，否则打开已有的缓冲区"""
+        self._capacity = capacity
+        super().__init__(path, create=bool(capacity))
+
+    def _map_file(self, fd: int, create: bool) -> mmap.mmap:
+        if create:
+            size = HEADER_SIZE + self._capacity * RECORD.size
+            os.ftruncate(fd, size)
+            mapped = mmap.mmap(fd, size)
+            HEADER.pack_into(mapped, 0, MAGIC, self._capacity, 0, 0, 0)
+        else:
+            mapped = mmap.mmap(fd, os.fstat(fd).st_size)
+            if mapped[:len(MAGIC)] != MAGIC:
+                mapped.close()
+                raise ValueError(f"{self.path} 不是结果缓冲区")
+        self.capacity = HEADER.unpack_from(mapped, 0)[1]
+        return mapped
+
+    def publish(self, nodeid: str, status: str, start: float, duration: float,
+                timeout: float = PUBLISH_TIMEOUT) -> bool:
+        """写入一条结果，缓冲区满时等待取出；超时仍未写入返回 False 并计入丢弃数"""
+        encoded = nodeid.encode()[:NODEID_SIZE]
+        code = STATUSES.index(status) if status in STATUSES else len(STATUSES) - 1
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._locked():
+                magic, capacity, written, read, dropped = HEADER.unpack_from(self._map, 0)
+                if written - read < capacity:
+                    offset = HEADER_SIZE + (written % capacity) * RECORD.size
+                    RECORD.pack_into(self._map, offset, written, start, duration, os.getpid(), code,
+                                     len(encoded), encoded)
+                    HEADER.pack_into(self._map, 0, magic, capacity, written + 1, read, dropped)
+                    return True
+                if time.monotonic() >= deadline:
+                    HEADER.pack_into(self._map, 0, magic, capacity, written, read, dropped + 1)
+                    return False
+            time.sleep(0.001)
+
+    def consume(self, limit: Optional[int] = None) -> List[dict]:
+        """取出已写入的记录(按写入顺序)"""
+        with self._locked():
+            magic, capacity, written, read, dropped = HEADER.unpack_from(self._map, 0)
+            end = written if limit is None else min(written, read + limit)
+            records = []
+            for seq in range(read, end):
+                _, start, duration, pid, code, length, nodeid = RECORD.unpack_from(
+                    self._map, HEADER_SIZE + (seq % capacity) * RECORD.size)
+                records.append({"nodeid": nodeid[:length].decode(errors="ignore"), "status": STATUSES[code],
+                                "start": start, "duration": duration, "pid": pid})
+            HEADER.pack_into(self._map, 0, magic, capacity, written, end, dropped)
+            return records
+
+    def dropped(self) -> int:
+        with self._locked():
+            return HEADER.unpack_from(self._map, 0)[4]
+
+
+class StatusTracker:
+    """按 allure 的方式判定用例状态(断言失败为 failed，其它异常及 setup/teardown 出错为 broken)；
+    逐阶段传入报告，teardown 时返回 (状态, 开始时间, 各阶段总耗时)"""
+
+    def __init__(self):
+        self._tests: Dict[str, list] = {}
+
+    def update(self, report, call) -> Optional[Tuple[str, float, float]]:
+        state = self._tests.setdefault(report.nodeid, [None, call.start, 0.0])
+        state[2] += report.duration
+        if report.when == "setup" and not report.passed:
+            state[0] = "skipped" if report.skipped else "broken"
+        elif report.when == "call":
+            if report.passed or report.skipped:
+                state[0] = "skipped" if report.skipped else "passed"
+            else:
+                state[0] = "failed" if call.excinfo is not None and call.excinfo.errisinstance(AssertionError) \
+                    else "broken"
+        elif report.when == "teardown":
+            status, start, duration = self._tests.pop(report.nodeid)
+            if report.failed and status in (None, "passed"):
+                status = "broken"
+            return status or "unknown", start, duration
+        return None
+
+
+class ResultStreamWriter:
+    """pytest 插件：每条用例在 teardown 结束时写一条结果，状态判定见 StatusTracker"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.ring = ResultRing(path or stream_path())
+        self.tracker = StatusTracker()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        finished = self.tracker.update(report, call)
+        if finished is not None:
+            self.ring.publish(report.nodeid, *finished)
+
+
+class ResultSummary:
+    """按状态累计的实时汇总"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.start: Optional[float] = None
+        self.stop: Optional[float] = None
+        self.sum_duration = 0.0
+        self.failures: List[str] = []
+        self.workers = set()
+        self.dropped = 0
+
+    def add(self, record: dict):
+        self.counts[record["status"]] += 1
+        stop = record["start"] + record["duration"]
+        self.start = record["start"] if self.start is None else min(self.start, record["start"])
+        self.stop = stop if self.stop is None else max(self.stop, stop)
+        self.sum_duration += record["duration"]
+        self.workers.add(record["pid"])
+        if record["status"] in ("failed", "broken"):
+            self.failures.append(record["nodeid"])
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def to_dict(self, run_id: Optional[str] = None) -> dict:
+        """与 reports/results.jsonl 首行相同的格式"""
+        stats = dict(self.counts, total=self.total)
+        summary = {"run_id": run_id, "stats": stats,
+                   "pass_rate": round(stats["passed"] / stats["total"] * 100, 2) if stats["total"] else 0,
+                   "workers": len(self.workers), "dropped": self.dropped, "failures": list(self.failures)}
+        if self.start is not None:
+            start_ms, stop_ms = int(self.start * 1000), int(self.stop * 1000)
+            summary["time"] = {"start": timestamp_to_standard(start_ms), "end": timestamp_to_standard(stop_ms),
+                               "duration": time_format((stop_ms - start_ms) / 1000), "start_ms": start_ms,
+                               "stop_ms": stop_ms, "duration_ms": stop_ms - start_ms,
+                               "sum_duration_ms": int(self.sum_duration * 1000)}
+        return summary
+
+
+class ResultAggregator:
+    """主进程中的汇总线程：创建缓冲区并通过环境变量交给之后启动的测试进程，定时取出记录累计"""
+
+    def __init__(self, path: Optional[str] = None, capacity: int = DEFAULT_CAPACITY,
+                 interval: float = DRAIN_INTERVAL, run_id: Optional[str] = None):
+        self.path = path or _default_path()
+        self.capacity = capacity
+        self.interval = interval
+        self.run_id = run_id
+        self.ring: Optional[ResultRing] = None
+        self._summary = ResultSummary()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ResultAggregator":
+        global _current
+        self.ring = ResultRing(self.path, self.capacity)
+        os.environ[STREAM_ENV] = self.path
+        self._thread = threading.Thread(target=self._run, name="result-aggregator", daemon=True)
+        self._thread.start()
+        _current = self
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.drain()
+
+    def drain(self) -> int:
+        records = self.ring.consume()
+        with self._lock:
+            for record in records:
+                self._summary.add(record)
+            self._summary.dropped = self.ring.dropped()
+        return len(records)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return self._summary.to_dict(self.run_id)
+
+    def stop(self) -> dict:
+        """取完剩余记录，删除缓冲区，返回最终汇总"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self.ring is not None:
+            self.drain()
+            self.ring.close()
+            self.ring = None
+            if os.environ.get(STREAM_ENV) == self.path:
+                del os.environ[STREAM_ENV]
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        return self.summary()
+
+    def __enter__(self) -> "ResultAggregator":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+_current: Optional[ResultAggregator] = None
+
+
+def live_summary() -> Optional[dict]:
+    """本进程最近一次运行的实时汇总，没有汇总或尚无用例完成时返回 None"""
+    if _current is None:
+        return None
+    summary = _current.summary()
+    return summary if summary["stats"]["total"] else None
+
+
+def print_summary(summary: dict):
+    stats = summary["stats"]
+    table = Table(title=f"用例结果 ({summary['workers']} 个测试进程)", show_header=True, header_style="bold magenta")
+    for column in ("总数", "通过", "失败", "阻塞", "跳过", "通过率", "耗时"):
+        table.add_column(column)
+    table.add_row(str(stats["total"]), str(stats["passed"]), str(stats["failed"]), str(stats["broken"]),
+                  str(stats["skipped"]), f"{summary['pass_rate']}%", (summary.get("time") or {}).get("duration", "-"))
+    console.print(table)
+    if summary["dropped"]:
+        console.print(f"[yellow]结果缓冲区满，{summary['dropped']} 条结果未计入[/yellow]")
@@ -0,0 +1,252 @@
+"""
+按运行保存接口统计：在 statistics 表(运行数据库 database/run_data.db，与 aomaker 的表结构相同)上扩展运行维度，每次运行每个接口一行，
+记录调用数、错误数、收发字节数与完整延迟直方图；提供跨运行对比的查询接口与命令行
+
+数据在运行中只累积在进程内（见 middlewares/timing_middleware.py），运行结束时由主进程一次性批量写入，
+请求路径上不访问 SQLite
+
+python run.py stats runs
+python run.py stats compare 20240601-000000 20240602-000000 --threshold 0.1
+python run.py stats compare            # 对比最近两次运行
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from aomaker.database.sqlite import lock
+from aomaker.storage import Stats
+from rich.console import Console
+from rich.table import Table
+
+from middlewares.timing_middleware import EndpointTiming, TimingStats
+from Tools.latency import LatencyHistogram
+from Tools.storage import run_db_path
+
+console = Console()
+
+RUN_ID_ENV = "APEX_RUN_ID"
+
+# aomaker 原表只有 (package, api_name)，arun gen stats 写入的接口清单行 run_id 为空
+RUN_COLUMNS = {
+    "run_id": "TEXT",
+    "endpoint_id": "TEXT",
+    "calls": "INTEGER DEFAULT 0",
+    "errors": "INTEGER DEFAULT 0",
+    "bytes_in": "INTEGER DEFAULT 0",
+    "bytes_out": "INTEGER DEFAULT 0",
+    "p50_ms": "REAL",
+    "p99_ms": "REAL",
+    "histogram": "TEXT",
+    "created_at": "TIMESTAMP",
+}
+
+
+def current_run_id() -> str:
+    """本次运行的ID：取环境变量 APEX_RUN_ID，未设置时按启动时间生成并写回环境变量，子进程沿用"""
+    run_id = os.environ.get(RUN_ID_ENV)
+    if not run_id:
+        run_id = os.environ[RUN_ID_ENV] = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return run_id
+
+
+class RunStats(Stats):
+    """statistics 表的运行维度读写"""
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or run_db_path())
+
+    def create_table(self):
+        super().create_table()
+        existing = {row["name"] for row in self.query(f"PRAGMA table_info({self.table})")}
+        for column, column_type in RUN_COLUMNS.items():
+            if column not in existing:
+                self.execute_sql(f"ALTER TABLE {self.table} ADD COLUMN {column} {column_type}")
+        self.execute_sql(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_run ON {self.table} (run_id, endpoint_id)")
+
+    def save_run(self, run_id: str, stats: TimingStats) -> int:
+        """在一个事务内写入（覆盖）一次运行的全部接口统计，返回写入行数"""
+        created_at = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for endpoint_id, timing in stats.endpoints.items():
+            total = timing.phases["total"]
+            rows.append((
+                timing.package, timing.api_name, run_id, endpoint_id, timing.calls, timing.errors,
+                timing.bytes_in, timing.bytes_out, total.percentile(50) * 1000, total.percentile(99) * 1000,
+                json.dumps({phase: hist.to_dict() for phase, hist in timing.phases.items()}), created_at,
+            ))
+        columns = ("package", "api_name") + tuple(RUN_COLUMNS)
+        sql = f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        with lock, self.connection:
+            self.connection.execute(f"DELETE FROM {self.table} WHERE run_id = ?", (run_id,))
+            self.connection.executemany(sql, rows)
+        return len(rows)
+
+    def runs(self, limit: int = 20) -> List[Dict]:
+        """最近的运行，按时间倒序"""
+        return self.query(
+            f"""SELECT run_id, MIN(created_at) AS created_at, COUNT(*) AS endpoints,
+                       SUM(calls) AS calls, SUM(errors) AS errors
+                FROM {self.table} WHERE run_id IS NOT NULL
+                GROUP BY run_id ORDER BY created_at DESC, run_id DESC LIMIT ?""",
+            (limit,),
+        )
+
+    def load_run(self, run_id: str) -> TimingStats:
+        """读回一次运行的统计，直方图可继续合并或求任意分位数"""
+        stats = TimingStats()
+        rows = self.query(f"SELECT * FROM {self.table} WHERE run_id = ?", (run_id,))
+        for row in rows:
+            timing = EndpointTiming(row["package"] or "", row["api_name"] or "")
+            timing.calls, timing.errors = row["calls"], row["errors"]
+            timing.bytes_in, timing.bytes_out = row["bytes_in"], row["bytes_out"]
+            for phase, hist in json.loads(row["histogram"] or "{}").items():
+                timing.phases[phase] = LatencyHistogram.from_dict(hist)
+            stats.endpoints[row["endpoint_id"]] = timing
+        return stats
+
+    def delete_run(self, run_id: str):
+        self.del_by_condition({"run_id": run_id})
+
+
+class EndpointDiff:
+    """单个接口在两次运行间的对比"""
+
+    def __init__(self, endpoint_id: str, base: Optional[EndpointTiming], head: Optional[EndpointTiming],
+                 percentile: float):
+        self.endpoint_id = endpoint_id
+        self.base = base
+        self.head = head
+        self.base_ms = self._value(base, percentile)
+        self.head_ms = self._value(head, percentile)
+
+    @staticmethod
+    def _value(timing: Optional[EndpointTiming], percentile: float) -> Optional[float]:
+        if timing is None or not timing.phases["total"].total:
+            return None
+        return timing.phases["total"].percentile(percentile) * 1000
+
+    @property
+    def change(self) -> Optional[float]:
+        """相对变化，0.1 表示变慢 10%"""
+        if not self.base_ms or self.head_ms is None:
+            return None
+        return self.head_ms / self.base_ms - 1
+
+    def is_regression(self, threshold: float, min_delta_ms: float) -> bool:
+        change = self.change
+        return (change is not None and change > threshold
+                and self.head_ms - self.base_ms >= min_delta_ms)
+
+
+def compare_runs(base: TimingStats, head: TimingStats, percentile: float = 99) -> List[EndpointDiff]:
+    """逐接口对比两次运行的总耗时分位数，按变化幅度从大到小排序"""
+    endpoint_ids = sorted(set(base.endpoints) | set(head.endpoints))
+    diffs = [EndpointDiff(endpoint_id, base.endpoints.get(endpoint_id), head.endpoints.get(endpoint_id), percentile)
+             for endpoint_id in endpoint_ids]
+    return sorted(diffs, key=lambda diff: -(diff.change if diff.change is not None else float("-inf")))
+
+
+def save_current_run(stats: TimingStats, db_path=None) -> Optional[str]:
+    """运行结束时调用：把合并后的统计写入 statistics 表"""
+    if not stats.endpoints:
+        return None
+    run_id = current_run_id()
+    store = RunStats(db_path)
+    try:
+        store.save_run(run_id, stats)
+    finally:
+        store.close()
+    return run_id
+
+
+def _print_runs(store: RunStats, limit: int):
+    table = Table(title="最近运行", show_header=True, header_style="bold magenta")
+    for column in ("run_id", "时间", "接口数", "调用数", "错误数"):
+        table.add_column(column)
+    for row in store.runs(limit):
+        table.add_row(row["run_id"], str(row["created_at"]), str(row["endpoints"]), str(row["calls"]),
+                      str(row["errors"]))
+    console.print(table)
+
+
+def _fmt_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+def _print_compare(base_id: str, head_id: str, diffs: List[EndpointDiff], args) -> int:
+    table = Table(title=f"p{args.percentile:g} 对比: {base_id} -> {head_id} (ms)", show_header=True,
+                  header_style="bold magenta")
+    for column in ("接口", base_id, head_id, "变化", "调用数", "错误数"):
+        table.add_column(column)
+    regressions = 0
+    for diff in diffs:
+        regressed = diff.is_regression(args.threshold, args.min_delta_ms)
+        regressions += regressed
+        change = "-" if diff.change is None else f"{diff.change:+.1%}"
+        style = "red" if regressed else ("green" if diff.change is not None and diff.change < -args.threshold else None)
+        head = diff.head or diff.base
+        table.add_row(diff.endpoint_id, _fmt_ms(diff.base_ms), _fmt_ms(diff.head_ms), change,
+                      str(head.calls), str(head.errors), style=style)
+    console.print(table)
+    if regressions:
+        console.print(f"[red]{regressions} 个接口 p{args.percentile:g} 变慢超过 {args.threshold:.0%}[/red]")
+    return regressions
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="run.py stats", description="按运行查询、对比接口延迟统计")
+    parser.add_argument("--db", default=None, help="数据库路径，默认 database/run_data.db")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    runs = subparsers.add_parser("runs", help="列出最近的运行")
+    runs.add_argument("--limit", type=int, default=20)
+
+    compare = subparsers.add_parser("compare", help="对比两次运行，默认最近两次")
+    compare.add_argument("base", nargs="?", help="基准运行ID")
+    compare.add_argument("head", nargs="?", help="对比运行ID")
+    compare.add_argument("--percentile", type=float, default=99, help="对比的分位数")
+    compare.add_argument("--threshold", type=float, default=0.1, help="相对变慢超过该比例视为退化")
+    compare.add_argument("--min-delta-ms", type=float, default=1.0, help="绝对变慢小于该值(ms)时忽略")
+    compare.add_argument("--endpoint", action="append", help="只对比指定 endpoint_id，可多次指定")
+    compare.add_argument("--fail-on-regression", action="store_true", help="存在退化时以非零状态码退出")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口: python run.py stats compare [base] [head]"""
+    args = _parse_args(argv)
+    store = RunStats(args.db)
+    try:
+        if args.command == "runs":
+            _print_runs(store, args.limit)
+            return 0
+
+        # 省略 head 时与最近一次运行对比，都省略时对比最近两次
+        base_id, head_id = args.base, args.head
+        recent = [row["run_id"] for row in store.runs(2)]
+        if base_id is None and len(recent) == 2:
+            head_id, base_id = recent
+        elif head_id is None and recent:
+            head_id = recent[0]
+        if base_id is None or head_id is None or base_id == head_id:
+            console.print("[yellow]statistics 表中不足两次运行，无法对比[/yellow]")
+            return 1
+        base, head = store.load_run(base_id), store.load_run(head_id)
+        for run_id, stats in ((base_id, base), (head_id, head)):
+            if not stats.endpoints:
+                console.print(f"[red]未找到运行 {run_id}[/red]")
+                return 1
+        if args.endpoint:
+            for stats in (base, head):
+                stats.endpoints = {k: v for k, v in stats.endpoints.items() if k in args.endpoint}
+        regressions = _print_compare(base_id, head_id, compare_runs(base, head, args.percentile), args)
+        return 1 if regressions and args.fail_on_regression else 0
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,415 @@
+"""
+订单生命周期场景引擎：生命周期以数据描述(testcases/test_scenario/order_lifecycles.yaml)，每个交易对一个订单簿，
+多条生命周期跨交易对在同一事件循环中并发执行，逐步骤统计延迟，结束后按交易对校验不变量
+
+步骤与 apis/mock 订单接口的对应：
+- place：CreateOrderAPI 下限价单，状态 pending
+- fill：UpdateOrderStatusAPI 成交 quantity，状态 partially_filled / filled
+- amend：改价，撤单重下：原单 cancelled，以剩余数量和新价格重新下单
+- cancel：UpdateOrderStatusAPI 撤单，状态 cancelled
+- query：GetOrdersAPI 按订单簿账户与状态查询，校验服务端状态与最近一次确认的状态一致(读己之写)
+
+生命周期在加载时按状态机离线走一遍，非法的步骤序列(终态后再成交、超量成交等)直接报错；
+运行结束后拉取每个订单簿的快照校验：确认过的订单不丢失、不重复，状态等于最后确认的状态，
+且 A 的下单确认早于 B 的下单请求时 A 在订单簿中排在 B 之前。请求出错的订单结果未知，不参与校验
+
+python run.py scenario --lifecycles 400 --concurrency 64
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import yaml
+from rich.console import Console
+from rich.table import Table
+from aomaker.core.http_client import HTTPClient
+
+from apis.mock.apis import CreateOrderAPI, GetOrdersAPI, UpdateOrderStatusAPI
+from Tools.async_http import AsyncHTTPClient
+from Tools.columnar import ColumnarList
+from Tools.latency import LatencyHistogram
+
+console = Console()
+
+DEFAULT_SCENARIO = "testcases/test_scenario/order_lifecycles.yaml"
+
+PLACE, FILL, AMEND, CANCEL, QUERY = "place", "fill", "amend", "cancel", "query"
+ACTIONS = (PLACE, FILL, AMEND, CANCEL, QUERY)
+OPEN, PARTIALLY_FILLED, FILLED, CANCELLED = "pending", "partially_filled", "filled", "cancelled"
+TERMINAL = (FILLED, CANCELLED)
+
+# 订单簿账户与订单号的起点，避开 mock 服务生成的数据
+BOOK_USER_BASE = 900000
+ORDER_ID_BASE = 10000000
+BOOK_LIMIT = 1000000
+
+
+class ScenarioError(ValueError):
+    """场景定义不合法"""
+
+
+class Step:
+    """生命周期中的一步"""
+
+    def __init__(self, action: str, price: Optional[float] = None, quantity: Optional[int] = None,
+                 expect: Optional[str] = None):
+        if action not in ACTIONS:
+            raise ScenarioError(f"未知的步骤 {action}，可选: {', '.join(ACTIONS)}")
+        self.action = action
+        self.price = price
+        self.quantity = quantity
+        self.expect = expect
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "Step":
+        try:
+            return cls(**spec)
+        except TypeError as e:
+            raise ScenarioError(f"无法解析步骤 {spec}: {e}") from None
+
+
+class OrderState:
+    """一条生命周期当前订单的本地状态，apply 按状态机推进"""
+
+    def __init__(self):
+        self.order_id: Optional[int] = None
+        self.price = 0.0
+        self.quantity = 0
+        self.filled = 0
+        self.status: Optional[str] = None
+
+    def apply(self, step: Step):
+        if step.action == PLACE:
+            if self.status is not None:
+                raise ScenarioError("每条生命周期只下一次单")
+            if not step.price or not step.quantity:
+                raise ScenarioError("place 需要 price 与 quantity")
+            self.price, self.quantity, self.status = step.price, step.quantity, OPEN
+        elif self.status is None:
+            raise ScenarioError(f"{step.action} 之前需要先 place")
+        elif step.action == QUERY:
+            if step.expect and step.expect != self.status:
+                raise ScenarioError(f"此时订单状态为 {self.status}，不会是 {step.expect}")
+        elif self.status in TERMINAL:
+            raise ScenarioError(f"订单已 {self.status}，不能再 {step.action}")
+        elif step.action == FILL:
+            if not step.quantity or self.filled + step.quantity > self.quantity:
+                raise ScenarioError(f"成交数量 {step.quantity} 超过剩余数量 {self.quantity - self.filled}")
+            self.filled += step.quantity
+            self.status = FILLED if self.filled == self.quantity else PARTIALLY_FILLED
+        elif step.action == AMEND:
+            if not step.price:
+                raise ScenarioError("amend 需要 price")
+            self.price, self.quantity, self.filled, self.status = step.price, self.quantity - self.filled, 0, OPEN
+        else:
+            self.status = CANCELLED
+
+
+class Lifecycle:
+    """一种订单生命周期：按顺序执行的步骤，weight 为被选中的相对权重"""
+
+    def __init__(self, name: str, steps: List[Step], weight: float = 1.0):
+        self.name = name
+        self.steps = steps
+        self.weight = weight
+        state = OrderState()
+        for i, step in enumerate(steps):
+            try:
+                state.apply(step)
+            except ScenarioError as e:
+                raise ScenarioError(f"{name} 第 {i + 1} 步 {step.action}: {e}") from None
+
+
+class Scenario:
+    """交易对与生命周期定义"""
+
+    def __init__(self, symbols: List[str], lifecycles: List[Lifecycle]):
+        if not symbols or not lifecycles:
+            raise ScenarioError("场景至少需要一个交易对和一条生命周期")
+        self.symbols = symbols
+        self.lifecycles = lifecycles
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SCENARIO) -> "Scenario":
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        lifecycles = [Lifecycle(name, [Step.from_dict(step) for step in spec.get("steps") or []],
+                                spec.get("weight", 1.0))
+                      for name, spec in (data.get("lifecycles") or {}).items()]
+        return cls(list(data.get("symbols") or []), lifecycles)
+
+
+class OrderRecord:
+    """订单簿中一笔订单的确认记录，序号来自引擎的全局递增计数"""
+
+    def __init__(self, order_id: int, sent: int):
+        self.order_id = order_id
+        self.sent = sent
+        self.acked: Optional[int] = None
+        self.status = OPEN
+        # 请求出错时服务端是否已执行未知
+        self.uncertain = False
+
+
+class OrderBook:
+    """一个交易对的订单簿：独立的下单账户(user_id)与该交易对全部订单的确认记录"""
+
+    def __init__(self, symbol: str, index: int):
+        self.symbol = symbol
+        self.product_id = index + 1
+        self.user_id = BOOK_USER_BASE + index
+        self.orders: Dict[int, OrderRecord] = {}
+
+
+def check_book(book: OrderBook, ids: List[int], statuses: List[str]) -> List[str]:
+    """按服务端订单簿快照(ids/statuses 为服务端顺序)校验不变量，返回违反项"""
+    violations = []
+    position: Dict[int, int] = {}
+    for i, order_id in enumerate(ids):
+        if order_id in position:
+            violations.append(f"{book.symbol}: 订单 {order_id} 重复出现")
+        elif order_id not in book.orders:
+            violations.append(f"{book.symbol}: 订单簿中出现未下过的订单 {order_id}")
+        position.setdefault(order_id, i)
+    certain = [record for record in book.orders.values() if record.acked is not None and not record.uncertain]
+    for record in certain:
+        if record.order_id not in position:
+            violations.append(f"{book.symbol}: 已确认的订单 {record.order_id} 丢失")
+        elif statuses[position[record.order_id]] != record.status:
+            violations.append(f"{book.symbol}: 订单 {record.order_id} 状态为 {statuses[position[record.order_id]]}，"
+                              f"最后确认的状态为 {record.status}")
+    # 按下单请求的顺序扫描，已确认早于该请求发出的订单都应排在它前面
+    present = [record for record in certain if record.order_id in position]
+    by_ack = sorted(present, key=lambda record: record.acked)
+    i, latest = 0, None
+    for record in sorted(present, key=lambda record: record.sent):
+        while i < len(by_ack) and by_ack[i].acked < record.sent:
+            if latest is None or position[by_ack[i].order_id] > position[latest.order_id]:
+                latest = by_ack[i]
+            i += 1
+        if latest is not None and position[latest.order_id] > position[record.order_id]:
+            violations.append(f"{book.symbol}: 订单 {latest.order_id} 先于订单 {record.order_id} 下单确认，"
+                              f"订单簿中却排在其后")
+    return violations
+
+
+class ScenarioReport:
+    """场景运行结果：逐步骤延迟与错误、生命周期完成情况及不变量违反项"""
+
+    def __init__(self):
+        self.steps: Dict[str, LatencyHistogram] = {action: LatencyHistogram() for action in ACTIONS}
+        self.errors: Dict[str, Counter] = {action: Counter() for action in ACTIONS}
+        self.lifecycles: Counter = Counter()
+        self.aborted = 0
+        self.violations: List[str] = []
+        self.elapsed = 0.0
+
+    def record(self, action: str, latency: float, error: Optional[str] = None):
+        self.steps[action].record(latency)
+        if error:
+            self.errors[action][error] += 1
+
+    @property
+    def requests(self) -> int:
+        return sum(histogram.total for histogram in self.steps.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "elapsed_s": self.elapsed,
+            "lifecycles": dict(self.lifecycles),
+            "aborted": self.aborted,
+            "steps": {action: {**histogram.summary(), "errors": dict(self.errors[action])}
+                      for action, histogram in self.steps.items() if histogram.total},
+            "violations": self.violations,
+        }
+
+    def print(self):
+        total = sum(self.lifecycles.values())
+        console.print(f"[bold cyan]生命周期: {total}（中止 {self.aborted}）  步骤: {self.requests}  "
+                      f"耗时: {self.elapsed:.2f}s  吞吐: {total / self.elapsed if self.elapsed else 0:.1f} 生命周期/s[/bold cyan]")
+        table = Table(title="逐步骤延迟", show_header=True, header_style="bold magenta")
+        for column in ("步骤", "次数", "错误", "p50(ms)", "p90(ms)", "p99(ms)", "max(ms)"):
+            table.add_column(column)
+        for action, histogram in self.steps.items():
+            if not histogram.total:
+                continue
+            summary = histogram.summary()
+            table.add_row(action, str(histogram.total), str(sum(self.errors[action].values())),
+                          f"{summary['p50_ms']:.2f}", f"{summary['p90_ms']:.2f}", f"{summary['p99_ms']:.2f}",
+                          f"{summary['max_ms']:.2f}")
+        console.print(table)
+        if self.violations:
+            console.print(f"[red]不变量违反 {len(self.violations)} 项：[/red]")
+            for violation in self.violations[:20]:
+                console.print(f"[red]- {violation}[/red]")
+        else:
+            console.print("[green]各交易对不变量均成立[/green]")
+
+
+class ScenarioRunner:
+    """在一个事件循环中并发执行生命周期，concurrency 限制同时进行的生命周期数"""
+
+    def __init__(self, scenario: Scenario, base_url: str, concurrency: int = 64, seed: int = 0,
+                 headers: Optional[dict] = None):
+        self.scenario = scenario
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.seed = seed
+        self.headers = headers or {}
+        self.books = [OrderBook(symbol, i) for i, symbol in enumerate(scenario.symbols)]
+        self.report = ScenarioReport()
+        self._seq = itertools.count()
+        self._order_ids = itertools.count(ORDER_ID_BASE)
+        # 只借用请求构造，不经过同步中间件
+        self._http_client = HTTPClient()
+        self._http_client.middlewares = []
+        self._client: Optional[AsyncHTTPClient] = None
+
+    def _api(self, api_class, **kwargs):
+        return api_class(base_url=self.base_url, headers=self.headers, http_client=self._http_client,
+                         async_client=self._client, enable_schema_validation=False, **kwargs)
+
+    async def _send(self, action: str, api, started: Optional[float] = None, final: bool = True):
+        """发送一个请求，返回 (响应模型, 出错原因)；撤单重下的两个请求按 started 与 final 计为一次 amend"""
+        started = started or time.perf_counter()
+        error = None
+        model = None
+        try:
+            model = (await api.asend()).response_model
+            if model.ret_code != 0:
+                error = f"ret_code {model.ret_code}"
+        except Exception as e:
+            error = type(e).__name__
+        if final or error:
+            self.report.record(action, time.perf_counter() - started, error)
+        return model, error
+
+    async def _place(self, book: OrderBook, state: OrderState, action: str, started: Optional[float] = None):
+        order_id = next(self._order_ids)
+        record = book.orders[order_id] = OrderRecord(order_id, next(self._seq))
+        api = self._api(CreateOrderAPI, request_body=CreateOrderAPI.RequestBodyModel(
+            id=order_id, user_id=book.user_id, products=[{"product_id": book.product_id, "symbol": book.symbol,
+                                                          "quantity": state.quantity, "price": state.price}],
+            total_price=round(state.price * state.quantity, 8), status=OPEN, created_at=datetime.now()))
+        _, error = await self._send(action, api, started)
+        record.acked = next(self._seq)
+        record.uncertain = error is not None
+        state.order_id = order_id
+        return error
+
+    async def _update(self, book: OrderBook, order_id: int, status: str, action: str, final: bool = True):
+        api = self._api(UpdateOrderStatusAPI, path_params=UpdateOrderStatusAPI.PathParams(order_id=order_id),
+                        request_body=UpdateOrderStatusAPI.RequestBodyModel(status=status))
+        _, error = await self._send(action, api, final=final)
+        record = book.orders[order_id]
+        record.status = status
+        record.uncertain = record.uncertain or error is not None
+        return error
+
+    async def _query(self, book: OrderBook, state: OrderState):
+        api = self._api(GetOrdersAPI, response_mode="columnar", query_params=GetOrdersAPI.QueryParams(
+            user_id=book.user_id, status=state.status, limit=BOOK_LIMIT))
+        model, error = await self._send(QUERY, api)
+        if error is None and state.order_id not in model.data.column("id"):
+            self.report.violations.append(f"{book.symbol}: 订单 {state.order_id} 已确认为 {state.status}，"
+                                          f"查询结果中没有")
+        return error
+
+    async def run_lifecycle(self, lifecycle: Lifecycle, book: OrderBook):
+        """顺序执行一条生命周期，某一步出错时中止"""
+        state = OrderState()
+        for step in lifecycle.steps:
+            previous = state.order_id
+            state.apply(step)
+            if step.action == PLACE:
+                error = await self._place(book, state, PLACE)
+            elif step.action == QUERY:
+                error = await self._query(book, state)
+            elif step.action == AMEND:
+                started = time.perf_counter()
+                error = (await self._update(book, previous, CANCELLED, AMEND, final=False)
+                         or await self._place(book, state, AMEND, started))
+            else:
+                error = await self._update(book, state.order_id, state.status, step.action)
+            if error:
+                self.report.aborted += 1
+                return
+        self.report.lifecycles[lifecycle.name] += 1
+
+    async def snapshot(self, book: OrderBook) -> List[str]:
+        """拉取订单簿快照并校验不变量"""
+        api = self._api(GetOrdersAPI, response_mode="columnar",
+                        query_params=GetOrdersAPI.QueryParams(user_id=book.user_id, limit=BOOK_LIMIT))
+        model, error = await self._send(QUERY, api)
+        if error:
+            return [f"{book.symbol}: 订单簿快照查询失败 ({error})"]
+        data: ColumnarList = model.data
+        return check_book(book, list(data.column("id")), list(data.column("status")))
+
+    async def run(self, count: int) -> ScenarioReport:
+        """按权重随机选择 count 条生命周期，随机分配到各交易对并发执行"""
+        rng = random.Random(self.seed)
+        weights = [lifecycle.weight for lifecycle in self.scenario.lifecycles]
+        plan = [(rng.choices(self.scenario.lifecycles, weights)[0], rng.choice(self.books)) for _ in range(count)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self._client = AsyncHTTPClient(limit=self.concurrency)
+
+        async def run_one(lifecycle: Lifecycle, book: OrderBook):
+            async with semaphore:
+                await self.run_lifecycle(lifecycle, book)
+
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(*(run_one(lifecycle, book) for lifecycle, book in plan))
+            self.report.elapsed = time.perf_counter() - started
+            for book in self.books:
+                self.report.violations += await self.snapshot(book)
+        finally:
+            await self._client.close()
+        return self.report
+
+
+def run_scenario(scenario: Scenario, base_url: str, count: int, concurrency: int = 64, seed: int = 0,
+                 headers: Optional[dict] = None) -> ScenarioReport:
+    """同步入口"""
+    return asyncio.run(ScenarioRunner(scenario, base_url, concurrency, seed, headers).run(count))
+
+
+def main(argv: Optional[List[str]] = None) -> ScenarioReport:
+    """命令行入口: python run.py scenario --lifecycles 400 --concurrency 64"""
+    parser = argparse.ArgumentParser(prog="python run.py scenario", description="订单生命周期场景压测")
+    parser.add_argument("--scenario", default=DEFAULT_SCENARIO, help="生命周期定义文件")
+    parser.add_argument("--lifecycles", type=int, default=400, help="执行的生命周期总数")
+    parser.add_argument("--concurrency", type=int, default=64, help="同时进行的生命周期数")
+    parser.add_argument("--seed", type=int, default=0, help="生命周期与交易对分配的随机种子")
+    parser.add_argument("--base-url", help="被测服务地址，不指定时在后台启动本地 mock 服务")
+    parser.add_argument("--output", default="reports/scenario.json", help="结果JSON输出路径")
+    args = parser.parse_args(argv)
+
+    scenario = Scenario.load(args.scenario)
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        from Tools.mock_server import MockServer
+        server = MockServer().start()
+        base_url = server.url
+        console.print(f"[yellow]使用本地 mock 服务: {base_url}[/yellow]")
+    try:
+        report = run_scenario(scenario, base_url, args.lifecycles, args.concurrency, args.seed)
+    finally:
+        if server is not None:
+            server.stop()
+
+    report.print()
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+    return report
@@ -0,0 +1,425 @@
+"""
+按历史耗时调度测试：记录每个用例的耗时（运行数据库 database/run_data.db 的 test_durations 表），
+按最长处理时间优先(LPT)把测试文件装箱到各 worker，耗时超过单 worker 平均负载的文件拆成多段；
+运行时每个 worker 先执行自己的队列，空闲后从剩余负载最大的队列尾部窃取任务
+
+在 conf/dist_strategy.yaml 中设置 mode: lpt 启用，run.py 的 run_tests() 会改走该调度
+"""
+import fnmatch
+import heapq
+import importlib
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import pytest
+import yaml
+from aomaker.database.sqlite import SQLiteDB, lock
+from aomaker.runner import Runner, RunConfig, runner_context
+from aomaker.runner.parallel import _progress_init
+from rich.console import Console
+from rich.table import Table
+
+from Tools.startup import worker_context
+from Tools.storage import run_db_path
+
+console = Console()
+
+STRATEGY_PATH = os.path.join("conf", "dist_strategy.yaml")
+SCHEDULE_REPORT = os.path.join("reports", "schedule.json")
+STATIC, LPT = "static", "lpt"
+# pytest 正常结束的退出码：全部通过、有用例失败、没有选中用例(如 -m 过滤掉整个文件)；其它为收集/参数错误或进程异常退出
+OK_EXIT_CODES = (0, 1, 5)
+
+# 新旧耗时的加权，越大越偏向最近一次
+EWMA_ALPHA = 0.5
+
+
+class DurationStore(SQLiteDB):
+    """用例历史耗时（秒，指数加权平均），按 pytest nodeid 存储"""
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or run_db_path())
+        self.table = "test_durations"
+        self.create_table()
+
+    def create_table(self):
+        self.execute_sql(f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                nodeid TEXT PRIMARY KEY,
+                duration REAL NOT NULL,
+                runs INTEGER NOT NULL DEFAULT 1,
+                updated_at TIMESTAMP
+            );""")
+
+    def update(self, durations: Dict[str, float]):
+        """批量写入一次会话的用例耗时，已有记录按 EWMA 合并"""
+        if not durations:
+            return
+        now = datetime.now().isoformat(timespec="seconds")
+        sql = f"""INSERT INTO {self.table} (nodeid, duration, runs, updated_at) VALUES (?, ?, 1, ?)
+                  ON CONFLICT(nodeid) DO UPDATE SET
+                      duration = {EWMA_ALPHA} * excluded.duration + {1 - EWMA_ALPHA} * duration,
+                      runs = runs + 1,
+                      updated_at = excluded.updated_at"""
+        with lock, self.connection:
+            self.connection.executemany(sql, [(nodeid, duration, now) for nodeid, duration in durations.items()])
+
+    def all(self) -> Dict[str, float]:
+        return {row["nodeid"]: row["duration"] for row in self.query(f"SELECT nodeid, duration FROM {self.table}")}
+
+
+class DurationRecorder:
+    """pytest 插件：累计每个用例 setup/call/teardown 的耗时，会话结束时写入 DurationStore"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.durations: Dict[str, float] = {}
+
+    def pytest_runtest_logreport(self, report):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        if not self.durations:
+            return
+        store = DurationStore(self.db_path)
+        try:
+            store.update(self.durations)
+        finally:
+            store.close()
+
+
+class TestUnit:
+    """调度单元：一次 pytest 会话的目标参数（整个文件，或文件中的部分用例）"""
+    __test__ = False
+
+    def __init__(self, name: str, args: List[str], predicted: float):
+        self.name = name
+        self.args = args
+        self.predicted = predicted
+
+    def __repr__(self) -> str:
+        return f"TestUnit({self.name!r}, predicted={self.predicted:.2f})"
+
+
+def find_test_files(path: str) -> List[str]:
+    """递归查找测试文件，命名规则与 aomaker 的 dist-file 一致"""
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if "__" not in d)
+        for name in sorted(names):
+            if fnmatch.fnmatch(name, "test_*.py") or fnmatch.fnmatch(name, "*_test.py"):
+                files.append(os.path.join(root, name).replace(os.sep, "/"))
+    return files
+
+
+def collect_nodeids(paths: List[str]) -> Optional[Set[str]]:
+    """在子进程中收集 paths 当前的用例 nodeid(含不带参数化后缀的形式)，收集失败返回 None"""
+    result = subprocess.run([sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider", *paths],
+                            capture_output=True, text=True)
+    if result.returncode not in (0, 5):
+        console.print(f"[yellow]收集 {len(paths)} 个慢文件的用例失败(退出码 {result.returncode})，不拆段[/yellow]")
+        return None
+    nodeids = {line.strip() for line in result.stdout.splitlines() if "::" in line}
+    return nodeids | {nodeid.split("[", 1)[0] for nodeid in nodeids}
+
+
+def lpt_schedule(units: List[TestUnit], workers: int) -> List[List[TestUnit]]:
+    """最长处理时间优先：按预估耗时从大到小，每次放入当前负载最小的 worker"""
+    bins: List[List[TestUnit]] = [[] for _ in range(max(1, workers))]
+    heap = [(0.0, index) for index in range(len(bins))]
+    for unit in sorted(units, key=lambda u: -u.predicted):
+        load, index = heapq.heappop(heap)
+        bins[index].append(unit)
+        heapq.heappush(heap, (load + unit.predicted, index))
+    return bins
+
+
+def list_schedule_makespan(units: List[TestUnit], workers: int) -> float:
+    """按原顺序逐个交给最先空闲的 worker（aomaker 静态分配的效果）的预估总耗时"""
+    heap = [0.0] * max(1, workers)
+    for unit in units:
+        heapq.heappush(heap, heapq.heappop(heap) + unit.predicted)
+    return max(heap)
+
+
+def makespan(bins: List[List[TestUnit]]) -> float:
+    return max((sum(unit.predicted for unit in units) for units in bins), default=0.0)
+
+
+def _split_file(path: str, known: Dict[str, float], parts: int,
+                remainder: Optional[List[str]] = None) -> List[TestUnit]:
+    """
+    把慢文件中已知耗时的用例装箱成 parts 段；最后一段用 --deselect 跑整个文件的其余部分，新增用例不会漏掉。
+    只运行选中的用例时 remainder 为其中没有历史耗时的用例，直接并入最后一段
+    """
+    tests = [TestUnit(nodeid, [nodeid], duration) for nodeid, duration in known.items()]
+    groups = [group for group in lpt_schedule(tests, parts) if group]
+    units = []
+    for index, group in enumerate(groups[:-1]):
+        units.append(TestUnit(f"{path}[{index + 1}/{len(groups)}]", [t.name for t in group],
+                              sum(t.predicted for t in group)))
+    if remainder is None:
+        args = [path] + [arg for group in groups[:-1] for t in group for arg in ("--deselect", t.name)]
+    else:
+        args = [t.name for t in groups[-1]] + remainder
+    units.append(TestUnit(f"{path}[{len(groups)}/{len(groups)}]", args, sum(t.predicted for t in groups[-1])))
+    return units
+
+
+def build_units(files: List[str], history: Dict[str, float], workers: int,
+                default_duration: float = 5.0, split_slow_files: bool = True,
+                selected: Optional[List[str]] = None,
+                collect: Optional[Callable[[List[str]], Optional[Set[str]]]] = None) -> List[TestUnit]:
+    """
+    按历史耗时为每个测试文件生成调度单元，无历史的文件取 default_duration；
+    selected 为增量运行选中的用例（不含参数化后缀），此时只为这些用例生成单元；
+    collect 返回给定文件当前的用例 nodeid（见 collect_nodeids），拆段前用它剔除历史中已不存在的用例，返回 None 时不拆段
+    """
+    chosen: Optional[Dict[str, List[str]]] = None
+    if selected is not None:
+        chosen = {}
+        for nodeid in selected:
+            chosen.setdefault(nodeid.split("::", 1)[0], []).append(nodeid)
+        files = sorted(chosen)
+        # 参数化用例的历史耗时按用例汇总
+        wanted, grouped = set(selected), {}
+        for nodeid, duration in history.items():
+            base = nodeid.split("[", 1)[0]
+            if base in wanted:
+                grouped[base] = grouped.get(base, 0.0) + duration
+        history = grouped
+    by_file: Dict[str, Dict[str, float]] = {}
+    for nodeid, duration in history.items():
+        by_file.setdefault(nodeid.split("::", 1)[0], {})[nodeid] = duration
+    units = [TestUnit(path, chosen[path] if chosen else [path],
+                      sum(by_file[path].values()) if path in by_file else default_duration)
+             for path in files]
+    if not split_slow_files or workers <= 1:
+        return units
+
+    target = sum(unit.predicted for unit in units) / workers
+
+    def parts_of(unit: TestUnit, known: Dict[str, float]) -> int:
+        return min(len(known), math.ceil(unit.predicted / target)) if target else 1
+
+    slow = [unit.name for unit in units if parts_of(unit, by_file.get(unit.name, {})) > 1]
+    if slow and collect is not None:
+        # 耗时表不清理，改名或删除的用例作为参数传给 pytest 会报 not found 使整段都不运行，只保留当前仍存在的用例
+        current = collect(slow)
+        for path in slow:
+            by_file[path] = {} if current is None else {nodeid: duration for nodeid, duration in by_file[path].items()
+                                                        if nodeid in current}
+    result = []
+    for unit in units:
+        known = by_file.get(unit.name, {})
+        parts = parts_of(unit, known)
+        if parts <= 1:
+            result.append(unit)
+            continue
+        remainder = None if chosen is None else [nodeid for nodeid in chosen[unit.name] if nodeid not in known]
+        result.extend(_split_file(unit.name, known, parts, remainder))
+    return result
+
+
+class WorkStealingQueues:
+    """每个 worker 一个双端队列：从自己的队头取，空了从剩余负载最大的队列队尾窃取"""
+
+    def __init__(self, bins: List[List[TestUnit]]):
+        self._queues = [deque(units) for units in bins]
+        self._loads = [sum(unit.predicted for unit in units) for units in bins]
+        self._lock = threading.Lock()
+        self.steals = 0
+
+    def take(self, worker: int) -> Optional[Tuple[TestUnit, bool]]:
+        with self._lock:
+            victim, stolen = worker, False
+            if not self._queues[worker]:
+                candidates = [i for i, queue in enumerate(self._queues) if queue]
+                if not candidates:
+                    return None
+                victim = max(candidates, key=lambda i: self._loads[i])
+                stolen = True
+                self.steals += 1
+            queue = self._queues[victim]
+            unit = queue.pop() if stolen else queue.popleft()
+            self._loads[victim] -= unit.predicted
+            return unit, stolen
+
+
+class ScheduleReport:
+    """调度结果：预估与实际的总耗时(makespan)对比"""
+
+    def __init__(self, workers: int, predicted_makespan: float, baseline_makespan: float):
+        self.workers = workers
+        self.predicted_makespan = predicted_makespan
+        self.baseline_makespan = baseline_makespan
+        self.actual_makespan = 0.0
+        self.steals = 0
+        self.busy = [0.0] * workers
+        self.units: List[dict] = []
+
+    def add(self, worker: int, unit: TestUnit, elapsed: float, stolen: bool, exitcode: Optional[int] = None):
+        self.busy[worker] += elapsed
+        self.units.append({"name": unit.name, "worker": worker, "predicted": unit.predicted,
+                           "actual": elapsed, "stolen": stolen, "exitcode": exitcode})
+
+    @property
+    def errors(self) -> List[dict]:
+        """退出码异常的单元，其中的用例可能没有运行"""
+        return [unit for unit in self.units if unit["exitcode"] is not None and unit["exitcode"] not in OK_EXIT_CODES]
+
+    def to_dict(self) -> dict:
+        return {
+            "workers": self.workers,
+            "predicted_makespan": self.predicted_makespan,
+            "baseline_makespan": self.baseline_makespan,
+            "actual_makespan": self.actual_makespan,
+            "serial": sum(self.busy),
+            "steals": self.steals,
+            "busy": self.busy,
+            "errors": self.errors,
+            "units": self.units,
+        }
+
+    def save(self, path: str = SCHEDULE_REPORT):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def print(self):
+        table = Table(title=f"LPT 调度 ({self.workers} workers)", show_header=True, header_style="bold magenta")
+        table.add_column("指标")
+        table.add_column("耗时(s)")
+        table.add_row("静态分配预估", f"{self.baseline_makespan:.1f}")
+        table.add_row("LPT 预估", f"{self.predicted_makespan:.1f}")
+        table.add_row("实际", f"{self.actual_makespan:.1f}")
+        table.add_row("串行总耗时", f"{sum(self.busy):.1f}")
+        table.add_row("窃取次数", str(self.steals))
+        console.print(table)
+        for unit in self.errors:
+            console.print(f"[red]{unit['name']} 异常退出(退出码 {unit['exitcode']})，其中的用例可能没有运行[/red]")
+
+
+def run_schedule(bins: List[List[TestUnit]], execute: Callable[[TestUnit], Optional[int]],
+                 baseline_makespan: Optional[float] = None) -> ScheduleReport:
+    """每个 worker 一个线程按队列执行 execute(unit)(返回退出码)，返回预估与实际耗时"""
+    queues = WorkStealingQueues(bins)
+    report = ScheduleReport(len(bins), makespan(bins),
+                            makespan(bins) if baseline_makespan is None else baseline_makespan)
+
+    def work(worker: int):
+        while True:
+            task = queues.take(worker)
+            if task is None:
+                return
+            unit, stolen = task
+            start, exitcode = time.perf_counter(), None
+            try:
+                exitcode = execute(unit)
+            finally:
+                report.add(worker, unit, time.perf_counter() - start, stolen, exitcode)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=work, args=(i,), name=f"lpt-worker-{i}") for i in range(len(bins))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.actual_makespan = time.perf_counter() - start
+    report.steals = queues.steals
+    return report
+
+
+def load_strategy(path: str = STRATEGY_PATH) -> dict:
+    """读取 dist_strategy.yaml 的调度配置，未配置 mode 时为 static"""
+    data = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    options = {"path": "testcases", "workers": None, "default_duration": 5.0, "split_slow_files": True}
+    options.update(data.get(LPT) or {})
+    options["mode"] = data.get("mode", STATIC)
+    return options
+
+
+def run_unit(args: List[str], pytest_plugin_names: List[str]) -> int:
+    """与 aomaker 的 main_task 相同地执行一个调度单元，返回 pytest 的退出码(main_task 不返回)"""
+    plugins = [importlib.import_module(name) for name in pytest_plugin_names]
+    _progress_init(args)
+    return int(pytest.main(args, plugins=plugins))
+
+
+def _unit_process(args: List[str], pytest_plugin_names: List[str]):
+    sys.exit(run_unit(args, pytest_plugin_names))
+
+
+class ScheduledRunner(Runner):
+    """按 LPT 计划并行执行的 aomaker Runner，mp 下每个调度单元在进程池中执行，mt 下在线程中执行"""
+
+    def __init__(self, is_processes: bool = True, options: Optional[dict] = None, db_path=None):
+        super().__init__(is_processes=is_processes)
+        self.is_processes = is_processes
+        self.options = options or load_strategy()
+        self.db_path = db_path
+
+    @property
+    def workers(self) -> int:
+        return self.options.get("workers") or os.cpu_count() or 1
+
+    def plan(self) -> Tuple[List[List[TestUnit]], float]:
+        store = DurationStore(self.db_path)
+        try:
+            history = store.all()
+        finally:
+            store.close()
+        files = find_test_files(self.options["path"])
+        selected = self.options.get("nodeids")
+        whole = build_units(files, history, self.workers, self.options["default_duration"], split_slow_files=False,
+                            selected=selected)
+        units = build_units(files, history, self.workers, self.options["default_duration"],
+                            self.options["split_slow_files"], selected=selected, collect=collect_nodeids)
+        workers = min(self.workers, len(units)) or 1
+        return lpt_schedule(units, workers), list_schedule_makespan(whole, workers)
+
+    def run(self, run_config: RunConfig, **kwargs) -> ScheduleReport:
+        extra_pytest_args = self._prepare_extra_args(run_config.pytest_args)
+        pytest_plugin_names = [plugin.__name__ for plugin in self.pytest_plugins]
+        bins, baseline = self.plan()
+        console.print(f"[cyan]LPT 调度: {sum(map(len, bins))} 个单元，{len(bins)} 个 worker，"
+                      f"预估 {makespan(bins):.1f}s（静态分配预估 {baseline:.1f}s）[/cyan]")
+
+        # worker 由预加载了重模块的 forkserver 启动，直接继承已导入的模块，也不继承本进程的线程
+        context = worker_context() if self.is_processes else None
+
+        def execute(unit: TestUnit) -> int:
+            args = unit.args + extra_pytest_args
+            if not self.is_processes:
+                return run_unit(args, pytest_plugin_names)
+            # aomaker 以进程名区分 worker 的缓存与进度，每个单元使用独立进程，与其一进程一任务的约定一致
+            process = context.Process(target=_unit_process, args=(args, pytest_plugin_names))
+            process.start()
+            process.join()
+            return process.exitcode
+
+        report = run_schedule(bins, execute, baseline)
+        report.print()
+        report.save()
+        return report
+
+
+def scheduled_run(pytest_args: Optional[List[str]] = None, mp: bool = True, env: Optional[str] = None,
+                  login_obj=None, report_enabled: bool = True, options: Optional[dict] = None) -> ScheduleReport:
+    """与 aomaker 的 main_run 相同的初始化与报告流程，只替换任务分配方式；options["nodeids"] 限定只运行这些用例"""
+    options = options or load_strategy()
+    run_config = RunConfig(env=env, run_mode="mp" if mp else "mt", task_args=[options["path"]],
+                           pytest_args=list(pytest_args or []), login_obj=login_obj,
+                           report_enabled=report_enabled)
+    with runner_context(run_config):
+        return ScheduledRunner(is_processes=mp, options=options).run(run_config)
@@ -0,0 +1,302 @@
+"""
+响应 schema 校验缓存：aomaker 每次校验响应都要生成模型的 JSON schema、读 schema 表、比对后由 jsonschema 重新检查并解释 schema，
+CACHED_MODELS 中列出的响应模型改为使用编译好的校验器(按类名登记，模型层不依赖本模块)
+
+- 校验器按 schema 表的 (schema_name, updated_at) 编译一次，放在 LRU 中；
+  编译与 Tools/deserializers.py 相同，把 schema 生成为 Python 函数(支持 apischema 生成的 type/properties/required/
+  additionalProperties/items/anyOf/enum 与长度、数值范围等约束)，含其它关键字的 schema 使用只构造一次的 jsonschema 校验器
+- 编译函数判定不通过时再由 jsonschema 找出具体错误，报错信息与 aomaker 一致；format 与 aomaker 一样不校验
+- 每个模型每个进程只生成一次 schema 并与 schema 表比对(与 aomaker 相同，变化时输出差异并写入)，
+  之后每 REFRESH_INTERVAL 秒重新读取 updated_at，其它进程更新了 schema 时重新编译
+  (Tools/storage.py 启用时 schema 变化会刷新 updated_at)
+- 抽样：APEX_SCHEMA_SAMPLE=N 时每个模型每 N 个响应校验 1 个，压测时使用；CACHED_MODELS 中可为单个模型单独设置
+"""
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+SAMPLE_ENV = "APEX_SCHEMA_SAMPLE"
+DEFAULT_CACHE_SIZE = 256
+# 重新读取 schema 表 updated_at 的间隔(秒)
+REFRESH_INTERVAL = 30.0
+# 使用编译缓存校验的响应模型(apis/mock/models.py 中较大的列表与详情响应)：类名 -> 抽样间隔，None 时取 APEX_SCHEMA_SAMPLE
+CACHED_MODELS: Dict[str, Optional[int]] = {
+    "UserListResponse": None,
+    "UserDetailResponse": None,
+    "ProductListResponse": None,
+    "ProductDetailResponse": None,
+    "OrderListResponse": None,
+    "CommentListResponse": None,
+}
+
+# 不影响校验结果的关键字
+_ANNOTATIONS = {"default", "format", "title", "description", "$schema", "examples", "deprecated", "readOnly",
+                "writeOnly", "$comment"}
+_SUPPORTED = _ANNOTATIONS | {"type", "properties", "required", "additionalProperties", "items", "anyOf", "enum",
+                             "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "minLength", "maxLength",
+                             "minItems", "maxItems", "pattern"}
+_TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    # 与 jsonschema 一致：bool 不是整数，整数值的浮点数是整数
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool) or isinstance({v}, float) and {v}.is_integer())",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+}
+_NUMBER = "(isinstance({v}, (int, float)) and not isinstance({v}, bool))"
+
+
+class Unsupported(Exception):
+    """schema 含编译器未支持的关键字"""
+
+
+class _Compiler:
+    """把 JSON schema 生成为返回 bool 的函数，对象与数组各生成一个函数，标量约束内联"""
+
+    def __init__(self):
+        self.namespace: Dict[str, Any] = {}
+        self.sources = []
+        self._ids = itertools.count()
+
+    def const(self, value: Any) -> str:
+        name = f"_k{next(self._ids)}"
+        self.namespace[name] = value
+        return name
+
+    def call(self, schema: Any, arg: str) -> str:
+        if isinstance(schema, dict) and ({"properties", "items", "anyOf"} & schema.keys()
+                                         or isinstance(schema.get("additionalProperties"), dict)):
+            return f"{self.function(schema)}({arg})"
+        return self.expr(schema, arg)
+
+    def function(self, schema: Any) -> str:
+        name = f"_check{next(self._ids)}"
+        self.sources.append(f"def {name}(v):\n    return {self.expr(schema, 'v')}\n")
+        return name
+
+    def expr(self, schema: Any, v: str) -> str:
+        if schema is True or schema == {}:
+            return "True"
+        if schema is False:
+            return "False"
+        if not isinstance(schema, dict) or not schema.keys() <= _SUPPORTED:
+            raise Unsupported(schema)
+        parts = []
+        types = schema.get("type")
+        if types is not None:
+            types = [types] if isinstance(types, str) else types
+            if not set(types) <= _TYPE_CHECKS.keys():
+                raise Unsupported(types)
+            parts.append("(" + " or ".join(_TYPE_CHECKS[t].format(v=v) for t in types) + ")")
+
+        checks = []
+        for key in schema.get("required", ()):
+            checks.append(f"{key!r} in {v}")
+        properties = schema.get("properties", {})
+        for key, sub in properties.items():
+            checks.append(f"({key!r} not in {v} or {self.call(sub, f'{v}[{key!r}]')})")
+        additional = schema.get("additionalProperties", True)
+        if additional is False:
+            checks.append(f"{v}.keys() <= {self.const(frozenset(properties))}")
+        elif additional is not True:
+            item = f"_x{next(self._ids)}"
+            checks.append(f"all({self.call(additional, f'{item}[1]')} for {item} in {v}.items() "
+                          f"if {item}[0] not in {self.const(frozenset(properties))})")
+        if checks:
+            parts.append(f"(not isinstance({v}, dict) or ({' and '.join(checks)}))")
+
+        checks = []
+        if "items" in schema:
+            item = f"_x{next(self._ids)}"
+            checks.append(f"all({self.call(schema['items'], item)} for {item} in {v})")
+        if "minItems" in schema:
+            checks.append(f"len({v}) >= {int(schema['minItems'])}")
+        if "maxItems" in schema:
+            checks.append(f"len({v}) <= {int(schema['maxItems'])}")
+        if checks:
+            parts.append(f"(not isinstance({v}, list) or ({' and '.join(checks)}))")
+
+        checks = []
+        if "minLength" in schema:
+            checks.append(f"len({v}) >= {int(schema['minLength'])}")
+        if "maxLength" in schema:
+            checks.append(f"len({v}) <= {int(schema['maxLength'])}")
+        if "pattern" in schema:
+            checks.append(f"{self.const(re.compile(schema['pattern']))}.search({v}) is not None")
+        if checks:
+            parts.append(f"(not isinstance({v}, str) or ({' and '.join(checks)}))")
+
+        checks = []
+        for keyword, op in (("minimum", ">="), ("maximum", "<="), ("exclusiveMinimum", ">"),
+                            ("exclusiveMaximum", "<")):
+            if keyword in schema:
+                checks.append(f"{v} {op} {self.const(schema[keyword])}")
+        if checks:
+            parts.append(f"(not {_NUMBER.format(v=v)} or ({' and '.join(checks)}))")
+
+        if "enum" in schema:
+            values = schema["enum"]
+            # bool 与 0/1 相等，列表与字典不可哈希，交给 jsonschema
+            if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) or value is None
+                       for value in values):
+                raise Unsupported(values)
+            parts.append(f"(not isinstance({v}, (bool, list, dict)) and {v} in {self.const(frozenset(values))})")
+        if "anyOf" in schema:
+            parts.append("(" + " or ".join(self.call(sub, v) for sub in schema["anyOf"]) + ")")
+        return " and ".join(parts) or "True"
+
+
+def compile_schema(schema: Any) -> Optional[Callable[[Any], bool]]:
+    """生成校验函数，返回实例是否符合 schema；含未支持的关键字时返回 None"""
+    compiler = _Compiler()
+    try:
+        name = compiler.function(schema)
+    except Unsupported:
+        return None
+    exec("\n".join(compiler.sources), compiler.namespace)
+    return compiler.namespace[name]
+
+
+class CompiledValidator:
+    """编译一次的校验器：编译函数判定通过即返回，否则由 jsonschema 给出与 aomaker 相同的错误信息"""
+
+    def __init__(self, schema: dict):
+        from jsonschema.validators import validator_for
+        self.schema = schema
+        self.check = compile_schema(schema)
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        self._validator = cls(schema)
+
+    @property
+    def compiled(self) -> bool:
+        return self.check is not None
+
+    def validate(self, instance: Any):
+        if self.check is not None and self.check(instance):
+            return
+        from aomaker.core.api_object import format_validation_error
+        from jsonschema.exceptions import best_match
+        error = best_match(self._validator.iter_errors(instance))
+        if error is None:
+            return
+        error = best_match(error.context) if error.context else error
+        raise AssertionError(format_validation_error(error)) from None
+
+
+def opted_in(cls: Any) -> bool:
+    return isinstance(cls, type) and cls.__name__ in CACHED_MODELS
+
+
+class _ModelState:
+
+    def __init__(self, name: str, sample: int):
+        self.name = name
+        self.sample = max(1, sample)
+        self.counter = itertools.count()
+        self.synced = False
+        self.updated_at: Optional[str] = None
+        self.checked_at = 0.0
+
+
+class SchemaCache:
+    """按 (schema_name, updated_at) 缓存编译好的校验器，store 为 aomaker 的 Schema(默认全局的 schema 表)"""
+
+    def __init__(self, store=None, size: int = DEFAULT_CACHE_SIZE, refresh_interval: float = REFRESH_INTERVAL,
+                 sample: Optional[int] = None):
+        self._store = store
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.sample = sample if sample is not None else int(os.environ.get(SAMPLE_ENV) or 1)
+        self._validators: "OrderedDict[Tuple[str, Optional[str]], CompiledValidator]" = OrderedDict()
+        self._models: Dict[Type, _ModelState] = {}
+        self._lock = threading.RLock()
+        self.stats = {"validated": 0, "skipped": 0, "compiled": 0, "hits": 0}
+
+    @property
+    def store(self):
+        if self._store is None:
+            from aomaker.storage import schema
+            self._store = schema
+        return self._store
+
+    def _state(self, cls: Type) -> _ModelState:
+        state = self._models.get(cls)
+        if state is None:
+            sample = CACHED_MODELS.get(cls.__name__) or self.sample
+            state = self._models.setdefault(cls, _ModelState(cls.__name__, sample))
+        return state
+
+    def _updated_at(self, name: str) -> Optional[str]:
+        rows = self.store.query(f"SELECT updated_at FROM {self.store.table} WHERE schema_name = ?", (name,))
+        return rows[0]["updated_at"] if rows else None
+
+    def _sync(self, cls: Type, name: str):
+        """与 aomaker update_schema_if_needed 相同：首次保存，变化时输出差异并更新(写入 self.store)"""
+        from aomaker.core.api_object import get_diff, logger
+        from apischema.json_schema import deserialization_schema
+        current, existing = deserialization_schema(cls), self.store.get_schema(name)
+        if current == existing:
+            return
+        if existing:
+            get_diff(existing, current, name)
+            logger.info(f"[SchemaDiff] 模型<{name}> ，已更新schema缓存")
+        self.store.save_schema(name, current)
+
+    def validator(self, cls: Type) -> CompiledValidator:
+        """模型当前 schema 版本的校验器，首次使用时与 schema 表同步"""
+        with self._lock:
+            state = self._state(cls)
+            now = time.monotonic()
+            if not state.synced:
+                self._sync(cls, state.name)
+                state.synced = True
+                state.checked_at = 0.0
+            if now - state.checked_at >= self.refresh_interval:
+                state.updated_at = self._updated_at(state.name)
+                state.checked_at = now
+            key = (state.name, state.updated_at)
+            validator = self._validators.get(key)
+            if validator is not None:
+                self._validators.move_to_end(key)
+                self.stats["hits"] += 1
+                return validator
+            validator = self._validators[key] = CompiledValidator(self.store.get_schema(state.name))
+            self.stats["compiled"] += 1
+            while len(self._validators) > self.size:
+                self._validators.popitem(last=False)
+            return validator
+
+    def validate(self, cls: Type, instance: Any) -> bool:
+        """按抽样比例校验，不符合 schema 时抛出 AssertionError；返回本次是否校验"""
+        state = self._models.get(cls) or self._state(cls)
+        if next(state.counter) % state.sample:
+            self.stats["skipped"] += 1
+            return False
+        self.validator(cls).validate(instance)
+        self.stats["validated"] += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._validators.clear()
+            self._models.clear()
+
+
+_cache: Optional[SchemaCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_schema_cache() -> SchemaCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SchemaCache()
+    return _cache
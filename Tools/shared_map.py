@@ -0,0 +1,61 @@
+"""
+跨进程共享的 mmap 文件：读写都在进程内线程锁 + 文件锁(flock)内进行；
+fork 出的子进程继承的描述符与父进程共用同一把 flock，首次加锁时关闭并重新打开文件以持有独立的锁
+
+Tools/rate_limit.py 的限流状态文件与 Tools/result_stream.py 的结果环形缓冲区基于 SharedMapping 实现
+"""
+import fcntl
+import mmap
+import os
+import threading
+
+
+class FileLock:
+    """进程内线程锁 + 跨进程文件锁"""
+
+    def __init__(self, lock: threading.Lock, fd: int):
+        self.lock = lock
+        self.fd = fd
+
+    def __enter__(self):
+        self.lock.acquire()
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self.lock.release()
+
+
+class SharedMapping:
+    """mmap 映射的共享文件，子类实现 _map_file 在文件锁内建立映射(create 为 True 时按需初始化内容)"""
+    mode = 0o644
+
+    def __init__(self, path: str, create: bool = True):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._open(create)
+
+    def _open(self, create: bool):
+        self._fd = os.open(self.path, os.O_RDWR | (os.O_CREAT if create else 0), self.mode)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            self._map = self._map_file(self._fd, create)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._pid = os.getpid()
+
+    def _map_file(self, fd: int, create: bool) -> mmap.mmap:
+        raise NotImplementedError
+
+    def _locked(self) -> FileLock:
+        if self._pid != os.getpid():
+            # 继承自父进程的描述符与父进程共用同一把 flock，关闭后重新打开；文件已存在，不再初始化
+            self._map.close()
+            os.close(self._fd)
+            self._open(False)
+        return FileLock(self._lock, self._fd)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
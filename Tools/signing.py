@@ -0,0 +1,332 @@
+"""
+下单签名引擎：HttpPrivateSign.create_order_v3 每单都会由 zk_seeds 重新派生签名密钥，再计算 zk L2 签名，
+压测时这部分 CPU 开销决定了客户端延迟
+
+- OrderSigner：每个进程按 seeds 只派生一次签名密钥；交易对精度、资产精度与费率由 configs_v3/get_account_v3
+  整理为 OrderContext 后缓存；签名是确定性的，按交易字节缓存，重发同一 clientId 的订单不重复计算
+- SigningPool：进程池批量签名，worker 启动时派生密钥，在途批次数有上限，队列满时提交方阻塞
+- PresignedOrders：后台按订单模板持续预签名，放入有界队列，下单时直接取用
+- enable_signing_engine：替换客户端的 create_order_v3，请求参数与原实现逐字段一致；
+  带止盈止损(isOpenTpslOrder)的订单与按位置传参的调用仍走原实现
+
+签名库只加载 apexpro 包内的 zklink_sdk.py，不执行 apexpro/__init__（会导入 web3 等），进程池 worker 启动更快
+
+签名吞吐基准：python -m benchmarks.bench_signing
+"""
+import decimal
+import hashlib
+import importlib.util
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+ORDER_PATH = "/v3/order"
+MAX_UINT32 = 2 ** 32 - 1
+MAX_UINT64 = 2 ** 64 - 1
+# 止损订单的有效期：create_order_v3 在下单时间上加 28 天
+EXPIRATION_OFFSET = 3600 * 24 * 28
+SIGNATURE_CACHE_SIZE = 4096
+DEFAULT_BATCH_SIZE = 16
+
+ROUND_UP = decimal.Context(rounding=decimal.ROUND_UP)
+ROUND_DOWN = decimal.Context(rounding=decimal.ROUND_DOWN)
+
+# create_order_v3 订单体中与止盈止损相关、普通订单恒为空的字段
+_TPSL_FIELDS = ("slClientOrderId", "slPrice", "slSide", "slSize", "slTriggerPrice", "slTriggerPriceType",
+                "slExpiration", "slLimitFee", "slSignature", "tpClientOrderId", "tpPrice", "tpSide", "tpSize",
+                "tpTriggerPrice", "tpTriggerPriceType", "tpExpiration", "tpLimitFee", "tpSignature")
+# 由签名引擎处理的 create_order_v3 参数，出现其他参数时交给原实现
+SUPPORTED_ARGS = frozenset({
+    "symbol", "side", "type", "size", "price", "subAccountId", "takerFeeRate", "makerFeeRate", "accountId",
+    "timeInForce", "reduceOnly", "triggerPrice", "triggerPriceType", "trailingPercent", "clientId",
+    "timestampSeconds", "isPositionTpsl", "signature", "isOpenTpslOrder", "isSetOpenSl", "isSetOpenTp",
+    "sourceFlag", "brokerId",
+})
+
+_sdk = None
+_signers: Dict[str, Any] = {}
+_signers_lock = threading.Lock()
+
+
+def load_sdk():
+    """加载 apexpro 自带的 zklink 签名库(ctypes)，不导入 apexpro 包本身"""
+    global _sdk
+    if _sdk is None:
+        spec = importlib.util.find_spec("apexpro")
+        if spec is None or not spec.submodule_search_locations:
+            raise ImportError("未安装 apexpro，无法加载 zklink 签名库")
+        path = os.path.join(list(spec.submodule_search_locations)[0], "zklink_sdk.py")
+        module_spec = importlib.util.spec_from_file_location("_apex_zklink_sdk", path)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+        _sdk = module
+    return _sdk
+
+
+def get_signer(seeds: str):
+    """按 seeds 派生的签名密钥，每个进程只派生一次"""
+    key = hashlib.sha256(seeds.encode()).hexdigest()
+    signer = _signers.get(key)
+    if signer is None:
+        with _signers_lock:
+            signer = _signers.get(key)
+            if signer is None:
+                seed_bytes = bytes.fromhex(seeds.removeprefix("0x"))
+                signer = _signers[key] = load_sdk().ZkLinkSigner().new_from_seed(seed_bytes)
+    return signer
+
+
+def random_client_id() -> str:
+    # 与 apexpro.helpers.request_helpers.random_client_id 相同
+    return str(int(float(str(random.random())[2:])))
+
+
+def order_context(config: dict, account: dict, symbol: str) -> dict:
+    """从 configs_v3 的 data 与 get_account_v3 的结果中取出签名 symbol 订单所需的字段（可序列化，发往进程池）"""
+    contract = config["contractConfig"]
+    symbol_data = None
+    for item in contract.get("perpetualContract") or []:
+        if symbol in (item.get("symbol"), item.get("symbolDisplayName")):
+            symbol_data = item
+    if symbol_data is None:
+        for item in contract.get("prelaunchContract") or []:
+            if symbol in (item.get("symbol"), item.get("symbolDisplayName")):
+                symbol_data = item
+    if symbol_data is None:
+        raise ValueError(f"configs_v3 中没有交易对 {symbol}")
+    currency = next((asset for asset in contract["assets"] if asset.get("token") == symbol_data.get("settleAssetId")),
+                    {})
+    return {
+        "symbol": symbol,
+        "l2_pair_id": int(symbol_data["l2PairId"]),
+        "tick_size": symbol_data["tickSize"],
+        "decimals": currency.get("decimals"),
+        "show_step": currency.get("showStep"),
+        "account_id": account.get("id"),
+        "sub_account_id": account["spotAccount"]["defaultSubAccountId"],
+        "taker_fee_rate": account["contractAccount"]["takerFeeRate"],
+        "maker_fee_rate": account["contractAccount"]["makerFeeRate"],
+    }
+
+
+class OrderSigner:
+    """进程内签名：密钥派生一次，签名按交易字节缓存"""
+
+    def __init__(self, seeds: str, cache_size: int = SIGNATURE_CACHE_SIZE):
+        self.seeds = seeds
+        self.signer = get_signer(seeds)
+        self.sdk = load_sdk()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.signed = 0
+        self.cache_hits = 0
+
+    def _signature(self, tx_bytes: bytes) -> str:
+        with self._lock:
+            signature = self._cache.get(tx_bytes)
+            if signature is not None:
+                self._cache.move_to_end(tx_bytes)
+                self.cache_hits += 1
+                return signature
+        # ctypes 调用期间释放 GIL
+        signature = self.signer.sign_musig(tx_bytes).signature
+        with self._lock:
+            self.signed += 1
+            self._cache[tx_bytes] = signature
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return signature
+
+    def sign(self, context: dict, order: dict) -> dict:
+        """按 create_order_v3 的算法生成签名后的订单体，order 为 create_order_v3 的参数"""
+        price, size, side = str(order.get("price")), str(order["size"]), order["side"]
+        client_id = order.get("clientId") or random_client_id()
+        account_id = order.get("accountId") or context["account_id"]
+        if not account_id:
+            raise ValueError("缺少 accountId，请先调用 get_account_v3()")
+        number = decimal.Decimal(price) / decimal.Decimal(context["tick_size"])
+        if number > int(number):
+            raise ValueError("the price must Multiple of tickSize")
+        expiration = int((order.get("timestampSeconds") or int(time.time())) + EXPIRATION_OFFSET)
+        sub_account_id = order.get("subAccountId") or context["sub_account_id"]
+        taker_fee_rate = order.get("takerFeeRate") or context["taker_fee_rate"]
+        maker_fee_rate = order.get("makerFeeRate") or context["maker_fee_rate"]
+
+        nonce_int = int(hashlib.sha256(client_id.encode()).hexdigest(), 16)
+        slot_id = (nonce_int % MAX_UINT64) / MAX_UINT32
+        nonce = nonce_int % MAX_UINT32
+        scale = decimal.Decimal(10) ** decimal.Decimal(context["decimals"])
+        price_str = (decimal.Decimal(price) * scale).quantize(decimal.Decimal(0), rounding=decimal.ROUND_DOWN)
+        size_str = (decimal.Decimal(size) * scale).quantize(decimal.Decimal(0), rounding=decimal.ROUND_DOWN)
+        taker_fee = (decimal.Decimal(taker_fee_rate) * 10000).quantize(decimal.Decimal(0), rounding=decimal.ROUND_UP)
+        maker_fee = (decimal.Decimal(maker_fee_rate) * 10000).quantize(decimal.Decimal(0), rounding=decimal.ROUND_UP)
+
+        builder = self.sdk.ContractBuilder(
+            int(account_id, 10) % MAX_UINT32, int(sub_account_id), int(slot_id), int(nonce),
+            context["l2_pair_id"], str(size_str), str(price_str), side == "BUY", int(taker_fee), int(maker_fee), False)
+        signature = self._signature(bytes(self.sdk.Contract(builder).get_bytes()))
+
+        rounding = ROUND_UP if side == "BUY" else ROUND_DOWN
+        fee = rounding.multiply(rounding.multiply(decimal.Decimal(size), decimal.Decimal(price)),
+                                decimal.Decimal(taker_fee_rate))
+        limit_fee = ROUND_UP.quantize(decimal.Decimal(fee), decimal.Decimal(context["show_step"]))
+
+        body = {
+            "symbol": order["symbol"],
+            "side": side,
+            "type": order["type"],
+            "timeInForce": order.get("timeInForce", "GOOD_TIL_CANCEL"),
+            "size": size,
+            "price": price,
+            "limitFee": str(limit_fee),
+            "expiration": expiration,
+            "triggerPrice": order.get("triggerPrice"),
+            "triggerPriceType": order.get("triggerPriceType"),
+            "trailingPercent": order.get("trailingPercent"),
+            "clientId": client_id,
+            "signature": signature,
+            "reduceOnly": order.get("reduceOnly", False),
+            "isPositionTpsl": order.get("isPositionTpsl", False),
+            "isOpenTpslOrder": False,
+            "isSetOpenSl": order.get("isSetOpenSl", False),
+            "isSetOpenTp": order.get("isSetOpenTp", False),
+        }
+        body.update(dict.fromkeys(_TPSL_FIELDS))
+        # 与 create_order_v3 一致：未设置止盈止损时 LimitFee 为字符串 "None"
+        body["slLimitFee"] = body["tpLimitFee"] = "None"
+        body["sourceFlag"] = order.get("sourceFlag")
+        body["brokerId"] = order.get("brokerId")
+        return body
+
+    def sign_batch(self, context: dict, orders: List[dict]) -> List[dict]:
+        return [self.sign(context, order) for order in orders]
+
+
+# 进程池 worker 内的签名器
+_worker_signer: Optional[OrderSigner] = None
+
+
+def _init_worker(seeds: str):
+    global _worker_signer
+    _worker_signer = OrderSigner(seeds)
+
+
+def _sign_chunk(context: dict, orders: List[dict]) -> List[dict]:
+    return _worker_signer.sign_batch(context, orders)
+
+
+class SigningPool:
+    """进程池批量签名；在途批次数不超过 max_pending，超过时 submit 阻塞（背压）"""
+
+    def __init__(self, seeds: str, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_pending = max_pending or self.workers * 2
+        # spawn：调用方进程中可能已有通知、进度等后台线程，fork 不安全
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"),
+                                             initializer=_init_worker, initargs=(seeds,))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def warm_up(self):
+        """等待所有 worker 启动并派生完密钥"""
+        for future in [self._executor.submit(_sign_chunk, {}, []) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, context: dict, orders: List[dict], timeout: Optional[float] = None) -> Future:
+        """提交一批订单签名，在途批次已满时阻塞"""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("签名队列已满")
+        try:
+            future = self._executor.submit(_sign_chunk, context, orders)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def sign_batch(self, context: dict, orders: List[dict]) -> List[dict]:
+        """按 batch_size 切分后并行签名，结果与输入顺序一致"""
+        futures = [self.submit(context, orders[i:i + self.batch_size])
+                   for i in range(0, len(orders), self.batch_size)]
+        return [body for future in futures for body in future.result()]
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "SigningPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class PresignedOrders:
+    """按模板在后台持续预签名订单，保持有界队列中有 size 个可用订单"""
+
+    def __init__(self, signer, context: dict, template: dict, size: int = 256,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.signer = signer
+        self.context = context
+        self.template = template
+        self.batch_size = batch_size
+        self.orders: "queue.Queue[dict]" = queue.Queue(maxsize=size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, name="presign-orders", daemon=True)
+        self._thread.start()
+
+    def _fill(self):
+        while not self._stop.is_set():
+            batch = self.signer.sign_batch(self.context, [dict(self.template) for _ in range(self.batch_size)])
+            for body in batch:
+                while not self._stop.is_set():
+                    try:
+                        self.orders.put(body, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+    def get(self, timeout: Optional[float] = None) -> dict:
+        """取一个已签名的订单体；clientId 与过期时间在签名时生成"""
+        return self.orders.get(timeout=timeout)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def post_signed_order(client, body: dict):
+    """发送已签名的订单体，请求与 create_order_v3 相同"""
+    from apexpro.constants import URL_SUFFIX
+    return client._post(endpoint=URL_SUFFIX + ORDER_PATH, data=body)
+
+
+def enable_signing_engine(client, signer: Optional[OrderSigner] = None) -> OrderSigner:
+    """替换客户端的 create_order_v3：密钥只派生一次，交易对与账户参数按 configV3/accountV3 缓存"""
+    signer = signer or OrderSigner(client.zk_seeds)
+    create_order_v3 = client.create_order_v3
+    contexts: Dict[tuple, dict] = {}
+
+    def signed_create_order_v3(*args, **kwargs):
+        # 原实现接受位置参数(symbol, side, type, size, ...)，按位置传参时交给原实现
+        if (args or not SUPPORTED_ARGS.issuperset(kwargs) or kwargs.get("isOpenTpslOrder")
+                or not client.configV3 or not client.zk_seeds):
+            return create_order_v3(*args, **kwargs)
+        config, account = client.configV3, client.accountV3
+        key = (kwargs["symbol"], id(config), id(account))
+        context = contexts.get(key)
+        if context is None:
+            contexts.clear()
+            context = contexts[key] = order_context(config, account, kwargs["symbol"])
+        return post_signed_order(client, signer.sign(context, kwargs))
+
+    client.create_order_v3 = signed_create_order_v3
+    client.order_signer = signer
+    return signer
@@ -0,0 +1,197 @@
+"""
+测试进程启动耗时：导入耗时剖析与预热的 worker 启动
+
+- 导入剖析：以 python -X importtime 运行一次用例收集(pytest --collect-only)，按顶层包汇总导入耗时，
+  列出最慢的模块，明细写入 reports/import_profile.json；python run.py startup 查看
+- 预热启动：worker 由 forkserver 启动，forkserver 进程先导入一次 pytest、aomaker、allure 与 apexpro 签名依赖等
+  重模块，再为每个 worker fork 一次，worker 直接继承已导入的模块，启动从秒级降到毫秒级；forkserver 是单线程的，
+  不会继承调度进程里运行中的线程与它们持有的锁；APEX_WORKER_START=spawn 时改为每个 worker 冷启动(重新导入全部模块)
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+START_METHOD_ENV = "APEX_WORKER_START"
+FORKSERVER, SPAWN = "forkserver", "spawn"
+PROFILE_REPORT = os.path.join("reports", "import_profile.json")
+
+# worker 运行用例时必然导入的模块，apexpro 放在最后：它最重，且导入失败不影响其它模块预热
+PRELOAD_MODULES = [
+    "pytest",
+    "allure",
+    "allure_pytest.plugin",
+    "rich.console",
+    "requests",
+    "yaml",
+    "aomaker.runner.parallel",
+    "aomaker.storage",
+    "aiohttp",
+    "apis.base",
+    "middlewares.timing_middleware",
+    "Tools.allure_report",
+    "Tools.apex_client",
+    "Tools.impact",
+    "Tools.progress",
+    "Tools.scheduler",
+    "apexpro.http_private_sign",
+]
+
+
+def start_method() -> str:
+    """worker 启动方式，没有 forkserver 的平台只能冷启动"""
+    method = os.environ.get(START_METHOD_ENV, FORKSERVER).strip().lower()
+    if method != SPAWN and FORKSERVER in multiprocessing.get_all_start_methods():
+        return FORKSERVER
+    return SPAWN
+
+
+def worker_context():
+    """创建 worker 进程的 multiprocessing 上下文：forkserver 预先导入 PRELOAD_MODULES，worker 从它 fork；
+    预加载列表在 forkserver 首次启动时生效，导入失败(ImportError)的模块跳过，留给 worker 自行导入时报错"""
+    if start_method() == SPAWN:
+        return multiprocessing.get_context(SPAWN)
+    context = multiprocessing.get_context(FORKSERVER)
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+def _import_modules(modules: List[str]):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def measure_startup(method: str, modules: Optional[List[str]] = None, runs: int = 3) -> List[float]:
+    """启动 runs 个 worker 并导入 modules，返回每个 worker 从启动到就绪退出的耗时(秒)"""
+    modules = modules or PRELOAD_MODULES
+    context = multiprocessing.get_context(method)
+    if method == FORKSERVER:
+        context.set_forkserver_preload(modules)
+    elapsed = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = context.Process(target=_import_modules, args=(modules,))
+        process.start()
+        process.join()
+        elapsed.append(time.perf_counter() - start)
+    return elapsed
+
+
+def parse_importtime(text: str) -> List[dict]:
+    """解析 -X importtime 的输出，每行一个模块：self/cumulative 为微秒，depth 为嵌套层级"""
+    records = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|", 2)
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头
+        name = parts[2][1:]
+        records.append({"module": name.strip(), "self_us": int(parts[0]), "cumulative_us": int(parts[1]),
+                        "depth": (len(name) - len(name.lstrip())) // 2})
+    return records
+
+
+def summarize(records: List[dict]) -> dict:
+    """按顶层包汇总自身耗时(各模块只计一次，不会像 cumulative 那样重复计算)"""
+    packages = defaultdict(lambda: {"self_us": 0, "modules": 0})
+    for record in records:
+        package = packages[record["module"].split(".", 1)[0]]
+        package["self_us"] += record["self_us"]
+        package["modules"] += 1
+    return {
+        "total_us": sum(record["self_us"] for record in records),
+        "modules": len(records),
+        "packages": dict(sorted(packages.items(), key=lambda item: -item[1]["self_us"])),
+        "slowest": sorted(records, key=lambda record: -record["cumulative_us"]),
+    }
+
+
+def profile_imports(command: List[str], cwd: Optional[str] = None) -> dict:
+    """以 -X importtime 运行 python command，返回汇总后的导入耗时"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime"] + command, cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    profile = summarize(parse_importtime(result.stderr))
+    profile.update({"command": command, "wall_s": time.perf_counter() - start, "returncode": result.returncode})
+    return profile
+
+
+def profile_session(path: str = "testcases", extra_args: Optional[List[str]] = None) -> dict:
+    """剖析一次用例收集的导入耗时，即每个 worker 运行第一个用例前要付出的导入开销；
+    -s 关闭输出捕获，否则收集阶段的导入记录被 pytest 截获"""
+    return profile_imports(["-m", "pytest", "--collect-only", "-q", "-s", "-p", "no:cacheprovider", path]
+                           + list(extra_args or []))
+
+
+def save_profile(profile: dict, path: str = PROFILE_REPORT):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+
+
+def print_profile(profile: dict, top: int = 15):
+    total = profile["total_us"] or 1
+    table = Table(title=f"导入耗时 {profile['total_us'] / 1e6:.2f}s，{profile['modules']} 个模块",
+                  show_header=True, header_style="bold magenta")
+    for column in ("顶层包", "模块数", "自身耗时(ms)", "占比"):
+        table.add_column(column)
+    for name, package in list(profile["packages"].items())[:top]:
+        table.add_row(name, str(package["modules"]), f"{package['self_us'] / 1000:.1f}",
+                      f"{package['self_us'] / total:.1%}")
+    console.print(table)
+
+    table = Table(title="最慢的模块(含依赖)", show_header=True, header_style="bold magenta")
+    for column in ("模块", "累计耗时(ms)", "自身耗时(ms)"):
+        table.add_column(column)
+    for record in profile["slowest"][:top]:
+        table.add_row(record["module"], f"{record['cumulative_us'] / 1000:.1f}", f"{record['self_us'] / 1000:.1f}")
+    console.print(table)
+
+
+def print_startup(results: Dict[str, List[float]]):
+    table = Table(title="worker 启动耗时", show_header=True, header_style="bold magenta")
+    for column in ("启动方式", "次数", "平均(ms)", "最慢(ms)"):
+        table.add_column(column)
+    for method, elapsed in results.items():
+        table.add_row(method, str(len(elapsed)), f"{sum(elapsed) / len(elapsed) * 1000:.1f}",
+                      f"{max(elapsed) * 1000:.1f}")
+    console.print(table)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python run.py startup", description="剖析测试进程的导入与启动耗时")
+    parser.add_argument("--path", default="testcases", help="剖析该目录的用例收集")
+    parser.add_argument("--modules", nargs="+", help="只剖析导入这些模块，而不是用例收集")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=0, help="另外对比冷启动与预热启动 N 个 worker 的耗时")
+    parser.add_argument("--output", default=PROFILE_REPORT)
+    # 其余参数原样传给 pytest，如 -p no:xxx 禁用插件
+    args, pytest_args = parser.parse_known_args(argv)
+
+    if args.modules:
+        profile = profile_imports(["-c", "; ".join(f"import {name}" for name in args.modules)])
+    else:
+        profile = profile_session(args.path, pytest_args)
+    if profile["returncode"]:
+        console.print(f"[yellow]剖析命令退出码 {profile['returncode']}，导入可能中途失败，结果不完整[/yellow]")
+    print_profile(profile, args.top)
+    save_profile(profile, args.output)
+    console.print(f"[green]明细已写入 {args.output}[/green]")
+    if args.workers:
+        print_startup({SPAWN: measure_startup(SPAWN, args.modules, args.workers),
+                       FORKSERVER: measure_startup(FORKSERVER, args.modules, args.workers)})
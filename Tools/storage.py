@@ -0,0 +1,282 @@
+"""
+aomaker.db 访问层：替换 aomaker SQLiteDB 的连接与执行方式，减少多进程并发读写 cache/config/schema/statistics 时的锁争用
+
+- 每个进程每个数据库文件只建一个连接，WAL + synchronous=NORMAL，所有 SQLiteDB 实例共用，各自持有游标；
+  fork 出的子进程首次访问时重新连接(继承的连接既不能使用也不能关闭，只保留引用)
+- 写入遇到 database is locked/busy 时在 busy_timeout 之外再按指数退避重试，BUSY_RETRIES 次后才抛出
+- batch() 内的多次写入在同一个 BEGIN IMMEDIATE 事务中只提交一次；
+  aomaker 每条用例 teardown 都会写的进度(cache 表 _progress.*)合并为最新值，每 FLUSH_INTERVAL 秒批量写入一次，会话结束时写完
+- 建 cache(worker)、schema(updated_at) 索引(纳入版本管理的 aomaker.db 已带有，建索引不改动该文件)；schema 变化时刷新 updated_at
+- 运行产生的数据(用例耗时、用例与 API 的映射、待发送的通知、跨 worker 的参考数据缓存、每次运行的接口统计)
+  写入不纳入版本管理的 run_db_path()，纳入版本管理的 aomaker.db 只保留 aomaker 自身的数据
+
+hooks.py 与 testcases/conftest.py 调用 use_shared_storage()；APEX_STORAGE=aomaker 时保留 aomaker 原有的访问方式
+"""
+import atexit
+import json
+import os
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from aomaker.database.sqlite import SQLiteDB, get_db_path, lock
+
+STORAGE_ENV = "APEX_STORAGE"
+SHARED = "shared"
+# sqlite 自身等待锁的时长(毫秒)，超时后由 retry_busy 退避重试
+BUSY_TIMEOUT_MS = 2000
+BUSY_RETRIES = 6
+BACKOFF_BASE = 0.02
+BACKOFF_MAX = 1.0
+# 合并写入的进度最多延迟的时长(秒)
+FLUSH_INTERVAL = 1.0
+DEFERRED_PREFIX = "_progress."
+RUN_DB_NAME = "run_data.db"
+INDEXES = {
+    "idx_cache_worker": ("cache", "worker"),
+    "idx_schema_updated_at": ("schema", "updated_at"),
+}
+
+_connections: Dict[str, sqlite3.Connection] = {}
+_inherited: List[sqlite3.Connection] = []
+_batch_depth: Dict[str, int] = {}
+# 数据库路径 -> {(var_name, worker): value}
+_pending: Dict[str, Dict[Tuple[str, str], str]] = {}
+_last_flush: Dict[str, float] = {}
+_pid = os.getpid()
+_original: Dict[str, object] = {}
+storage_stats = {"connections": 0, "busy_retries": 0, "commits": 0, "deferred": 0, "flushed": 0}
+
+
+def is_busy(error: Exception) -> bool:
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+def retry_busy(func, *args, retries: int = BUSY_RETRIES):
+    """执行 func(*args)，数据库忙时按指数退避(带抖动)重试"""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args)
+        except sqlite3.OperationalError as e:
+            if not is_busy(e) or attempt == retries:
+                raise
+            storage_stats["busy_retries"] += 1
+            time.sleep(min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+
+def _check_fork():
+    global _pid
+    if _pid != os.getpid():
+        # 父进程的连接在子进程中不可用；关闭会对父进程正在使用的 WAL 做检查点，只保留引用
+        _inherited.extend(_connections.values())
+        _connections.clear()
+        _batch_depth.clear()
+        # 父进程未写出的进度由父进程负责
+        _pending.clear()
+        _pid = os.getpid()
+
+
+def run_db_path() -> str:
+    """运行数据库 database/run_data.db(已加入 .gitignore)"""
+    return str(get_db_path().with_name(RUN_DB_NAME))
+
+
+def connect(db_path=None) -> sqlite3.Connection:
+    """本进程访问 db_path(默认 database/aomaker.db) 的共享连接"""
+    path = str(db_path or get_db_path())
+    with lock:
+        _check_fork()
+        connection = _connections.get(path)
+        if connection is None:
+            connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+            retry_busy(connection.execute, "PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            _connections[path] = connection
+            storage_stats["connections"] += 1
+        return connection
+
+
+def _commit(path: str, connection: sqlite3.Connection):
+    if not _batch_depth.get(path):
+        retry_busy(connection.commit)
+        storage_stats["commits"] += 1
+
+
+@contextmanager
+def batch(db_path=None):
+    """块内经 SQLiteDB 的写入在同一事务中提交一次；可嵌套，出错时回滚"""
+    path = str(db_path or get_db_path())
+    with lock:
+        connection = connect(path)
+        if _batch_depth.get(path):
+            _batch_depth[path] += 1
+            try:
+                yield connection
+            finally:
+                _batch_depth[path] -= 1
+            return
+        if connection.in_transaction:
+            retry_busy(connection.commit)
+        # 开始即取得写锁，事务中途不会因升级写锁失败
+        retry_busy(connection.execute, "BEGIN IMMEDIATE")
+        _batch_depth[path] = 1
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            raise
+        else:
+            retry_busy(connection.commit)
+            storage_stats["commits"] += 1
+        finally:
+            _batch_depth[path] = 0
+
+
+def ensure_indexes(db_path=None):
+    """为已存在的表建索引"""
+    connection = connect(db_path)
+    with lock:
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for name, (table, column) in INDEXES.items():
+            if table in tables:
+                retry_busy(connection.execute, f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+        _commit(str(db_path or get_db_path()), connection)
+
+
+def flush_pending(db_path=None, force: bool = True) -> int:
+    """写出合并的进度；force 为 False 时距上次写出不足 FLUSH_INTERVAL 秒则跳过"""
+    written = 0
+    with lock:
+        _check_fork()
+        for path in [str(db_path)] if db_path else list(_pending):
+            pending, last = _pending.get(path), _last_flush.get(path)
+            if not pending or (not force and last is not None and time.monotonic() - last < FLUSH_INTERVAL):
+                continue
+            rows = [(var_name, value, worker) for (var_name, worker), value in pending.items()]
+            with batch(path) as connection:
+                connection.executemany("""INSERT INTO cache (var_name, value, worker) VALUES (?, ?, ?)
+                                          ON CONFLICT(var_name, worker) DO UPDATE SET value = excluded.value""", rows)
+            pending.clear()
+            _last_flush[path] = time.monotonic()
+            storage_stats["flushed"] += len(rows)
+            written += len(rows)
+    return written
+
+
+# ---------------- 替换 aomaker SQLiteDB 的方法 ----------------
+
+def _init(self, db_path=None):
+    self._db_path = str(db_path or get_db_path())
+    connect(self._db_path)
+
+
+def _connection(self) -> sqlite3.Connection:
+    return connect(self.__dict__.get("_db_path"))
+
+
+def _cursor(self) -> sqlite3.Cursor:
+    connection = self.connection
+    cursor = self.__dict__.get("_shared_cursor")
+    if cursor is None or cursor.connection is not connection:
+        cursor = self.__dict__["_shared_cursor"] = connection.cursor()
+    return cursor
+
+
+def _execute_sql(self, sql: str, params=()):
+    if not isinstance(params, (tuple, list)):
+        raise TypeError("SQL parameters must be a tuple or list")
+    with lock:
+        retry_busy(self.cursor.execute, sql, params)
+        _commit(self.__dict__.get("_db_path") or str(get_db_path()), self.connection)
+
+
+def _query(self, sql: str, params=()) -> List[Dict]:
+    with lock:
+        cursor = self.cursor
+        retry_busy(cursor.execute, sql, params)
+        columns = [col[0] for col in cursor.description] if cursor.description else []
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _close(self):
+    """连接由本进程共用，只释放游标"""
+    cursor = self.__dict__.pop("_shared_cursor", None)
+    if cursor is not None:
+        cursor.close()
+
+
+def _cache_upsert(self, var_name: str, value):
+    if not var_name.startswith(DEFERRED_PREFIX):
+        return _original["Cache.upsert"](self, var_name, value)
+    path = self.__dict__.get("_db_path") or str(get_db_path())
+    with lock:
+        _check_fork()
+        _pending.setdefault(path, {})[(var_name, self.worker)] = json.dumps(value)
+        storage_stats["deferred"] += 1
+    flush_pending(path, force=False)
+
+
+def _save_schema(self, schema_name: str, schema_: dict):
+    """与 aomaker 相同的 upsert，同时刷新 updated_at 供按版本缓存"""
+    self.execute_sql(f"""INSERT INTO {self.table} (schema_name, schema_json, updated_at)
+                         VALUES (?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                         ON CONFLICT(schema_name) DO UPDATE SET
+                             schema_json = excluded.schema_json, updated_at = excluded.updated_at""",
+                     (schema_name, json.dumps(schema_)))
+
+
+def install():
+    """替换 SQLiteDB 的连接与执行方法(对所有子类与已创建的实例生效)，不访问数据库"""
+    if _original:
+        return
+    from aomaker.storage import Cache, Schema
+    _original.update({"__init__": SQLiteDB.__init__, "execute_sql": SQLiteDB.execute_sql,
+                      "query": SQLiteDB.query, "close": SQLiteDB.close,
+                      "Cache.upsert": Cache.upsert, "Schema.save_schema": Schema.save_schema})
+    SQLiteDB.__init__ = _init
+    # 数据描述符优先于实例属性，已创建的实例也改用共享连接
+    SQLiteDB.connection = property(_connection)
+    SQLiteDB.cursor = property(_cursor)
+    SQLiteDB.execute_sql = _execute_sql
+    SQLiteDB.query = _query
+    SQLiteDB.close = _close
+    Cache.upsert = _cache_upsert
+    Schema.save_schema = _save_schema
+
+
+def uninstall():
+    """恢复 aomaker 原有实现(测试用)，先写出合并的进度"""
+    if not _original:
+        return
+    flush_pending()
+    from aomaker.storage import Cache, Schema
+    del SQLiteDB.connection, SQLiteDB.cursor
+    SQLiteDB.__init__ = _original["__init__"]
+    SQLiteDB.execute_sql = _original["execute_sql"]
+    SQLiteDB.query = _original["query"]
+    SQLiteDB.close = _original["close"]
+    Cache.upsert = _original["Cache.upsert"]
+    Schema.save_schema = _original["Schema.save_schema"]
+    _original.clear()
+
+
+_installed = False
+
+
+def use_shared_storage():
+    """替换 aomaker 的数据库访问并建索引，进程退出时写出合并的进度；APEX_STORAGE=aomaker 时不替换"""
+    global _installed
+    if os.environ.get(STORAGE_ENV, SHARED) != SHARED or _installed:
+        return
+    from aomaker import storage
+    install()
+    for instance in (storage.cache, storage.config, storage.schema, storage.stats):
+        # aomaker 全局实例导入时各建了一个连接，可能继承自父进程，不关闭，只保留引用
+        _inherited.append(instance.__dict__.pop("connection", None))
+        instance.__dict__.pop("cursor", None)
+    ensure_indexes()
+    atexit.register(flush_pending)
+    _installed = True
@@ -0,0 +1,196 @@
+"""
+本地桩服务：模拟 Apex /v3 接口响应，用于离线调试压测、连接池等工具
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+StubResult = Tuple[int, Any]
+StubRoute = Callable[["StubRequest"], StubResult]
+
+# 桩环境下使用的占位凭证（仅用于本地桩服务，不可用于真实环境）
+STUB_CREDENTIALS = {
+    "APEX_API_KEY": "stub-key",
+    "APEX_API_SECRET": "stub-secret",
+    "APEX_API_PASSPHRASE": "stub-passphrase",
+    "APEX_SEEDS": "0x" + "11" * 32,
+    "APEX_L2_KEY": "0x" + "22" * 32,
+}
+
+
+class StubRequest:
+    """桩服务收到的请求"""
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"null")
+
+    def form(self) -> Dict[str, str]:
+        return dict(parse_qsl(self.body.decode("utf-8"), keep_blank_values=True))
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 保持长连接，便于观察连接复用
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分两次写出，关闭Nagle避免长连接下的延迟确认等待
+    disable_nagle_algorithm = True
+    server: "StubServer"
+
+    def _dispatch(self):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        request = StubRequest(self.command, parts.path, dict(parse_qsl(parts.query)), dict(self.headers), body)
+
+        status, payload = self.server.handle_stub_request(request)
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+    def log_message(self, format, *args):
+        # 静默，避免压测时刷屏
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """可注入延迟与错误率的本地HTTP桩服务"""
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        super().__init__((host, port), _StubHandler)
+        self.routes: Dict[Tuple[str, str], StubRoute] = {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._count_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, method: str, path: str) -> Callable[[StubRoute], StubRoute]:
+        """注册路由的装饰器"""
+        def decorator(func: StubRoute) -> StubRoute:
+            self.routes[(method.upper(), path)] = func
+            return func
+        return decorator
+
+    def handle_stub_request(self, request: StubRequest) -> StubResult:
+        with self._count_lock:
+            self.request_count += 1
+            inject_error = self.error_rate and self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if inject_error:
+            return 500, {"code": 500, "msg": "stub injected error"}
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            return 404, {"code": 404, "msg": f"no stub route for {request.method} {request.path}"}
+        return handler(request)
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def _apex_symbols() -> dict:
+    return {
+        "data": {
+            "contractConfig": {
+                "assets": [
+                    {"token": "USDT", "tokenId": "141", "decimals": 6, "showStep": "0.0001"}
+                ],
+                "perpetualContract": [
+                    {"symbol": "BTC-USDT", "symbolDisplayName": "BTCUSDT", "tickSize": "0.1",
+                     "stepSize": "0.001", "l2PairId": "50001", "settleAssetId": "USDT"},
+                    {"symbol": "ETH-USDT", "symbolDisplayName": "ETHUSDT", "tickSize": "0.01",
+                     "stepSize": "0.01", "l2PairId": "50002", "settleAssetId": "USDT"},
+                ],
+                "prelaunchContract": [],
+            }
+        },
+        "timeCost": 1,
+    }
+
+
+def _apex_account() -> dict:
+    return {
+        "data": {
+            "id": "584232029744218334",
+            "ethereumAddress": "0x0000000000000000000000000000000000000001",
+            "spotAccount": {"defaultSubAccountId": "0"},
+            "contractAccount": {"takerFeeRate": "0.0005", "makerFeeRate": "0.0002"},
+        },
+        "timeCost": 1,
+    }
+
+
+def apex_stub_server(**kwargs) -> StubServer:
+    """构建模拟 Apex 交易所 /v3/symbols、/v3/account、/v3/order 的桩服务"""
+    server = StubServer(**kwargs)
+    symbols = _apex_symbols()
+    account = _apex_account()
+
+    @server.route("GET", "/api/v3/symbols")
+    def symbols_v3(request: StubRequest) -> StubResult:
+        return 200, symbols
+
+    @server.route("GET", "/api/v3/account")
+    def account_v3(request: StubRequest) -> StubResult:
+        return 200, account
+
+    @server.route("POST", "/api/v3/order")
+    def order_v3(request: StubRequest) -> StubResult:
+        order = request.form()
+        if not order.get("symbol") or not order.get("side"):
+            return 200, {"code": 3, "msg": "symbol and side are required", "timeCost": 1}
+        return 200, {
+            "data": {
+                "id": uuid.uuid4().hex,
+                "clientId": order.get("clientId"),
+                "accountId": account["data"]["id"],
+                "symbol": order["symbol"],
+                "side": order["side"],
+                "price": order.get("price"),
+                "size": order.get("size"),
+                "type": order.get("type"),
+                "status": "PENDING",
+                "createdAt": int(time.time() * 1000),
+            },
+            "timeCost": 1,
+        }
+
+    return server
@@ -0,0 +1,214 @@
+"""
+连接池传输层：为 requests.Session 挂载可配置大小、TCP保活的连接池，并统计连接复用情况；
+同时在连接层采集单次请求的 DNS/建连/TLS/首字节 耗时，供计时中间件使用
+
+说明：requests/urllib3 仅支持 HTTP/1.1，HTTP/2 不在此传输层范围内；
+长连接复用已可消除绝大部分握手开销。
+"""
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+from Tools.latency import LatencyHistogram
+
+DEFAULT_POOL_SIZE = 10
+POOL_SIZE_ENV = "APEX_HTTP_POOL_SIZE"
+
+# 开启TCP保活，避免空闲的池化连接被中间设备断开
+KEEPALIVE_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+class PoolStats:
+    """连接池统计：请求数、复用命中/新建连接数及建连耗时（每个worker进程一份）"""
+
+    def __init__(self):
+        self.requests = 0
+        self.misses = 0
+        self.connect_time = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        return max(self.requests - self.misses, 0)
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connect(self, seconds: float):
+        with self._lock:
+            self.misses += 1
+        self.connect_time.record(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.misses = 0
+            self.connect_time = LatencyHistogram()
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / self.requests if self.requests else 0.0,
+            "connect_time_total_ms": self.connect_time.sum * 1000,
+            "connect_time_p50_ms": self.connect_time.percentile(50) * 1000,
+            "connect_time_p99_ms": self.connect_time.percentile(99) * 1000,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class RequestPhases:
+    """
+    单次请求的分阶段耗时（秒）：dns/connect/tls 为各阶段时长，仅新建连接时有值；
+    ttfb 为从请求开始到收到响应头的时长
+    """
+    __slots__ = ("start", "dns", "connect", "tls", "ttfb")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.dns: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.tls: Optional[float] = None
+        self.ttfb: Optional[float] = None
+
+    @property
+    def new_connection(self) -> bool:
+        return self.connect is not None
+
+
+_phases = threading.local()
+
+
+def begin_phases() -> RequestPhases:
+    """开始记录当前线程下一次请求的分阶段耗时"""
+    phases = _phases.current = RequestPhases()
+    return phases
+
+
+def end_phases():
+    _phases.current = None
+
+
+def current_phases() -> Optional[RequestPhases]:
+    return getattr(_phases, "current", None)
+
+
+class _PhaseTimingMixin:
+    """只有当前线程开启了分阶段记录时才额外计时，未开启时每次请求仅多一次线程局部变量读取"""
+
+    def _new_conn(self):
+        phases = current_phases()
+        if phases is None:
+            return super()._new_conn()
+        start = time.perf_counter()
+        host = self._dns_host
+        try:
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            # 交给 urllib3 重新解析并抛出其标准异常
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        phases.dns = resolved - start
+        # 用解析结果逐个尝试建连，行为与 urllib3 的 create_connection 一致
+        error = None
+        for address in dict.fromkeys(info[4][0] for info in addresses):
+            self._dns_host = address
+            try:
+                conn = super()._new_conn()
+                break
+            except NewConnectionError as e:
+                error = e
+            finally:
+                self._dns_host = host
+        else:
+            raise error
+        phases.connect = time.perf_counter() - resolved
+        return conn
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        elapsed = time.perf_counter() - start
+        pool_stats.record_connect(elapsed)
+        phases = current_phases()
+        if phases is not None and isinstance(self, HTTPSConnection) and phases.connect is not None:
+            phases.tls = max(elapsed - phases.dns - phases.connect, 0.0)
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        phases = current_phases()
+        if phases is not None:
+            phases.ttfb = time.perf_counter() - phases.start
+        return response
+
+
+class _TimedHTTPConnection(_PhaseTimingMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_PhaseTimingMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """带统计的连接池适配器，pool_size 为每个主机保留的连接数"""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, pool_block: bool = False, **kwargs):
+        super().__init__(pool_maxsize=pool_size, pool_block=pool_block, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault("socket_options", KEEPALIVE_SOCKET_OPTIONS)
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        pool_stats.record_request()
+        return super().send(request, **kwargs)
+
+
+def get_pool_size() -> int:
+    """每主机连接池大小，可通过环境变量 APEX_HTTP_POOL_SIZE 配置"""
+    value = os.getenv(POOL_SIZE_ENV)
+    return int(value) if value else DEFAULT_POOL_SIZE
+
+
+def ensure_pooled_transport(session: requests.Session) -> PooledHTTPAdapter:
+    """session 尚未挂载池化传输层时挂载，已挂载则直接返回"""
+    adapter = session.adapters.get("https://")
+    if isinstance(adapter, PooledHTTPAdapter):
+        return adapter
+    return mount_pooled_transport(session)
+
+
+def mount_pooled_transport(session: requests.Session, pool_size: Optional[int] = None) -> PooledHTTPAdapter:
+    """为session挂载池化传输层，同一worker内所有用例共享该session的连接"""
+    adapter = PooledHTTPAdapter(pool_size=pool_size or get_pool_size())
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
@@ -0,0 +1,59 @@
+import os
+from typing import Dict, List, Optional
+
+from rich.console import Console
+
+from Tools.feishu_bot import get_failed_cases, get_test_results
+from Tools.notifier import Notifier, get_notifier
+from Tools.run_stats import current_run_id
+
+console = Console()
+
+def build_wechat_report() -> Dict:
+    """由结构化结果构建企业微信 markdown 消息"""
+    results = get_test_results()
+    stats = results["stats"]
+    times = results["time"]
+    total = stats["total"]
+    pass_rate = (stats["passed"] / total * 100) if total > 0 else 0
+    color = "info" if pass_rate == 100 else "warning"
+
+    lines = [
+        "## 🎯 自动化测试报告",
+        f"> 开始：{times['start']}　结束：{times['end']}　耗时：{times['duration']}",
+        f"> 总用例数：{total}　通过率：<font color=\"{color}\">{pass_rate:.1f}%</font>",
+        f"> 通过：{stats['passed']}　失败：{stats['failed']}　阻塞：{stats['broken']}　跳过：{stats['skipped']}",
+    ]
+    if stats["failed"] or stats["broken"]:
+        for case in get_failed_cases():
+            lines.append(f"- <font color=\"warning\">{case['name']}</font>："
+                         f"{(case['message'] or case['status']).splitlines()[0][:100]}")
+    report_url = os.getenv('GITHUB_PAGES_URL', '').rstrip('/')
+    if report_url:
+        lines.append(f"[完整测试报告]({report_url}/reports/aomaker-report.html)")
+    return {"msgtype": "markdown", "markdown": {"content": "\n".join(lines)}}
+
+def send_wechat_report(notifier: Optional[Notifier] = None):
+    """conf/utils.yaml 配置了 wechat.webhook 时，把测试报告加入企业微信通知队列"""
+    notifier = notifier or get_notifier()
+    if "wechat" not in notifier.sinks:
+        return
+    try:
+        notifier.notify("wechat", build_wechat_report(), key=f"report:{current_run_id()}")
+        console.print("[cyan]测试报告已加入企业微信通知队列[/cyan]")
+    except Exception as e:
+        console.print(f"[red]Error sending message to WeChat: {str(e)}[/red]")
+
+def send_wechat_no_tests(reason: str, changed_files: List[str], notifier: Optional[Notifier] = None):
+    """增量运行没有选中用例时，通知企业微信本次未运行测试"""
+    notifier = notifier or get_notifier()
+    if "wechat" not in notifier.sinks:
+        return
+    lines = ["## ℹ️ 没有受影响的用例，本次未运行测试", f"> 增量运行：{reason}，{len(changed_files)} 个改动文件"]
+    lines += [f"- {path}" for path in changed_files[:10]]
+    try:
+        notifier.notify("wechat", {"msgtype": "markdown", "markdown": {"content": "\n".join(lines)}},
+                        key=f"report:{current_run_id()}")
+        console.print("[cyan]没有受影响的用例，已加入企业微信通知队列[/cyan]")
+    except Exception as e:
+        console.print(f"[red]Error sending message to WeChat: {str(e)}[/red]")
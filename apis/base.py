@@ -0,0 +1,136 @@
+import asyncio
+import functools
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import attrs
+from attrs import define, field
+from aomaker.core.api_object import BaseAPIObject
+from aomaker.core.base_model import AoResponse, ResponseT
+from aomaker.core.middlewares.registry import registry
+
+from middlewares.timing_middleware import record_request
+from Tools.async_http import AsyncHTTPClient, get_async_client, close_async_client
+from Tools.impact import ImpactRecorder, api_target
+from Tools.transport import RequestPhases, ensure_pooled_transport
+from Tools import deserializers, json_stream, schema_cache
+
+DEFAULT_CONCURRENCY = 100
+
+
+@define(kw_only=True)
+class BaseAPI(BaseAPIObject[ResponseT]):
+    """项目API基类：在 aomaker BaseAPIObject 的同步发送之外提供异步发送"""
+
+    async_client: Optional[AsyncHTTPClient] = field(default=None)
+    # 响应中模型列表的形态：eager 立即转换；lazy 访问时转换；columnar 按列存储，适合保留大量结果
+    response_mode: str = field(default=deserializers.EAGER)
+
+    @classmethod
+    def __attrs_init_subclass__(cls):
+        # 定义API类时预编译其响应模型
+        response = attrs.fields(cls).response.default
+        if attrs.has(response):
+            deserializers.register(response)
+
+    def __attrs_post_init__(self):
+        super().__attrs_post_init__()
+        # aomaker 的 HTTPClient 同样使用池化传输层，计时中间件依赖其采集连接阶段耗时
+        ensure_pooled_transport(self.http_client.session)
+
+    def _prepare_request(self, is_stream: bool) -> Dict[str, Any]:
+        req = super()._prepare_request(is_stream)
+        req["_api_meta"]["endpoint_id"] = self.endpoint_id or self.class_name
+        # 与 arun gen stats 的 package 一致：apis/mock/apis.py -> mock
+        req["_api_meta"]["package"] = self.package
+        req["_api_meta"]["module"] = type(self).__module__
+        return req
+
+    @property
+    def package(self) -> str:
+        parts = type(self).__module__.split(".")
+        return ".".join(parts[1:-1]) if len(parts) > 2 and parts[0] == "apis" else ".".join(parts[:-1])
+
+    def _parse_response(self, cached_response) -> ResponseT:
+        if self.response_mode == deserializers.EAGER:
+            return super()._parse_response(cached_response)
+        response_data = cached_response.json()
+        if self.enable_schema_validation:
+            self._validate_response_schema(response_data)
+        return deserializers.structure(response_data, self.response, self.response_mode)
+
+    def _validate_response_schema(self, response_data):
+        # Tools/schema_cache.py 的 CACHED_MODELS 中列出的响应模型使用编译缓存的校验器，可按 APEX_SCHEMA_SAMPLE 抽样
+        if schema_cache.opted_in(self.response):
+            schema_cache.get_schema_cache().validate(self.response, response_data)
+            return
+        super()._validate_response_schema(response_data)
+
+    def stream(self, chunk_size: int = json_stream.DEFAULT_CHUNK_SIZE, **request_kwargs) -> json_stream.StreamedItems:
+        """
+        流式读取列表响应：边接收边解析 data 数组，逐个产出元素模型，峰值内存与单个元素相当；
+        流式模式下不做整体 schema 校验
+        """
+        item_cls = json_stream.list_item_type(self.response)
+        req = self._prepare_request(True)
+        response = self.http_client.send_request(request=req, **request_kwargs)
+        return json_stream.StreamedItems(response, item_cls, chunk_size=chunk_size)
+
+    async def asend(self, **request_kwargs) -> AoResponse[ResponseT]:
+        """异步发送请求，响应解析与同步 send 一致；multipart 文件上传在线程池中以同步 send 发送"""
+        req = self._prepare_request(False)
+        if req.get("files") or request_kwargs.get("files"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(self.send, **request_kwargs))
+        # 异步请求不经过 aomaker 的中间件链，按相同口径补记用例影响映射与耗时
+        api_meta = req.get("_api_meta") or {}
+        recorder = ImpactRecorder.active
+        if recorder is not None and _middleware_enabled("impact_middleware"):
+            recorder.touch(*api_target(api_meta))
+        client = self.async_client or get_async_client()
+        phases, response = RequestPhases(), None
+        try:
+            response = await client.send_request(req, **request_kwargs)
+        finally:
+            if _middleware_enabled("timing_middleware"):
+                record_request(api_meta, req.get("url"), phases, time.perf_counter() - phases.start,
+                               response is None or response.status_code >= 400,
+                               len(response.content) if response is not None else 0)
+        if self.enable_schema_validation and not schema_cache.opted_in(self.response):
+            # aomaker 原有校验每次生成 schema 并读 schema 表，放到线程池，不阻塞事件循环上的其它请求
+            return await asyncio.get_running_loop().run_in_executor(None, self._handle_response, response)
+        return self._handle_response(response)
+
+    def __await__(self):
+        return self.asend().__await__()
+
+
+def _middleware_enabled(name: str) -> bool:
+    config = registry.middleware_configs.get(name)
+    return config is not None and config.enabled
+
+
+async def gather_apis(api_objects: Iterable[BaseAPI],
+                      concurrency: int = DEFAULT_CONCURRENCY,
+                      return_exceptions: bool = False) -> List[AoResponse]:
+    """在当前事件循环内并发发送，semaphore 限制同时在途的请求数"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _send(api_object: BaseAPI):
+        async with semaphore:
+            return await api_object.asend()
+
+    return await asyncio.gather(*(_send(api) for api in api_objects), return_exceptions=return_exceptions)
+
+
+def run_apis(api_objects: Iterable[BaseAPI],
+             concurrency: int = DEFAULT_CONCURRENCY,
+             return_exceptions: bool = False) -> List[AoResponse]:
+    """同步入口：新建事件循环并发执行一批API对象，结果顺序与输入一致"""
+    async def _main():
+        try:
+            return await gather_apis(api_objects, concurrency, return_exceptions)
+        finally:
+            await close_async_client()
+
+    return asyncio.run(_main())
@@ -0,0 +1,140 @@
+"""
+批量请求：按窗口并发发送一组API对象，完成即返回并保留原始序号；分页接口可在出现短页时提前停止
+"""
+import asyncio
+import itertools
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Type
+
+from attrs import define, field
+from aomaker.core.base_model import AoResponse
+
+from .base import BaseAPI, DEFAULT_CONCURRENCY
+from Tools.async_http import close_async_client
+
+StopCondition = Callable[["BatchResult"], bool]
+
+
+@define
+class BatchResult:
+    """单个请求的结果，index 为其在输入序列中的位置"""
+    index: int
+    api: BaseAPI
+    response: Optional[AoResponse] = field(default=None)
+    error: Optional[BaseException] = field(default=None)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def _send(index: int, api_object: BaseAPI) -> BatchResult:
+    try:
+        return BatchResult(index, api_object, response=await api_object.asend())
+    except Exception as e:
+        return BatchResult(index, api_object, error=e)
+
+
+async def iter_batch(api_objects: Iterable[BaseAPI],
+                     window: int = DEFAULT_CONCURRENCY,
+                     stop_when: Optional[StopCondition] = None) -> AsyncIterator[BatchResult]:
+    """
+    并发发送，同时在途的请求不超过 window，按完成顺序逐个产出结果；
+    api_objects 可以是惰性生成器，只在窗口有空位时才取下一个。
+    stop_when 返回 True 后不再发出新请求，序号更大的在途请求被取消，序号更小的仍正常返回
+    """
+    source = iter(api_objects)
+    pending: Dict[asyncio.Task, int] = {}
+    stop_index: Optional[int] = None
+    counter = itertools.count()
+
+    def fill():
+        while stop_index is None and len(pending) < window:
+            api_object = next(source, None)
+            if api_object is None:
+                return
+            index = next(counter)
+            pending[asyncio.ensure_future(_send(index, api_object))] = index
+
+    fill()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=pending.get):
+                if pending.pop(task, None) is None:
+                    # 已被本轮先前的停止条件剔除
+                    continue
+                result = task.result()
+                if stop_index is not None and result.index > stop_index:
+                    continue
+                if stop_when is not None and stop_when(result):
+                    if stop_index is None or result.index < stop_index:
+                        stop_index = result.index
+                    for other, index in list(pending.items()):
+                        if index > stop_index:
+                            other.cancel()
+                            del pending[other]
+                yield result
+            fill()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def gather_batch(api_objects: Iterable[BaseAPI],
+                       window: int = DEFAULT_CONCURRENCY,
+                       stop_when: Optional[StopCondition] = None) -> List[BatchResult]:
+    """收集全部结果并按序号排序"""
+    results = [result async for result in iter_batch(api_objects, window, stop_when)]
+    return sorted(results, key=lambda r: r.index)
+
+
+def run_batch(api_objects: Iterable[BaseAPI],
+              window: int = DEFAULT_CONCURRENCY,
+              stop_when: Optional[StopCondition] = None) -> List[BatchResult]:
+    """同步入口，见 gather_batch"""
+    async def _main():
+        try:
+            return await gather_batch(api_objects, window, stop_when)
+        finally:
+            await close_async_client()
+
+    return asyncio.run(_main())
+
+
+def page_apis(api_cls: Type[BaseAPI], limit: int = 10, offset: int = 0, total: Optional[int] = None,
+              query: Optional[dict] = None, **api_kwargs) -> Iterator[BaseAPI]:
+    """
+    生成分页API对象：offset 从 offset 开始每次递增 limit，直到 total（缺省不设上限，依赖短页停止）
+    query 为其余查询参数，api_kwargs 透传给API对象（如 base_url、headers）
+    """
+    offsets = itertools.count(offset, limit) if total is None else range(offset, total, limit)
+    for page_offset in offsets:
+        query_params = api_cls.QueryParams(offset=page_offset, limit=limit, **(query or {}))
+        yield api_cls(query_params=query_params, **api_kwargs)
+
+
+def short_page(result: BatchResult) -> bool:
+    """返回条数少于 limit 的页视为最后一页；请求失败时同样停止"""
+    if not result.ok:
+        return True
+    return len(result.response.response_model.data) < result.api.query_params.limit
+
+
+def iter_pages(api_cls: Type[BaseAPI], limit: int = 10, window: int = 4, offset: int = 0,
+               total: Optional[int] = None, query: Optional[dict] = None,
+               **api_kwargs) -> AsyncIterator[BatchResult]:
+    """并发拉取分页接口，遇到短页后停止"""
+    pages = page_apis(api_cls, limit=limit, offset=offset, total=total, query=query, **api_kwargs)
+    return iter_batch(pages, window=window, stop_when=short_page)
+
+
+def crawl_pages(api_cls: Type[BaseAPI], limit: int = 10, window: int = 4, offset: int = 0,
+                total: Optional[int] = None, query: Optional[dict] = None, **api_kwargs) -> list:
+    """同步拉取全部分页并按页序拼接 data；任一页失败时抛出其异常"""
+    pages = page_apis(api_cls, limit=limit, offset=offset, total=total, query=query, **api_kwargs)
+    items = []
+    for result in run_batch(pages, window=window, stop_when=short_page):
+        if not result.ok:
+            raise result.error
+        items.extend(result.response.response_model.data)
+    return items
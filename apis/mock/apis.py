@@ -3,7 +3,8 @@ from datetime import datetime
 
 from attrs import define, field
 from aomaker.core.router import router
-from aomaker.core.api_object import BaseAPIObject
+
+from ..base import BaseAPI
 
 from .models import (
     UserListResponse,
@@ -16,6 +17,7 @@ from .models import (
     Product,
     UserResponse,
     OrderResponse, 
+    OrderListResponse,
     CommentListResponse, 
     SystemStatusResponse, 
     CommentResponse, 
@@ -27,7 +29,7 @@ from .models import (
 
 @define(kw_only=True)
 @router.post("/api/login/token")
-class LoginAPI(BaseAPIObject[TokenResponseData]):
+class LoginAPI(BaseAPI[TokenResponseData]):
     """登录"""
 
     @define
@@ -41,7 +43,7 @@ class LoginAPI(BaseAPIObject[TokenResponseData]):
 
 @define(kw_only=True)
 @router.get("/api/users")
-class GetUsersAPI(BaseAPIObject[UserListResponse]):
+class GetUsersAPI(BaseAPI[UserListResponse]):
     """获取用户列表"""
 
     @define
@@ -59,7 +61,7 @@ class GetUsersAPI(BaseAPIObject[UserListResponse]):
 
 @define(kw_only=True)
 @router.get("/api/users/{user_id}")
-class GetUserAPI(BaseAPIObject[UserResponse]):
+class GetUserAPI(BaseAPI[UserResponse]):
     """获取单个用户信息"""
 
     @define
@@ -73,7 +75,7 @@ class GetUserAPI(BaseAPIObject[UserResponse]):
 
 @define(kw_only=True)
 @router.post("/api/users")
-class CreateUserAPI(BaseAPIObject[UserResponse]):
+class CreateUserAPI(BaseAPI[UserResponse]):
     """创建新用户"""
 
     @define
@@ -91,7 +93,7 @@ class CreateUserAPI(BaseAPIObject[UserResponse]):
 
 @define(kw_only=True)
 @router.get("/api/products")
-class GetProductsAPI(BaseAPIObject[ProductListResponse]):
+class GetProductsAPI(BaseAPI[ProductListResponse]):
     """获取产品列表"""
 
     @define
@@ -109,7 +111,7 @@ class GetProductsAPI(BaseAPIObject[ProductListResponse]):
 
 @define(kw_only=True)
 @router.get("/api/products/{product_id}")
-class GetProductAPI(BaseAPIObject[ProductResponse]):
+class GetProductAPI(BaseAPI[ProductResponse]):
     """获取单个产品信息"""
 
     @define
@@ -123,7 +125,7 @@ class GetProductAPI(BaseAPIObject[ProductResponse]):
 
 @define(kw_only=True)
 @router.post("/api/orders")
-class CreateOrderAPI(BaseAPIObject[OrderResponse]):
+class CreateOrderAPI(BaseAPI[OrderResponse]):
     """创建新订单"""
 
     @define
@@ -140,9 +142,26 @@ class CreateOrderAPI(BaseAPIObject[OrderResponse]):
     endpoint_id: Optional[str] = field(default="create_order_api_orders_post")
 
 
+@define(kw_only=True)
+@router.get("/api/orders")
+class GetOrdersAPI(BaseAPI[OrderListResponse]):
+    """获取订单列表"""
+
+    @define
+    class QueryParams:
+        user_id: Optional[int] = field(default=None, metadata={"description": "用户ID"})
+        status: Optional[str] = field(default=None, metadata={"description": "订单状态"})
+        offset: int = field(default=0, metadata={"description": "偏移量"})
+        limit: int = field(default=10, metadata={"description": "限制数量"})
+
+    query_params: QueryParams = field(factory=QueryParams)
+    response: Optional[OrderListResponse] = field(default=OrderListResponse)
+    endpoint_id: Optional[str] = field(default="get_orders_api_orders_get")
+
+
 @define(kw_only=True)
 @router.put("/api/orders/{order_id}/status")
-class UpdateOrderStatusAPI(BaseAPIObject[GenericResponse]):
+class UpdateOrderStatusAPI(BaseAPI[GenericResponse]):
     """更新订单状态"""
 
     @define
@@ -162,7 +181,7 @@ class UpdateOrderStatusAPI(BaseAPIObject[GenericResponse]):
 # 1. GET请求，带路径参数
 @define(kw_only=True)
 @router.get("/api/user_details/{user_id}")
-class GetUserDetailAPI(BaseAPIObject[UserDetailResponse]):
+class GetUserDetailAPI(BaseAPI[UserDetailResponse]):
     """获取用户详细信息"""
 
     @define
@@ -177,7 +196,7 @@ class GetUserDetailAPI(BaseAPIObject[UserDetailResponse]):
 # 2. GET请求，带查询参数
 @define(kw_only=True)
 @router.get("/api/comments")
-class GetCommentsAPI(BaseAPIObject[CommentListResponse]):
+class GetCommentsAPI(BaseAPI[CommentListResponse]):
     """获取评论列表"""
 
     @define
@@ -196,7 +215,7 @@ class GetCommentsAPI(BaseAPIObject[CommentListResponse]):
 # 3. GET请求，无路径参数和查询参数
 @define(kw_only=True)
 @router.get("/api/system/status")
-class GetSystemStatusAPI(BaseAPIObject[SystemStatusResponse]):
+class GetSystemStatusAPI(BaseAPI[SystemStatusResponse]):
     """获取系统状态"""
 
     response: Optional[SystemStatusResponse] = field(default=SystemStatusResponse)
@@ -206,7 +225,7 @@ class GetSystemStatusAPI(BaseAPIObject[SystemStatusResponse]):
 # 4. POST请求，带路径参数和请求体
 @define(kw_only=True)
 @router.post("/api/products/{product_id}/comments")
-class AddProductCommentAPI(BaseAPIObject[CommentResponse]):
+class AddProductCommentAPI(BaseAPI[CommentResponse]):
     """添加产品评论"""
 
     @define
@@ -231,7 +250,7 @@ class AddProductCommentAPI(BaseAPIObject[CommentResponse]):
 # 5. DELETE请求
 @define(kw_only=True)
 @router.delete("/api/comments/{comment_id}")
-class DeleteCommentAPI(BaseAPIObject[GenericResponse]):
+class DeleteCommentAPI(BaseAPI[GenericResponse]):
     """删除评论"""
 
     @define
@@ -246,7 +265,7 @@ class DeleteCommentAPI(BaseAPIObject[GenericResponse]):
 # 6. PATCH请求，模拟文件上传
 @define(kw_only=True)
 @router.patch("/api/users/{user_id}/avatar")
-class UploadAvatarAPI(BaseAPIObject[FileUploadDataResponse]):
+class UploadAvatarAPI(BaseAPI[FileUploadDataResponse]):
     """上传用户头像"""
 
     @define
@@ -268,7 +287,7 @@ class UploadAvatarAPI(BaseAPIObject[FileUploadDataResponse]):
 # 7. PUT请求，更新用户详情
 @define(kw_only=True)
 @router.put("/api/user_details/{user_id}")
-class UpdateUserDetailAPI(BaseAPIObject[UserDetailResponse]):
+class UpdateUserDetailAPI(BaseAPI[UserDetailResponse]):
     """更新用户详细信息"""
 
     @define
@@ -293,7 +312,7 @@ class UpdateUserDetailAPI(BaseAPIObject[UserDetailResponse]):
 # 8. 带嵌套模型的GET请求
 @define(kw_only=True)
 @router.get("/api/product_details/{product_id}")
-class GetProductDetailAPI(BaseAPIObject[ProductDetailResponse]):
+class GetProductDetailAPI(BaseAPI[ProductDetailResponse]):
     """获取产品详细信息"""
 
     @define
@@ -308,7 +327,7 @@ class GetProductDetailAPI(BaseAPIObject[ProductDetailResponse]):
 # 9. 带嵌套模型的POST请求
 @define(kw_only=True)
 @router.post("/api/product_details")
-class CreateProductDetailAPI(BaseAPIObject[ProductDetailResponse]):
+class CreateProductDetailAPI(BaseAPI[ProductDetailResponse]):
     """创建产品详细信息"""
 
     @define
@@ -0,0 +1,98 @@
+"""
+异步API基准：对比同步逐个发送与 asyncio 并发发送 apis/mock 读接口的吞吐
+
+python -m benchmarks.bench_async_api --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from aomaker.core.http_client import HTTPClient
+
+from apis.base import gather_apis
+from apis.mock.apis import LoginAPI, GetUserAPI, GetProductAPI
+from Tools.async_http import AsyncHTTPClient
+from Tools.mock_server import MockServer
+
+console = Console()
+
+
+def start_mock_server() -> MockServer:
+    """在后台线程启动由 apis/mock 路由声明生成的 mock 服务"""
+    return MockServer().start()
+
+
+def make_apis(base_url: str, headers: dict, total: int, http_client=None, validate=False):
+    """交替构造用户查询与产品查询"""
+    apis = []
+    for i in range(total):
+        kwargs = dict(base_url=base_url, headers=headers, http_client=http_client, enable_schema_validation=validate)
+        if i % 2:
+            apis.append(GetUserAPI(path_params=GetUserAPI.PathParams(user_id=i % 5 + 1), **kwargs))
+        else:
+            apis.append(GetProductAPI(path_params=GetProductAPI.PathParams(product_id=i % 5 + 1), **kwargs))
+    return apis
+
+
+def run(base_url: str, total: int, concurrency: int, validate: bool):
+    # 两种模式均不挂中间件，只比较发送方式
+    sync_client = HTTPClient()
+    sync_client.middlewares = []
+
+    login = LoginAPI(base_url=base_url, http_client=sync_client, request_body=LoginAPI.RequestBodyModel(
+        username="aomaker", password="123456"))
+    token = login.send().response_model.data.access_token
+    headers = {"Authorization": f"Bearer {token}"}
+
+    results = {}
+    apis = make_apis(base_url, headers, total, http_client=sync_client, validate=validate)
+    start = time.perf_counter()
+    for api in apis:
+        api.send()
+    results["sync"] = time.perf_counter() - start
+
+    async def async_run():
+        client = AsyncHTTPClient(limit=concurrency)
+        apis = make_apis(base_url, headers, total, http_client=sync_client, validate=validate)
+        for api in apis:
+            api.async_client = client
+        start = time.perf_counter()
+        await gather_apis(apis, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        await client.close()
+        return elapsed
+
+    results[f"async x{concurrency}"] = asyncio.run(async_run())
+
+    table = Table(title=f"同步 vs 异步 ({total} 次读请求)", show_header=True, header_style="bold magenta")
+    for column in ("模式", "耗时(s)", "吞吐(req/s)"):
+        table.add_column(column)
+    for name, elapsed in results.items():
+        table.add_row(name, f"{elapsed:.3f}", f"{total / elapsed:.1f}")
+    console.print(table)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步/异步API吞吐基准")
+    parser.add_argument("--base-url", help="mock服务地址，缺省时在本进程内启动")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--validate", action="store_true", help="开启响应schema校验")
+    args = parser.parse_args()
+
+    if args.base_url:
+        run(args.base_url, args.requests, args.concurrency, args.validate)
+        return
+    server = start_mock_server()
+    try:
+        run(server.url, args.requests, args.concurrency, args.validate)
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
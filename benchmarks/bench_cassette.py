@@ -0,0 +1,94 @@
+"""
+录制回放基准：对本地桩服务录制 configs_v3/get_account_v3/create_order_v3 形式的请求，
+对比直接请求桩服务与零延迟回放的单次耗时，以及打开磁带(mmap + 读索引)的耗时
+
+python -m benchmarks.bench_cassette --orders 1000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import requests
+from rich.console import Console
+from rich.table import Table
+
+from Tools.cassette import Cassette, RECORD, REPLAY, install_cassette
+from Tools.stub_server import apex_stub_server
+from Tools.transport import mount_pooled_transport
+
+console = Console()
+
+
+def send_all(session: requests.Session, url: str, orders: int, salt: str) -> float:
+    """与 apexpro 一致用 prepare_request + send 发送，每 10 单读一次配置与账户，返回单次请求平均耗时(µs)"""
+    def send(method: str, path: str, **kwargs):
+        return session.send(session.prepare_request(requests.Request(method, f"{url}{path}", **kwargs)))
+
+    count = 0
+    start = time.perf_counter()
+    for i in range(orders):
+        if i % 10 == 0:
+            send("GET", "/api/v3/symbols")
+            send("GET", "/api/v3/account")
+            count += 2
+        send("POST", "/api/v3/order", data={
+            "symbol": "BTC-USDT", "side": "BUY", "type": "LIMIT", "size": "0.001", "price": str(60000 + i),
+            "clientId": f"{salt}{i}", "expiration": str(int(time.time())), "signature": f"0x{salt}{i}"})
+        count += 1
+    return (time.perf_counter() - start) / count * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制回放基准")
+    parser.add_argument("--orders", type=int, default=1000)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench-cassette-")
+    path = os.path.join(work, "order.cassette")
+    try:
+        with apex_stub_server() as server:
+            url = server.url
+            live = requests.Session()
+            mount_pooled_transport(live)
+            live_us = send_all(live, url, args.orders, "live")
+            recording = requests.Session()
+            mount_pooled_transport(recording)
+            recorder = install_cassette(recording, RECORD, path)
+            record_us = send_all(recording, url, args.orders, "rec")
+            recorder.save()
+
+        start = time.perf_counter()
+        cassette = Cassette.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        replay = requests.Session()
+        adapter = install_cassette(replay, REPLAY, path)
+        replay_us = send_all(replay, url, args.orders, "replay")
+        # 不含 requests.Session 自身开销(准备请求、读取代理环境变量等)
+        prepared = [replay.prepare_request(requests.Request("POST", f"{url}/api/v3/order", data={
+            "symbol": "BTC-USDT", "side": "BUY", "type": "LIMIT", "size": "0.001", "price": str(60000 + i),
+            "clientId": str(i), "signature": "0x"})) for i in range(args.orders)]
+        start = time.perf_counter()
+        for request in prepared:
+            adapter.send(request)
+        adapter_us = (time.perf_counter() - start) / len(prepared) * 1_000_000
+        stats = cassette.stats()
+
+        table = Table(title=f"录制回放 ({args.orders} 单，{stats['interactions']} 次请求)",
+                      show_header=True, header_style="bold magenta")
+        for column in ("场景", "耗时"):
+            table.add_column(column)
+        table.add_row("请求本地桩服务(单次)", f"{live_us:.0f}µs")
+        table.add_row("录制(单次)", f"{record_us:.0f}µs")
+        table.add_row("零延迟回放(单次)", f"{replay_us:.0f}µs")
+        table.add_row("其中回放适配器(单次)", f"{adapter_us:.0f}µs")
+        table.add_row("打开磁带", f"{load_ms:.2f}ms")
+        table.add_row("磁带大小", f"{stats['file_bytes'] / 1024:.1f}KB，去重后响应体 {stats['blobs']} 个")
+        console.print(table)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+aomaker.db 并发争用基准：N 个进程同时读写 cache 表(按 worker upsert，每 5 次按 worker 查询一次)，对比
+每次操作新建连接(rollback journal)、aomaker 原有 SQLiteDB(WAL，每次写入提交)、Tools/storage.py(共享连接、批量提交、忙时退避)
+
+python -m benchmarks.bench_db_contention --processes 8 --ops 500 --batch-size 50
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from aomaker.database.sqlite import SQLiteDB
+from rich.console import Console
+from rich.table import Table
+
+from Tools import storage
+from Tools.latency import LatencyHistogram
+
+console = Console()
+
+PER_OPERATION, AOMAKER, SHARED = "per_operation", "aomaker", "shared"
+CACHE_TABLE = """CREATE TABLE IF NOT EXISTS cache (var_name TEXT, value TEXT, worker TEXT, UNIQUE(var_name, worker))"""
+UPSERT = """INSERT INTO cache (var_name, value, worker) VALUES (?, ?, ?)
+            ON CONFLICT(var_name, worker) DO UPDATE SET value = excluded.value"""
+SELECT = "SELECT value FROM cache WHERE worker = ?"
+
+
+def _per_operation(db_path: str, sql: str, params: tuple):
+    connection = sqlite3.connect(db_path, timeout=5)
+    try:
+        rows = connection.execute(sql, params).fetchall()
+        connection.commit()
+        return rows
+    finally:
+        connection.close()
+
+
+def _worker(mode: str, db_path: str, worker: int, ops: int, batch_size: int, results):
+    if mode == SHARED:
+        storage.install()
+    db = SQLiteDB(db_path) if mode != PER_OPERATION else None
+    histogram, errors = LatencyHistogram(), 0
+    name = f"worker-{worker}"
+    start = time.perf_counter()
+    for first in range(0, ops, batch_size if mode == SHARED else 1):
+        count = min(batch_size, ops - first) if mode == SHARED else 1
+        began = time.perf_counter()
+        try:
+            if mode == SHARED:
+                with storage.batch(db_path):
+                    for i in range(first, first + count):
+                        db.upsert_data("cache", {"var_name": f"var_{i % 20}", "value": json.dumps({"i": i}),
+                                                 "worker": name}, "var_name, worker")
+                        if i % 5 == 0:
+                            db.query(SELECT, (name,))
+            elif mode == AOMAKER:
+                db.upsert_data("cache", {"var_name": f"var_{first % 20}", "value": json.dumps({"i": first}),
+                                         "worker": name}, "var_name, worker")
+                if first % 5 == 0:
+                    db.query(SELECT, (name,))
+            else:
+                _per_operation(db_path, UPSERT, (f"var_{first % 20}", json.dumps({"i": first}), name))
+                if first % 5 == 0:
+                    _per_operation(db_path, SELECT, (name,))
+        except sqlite3.OperationalError:
+            errors += count
+        # 批量模式下一次提交摊到批内各次操作
+        for _ in range(count):
+            histogram.record((time.perf_counter() - began) / count)
+    results.put({"elapsed": time.perf_counter() - start, "errors": errors, "latency": histogram.to_dict(),
+                 "busy_retries": storage.storage_stats["busy_retries"]})
+
+
+def bench(mode: str, processes: int, ops: int, batch_size: int) -> dict:
+    directory = tempfile.mkdtemp(prefix="bench_db_")
+    db_path = os.path.join(directory, "aomaker.db")
+    connection = sqlite3.connect(db_path)
+    connection.execute(f"PRAGMA journal_mode={'DELETE' if mode == PER_OPERATION else 'WAL'}")
+    connection.execute(CACHE_TABLE)
+    if mode == SHARED:
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_cache_worker ON cache (worker)")
+    connection.commit()
+    connection.close()
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_worker, args=(mode, db_path, i, ops, batch_size, results))
+               for i in range(processes)]
+    for process in workers:
+        process.start()
+    rows = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    # 各进程同时开始，以最慢的进程计总耗时，不含进程启动
+    elapsed = max(row["elapsed"] for row in rows)
+    latency = LatencyHistogram()
+    for row in rows:
+        latency.merge(LatencyHistogram.from_dict(row["latency"]))
+    return {"mode": mode, "ops": processes * ops, "elapsed": elapsed, "errors": sum(row["errors"] for row in rows),
+            "busy_retries": sum(row["busy_retries"] for row in rows), "p50": latency.percentile(50),
+            "p99": latency.percentile(99), "max": latency.max or 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="aomaker.db 并发争用基准")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=500, help="每个进程的写入次数")
+    parser.add_argument("--batch-size", type=int, default=50, help="共享连接模式每个事务的写入次数")
+    args = parser.parse_args()
+
+    names = {PER_OPERATION: "每次操作新建连接 (rollback journal)", AOMAKER: "aomaker SQLiteDB (WAL，逐条提交)",
+             SHARED: f"共享连接 + 批量提交 (每批 {args.batch_size})"}
+    rows = [bench(mode, args.processes, args.ops, args.batch_size) for mode in (PER_OPERATION, AOMAKER, SHARED)]
+    table = Table(title=f"cache 表并发读写 ({args.processes} 进程 × {args.ops} 次，{os.cpu_count()} 核)",
+                  show_header=True, header_style="bold magenta")
+    for column in ("方式", "总耗时(s)", "次/秒", "p50(ms)", "p99(ms)", "最长(ms)", "失败", "忙重试"):
+        table.add_column(column)
+    for row in rows:
+        table.add_row(names[row["mode"]], f"{row['elapsed']:.2f}", f"{row['ops'] / row['elapsed']:.0f}",
+                      f"{row['p50'] * 1000:.2f}", f"{row['p99'] * 1000:.2f}", f"{row['max'] * 1000:.1f}",
+                      str(row["errors"]), str(row["busy_retries"]))
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+响应反序列化基准：10k 元素 data 数组下，对比 aomaker 的 cattrs 转换与预编译/惰性转换
+
+python -m benchmarks.bench_deserialize --size 10000 --rounds 5
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from rich.console import Console
+from rich.table import Table
+
+from aomaker.core.converters import cattrs_converter
+
+from apis.mock.models import (UserListResponse, ProductListResponse, CommentListResponse, OrderListResponse,
+                             ProductDetailResponse)
+from Tools.deserializers import LAZY, compile_structure, _datetime_cache
+
+console = Console()
+
+
+def _times(size: int, distinct: int):
+    base = datetime(2024, 1, 1)
+    return [(base + timedelta(seconds=i % distinct)).isoformat() for i in range(size)]
+
+
+def make_payloads(size: int, distinct: int) -> Dict[type, dict]:
+    times = _times(size, distinct)
+    users = [{"id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+              "created_at": times[i], "is_active": True} for i in range(size)]
+    comments = [{"id": i, "product_id": i % 100, "user_id": i % 1000, "content": "不错",
+                 "rating": i % 5 + 1, "created_at": times[i]} for i in range(size)]
+    orders = [{"id": i, "user_id": i % 1000, "products": [{"product_id": 1, "quantity": 2}],
+               "total_price": 99.5, "status": "paid", "created_at": times[i]} for i in range(size)]
+    products = [{"id": i, "name": f"商品{i}", "price": 10.0 + i % 500, "description": None,
+                 "stock": i % 300, "category": ("电子", "服装", "食品")[i % 3]} for i in range(size)]
+    product = products[0]
+    return {
+        UserListResponse: {"ret_code": 0, "message": "success", "data": users, "total": size},
+        ProductListResponse: {"ret_code": 0, "message": "success", "data": products, "total": size},
+        CommentListResponse: {"ret_code": 0, "message": "success", "data": comments, "total": size},
+        OrderListResponse: {"ret_code": 0, "message": "success", "data": orders, "total": size},
+        ProductDetailResponse: {"ret_code": 0, "message": "success", "data": {
+            "basic_info": product, "sales_count": size, "comments": comments,
+            "related_products": list(range(10)), "specifications": {"color": "黑"}}},
+    }
+
+
+def _items(model):
+    data = model.data
+    return data.comments if hasattr(data, "comments") else data
+
+
+def best_of(func: Callable[[], object], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        _datetime_cache.clear()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应反序列化基准")
+    parser.add_argument("--size", type=int, default=10000, help="data 数组元素数")
+    parser.add_argument("--rounds", type=int, default=5, help="每项取最快的一轮")
+    parser.add_argument("--distinct-times", type=int, default=10000, help="created_at 不同取值的个数")
+    args = parser.parse_args()
+
+    table = Table(title=f"反序列化耗时 (ms, {args.size} 元素)", show_header=True, header_style="bold magenta")
+    for column in ("模型", "cattrs", "预编译", "惰性(取首元素)", "惰性(全部访问)", "加速比"):
+        table.add_column(column)
+
+    for cls, payload in make_payloads(args.size, args.distinct_times).items():
+        eager, lazy = compile_structure(cls), compile_structure(cls, mode=LAZY)
+        assert eager(payload) == cattrs_converter.structure(payload, cls)
+        baseline = best_of(lambda: cattrs_converter.structure(payload, cls), args.rounds)
+        compiled = best_of(lambda: eager(payload), args.rounds)
+        lazy_first = best_of(lambda: _items(lazy(payload))[0], args.rounds)
+        lazy_all = best_of(lambda: list(_items(lazy(payload))), args.rounds)
+        table.add_row(cls.__name__, f"{baseline * 1000:.1f}", f"{compiled * 1000:.1f}", f"{lazy_first * 1000:.3f}",
+                      f"{lazy_all * 1000:.1f}", f"{baseline / compiled:.1f}x")
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+列表响应内存基准：100k 元素下，对比原始字典、attrs 模型列表与列式存储常驻内存
+
+python -m benchmarks.bench_memory --size 100000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from rich.console import Console
+from rich.table import Table
+
+from apis.mock.models import UserListResponse, ProductListResponse, CommentListResponse, OrderListResponse
+from Tools.deserializers import EAGER, COLUMNAR, structure, _datetime_cache
+from benchmarks.bench_deserialize import make_payloads
+
+console = Console()
+
+MODELS = (UserListResponse, ProductListResponse, CommentListResponse, OrderListResponse)
+
+
+def measure(raw: bytes, cls, mode):
+    """返回 (解析后常驻字节数, 峰值字节数)；mode 为 None 时只保留 json.loads 的字典"""
+    _datetime_cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    data = json.loads(raw)
+    result = data if mode is None else structure(data, cls, mode)
+    del data
+    _datetime_cache.clear()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表响应内存基准")
+    parser.add_argument("--size", type=int, default=100000, help="data 数组元素数")
+    args = parser.parse_args()
+
+    table = Table(title=f"常驻内存 (MB, {args.size} 元素)", show_header=True, header_style="bold magenta")
+    for column in ("模型", "字典", "attrs模型", "列式", "列式/attrs", "列式解析峰值"):
+        table.add_column(column)
+
+    payloads = make_payloads(args.size, args.size)
+    for cls in MODELS:
+        raw = json.dumps(payloads[cls]).encode("utf-8")
+        dicts, _ = measure(raw, cls, None)
+        eager, _ = measure(raw, cls, EAGER)
+        columnar, peak = measure(raw, cls, COLUMNAR)
+        mb = 1024 * 1024
+        table.add_row(cls.__name__, f"{dicts / mb:.1f}", f"{eager / mb:.1f}", f"{columnar / mb:.1f}",
+                      f"{columnar / eager:.0%}", f"{peak / mb:.1f}")
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+中间件开销基准：中间件链包裹空发送函数，对比不挂计时中间件、开启计时中间件的单次调用耗时，
+以及关闭时连接层残留的检查开销
+
+python -m benchmarks.bench_middleware --calls 200000
+"""
+import argparse
+import time
+from functools import partial
+
+from rich.console import Console
+from rich.table import Table
+
+from middlewares.timing_middleware import TimingStats, timing_middleware
+import middlewares.timing_middleware as timing_module
+from Tools.transport import current_phases
+
+console = Console()
+
+
+class _Response:
+    status_code = 200
+
+
+def _send(request):
+    return _Response
+
+
+def build_chain(middlewares):
+    # 与 aomaker HTTPClient.send_request 相同的组装方式
+    call_next = _send
+    for middleware in reversed(middlewares):
+        call_next = partial(middleware, call_next=call_next)
+    return call_next
+
+
+def per_call_us(func, calls: int) -> float:
+    request = {"_api_meta": {"endpoint_id": "get_users_api_users_get"}, "url": "http://localhost/api/users"}
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(request)
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="计时中间件开销基准")
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    timing_module.timing_stats = TimingStats()
+    baseline = per_call_us(build_chain([]), args.calls)
+    enabled = per_call_us(build_chain([timing_middleware]), args.calls)
+    disabled = per_call_us(lambda request: current_phases(), args.calls)
+
+    table = Table(title=f"中间件单次调用开销 (µs, {args.calls} 次)", show_header=True, header_style="bold magenta")
+    for column in ("场景", "单次耗时", "额外开销"):
+        table.add_column(column)
+    table.add_row("无中间件", f"{baseline:.2f}", "-")
+    table.add_row("计时中间件开启", f"{enabled:.2f}", f"{enabled - baseline:.2f}")
+    table.add_row("计时中间件关闭(连接层检查)", f"{disabled:.2f}", f"{disabled:.2f}")
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
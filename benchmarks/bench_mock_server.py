@@ -0,0 +1,159 @@
+"""
+mock 服务吞吐基准：mock 服务独占一个进程，若干压测进程各开多个长连接，按读多写少的请求组合闭环发送；
+除整体吞吐外给出服务进程的 CPU 时间，单核容量 = 请求数 / 服务进程 CPU 秒，与压测进程是否抢占同一核无关
+
+python -m benchmarks.bench_mock_server --duration 5 --clients 2 --connections 32
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from Tools.mock_server import FaultConfig, MockServer
+
+console = Console()
+
+REQUESTS = [
+    b"GET /api/users/%d HTTP/1.1\r\nHost: mock\r\n\r\n",
+    b"GET /api/products/%d HTTP/1.1\r\nHost: mock\r\n\r\n",
+    b"GET /api/users?offset=%d&limit=10 HTTP/1.1\r\nHost: mock\r\n\r\n",
+    b"GET /api/product_details/%d HTTP/1.1\r\nHost: mock\r\n\r\n",
+    b"GET /api/orders?user_id=%d HTTP/1.1\r\nHost: mock\r\n\r\n",
+]
+ORDER = (b'{"id":%d,"user_id":1,"products":[{"product_id":1,"quantity":1}],"total_price":9.9,'
+         b'"status":"pending","created_at":"2024-01-01T00:00:00"}')
+
+
+def request_bytes(i: int) -> bytes:
+    # 每 10 个请求中 1 个下单
+    if i % 10 == 9:
+        body = ORDER % (100000 + i)
+        return (b"POST /api/orders HTTP/1.1\r\nHost: mock\r\nContent-Type: application/json\r\n"
+                b"Content-Length: %d\r\n\r\n" % len(body)) + body
+    return REQUESTS[i % len(REQUESTS)] % (i % 100 + 1)
+
+
+class _Client(asyncio.Protocol):
+    """一个长连接：收到完整响应后发送下一个请求"""
+
+    def __init__(self, deadline: float, counter: list):
+        self.deadline = deadline
+        self.counter = counter
+        self.buffer = bytearray()
+        self.i = 0
+        self.done = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._next()
+
+    def _next(self):
+        if time.perf_counter() >= self.deadline:
+            self.transport.close()
+            return
+        self.i += 1
+        self.transport.write(request_bytes(self.i))
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        end = self.buffer.find(b"\r\n\r\n")
+        if end < 0:
+            return
+        start = self.buffer.find(b"Content-Length: ", 0, end) + 16
+        length = int(self.buffer[start:self.buffer.find(b"\r\n", start)])
+        if len(self.buffer) < end + 4 + length:
+            return
+        self.counter[0 if self.buffer.startswith(b"HTTP/1.1 200") else 1] += 1
+        del self.buffer[:end + 4 + length]
+        self._next()
+
+    def connection_lost(self, exc):
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+def run_client(port: int, connections: int, duration: float, results):
+    async def run():
+        loop = asyncio.get_running_loop()
+        counter = [0, 0]
+        deadline = time.perf_counter() + duration
+        clients = []
+        for _ in range(connections):
+            _, client = await loop.create_connection(lambda: _Client(deadline, counter), "127.0.0.1", port)
+            clients.append(client)
+        await asyncio.gather(*(client.done for client in clients))
+        return counter
+
+    results.put(asyncio.run(run()))
+
+
+def run_server(port_queue, stop_event, fault: FaultConfig):
+    server = MockServer(fault=fault)
+
+    async def serve():
+        await server.serve()
+        cpu = time.process_time()
+        port_queue.put(server.port)
+        while not stop_event.is_set():
+            await asyncio.sleep(0.05)
+        port_queue.put((time.process_time() - cpu, server.request_count))
+
+    asyncio.run(serve())
+
+
+def bench(name: str, fault: FaultConfig, clients: int, connections: int, duration: float) -> dict:
+    ctx = multiprocessing.get_context("fork")
+    queue, results, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+    server = ctx.Process(target=run_server, args=(queue, stop, fault), daemon=True)
+    server.start()
+    port = queue.get()
+    start = time.perf_counter()
+    workers = [ctx.Process(target=run_client, args=(port, connections, duration, results), daemon=True)
+               for _ in range(clients)]
+    for worker in workers:
+        worker.start()
+    ok = errors = 0
+    for _ in workers:
+        done, failed = results.get()
+        ok, errors = ok + done, errors + failed
+    elapsed = time.perf_counter() - start
+    stop.set()
+    cpu, handled = queue.get()
+    server.join()
+    for worker in workers:
+        worker.join()
+    return {"name": name, "requests": ok + errors, "errors": errors, "rps": (ok + errors) / elapsed,
+            "cpu_us": cpu / handled * 1_000_000 if handled else 0.0,
+            "capacity": handled / cpu if cpu else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mock 服务吞吐基准")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)), help="压测进程数")
+    parser.add_argument("--connections", type=int, default=32, help="每个压测进程的长连接数")
+    args = parser.parse_args()
+
+    scenarios = [
+        ("无注入", FaultConfig()),
+        ("延迟 5ms±5ms", FaultConfig(latency=0.005, jitter=0.005)),
+        ("错误率 10%", FaultConfig(error_rate=0.1)),
+    ]
+    rows = [bench(name, fault, args.clients, args.connections, args.duration) for name, fault in scenarios]
+
+    table = Table(title=f"mock 服务吞吐 ({args.clients} 个压测进程 x {args.connections} 连接, {os.cpu_count()} 核)",
+                  show_header=True, header_style="bold magenta")
+    for column in ("场景", "请求数", "错误数", "吞吐(req/s)", "服务CPU/请求", "单核容量(req/s)"):
+        table.add_column(column)
+    for row in rows:
+        table.add_row(row["name"], str(row["requests"]), str(row["errors"]), f"{row['rps']:.0f}",
+                      f"{row['cpu_us']:.1f}µs", f"{row['capacity']:.0f}")
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
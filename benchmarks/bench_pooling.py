@@ -0,0 +1,83 @@
+"""
+连接池基准：对比池化长连接与每次新建连接的请求延迟
+
+python -m benchmarks.bench_pooling --requests 500 --concurrency 4
+python -m benchmarks.bench_pooling --url https://omni.apex.exchange/api/v3/symbols
+"""
+import argparse
+import threading
+import time
+from typing import Callable
+
+import requests
+from rich.console import Console
+from rich.table import Table
+
+from Tools.latency import LatencyHistogram
+from Tools.stub_server import apex_stub_server
+from Tools.transport import mount_pooled_transport, pool_stats
+
+console = Console()
+
+
+def _measure(get: Callable[[], requests.Response], total: int, concurrency: int) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    per_thread = total // concurrency
+
+    def worker():
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            get().close()
+            histogram.record(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return histogram
+
+
+def run(url: str, total: int, concurrency: int):
+    # 不池化：每次请求新建Session并关闭连接
+    def unpooled_get():
+        with requests.Session() as session:
+            return session.get(url, headers={"Connection": "close"})
+
+    pooled_session = requests.Session()
+    mount_pooled_transport(pooled_session, pool_size=concurrency)
+    pool_stats.reset()
+
+    results = {
+        "unpooled": _measure(unpooled_get, total, concurrency),
+        "pooled": _measure(lambda: pooled_session.get(url), total, concurrency),
+    }
+
+    table = Table(title=f"连接池基准 {url}", show_header=True, header_style="bold magenta")
+    for column in ("模式", "请求数", "mean(ms)", "p50(ms)", "p99(ms)"):
+        table.add_column(column)
+    for name, histogram in results.items():
+        summary = histogram.summary()
+        table.add_row(name, str(summary["count"]), f"{summary['mean_ms']:.3f}",
+                      f"{summary['p50_ms']:.3f}", f"{summary['p99_ms']:.3f}")
+    console.print(table)
+    console.print(f"池化统计: {pool_stats.to_dict()}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="连接池基准")
+    parser.add_argument("--url", help="目标URL，缺省时启动本地桩服务")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.url:
+        run(args.url, args.requests, args.concurrency)
+        return
+    with apex_stub_server() as server:
+        run(f"{server.url}/api/v3/symbols", args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+运行进度聚合开销基准：对比每个用例结束时 ProgressAggregator 的计数开销、写快照的开销，
+以及 ProgressReporter 合并 N 个进程快照的耗时
+
+python -m benchmarks.bench_progress --tests 100000 --workers 16
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+from rich.console import Console
+from rich.table import Table
+
+from middlewares.timing_middleware import TimingStats
+from Tools.progress import ProgressAggregator, merge_progress
+from Tools.transport import RequestPhases
+
+console = Console()
+
+
+def make_stats(endpoints: int) -> TimingStats:
+    stats = TimingStats()
+    for i in range(endpoints):
+        for j in range(50):
+            stats.record(f"endpoint_{i}", RequestPhases(), 0.001 * (1 + (i + j) % 200))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行进度聚合开销基准")
+    parser.add_argument("--tests", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--endpoints", type=int, default=100)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench-progress-")
+    try:
+        stats = make_stats(args.endpoints)
+        reports = [SimpleNamespace(nodeid="t.py::test", when=when, outcome="passed", passed=True, failed=False,
+                                   skipped=False, duration=0.001) for when in ("setup", "call", "teardown")]
+        call = SimpleNamespace(start=time.time(), excinfo=None)
+        aggregator = ProgressAggregator(work, interval=3600, stats=stats, name="0")
+        start = time.perf_counter()
+        for _ in range(args.tests):
+            for report in reports:
+                aggregator.record(report, call)
+        per_test_us = (time.perf_counter() - start) / args.tests * 1_000_000
+
+        start = time.perf_counter()
+        for i in range(args.workers):
+            aggregator.name = str(i)
+            aggregator.dump()
+        dump_ms = (time.perf_counter() - start) / args.workers * 1000
+
+        start = time.perf_counter()
+        progress = merge_progress(work)
+        merge_ms = (time.perf_counter() - start) * 1000
+        assert progress.finished == args.tests * args.workers
+
+        table = Table(title=f"运行进度聚合开销 ({args.endpoints} 个接口)", show_header=True, header_style="bold magenta")
+        for column in ("场景", "耗时"):
+            table.add_column(column)
+        table.add_row("每个用例的计数(setup/call/teardown)", f"{per_test_us:.2f}µs")
+        table.add_row("写一次快照(每 10 秒最多一次)", f"{dump_ms:.2f}ms")
+        table.add_row(f"合并 {args.workers} 个进程的快照", f"{merge_ms:.2f}ms")
+        console.print(table)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
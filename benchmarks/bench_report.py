@@ -0,0 +1,94 @@
+"""
+测试报告生成基准：构造 N 条 allure 结果（默认 1 万），对比运行中逐条索引的开销、
+收尾合并索引生成报告、无索引时逐个解析结果文件生成报告，以及 allure 命令行（已安装时）的耗时
+
+python -m benchmarks.bench_report --results 10000
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+
+from allure_commons.logger import AllureFileLogger
+from allure_commons.model2 import Label, Parameter, Status, StatusDetails, TestResult
+from rich.console import Console
+from rich.table import Table
+
+from Tools.allure_report import INDEX_DIR, ReportIndexer, build_report
+
+console = Console()
+
+STATUSES = [Status.PASSED] * 17 + [Status.FAILED, Status.BROKEN, Status.SKIPPED]
+
+
+def make_result(i: int, start: int) -> TestResult:
+    status = STATUSES[i % len(STATUSES)]
+    result = TestResult(uuid=str(uuid.uuid4()), historyId=f"h{i}", name=f"test_case_{i}",
+                        fullName=f"testcases.test_module_{i % 50}.TestSuite#test_case_{i}",
+                        status=status, start=start + i * 10, stop=start + i * 10 + 5 + i % 40)
+    result.labels = [Label(name="suite", value=f"test_module_{i % 50}"), Label(name="feature", value="下单"),
+                     Label(name="tag", value="order")]
+    result.parameters = [Parameter(name="symbol", value="'BTC-USDT'")]
+    if status in (Status.FAILED, Status.BROKEN):
+        result.statusDetails = StatusDetails(message=f"AssertionError: case {i}",
+                                             trace="Traceback (most recent call last):\n" * 20)
+    return result
+
+
+def generate(directory: str, count: int) -> float:
+    """写出结果文件并同时走索引插件，返回单条索引的平均耗时(µs)"""
+    writer = AllureFileLogger(directory)
+    indexer = ReportIndexer()
+    os.makedirs(os.path.join(directory, INDEX_DIR), exist_ok=True)
+    indexer._file = open(os.path.join(directory, INDEX_DIR, "index-bench.jsonl"), "w", encoding="utf-8")
+    start, indexing = int(time.time() * 1000), 0.0
+    for i in range(count):
+        result = make_result(i, start)
+        writer.report_result(result)
+        t0 = time.perf_counter()
+        indexer.report_result(result)
+        indexing += time.perf_counter() - t0
+    indexer._file.close()
+    return indexing / count * 1_000_000
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测试报告生成基准")
+    parser.add_argument("--results", type=int, default=10000)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench-report-")
+    try:
+        results_dir = os.path.join(work, "json")
+        per_result_us = generate(results_dir, args.results)
+        indexed = timed(lambda: build_report(results_dir, os.path.join(work, "html-indexed")))
+        shutil.rmtree(os.path.join(results_dir, INDEX_DIR))
+        scanned = timed(lambda: build_report(results_dir, os.path.join(work, "html-scanned")))
+        cli = None
+        if shutil.which("allure"):
+            cli = timed(lambda: subprocess.run(["allure", "generate", results_dir, "-o", os.path.join(work, "html-cli"),
+                                                "-c"], capture_output=True, check=False))
+
+        table = Table(title=f"测试报告生成耗时 ({args.results} 条结果)", show_header=True, header_style="bold magenta")
+        for column in ("场景", "耗时"):
+            table.add_column(column)
+        table.add_row("运行中逐条索引(单条)", f"{per_result_us:.1f}µs")
+        table.add_row("合并索引生成报告", f"{indexed:.2f}s")
+        table.add_row("逐个解析结果文件生成报告", f"{scanned:.2f}s")
+        table.add_row("allure generate", "未安装" if cli is None else f"{cli:.2f}s")
+        console.print(table)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+结果实时汇总基准：多个进程同时向共享内存环形缓冲区写入用例结果，主进程汇总线程同时取出；
+输出写入吞吐、单条写入耗时，以及全部写完后汇总追上所需的时间
+
+python -m benchmarks.bench_result_stream --workers 4 --records 20000
+"""
+import argparse
+import multiprocessing
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from Tools.result_stream import DEFAULT_CAPACITY, ResultAggregator, ResultRing
+
+console = Console()
+
+
+def _write(path: str, worker: int, count: int):
+    ring = ResultRing(path)
+    for i in range(count):
+        ring.publish(f"testcases/test_api/test_worker_{worker}.py::TestOrders::test_case_{i}",
+                     "failed" if i % 50 == 0 else "passed", time.time(), 0.01)
+
+
+def bench(workers: int, records: int, capacity: int) -> dict:
+    per_worker = records // workers
+    with ResultAggregator(capacity=capacity, interval=0.01) as aggregator:
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=_write, args=(aggregator.path, i, per_worker)) for i in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        written = time.perf_counter() - start
+        while aggregator.summary()["stats"]["total"] < per_worker * workers:
+            time.sleep(0.001)
+        caught_up = time.perf_counter() - start - written
+    summary = aggregator.summary()
+    return {"workers": workers, "records": summary["stats"]["total"], "dropped": summary["dropped"],
+            "elapsed": written, "lag": caught_up}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="结果实时汇总基准")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    args = parser.parse_args()
+
+    rows = [bench(workers, args.records, args.capacity) for workers in sorted({1, args.workers})]
+    table = Table(title=f"结果缓冲区 (容量 {args.capacity})", show_header=True, header_style="bold magenta")
+    for column in ("写入进程", "记录数", "丢弃", "写入耗时(s)", "条/秒", "单条(µs)", "汇总滞后(ms)"):
+        table.add_column(column)
+    for row in rows:
+        table.add_row(str(row["workers"]), str(row["records"]), str(row["dropped"]), f"{row['elapsed']:.2f}",
+                      f"{row['records'] / row['elapsed']:.0f}", f"{row['elapsed'] / row['records'] * 1e6:.1f}",
+                      f"{row['lag'] * 1000:.1f}")
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+响应 schema 校验基准：ProductDetailResponse 形态的响应(每条 N 个评论)，对比
+aomaker 原有校验(每次生成 schema、读 schema 表、jsonschema.validate)、缓存的 jsonschema 校验器、
+Tools/schema_cache.py 编译的校验器，以及按比例抽样
+
+python -m benchmarks.bench_schema_validation --responses 2000 --comments 20 --sample 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+# 导入 aomaker.core.api_object 时注册 apischema 的 attrs 支持
+from aomaker.core.api_object import format_validation_error
+from aomaker.storage import Schema
+from apischema.json_schema import deserialization_schema
+from jsonschema import validate
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+from rich.console import Console
+from rich.table import Table
+
+from apis.mock.models import ProductDetailResponse
+from Tools.schema_cache import SchemaCache
+
+console = Console()
+
+
+def payload(index: int, comments: int) -> dict:
+    created_at = "2024-01-01T00:00:00"
+    return {"ret_code": 0, "message": "success", "data": {
+        "basic_info": {"id": index, "name": f"商品{index}", "description": "描述", "price": 99.5, "stock": 100,
+                       "category": "数码"},
+        "sales_count": index * 3,
+        "comments": [{"id": i, "product_id": index, "user_id": i % 50, "content": "好评", "rating": 5,
+                      "created_at": created_at} for i in range(comments)],
+        "related_products": list(range(index, index + 5)),
+        "specifications": {"color": "black", "weight": "1kg"}}}
+
+
+def _aomaker(store: Schema):
+    cls = ProductDetailResponse
+
+    def check(data: dict):
+        # 与 BaseAPIObject._validate_response_schema 相同的步骤，schema 表换为临时数据库
+        existing, current = store.get_schema(cls.__name__), deserialization_schema(cls)
+        if existing != current:
+            store.save_schema(cls.__name__, current)
+        validate(instance=data, schema=current)
+    return check
+
+
+def _jsonschema(store: Schema):
+    schema = deserialization_schema(ProductDetailResponse)
+    validator = validator_for(schema)(schema)
+
+    def check(data: dict):
+        error = best_match(validator.iter_errors(data))
+        if error is not None:
+            raise AssertionError(format_validation_error(error))
+    return check
+
+
+def _compiled(store: Schema, sample: int = 1):
+    cache = SchemaCache(store, sample=sample)
+    return lambda data: cache.validate(ProductDetailResponse, data)
+
+
+def bench(check, payloads) -> float:
+    # 预热：首次同步 schema、编译
+    check(payloads[0])
+    start = time.perf_counter()
+    for data in payloads:
+        check(data)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应 schema 校验基准")
+    parser.add_argument("--responses", type=int, default=2000)
+    parser.add_argument("--comments", type=int, default=20, help="每个响应的评论数")
+    parser.add_argument("--sample", type=int, default=10, help="抽样模式每 N 个响应校验 1 个")
+    args = parser.parse_args()
+
+    store = Schema(os.path.join(tempfile.mkdtemp(prefix="bench_schema_"), "aomaker.db"))
+    payloads = [payload(i, args.comments) for i in range(args.responses)]
+    modes = [("aomaker 原有校验", _aomaker(store)), ("缓存 jsonschema 校验器", _jsonschema(store)),
+             ("编译校验器", _compiled(store)), (f"编译校验器 + 抽样 1/{args.sample}", _compiled(store, args.sample))]
+    rows = [(name, bench(check, payloads)) for name, check in modes]
+
+    baseline = rows[0][1]
+    table = Table(title=f"ProductDetailResponse 校验 ({args.responses} 个响应，每个 {args.comments} 条评论)",
+                  show_header=True, header_style="bold magenta")
+    for column in ("方式", "耗时(s)", "次/秒", "单次(µs)", "加速"):
+        table.add_column(column)
+    for name, elapsed in rows:
+        table.add_row(name, f"{elapsed:.3f}", f"{args.responses / elapsed:.0f}",
+                      f"{elapsed / args.responses * 1e6:.1f}", f"{baseline / elapsed:.1f}x")
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
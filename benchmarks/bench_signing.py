@@ -0,0 +1,79 @@
+"""
+下单签名吞吐基准：每单重新派生密钥(create_order_v3 的做法)、缓存密钥单线程、签名缓存命中、进程池批量签名；
+单线程各项按进程 CPU 时间折算单核吞吐，进程池按 min(进程数, 核数) 折算
+
+python -m benchmarks.bench_signing --orders 400 --workers 4
+"""
+import argparse
+import os
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from Tools import signing
+from Tools.signing import OrderSigner, SigningPool, order_context
+from Tools.stub_server import STUB_CREDENTIALS, _apex_account, _apex_symbols
+
+console = Console()
+
+SEEDS = STUB_CREDENTIALS["APEX_SEEDS"]
+
+
+def make_orders(n: int, client_id: str = None) -> list:
+    return [{"symbol": "BTC-USDT", "side": "BUY" if i % 2 else "SELL", "type": "LIMIT", "size": "0.001",
+             "price": "100000", "clientId": client_id or str(1000000 + i), "timestampSeconds": 1700000000}
+            for i in range(n)]
+
+
+def bench_single(name: str, context: dict, orders: list, derive_each: bool = False) -> dict:
+    signer = OrderSigner(SEEDS)
+    start, cpu = time.perf_counter(), time.process_time()
+    for order in orders:
+        if derive_each:
+            signing._signers.clear()
+            signer = OrderSigner(SEEDS, cache_size=0)
+        signer.sign(context, order)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+    return {"name": name, "orders": len(orders), "elapsed": elapsed, "rate": len(orders) / elapsed,
+            "per_core": len(orders) / cpu if cpu else 0.0}
+
+
+def bench_pool(context: dict, orders: list, workers: int, batch_size: int) -> dict:
+    with SigningPool(SEEDS, workers=workers, batch_size=batch_size) as pool:
+        pool.warm_up()
+        start = time.perf_counter()
+        pool.sign_batch(context, orders)
+        elapsed = time.perf_counter() - start
+    cores = min(workers, os.cpu_count() or 1)
+    return {"name": f"进程池 {workers} 进程 (批 {batch_size})", "orders": len(orders), "elapsed": elapsed,
+            "rate": len(orders) / elapsed, "per_core": len(orders) / elapsed / cores}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="下单签名吞吐基准")
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="签名进程数")
+    parser.add_argument("--batch-size", type=int, default=signing.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    context = order_context(_apex_symbols()["data"], _apex_account()["data"], "BTC-USDT")
+    orders = make_orders(args.orders)
+    rows = [
+        bench_single("每单派生密钥", context, orders, derive_each=True),
+        bench_single("缓存密钥，单线程", context, orders),
+        bench_single("重复 clientId，签名缓存命中", context, make_orders(args.orders, client_id="42")),
+        bench_pool(context, orders, args.workers, args.batch_size),
+    ]
+
+    table = Table(title=f"下单签名吞吐 ({os.cpu_count()} 核)", show_header=True, header_style="bold magenta")
+    for column in ("方式", "订单数", "耗时(s)", "单/秒", "单/秒/核", "单均(ms)"):
+        table.add_column(column)
+    for row in rows:
+        table.add_row(row["name"], str(row["orders"]), f"{row['elapsed']:.2f}", f"{row['rate']:.0f}",
+                      f"{row['per_core']:.0f}", f"{row['elapsed'] / row['orders'] * 1000:.3f}")
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+worker 启动耗时基准：spawn 冷启动与 forkserver 预加载后 fork；
+每个 worker 导入 Tools/startup.py 的 PRELOAD_MODULES 后退出，计时从启动到退出，
+forkserver 启动并预加载的一次性耗时单独列出
+
+python -m benchmarks.bench_worker_startup --workers 4
+"""
+import argparse
+import multiprocessing
+from multiprocessing import forkserver
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from Tools import startup
+
+console = Console()
+
+
+def bench(name: str, context, modules: list, workers: int) -> dict:
+    elapsed = []
+    for _ in range(workers):
+        start = time.perf_counter()
+        process = context.Process(target=startup._import_modules, args=(modules,))
+        process.start()
+        process.join()
+        elapsed.append(time.perf_counter() - start)
+    return {"name": name, "workers": workers, "mean": sum(elapsed) / workers, "max": max(elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="worker 启动耗时基准")
+    parser.add_argument("--workers", type=int, default=4, help="每种方式依次启动的 worker 数")
+    parser.add_argument("--modules", nargs="+", default=startup.PRELOAD_MODULES)
+    args = parser.parse_args()
+
+    rows = [bench("spawn 冷启动", multiprocessing.get_context("spawn"), args.modules, args.workers)]
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(args.modules)
+    start = time.perf_counter()
+    # 启动 forkserver 并等它导入完预加载模块(第一个 worker 连上时才会返回)
+    forkserver.ensure_running()
+    bench("", context, [], 1)
+    preload_cost = time.perf_counter() - start
+    rows.append(bench("forkserver 预加载后 fork", context, args.modules, args.workers))
+
+    table = Table(title=f"worker 启动耗时 (forkserver 预加载一次 {preload_cost:.2f}s)", show_header=True,
+                  header_style="bold magenta")
+    for column in ("方式", "worker 数", "平均(ms)", "最慢(ms)"):
+        table.add_column(column)
+    for row in rows:
+        table.add_row(row["name"], str(row["workers"]), f"{row['mean'] * 1000:.1f}", f"{row['max'] * 1000:.1f}")
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
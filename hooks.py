@@ -0,0 +1,40 @@
+import os
+
+from aomaker._constants import Allure
+from aomaker.aomaker import hook
+from rich.console import Console
+
+from middlewares.timing_middleware import TIMING_SUMMARY, clear_timing_exports, merge_timing_exports
+from Tools.allure_report import RESULTS_FILE, build_index, export_results, use_native_report
+from Tools.run_stats import current_run_id, save_current_run
+from Tools.storage import use_shared_storage
+
+console = Console()
+
+# 运行结束时在进程内生成测试报告，不再启动 allure 命令行（APEX_REPORT_ENGINE=allure 时保留）
+use_native_report()
+# aomaker.db 每进程一个 WAL 连接，忙时退避重试，进度写入合并提交
+use_shared_storage()
+
+
+@hook
+def endpoint_timing_report():
+    """运行前清理上次的计时导出；运行结束后合并各worker的接口分阶段耗时，并按运行写入 statistics 表"""
+    clear_timing_exports()
+    current_run_id()
+    yield
+    merged = merge_timing_exports()
+    if merged.endpoints:
+        console.print(f"[cyan]接口分阶段耗时已写入 {TIMING_SUMMARY}，共 {len(merged.endpoints)} 个接口[/cyan]")
+        run_id = save_current_run(merged)
+        console.print(f"[cyan]运行 {run_id} 的接口统计已写入 statistics 表，对比: python run.py stats compare[/cyan]")
+
+
+@hook
+def results_export():
+    """运行前删除上次的结构化结果；进程内生成报告时已写出，使用 allure 命令行时在此补写"""
+    if os.path.exists(RESULTS_FILE):
+        os.remove(RESULTS_FILE)
+    yield
+    if not os.path.exists(RESULTS_FILE):
+        export_results(build_index(Allure.JSON_DIR), run_id=current_run_id())
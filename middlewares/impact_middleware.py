@@ -0,0 +1,16 @@
+"""
+用例影响映射中间件：运行用例时记录其实际发出请求的 API 类与 endpoint_id，供增量运行按改动选择用例；
+未注册 ImpactRecorder（非 pytest 运行）时直接透传
+"""
+from aomaker.core.middlewares.registry import RequestType, CallNext, ResponseType, middleware
+
+from Tools.impact import ImpactRecorder, api_target
+
+
+@middleware(name="impact_middleware", priority=50)
+def impact_middleware(request: RequestType, call_next: CallNext) -> ResponseType:
+    """记录当前用例调用的 API"""
+    recorder = ImpactRecorder.active
+    if recorder is not None:
+        recorder.touch(*api_target(request.get("_api_meta") or {}))
+    return call_next(request)
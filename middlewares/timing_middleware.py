@@ -0,0 +1,217 @@
+"""
+计时中间件：按 endpoint_id 记录每次请求的 DNS、建连、TLS、首字节(TTFB)与总耗时及收发字节数，
+写入进程内直方图，会话结束时导出到 reports/timing/，合并后按运行写入 aomaker.db 的 statistics 表
+
+在 middlewares.yaml 中以较低优先级注册，位于日志中间件内层，计时不包含日志开销；
+enabled: false 时不进入中间件链，连接层仅多一次线程局部变量读取
+"""
+import glob
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from aomaker.core.middlewares.registry import RequestType, CallNext, ResponseType, middleware
+
+from Tools.latency import LatencyHistogram
+from Tools.transport import RequestPhases, begin_phases, end_phases
+
+PHASES = ("dns", "connect", "tls", "ttfb", "total")
+TIMING_DIR = os.path.join("reports", "timing")
+TIMING_SUMMARY = os.path.join("reports", "timing.json")
+
+
+class EndpointTiming:
+    """单个接口的分阶段耗时直方图"""
+
+    def __init__(self, package: str = "", api_name: str = ""):
+        self.package = package
+        self.api_name = api_name
+        self.calls = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.phases: Dict[str, LatencyHistogram] = {phase: LatencyHistogram() for phase in PHASES}
+
+    def record(self, phases: RequestPhases, total: float, error: bool, bytes_in: int = 0, bytes_out: int = 0):
+        self.calls += 1
+        self.errors += error
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        if phases.new_connection:
+            self.new_connections += 1
+            self.phases["dns"].record(phases.dns)
+            self.phases["connect"].record(phases.connect)
+            if phases.tls is not None:
+                self.phases["tls"].record(phases.tls)
+        if phases.ttfb is not None:
+            self.phases["ttfb"].record(phases.ttfb)
+        self.phases["total"].record(total)
+
+    def merge(self, other: "EndpointTiming"):
+        self.package = self.package or other.package
+        self.api_name = self.api_name or other.api_name
+        self.calls += other.calls
+        self.errors += other.errors
+        self.new_connections += other.new_connections
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        for phase in PHASES:
+            self.phases[phase].merge(other.phases[phase])
+
+    def to_dict(self) -> dict:
+        return {
+            "package": self.package,
+            "api_name": self.api_name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "new_connections": self.new_connections,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "phases": {phase: hist.to_dict() for phase, hist in self.phases.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EndpointTiming":
+        timing = cls(data.get("package", ""), data.get("api_name", ""))
+        timing.calls = data["calls"]
+        timing.errors = data["errors"]
+        timing.new_connections = data["new_connections"]
+        timing.bytes_in = data.get("bytes_in", 0)
+        timing.bytes_out = data.get("bytes_out", 0)
+        for phase, hist in data["phases"].items():
+            timing.phases[phase] = LatencyHistogram.from_dict(hist)
+        return timing
+
+
+class TimingStats:
+    """进程内按 endpoint_id 汇总的计时数据"""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointTiming] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint_id: str, package: str = "", api_name: str = "") -> EndpointTiming:
+        timing = self.endpoints.get(endpoint_id)
+        if timing is None:
+            with self._lock:
+                timing = self.endpoints.setdefault(endpoint_id, EndpointTiming(package, api_name))
+        return timing
+
+    def record(self, endpoint_id: str, phases: RequestPhases, total: float, error: bool = False,
+               bytes_in: int = 0, bytes_out: int = 0, package: str = "", api_name: str = ""):
+        timing = self.get(endpoint_id, package, api_name)
+        with self._lock:
+            timing.record(phases, total, error, bytes_in, bytes_out)
+
+    def merge(self, other: "TimingStats"):
+        for endpoint_id, timing in other.endpoints.items():
+            self.get(endpoint_id).merge(timing)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+
+    def summary(self) -> Dict[str, dict]:
+        """每个接口各阶段的 p50/p99(ms)"""
+        result = {}
+        for endpoint_id, timing in sorted(self.endpoints.items()):
+            result[endpoint_id] = {"calls": timing.calls, "errors": timing.errors,
+                                   "new_connections": timing.new_connections,
+                                   "bytes_in": timing.bytes_in, "bytes_out": timing.bytes_out}
+            for phase, hist in timing.phases.items():
+                if hist.total:
+                    result[endpoint_id][phase] = {
+                        "p50_ms": hist.percentile(50) * 1000,
+                        "p99_ms": hist.percentile(99) * 1000,
+                    }
+        return result
+
+    def to_dict(self) -> dict:
+        return {endpoint_id: timing.to_dict() for endpoint_id, timing in self.endpoints.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TimingStats":
+        stats = cls()
+        for endpoint_id, timing in data.items():
+            stats.endpoints[endpoint_id] = EndpointTiming.from_dict(timing)
+        return stats
+
+
+timing_stats = TimingStats()
+
+
+def _body_size(body) -> int:
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    # 文件上传等生成器请求体不计入
+    return 0
+
+
+def _response_size(response) -> int:
+    """响应体字节数：优先取 Content-Length；流式响应未读取时不强行读取"""
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit():
+        return int(length)
+    content = getattr(response, "_content", False)
+    return len(content) if isinstance(content, bytes) else 0
+
+
+def record_request(api_meta: dict, url: str, phases: RequestPhases, total: float, error: bool,
+                   bytes_in: int = 0, bytes_out: int = 0):
+    """按请求的 _api_meta 把一次请求记入 timing_stats；异步请求不经过中间件链，由 BaseAPI.asend 直接调用"""
+    endpoint_id = api_meta.get("endpoint_id") or api_meta.get("class_name") or url
+    timing_stats.record(endpoint_id, phases, total, error, bytes_in, bytes_out,
+                        api_meta.get("package", ""), api_meta.get("class_name", ""))
+
+
+@middleware(name="timing_middleware", priority=100)
+def timing_middleware(request: RequestType, call_next: CallNext) -> ResponseType:
+    """按 endpoint_id 记录请求分阶段耗时与收发字节数"""
+    api_meta = request.get("_api_meta") or {}
+    phases = begin_phases()
+    error = True
+    bytes_in = bytes_out = 0
+    try:
+        response = call_next(request)
+        error = response.status_code >= 400
+        bytes_in = _response_size(response)
+        bytes_out = _body_size(response.request.body)
+        return response
+    finally:
+        total = time.perf_counter() - phases.start
+        end_phases()
+        record_request(api_meta, request.get("url"), phases, total, error, bytes_in, bytes_out)
+
+
+def export_timings(directory: str = TIMING_DIR, stats: Optional[TimingStats] = None,
+                   name: Optional[str] = None) -> Optional[str]:
+    """把本进程的计时数据写入 directory/timing-<name 或 pid>.json，无数据时不写"""
+    stats = stats or timing_stats
+    if not stats.endpoints:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"timing-{name or os.getpid()}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stats.to_dict(), f)
+    return path
+
+
+def clear_timing_exports(directory: str = TIMING_DIR):
+    for path in glob.glob(os.path.join(directory, "timing-*.json")):
+        os.remove(path)
+
+
+def merge_timing_exports(directory: str = TIMING_DIR, output: str = TIMING_SUMMARY) -> TimingStats:
+    """合并各worker导出的计时数据，写出汇总（含完整直方图与分位数摘要）"""
+    merged = TimingStats()
+    for path in sorted(glob.glob(os.path.join(directory, "timing-*.json"))):
+        with open(path, encoding="utf-8") as f:
+            merged.merge(TimingStats.from_dict(json.load(f)))
+    if merged.endpoints:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"summary": merged.summary(), "histograms": merged.to_dict()}, f, ensure_ascii=False, indent=2)
+    return merged
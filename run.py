@@ -37,12 +37,118 @@ run(["-s","-m demo","-e testing"])
     dict：dist-suite模式
 多线程分配模式：
     同多进程
+
+================================按耗时调度================================
+conf/dist_strategy.yaml 中设置 mode: lpt 后，run_tests() 按历史用例耗时(database/run_data.db 的 test_durations 表)
+以最长处理时间优先装箱到各进程，慢文件拆段执行，空闲进程从最忙的队列窃取任务；
+结束时打印静态分配预估、LPT 预估与实际总耗时，明细写入 reports/schedule.json
+也可直接调用：scheduled_run(["-m order"], mp=True)
+
+================================启动耗时================================
+多进程调度时 worker 由预加载了重模块的 forkserver 启动；APEX_WORKER_START=spawn 时每个 worker 冷启动
+剖析用例收集的导入耗时并对比 worker 启动：python run.py startup [--workers N] [--modules M ...]
+
+================================数据库访问================================
+aomaker.db 每个进程一个 WAL 连接，忙时退避重试，aomaker 的用例进度合并后批量提交(Tools/storage.py)；
+APEX_STORAGE=aomaker 时保留 aomaker 原有的每实例连接、逐条提交
+
+================================响应校验================================
+Tools/schema_cache.py 的 CACHED_MODELS 中列出的响应模型按 schema 表版本缓存编译好的校验器(Tools/schema_cache.py)；
+压测时设置 APEX_SCHEMA_SAMPLE=N 每 N 个响应校验 1 个
+
+================================增量运行================================
+run_tests() 先对比 git 改动（基准取环境变量 APEX_DIFF_BASE，默认 HEAD~1），按源码依赖图与运行时记录的
+"用例 -> API类/endpoint_id" 映射(database/run_data.db 的 test_impact 表)只运行受影响的用例；
+只保留匹配 -m order 的用例；定时任务/手动触发、APEX_FULL_RUN=1、conf/依赖/中间件/hooks.py 改动时全量运行；
+没有受影响的用例时只发送通知
+查看选择结果：python run.py impact [--base REF] [-m order]
+
+================================结果汇总================================
+run_tests() 运行期间各测试进程把每条用例的状态与耗时写入共享内存环形缓冲区(路径由环境变量 APEX_RESULT_STREAM 传递)，
+主进程后台线程实时累计；结束时直接打印汇总，飞书/企业微信通知与进度卡片读取该汇总，不再读回结果文件
+
+================================测试报告================================
+运行结束时在进程内由 allure 结果(reports/json)生成静态报告到 reports/html/，无需安装 allure 命令行；
+用例结果在运行中已逐条索引，收尾只合并索引。设置 APEX_REPORT_ENGINE=allure 时仍调用 allure generate
+手动生成：python run.py report [--results reports/json] [--output reports/html]
+
+================================消息通知================================
+测试报告由后台线程发送到飞书（FEISHU_WEBHOOK_URL）与企业微信（conf/utils.yaml 的 wechat.webhook），
+失败按指数退避重试，同一次运行的报告只发送一次；仍未发出的消息保存在 database/run_data.db 的 notifications 表
+查看/重发：python run.py notify list|retry [--sink feishu]
+运行中每 APEX_PROGRESS_INTERVAL 秒(默认 300，0 关闭)把累计结果、吞吐与最慢接口更新到飞书进度卡片；
+需配置 FEISHU_APP_ID/FEISHU_APP_SECRET/FEISHU_CHAT_ID 以原地更新同一张卡片，只有 webhook 时不推送进度
+
+================================下单压测================================
+启动命令：python run.py load [参数]
+参数：
+    --mode open|closed   开环(按 --rate 目标单/秒)或闭环(按 --concurrency 固定并发)
+    --duration           持续时间(秒)
+    --stub               使用本地桩服务离线运行
+    --sign-workers       签名进程数，大于 0 时由进程池预签名订单，压测线程只负责发送
+    --presign            预签名队列长度(默认 256)
+example：
+    python run.py load --mode open --rate 20 --duration 60
+    python run.py load --mode closed --concurrency 8 --duration 30 --stub
+    python run.py load --mode open --rate 200 --duration 30 --stub --sign-workers 4
+================================本地mock服务================================
+启动命令：python run.py mock [参数]
+由 apis/mock/apis.py 的路由声明与 attrs 模型生成的 asyncio 服务，数据按 --seed 生成在内存中
+参数：
+    --latency/--jitter   响应固定延迟与均匀抖动(秒)
+    --error-rate         返回 --error-status(默认 500) 的比例
+    --route              按路由单独配置，如 --route "POST /api/orders=0.05,0,0.1"
+example：
+    python run.py mock --port 9999 --latency 0.005 --error-rate 0.01
+吞吐基准：python -m benchmarks.bench_mock_server
+================================订单生命周期场景================================
+启动命令：python run.py scenario [参数]
+按 testcases/test_scenario/order_lifecycles.yaml 描述的生命周期(挂单、部分成交、改价、撤单、查询)并发执行，
+输出逐步骤延迟并校验各交易对订单簿不变量，有违反时退出码为 1
+参数：
+    --lifecycles         执行的生命周期总数
+    --concurrency        同时进行的生命周期数
+    --base-url           被测服务地址，不指定时在后台启动本地 mock 服务
+example：
+    python run.py scenario --lifecycles 2000 --concurrency 128
+================================客户端限流================================
+api_client 的请求按 public/private/order 类别取令牌，同一 API key 的各进程共享预算，取不到时排队等待，429 时推迟并重发；
+预算：APEX_RATE_LIMITS="order=5,private=10:20,public=20"(每秒请求数[:突发数])，off 关闭
+查看各进程累计等待：python run.py ratelimit [--reset]
+================================录制回放================================
+APEX_CASSETTE_MODE=record 运行时把 api_client 的请求与响应录制到 testcases/cassettes/order.cassette(APEX_CASSETTE 可改)，
+APEX_CASSETTE_MODE=replay 时不访问网络、从磁带回放（未配置凭证时使用占位凭证），匹配忽略签名、时间戳、clientId 等字段；
+APEX_CASSETTE_LATENCY=original 按录制时的耗时回放，默认零延迟
+查看磁带：python run.py cassette [--path PATH]
+================================运行统计对比================================
+启动命令：python run.py stats runs|compare [参数]
+    runs                 列出最近的运行
+    compare [base] [head] 对比两次运行各接口的 p99，省略时对比最近两次
+    --threshold          相对变慢超过该比例标红，默认 0.1
+    --fail-on-regression 存在退化时以非零状态码退出
+example：
+    python run.py stats compare 20240601-000000 20240602-000000 --endpoint create_order_api_orders_post
 =========================================================================
 """
 import os
+import sys
 import pytest
 from aomaker.cli import main_run
-from Tools.feishu_bot import send_feishu_report
+from aomaker.hook_manager import session_hook
+from Tools.feishu_bot import send_feishu_no_tests, send_feishu_report
+from Tools.notifier import close_notifier
+from Tools.progress import ProgressReporter
+from Tools.result_stream import ResultAggregator, print_summary
+from Tools.run_stats import current_run_id
+from Tools.wechat_bot import send_wechat_no_tests, send_wechat_report
+from Tools.impact import select_tests
+from Tools.scheduler import LPT, load_strategy, scheduled_run
+
+# 运行结束时等待通知发出的最长时间(秒)
+NOTIFY_TIMEOUT = 20
+# 只运行标记为 order 的测试
+MARKER = 'order'
+
 
 def run_tests():
     """运行测试并生成报告"""
@@ -50,17 +156,75 @@ def run_tests():
     os.makedirs('allure-results', exist_ok=True)
     os.makedirs('reports', exist_ok=True)
     
-    # 运行测试并生成两种报告
-    main_run(pytest_args=[
-        '-m', 'order',  # 运行标记为 order 的测试
+    # 加载 hooks.py 中的会话钩子（arun 命令行会自动加载）
+    session_hook()
+
+    pytest_args = [
+        '-m', MARKER,  # 运行标记为 order 的测试
         '--alluredir=allure-results',  # 生成 Allure XML 结果
-    ], skip_login=True)
-    
-    # 生成 Allure HTML 报告
-    os.system('allure generate allure-results -o allure-report --clean')
+    ]
+    # 只运行受 git 改动影响且匹配 -m 标记的用例；定时任务、配置变更等情况下全量运行
+    selection = select_tests(markexpr=MARKER)
+    selection.print()
+    if not selection.full and not selection.nodeids:
+        # 没有用例可运行时也要让关注结果的人知道，而不是静默结束
+        print("没有受影响的用例，本次未运行测试")
+        send_feishu_no_tests(selection.reason, selection.changed_files)
+        send_wechat_no_tests(selection.reason, selection.changed_files)
+        close_notifier(timeout=NOTIFY_TIMEOUT)
+        return
+
+    # 运行测试并生成两种报告；dist_strategy.yaml 中 mode: lpt 时按历史耗时多进程调度
+    strategy = load_strategy()
+    # 长时间运行时定期把进度更新到飞书卡片（APEX_PROGRESS_INTERVAL 秒，0 关闭）
+    progress = ProgressReporter().start()
+    # 各测试进程把用例结果实时写入共享内存缓冲区，本进程汇总，飞书/企业微信通知直接取用
+    results = ResultAggregator(run_id=current_run_id()).start()
+    try:
+        if strategy["mode"] == LPT:
+            scheduled_run(pytest_args, options=strategy if selection.full else {**strategy, "nodeids": selection.nodeids})
+        else:
+            main_run(pytest_args=pytest_args if selection.full else selection.nodeids + pytest_args, skip_login=True)
+    finally:
+        print_summary(results.stop())
+        progress.stop()
+    # 测试报告已在运行收尾时由 Tools/allure_report.py 生成到 reports/html/
     
-    # 发送测试报告到飞书
+    # 测试报告加入通知队列，由后台线程发送到飞书/企业微信；最多等待 NOTIFY_TIMEOUT 秒，未发出的保存待重试
     send_feishu_report()
+    send_wechat_report()
+    close_notifier(timeout=NOTIFY_TIMEOUT)
 
 if __name__ == '__main__':
-    run_tests()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'load':
+        from Tools.load_test import main as run_load_test
+        run_load_test(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'impact':
+        from Tools.impact import main as show_impact
+        show_impact(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'report':
+        from Tools.allure_report import main as build_report
+        build_report(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'notify':
+        from Tools.notifier import main as run_notify
+        sys.exit(run_notify(sys.argv[2:]))
+    elif len(sys.argv) > 1 and sys.argv[1] == 'mock':
+        from Tools.mock_server import main as run_mock_server
+        run_mock_server(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'scenario':
+        from Tools.scenario import main as run_scenario
+        sys.exit(1 if run_scenario(sys.argv[2:]).violations else 0)
+    elif len(sys.argv) > 1 and sys.argv[1] == 'ratelimit':
+        from Tools.rate_limit import main as show_rate_limit
+        show_rate_limit(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'startup':
+        from Tools.startup import main as profile_startup
+        profile_startup(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'cassette':
+        from Tools.cassette import main as show_cassette
+        show_cassette(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'stats':
+        from Tools.run_stats import main as run_stats
+        sys.exit(run_stats(sys.argv[2:]))
+    else:
+        run_tests()
\ No newline at end of file
@@ -1,37 +1,52 @@
-import os
 import pytest
-from apexpro.http_private_sign import HttpPrivateSign
-from apexpro.constants import NETWORKID_TEST, APEX_OMNI_HTTP_TEST, NETWORKID_MAIN, APEX_OMNI_HTTP_MAIN
+from rich.console import Console
 
+from Tools.apex_client import create_api_client
+from Tools.cassette import save_cassettes
+from Tools.rate_limit import rate_limit_stats
+from Tools.transport import pool_stats
+from middlewares.timing_middleware import export_timings
+from Tools.allure_report import ReportIndexer
+from Tools.impact import ImpactRecorder
+from Tools.progress import ProgressAggregator, progress_enabled
+from Tools.result_stream import ResultStreamWriter, stream_path
+from Tools.scheduler import DurationRecorder
+from Tools.storage import flush_pending, use_shared_storage
 
-def get_env_or_fail(key: str) -> str:
-    """获取环境变量，如果不存在则抛出异常"""
-    value = os.getenv(key)
-    if not value:
-        raise ValueError(f"Environment variable {key} is not set")
-    return value
+console = Console()
+
+# spawn 启动的 worker 不经过 hooks.py，在此替换 aomaker.db 的访问方式
+use_shared_storage()
 
 
 @pytest.fixture(scope="session")
 def api_client():
     """创建API客户端"""
-    # 从环境变量获取敏感信息
-    api_key = get_env_or_fail("APEX_API_KEY")
-    api_secret = get_env_or_fail("APEX_API_SECRET")
-    api_passphrase = get_env_or_fail("APEX_API_PASSPHRASE")
-    seeds = get_env_or_fail("APEX_SEEDS")
-    l2_key = get_env_or_fail("APEX_L2_KEY")
-
-    # 创建客户端
-    client = HttpPrivateSign(
-        APEX_OMNI_HTTP_MAIN,
-        network_id=NETWORKID_MAIN,
-        zk_seeds=seeds,
-        zk_l2Key=l2_key,
-        api_key_credentials={
-            "key": api_key,
-            "secret": api_secret,
-            "passphrase": api_passphrase
-        }
-    )
-    return client
+    client = create_api_client()
+    yield client
+    stats = pool_stats.to_dict()
+    console.print(f"[cyan]连接池统计: 请求 {stats['requests']}，复用 {stats['hits']}，新建连接 {stats['misses']}，"
+                  f"建连总耗时 {stats['connect_time_total_ms']:.1f}ms[/cyan]")
+    for name, waits in rate_limit_stats().items():
+        console.print(f"[cyan]限流等待 {name}: 取令牌 {waits['count']}，累计等待 {waits['wait_total_ms']:.1f}ms，"
+                      f"p99 {waits['p99_ms']:.1f}ms[/cyan]")
+
+
+def pytest_configure(config):
+    """记录用例耗时供 LPT 调度预估，记录用例调用的 API 供增量运行选择用例，运行中索引用例结果供生成报告，
+    开启进度通知(需飞书应用凭证)时定期写出本进程的进度快照，由 run_tests 启动时把每条用例的结果实时写入共享的结果缓冲区"""
+    config.pluginmanager.register(DurationRecorder(), "duration_recorder")
+    config.pluginmanager.register(ImpactRecorder(), "impact_recorder")
+    config.pluginmanager.register(ReportIndexer(), "report_indexer")
+    if progress_enabled():
+        config.pluginmanager.register(ProgressAggregator(), "progress_aggregator")
+    if stream_path():
+        config.pluginmanager.register(ResultStreamWriter(), "result_stream_writer")
+
+
+def pytest_sessionfinish(session):
+    """导出本进程的接口分阶段耗时，由 hooks.py 在运行结束后汇总；录制模式下写出本进程录制的磁带；
+    写出合并提交的进度(worker 进程退出时不执行 atexit)"""
+    export_timings()
+    save_cassettes()
+    flush_pending()
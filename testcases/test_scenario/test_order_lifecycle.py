@@ -0,0 +1,43 @@
+import json
+
+import pytest
+import allure
+
+from Tools.mock_server import FaultConfig, MockServer
+from Tools.scenario import Scenario, run_scenario
+
+
+@allure.epic("订单管理")
+@allure.feature("订单生命周期")
+class TestOrderLifecycle:
+
+    @allure.story("多交易对并发生命周期")
+    @allure.title("挂单、部分成交、改价、撤单并发执行，各交易对订单簿不变量成立")
+    @pytest.mark.scenario
+    def test_concurrent_lifecycles(self):
+        scenario = Scenario.load()
+        # 响应延迟带抖动，打乱各生命周期的完成顺序
+        with MockServer(seed=1, fault=FaultConfig(latency=0.001, jitter=0.004)) as server:
+            with allure.step("并发执行 200 条生命周期"):
+                report = run_scenario(scenario, server.url, count=200, concurrency=32, seed=7)
+        allure.attach(json.dumps(report.to_dict(), ensure_ascii=False, indent=2), "场景报告",
+                      allure.attachment_type.JSON)
+
+        with allure.step("校验结果"):
+            assert report.violations == []
+            assert report.aborted == 0
+            assert sum(report.lifecycles.values()) == 200
+            assert set(report.lifecycles) == {lifecycle.name for lifecycle in scenario.lifecycles}
+            assert report.steps["place"].total == 200
+
+    @allure.story("故障注入")
+    @allure.title("状态更新按比例失败时生命周期中止，结果未知的订单不误报")
+    @pytest.mark.scenario
+    def test_lifecycles_with_errors(self):
+        faults = {"PUT /api/orders/{order_id}/status": FaultConfig(error_rate=0.2, error_status=503)}
+        with MockServer(seed=1, faults=faults) as server:
+            report = run_scenario(Scenario.load(), server.url, count=100, concurrency=16, seed=3)
+        assert report.violations == []
+        assert report.aborted > 0
+        assert sum(report.lifecycles.values()) + report.aborted == 100
+        assert report.errors["fill"]["ret_code 503"] + report.errors["cancel"]["ret_code 503"] > 0
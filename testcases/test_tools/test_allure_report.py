@@ -0,0 +1,121 @@
+import json
+import os
+import textwrap
+
+import pytest
+import allure
+from allure_commons.logger import AllureFileLogger
+from allure_commons.model2 import Status, StatusDetails, TestResult
+
+from Tools import feishu_bot
+from Tools.allure_report import (INDEX_DIR, ReportIndex, ReportIndexer, build_report, export_results, read_cases,
+                                 read_summary, to_record, use_native_report)
+
+SAMPLE_TESTS = """
+    import pytest
+
+    def test_pass():
+        assert True
+
+    def test_fail():
+        assert 1 == 2, "<b>escaped</b>"
+
+    @pytest.mark.skip(reason="skip")
+    def test_skip():
+        pass
+"""
+
+
+@allure.epic("测试工具")
+@allure.feature("测试报告")
+class TestAllureReport:
+
+    @allure.title("运行中索引用例结果，收尾生成报告")
+    @pytest.mark.tools
+    def test_index_during_run(self, tmp_path, monkeypatch):
+        test_file = tmp_path / "test_sample.py"
+        test_file.write_text(textwrap.dedent(SAMPLE_TESTS), encoding="utf-8")
+        results_dir, output_dir = tmp_path / "json", tmp_path / "html"
+        # 只加载 allure 插件，不受环境中其他 pytest 插件影响
+        monkeypatch.setenv("PYTEST_DISABLE_PLUGIN_AUTOLOAD", "1")
+        pytest.main([str(test_file), f"--alluredir={results_dir}", "-q", "-p", "allure_pytest.plugin",
+                     "-p", "no:cacheprovider"],
+                    plugins=[ReportIndexer()])
+
+        shards = os.listdir(results_dir / INDEX_DIR)
+        assert len(shards) == 1
+        with open(results_dir / INDEX_DIR / shards[0], encoding="utf-8") as f:
+            assert len(f.readlines()) == 3
+
+        index = build_report(str(results_dir), str(output_dir))
+        stat = index.statistic()
+        assert (stat["total"], stat["passed"], stat["failed"], stat["skipped"]) == (3, 1, 1, 1)
+        summary = json.loads((output_dir / "widgets" / "summary.json").read_text(encoding="utf-8"))
+        assert summary["statistic"] == stat and summary["time"]["stop"] >= summary["time"]["start"]
+        page = (output_dir / "index.html").read_text(encoding="utf-8")
+        assert "test_fail" in page and "&lt;b&gt;escaped&lt;/b&gt;" in page and "<b>escaped</b>" not in page
+        # 失败用例排在最前
+        assert page.index("test_fail") < page.index("test_pass")
+
+    @allure.title("缺少索引时解析结果文件，重试取最后一次")
+    @pytest.mark.tools
+    def test_scan_and_retry(self, tmp_path):
+        results_dir = tmp_path / "json"
+        logger = AllureFileLogger(str(results_dir))
+        logger.report_result(TestResult(uuid="u1", historyId="h1", name="test_order", status=Status.FAILED,
+                                        start=1000, stop=1100, statusDetails=StatusDetails(message="timeout")))
+        logger.report_result(TestResult(uuid="u2", historyId="h1", name="test_order", status=Status.PASSED,
+                                        start=2000, stop=2050))
+        logger.report_result(TestResult(uuid="u3", historyId="h2", name="test_cancel", status=Status.BROKEN,
+                                        start=1500, stop=1600))
+        # 只有部分结果被索引（例如进程中断），其余从结果文件补齐
+        os.makedirs(results_dir / INDEX_DIR)
+        (results_dir / INDEX_DIR / "index-1.jsonl").write_text(
+            json.dumps({"uuid": "u3", "historyId": "h2", "name": "test_cancel", "fullName": "", "status": "broken",
+                        "start": 1500, "stop": 1600, "message": "", "trace": "", "labels": {}, "tags": [],
+                        "parameters": [], "attachments": []}) + "\n{\"uuid\": ", encoding="utf-8")
+
+        index = build_report(str(results_dir), str(tmp_path / "html"))
+        assert index.statistic()["total"] == 2
+        order = index.results["h1"]
+        assert order["status"] == "passed" and order["attempts"] == 2
+        assert index.timing() == {"start": 1500, "stop": 2050, "duration": 550, "minDuration": 50,
+                                  "maxDuration": 100, "sumDuration": 150}
+
+    @allure.title("结构化结果文件：首行汇总，失败用例在前")
+    @pytest.mark.tools
+    def test_results_file(self, tmp_path, monkeypatch):
+        index = ReportIndex()
+        for i, status in enumerate(["passed", "failed", "passed", "broken", "skipped"]):
+            index.add(to_record({"uuid": f"u{i}", "name": f"test_{i}", "status": status, "start": 1000 + i,
+                                 "stop": 1100 + i * 10, "statusDetails": {"message": f"error {i}\ndetail"}}))
+        path = export_results(index, str(tmp_path / "results.jsonl"), run_id="run-1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("{not json")
+
+        # 汇总只读首行，后续内容不影响
+        summary = read_summary(path)
+        assert summary["run_id"] == "run-1" and summary["pass_rate"] == 40
+        assert summary["stats"]["total"] == 5 and summary["time"]["duration_ms"] == 140
+        failures = read_cases(path, status=("failed", "broken"))
+        assert [case["name"] for case in failures] == ["test_1", "test_3"]
+        assert failures[0]["duration_ms"] == 109 and failures[0]["message"].startswith("error 1")
+
+        monkeypatch.setattr(feishu_bot, "RESULTS_FILE", path)
+        results = feishu_bot.get_test_results()
+        assert results["stats"] == {"total": 5, "passed": 2, "failed": 1, "broken": 1, "skipped": 1}
+        assert results["time"]["start"] == summary["time"]["start"]
+        assert [case["name"] for case in feishu_bot.get_failed_cases(limit=1)] == ["test_1"]
+
+    @allure.title("aomaker 收尾改用进程内报告，可切回 allure 命令行")
+    @pytest.mark.tools
+    def test_use_native_report(self, monkeypatch):
+        from aomaker.runner import reporting
+        from Tools import allure_report
+        monkeypatch.setattr(reporting, "gen_allure", reporting.gen_allure)
+        monkeypatch.setenv("APEX_REPORT_ENGINE", "allure")
+        use_native_report()
+        assert reporting.gen_allure is not allure_report.gen_allure
+        monkeypatch.delenv("APEX_REPORT_ENGINE")
+        use_native_report()
+        assert reporting.gen_allure is allure_report.gen_allure
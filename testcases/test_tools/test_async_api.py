@@ -0,0 +1,84 @@
+import pytest
+import allure
+from aomaker.core.base_model import ContentType
+from aomaker.core.http_client import HTTPClient
+
+from apis.base import run_apis
+from apis.mock.apis import GetUserAPI, UploadAvatarAPI
+from middlewares.timing_middleware import timing_stats
+from Tools.impact import ImpactRecorder, api_target
+from Tools.stub_server import StubServer, StubRequest
+
+
+def user_stub_server() -> StubServer:
+    server = StubServer()
+
+    @server.route("GET", "/api/users/1")
+    @server.route("GET", "/api/users/2")
+    def get_user(request: StubRequest):
+        user_id = int(request.path.rsplit("/", 1)[-1])
+        return 200, {"ret_code": 0, "message": "success", "data": {
+            "id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com",
+            "created_at": "2024-01-01T00:00:00", "is_active": True}}
+
+    @server.route("PATCH", "/api/users/1/avatar")
+    def upload_avatar(request: StubRequest):
+        assert request.headers["Content-Type"].startswith("multipart/form-data")
+        assert b'filename="a.png"' in request.body
+        return 200, {"ret_code": 0, "message": "success", "data": {
+            "file_id": "f1", "file_name": "a.png", "file_size": 3, "file_type": "image/png",
+            "upload_time": "2024-01-01T00:00:00", "download_url": "/files/f1"}}
+
+    return server
+
+
+@allure.epic("测试工具")
+@allure.feature("异步API")
+class TestAsyncAPI:
+
+    @allure.title("并发发送的结果顺序与输入一致并完成模型解析")
+    @pytest.mark.tools
+    def test_run_apis(self):
+        http_client = HTTPClient()
+        with user_stub_server() as server:
+            apis = [GetUserAPI(base_url=server.url, http_client=http_client, enable_schema_validation=False,
+                               path_params=GetUserAPI.PathParams(user_id=i % 2 + 1)) for i in range(20)]
+            responses = run_apis(apis, concurrency=5)
+        assert server.request_count == 20
+        assert [res.response_model.data.id for res in responses] == [i % 2 + 1 for i in range(20)]
+        assert responses[0].response_model.data.username == "user1"
+
+    @allure.title("multipart 文件上传回退到同步 send，与其它异步请求一起并发")
+    @pytest.mark.tools
+    def test_multipart_falls_back_to_send(self):
+        http_client = HTTPClient()
+        with user_stub_server() as server:
+            upload = UploadAvatarAPI(base_url=server.url, http_client=http_client, enable_schema_validation=False,
+                                     path_params=UploadAvatarAPI.PathParams(user_id=1),
+                                     request_body=UploadAvatarAPI.RequestBodyModel(
+                                         file_name="a.png", file_size=3, file_type="image/png"),
+                                     content_type=ContentType.MULTIPART, files={"avatar": ("a.png", b"png", "image/png")})
+            user = GetUserAPI(base_url=server.url, http_client=http_client, enable_schema_validation=False,
+                              path_params=GetUserAPI.PathParams(user_id=2))
+            responses = run_apis([upload, user])
+        assert server.request_count == 2
+        assert responses[0].response_model.data.file_id == "f1"
+        assert responses[1].response_model.data.id == 2
+
+    @allure.title("异步请求与同步请求一样记入用例影响映射与分阶段耗时")
+    @pytest.mark.tools
+    def test_records_impact_and_timing(self, monkeypatch):
+        monkeypatch.setattr(ImpactRecorder, "active", None)
+        monkeypatch.setattr(ImpactRecorder._local, "nodeid", "testcases/test_demo.py::test_async", raising=False)
+        recorder = ImpactRecorder()
+        http_client = HTTPClient()
+        with user_stub_server() as server:
+            apis = [GetUserAPI(base_url=server.url, http_client=http_client, enable_schema_validation=False,
+                               path_params=GetUserAPI.PathParams(user_id=1)) for _ in range(3)]
+            endpoint_id = apis[0]._prepare_request(False)["_api_meta"]["endpoint_id"]
+            calls, bytes_in = timing_stats.get(endpoint_id).calls, timing_stats.get(endpoint_id).bytes_in
+            run_apis(apis)
+        assert recorder.touched["testcases/test_demo.py::test_async"] == set(
+            api_target(apis[0]._prepare_request(False)["_api_meta"]))
+        assert timing_stats.get(endpoint_id).calls == calls + 3
+        assert timing_stats.get(endpoint_id).bytes_in > bytes_in
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+import allure
+from aomaker.core.http_client import HTTPClient
+
+from apis.batch import crawl_pages, iter_batch, page_apis, run_batch
+from apis.mock.apis import GetUsersAPI
+from Tools.async_http import close_async_client
+from Tools.stub_server import StubServer, StubRequest
+
+
+def users_stub_server(count: int) -> StubServer:
+    server = StubServer()
+    users = [{"id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+              "created_at": "2024-01-01T00:00:00", "is_active": True} for i in range(1, count + 1)]
+
+    @server.route("GET", "/api/users")
+    def get_users(request: StubRequest):
+        offset, limit = int(request.query["offset"]), int(request.query["limit"])
+        return 200, {"ret_code": 0, "message": "success", "data": users[offset:offset + limit], "total": count}
+
+    return server
+
+
+@pytest.fixture
+def api_kwargs():
+    return {"http_client": HTTPClient(), "enable_schema_validation": False}
+
+
+@allure.epic("测试工具")
+@allure.feature("批量请求")
+class TestBatchAPI:
+
+    @allure.title("分页拉取在短页后停止并按页序拼接")
+    @pytest.mark.tools
+    @pytest.mark.parametrize("count", [45, 40])
+    def test_crawl_pages_stops_on_short_page(self, api_kwargs, count):
+        with users_stub_server(count) as server:
+            users = crawl_pages(GetUsersAPI, limit=10, window=4, base_url=server.url, **api_kwargs)
+        assert [user.id for user in users] == list(range(1, count + 1))
+        # 短页之后最多只多发出一个窗口的请求
+        assert server.request_count <= count // 10 + 1 + 4
+
+    @allure.title("结果按完成顺序流式返回并保留序号")
+    @pytest.mark.tools
+    def test_iter_batch_streams_with_index(self, api_kwargs):
+        async def collect(url):
+            try:
+                pages = page_apis(GetUsersAPI, limit=5, total=30, base_url=url, **api_kwargs)
+                return [result async for result in iter_batch(pages, window=3)]
+            finally:
+                await close_async_client()
+
+        with users_stub_server(30) as server:
+            results = asyncio.run(collect(server.url))
+        assert sorted(r.index for r in results) == list(range(6))
+        for result in results:
+            assert result.ok
+            assert result.response.response_model.data[0].id == result.index * 5 + 1
+
+    @allure.title("请求失败记录在结果中而不中断批次")
+    @pytest.mark.tools
+    def test_run_batch_collects_errors(self, api_kwargs):
+        with users_stub_server(10) as server:
+            apis = [GetUsersAPI(base_url=server.url, **api_kwargs),
+                    GetUsersAPI(base_url="http://127.0.0.1:1", **api_kwargs)]
+            results = run_batch(apis, window=2)
+        assert [r.index for r in results] == [0, 1]
+        assert results[0].ok and not results[1].ok
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+import allure
+import requests
+
+from Tools.cassette import Cassette, CassetteAdapter, CassetteMiss, RECORD, REPLAY, install_cassette
+from Tools.stub_server import apex_stub_server
+from Tools.transport import mount_pooled_transport
+
+
+def place_order(session: requests.Session, url: str, client_id: str, side: str = "BUY") -> dict:
+    """与 apexpro 一致：表单提交，签名、过期时间与 clientId 每次不同"""
+    data = {"symbol": "BTC-USDT", "side": side, "type": "MARKET", "size": "0.001", "clientId": client_id,
+            "expiration": str(int(time.time()) + 3600), "signature": f"0x{client_id}"}
+    headers = {"APEX-SIGNATURE": client_id, "APEX-TIMESTAMP": str(time.time())}
+    return session.post(f"{url}/api/v3/order", data=data, headers=headers).json()
+
+
+@allure.epic("测试工具")
+@allure.feature("录制回放")
+class TestCassette:
+
+    @allure.title("录制后离线回放，匹配时忽略签名与时间戳等易变字段")
+    @pytest.mark.tools
+    def test_record_and_replay(self, tmp_path):
+        path = str(tmp_path / "order.cassette")
+        session = requests.Session()
+        mount_pooled_transport(session)
+        recorder = install_cassette(session, RECORD, path)
+        with apex_stub_server() as server:
+            url = server.url
+            symbols = [session.get(f"{url}/api/v3/symbols").json() for _ in range(3)]
+            recorded = [place_order(session, url, str(i)) for i in range(2)]
+            session.get(f"{url}/api/v3/account")
+        recorder.save()
+
+        cassette = Cassette.load(path)
+        stats = cassette.stats()
+        # 3 次 symbols 响应相同，只存一份
+        assert stats == {**stats, "requests": 3, "interactions": 6, "blobs": 4}
+
+        replay = requests.Session()
+        install_cassette(replay, REPLAY, path)
+        start = time.perf_counter()
+        assert replay.get(f"{url}/api/v3/symbols").json() == symbols[0]
+        replayed = [place_order(replay, url, f"other-{i}") for i in range(3)]
+        elapsed = time.perf_counter() - start
+        # 按录制顺序回放，超出后重复最后一次
+        assert [order["data"]["id"] for order in replayed] == [recorded[0]["data"]["id"]] + \
+               [recorded[1]["data"]["id"]] * 2
+        assert elapsed < 0.1
+        with pytest.raises(CassetteMiss, match="side=SELL"):
+            place_order(replay, url, "3", side="SELL")
+
+    @allure.title("再次录制时与已有磁带合并，可按原始耗时回放")
+    @pytest.mark.tools
+    def test_merge_and_original_latency(self, tmp_path):
+        path = str(tmp_path / "order.cassette")
+        with apex_stub_server(latency=0.05) as server:
+            for endpoint in ("symbols", "account"):
+                session = requests.Session()
+                mount_pooled_transport(session)
+                recorder = CassetteAdapter(path, RECORD, inner=session.get_adapter("https://"))
+                session.mount("http://", recorder)
+                session.get(f"{server.url}/api/v3/{endpoint}")
+                recorder.save()
+            url = server.url
+
+        session = requests.Session()
+        session.mount("http://", CassetteAdapter(path, REPLAY, latency="original"))
+        start = time.perf_counter()
+        response = session.get(f"{url}/api/v3/account")
+        assert time.perf_counter() - start >= 0.05 and response.elapsed.total_seconds() >= 0.05
+        assert response.json()["data"]["id"] == "584232029744218334"
+        assert session.get(f"{url}/api/v3/symbols").ok
@@ -0,0 +1,62 @@
+from array import array
+
+import pytest
+import allure
+from aomaker.core.http_client import HTTPClient
+
+from apis.mock.apis import GetProductsAPI
+from apis.mock.models import Product, ProductListResponse, User, UserListResponse
+from benchmarks.bench_deserialize import make_payloads
+from Tools.columnar import ColumnarList
+from Tools.deserializers import COLUMNAR, structure
+from Tools.stub_server import StubServer
+
+
+@allure.epic("测试工具")
+@allure.feature("列式模型列表")
+class TestColumnar:
+
+    @allure.title("列式结果与模型列表逐条相等")
+    @pytest.mark.tools
+    def test_matches_eager(self):
+        for cls, payload in make_payloads(50, 10).items():
+            assert structure(payload, cls, COLUMNAR) == structure(payload, cls)
+
+    @allure.title("行视图属性访问与数值列")
+    @pytest.mark.tools
+    def test_rows_and_columns(self):
+        payload = make_payloads(30, 30)[ProductListResponse]
+        products = structure(payload, ProductListResponse, COLUMNAR).data
+        assert isinstance(products, ColumnarList)
+        assert products[2].price == 12.0 and products[-1].id == 29
+        assert products[2].to_model() == Product(**payload["data"][2])
+        assert isinstance(products.column("stock"), array)
+        assert sum(products.column("stock")) == sum(p["stock"] for p in payload["data"])
+
+    @allure.title("跨页追加与列退化")
+    @pytest.mark.tools
+    def test_extend_and_fallback(self):
+        users = make_payloads(20, 20)[UserListResponse]["data"]
+        pages = ColumnarList.from_records(User, users[:10])
+        pages.extend(structure({"data": users[10:]}, UserListResponse, COLUMNAR).data)
+        assert len(pages) == 20 and pages[15].username == "user15"
+
+        products = ColumnarList.from_records(Product, [
+            {"id": 1, "name": "a", "price": 1, "stock": 1, "category": "c"},
+            {"id": 2, "name": "b", "price": 2.5, "stock": 2 ** 70, "category": "c"},
+        ])
+        assert products.column("stock") == [1, 2 ** 70]
+        assert products[0].price == 1.0
+
+    @allure.title("API对象 response_mode 为 columnar 时按列存储")
+    @pytest.mark.tools
+    def test_api_columnar_response(self):
+        payload = make_payloads(20, 20)[ProductListResponse]
+        server = StubServer()
+        server.route("GET", "/api/products")(lambda request: (200, payload))
+        with server:
+            api = GetProductsAPI(base_url=server.url, http_client=HTTPClient(), enable_schema_validation=False,
+                                 response_mode=COLUMNAR)
+            model = api.send().response_model
+        assert isinstance(model.data, ColumnarList)
+        assert [p.category for p in model.data[:3]] == ["电子", "服装", "食品"]
@@ -0,0 +1,49 @@
+import pytest
+import allure
+from aomaker.core.converters import cattrs_converter
+from aomaker.core.http_client import HTTPClient
+
+from apis.mock.apis import GetCommentsAPI
+from apis.mock.models import CommentListResponse, ProductDetailResponse, UserDetailResponse
+from benchmarks.bench_deserialize import make_payloads
+from Tools.deserializers import LAZY, LazyList, compile_structure, structure
+from Tools.stub_server import StubServer
+
+
+@allure.epic("测试工具")
+@allure.feature("响应反序列化")
+class TestDeserializers:
+
+    @allure.title("预编译结果与 cattrs 一致")
+    @pytest.mark.tools
+    def test_compiled_matches_cattrs(self):
+        for cls, payload in make_payloads(50, 10).items():
+            assert compile_structure(cls)(payload) == cattrs_converter.structure(payload, cls)
+        detail = {"data": {"user_id": 1, "phone": "13800000000", "birth_date": None, "tags": ["vip"],
+                           "address": {"street": "a", "city": "b", "province": "c", "postal_code": "0"}}}
+        assert structure(detail, UserDetailResponse) == cattrs_converter.structure(detail, UserDetailResponse)
+
+    @allure.title("惰性模式只转换被访问的元素")
+    @pytest.mark.tools
+    def test_lazy_list(self):
+        payload = make_payloads(100, 100)[ProductDetailResponse]
+        comments = structure(payload, ProductDetailResponse, mode=LAZY).data.comments
+        assert isinstance(comments, LazyList)
+        assert len(comments) == 100 and comments.materialized == 0
+        assert comments[-1].id == 99
+        assert comments.materialized == 1
+        assert comments == structure(payload, ProductDetailResponse).data.comments
+
+    @allure.title("API对象 response_mode 为 lazy 时返回惰性列表")
+    @pytest.mark.tools
+    def test_api_lazy_response(self):
+        payload = make_payloads(30, 30)[CommentListResponse]
+        server = StubServer()
+        server.route("GET", "/api/comments")(lambda request: (200, payload))
+        with server:
+            api = GetCommentsAPI(base_url=server.url, http_client=HTTPClient(), enable_schema_validation=False,
+                                 response_mode=LAZY)
+            model = api.send().response_model
+        assert isinstance(model.data, LazyList)
+        assert model.data[3].rating == 4
+        assert model.data.materialized == 1
@@ -0,0 +1,141 @@
+import subprocess
+import textwrap
+
+import pytest
+import allure
+
+from Tools.impact import ImpactStore, select_tests, FULL_RUN_ENV, DIFF_BASE_ENV
+
+FILES = {
+    "apis/__init__.py": "",
+    "apis/mock/__init__.py": "",
+    "apis/mock/models.py": """
+        class User:
+            name: str
+
+        class Order:
+            id: int
+    """,
+    "apis/mock/apis.py": """
+        from .models import User, Order
+
+        class GetUsersAPI:
+            response = User
+
+        class CreateOrderAPI:
+            response = Order
+    """,
+    "testcases/__init__.py": "",
+    "testcases/conftest.py": """
+        import pytest
+        from apis.mock.apis import CreateOrderAPI
+
+        @pytest.fixture
+        def order_client():
+            return CreateOrderAPI
+    """,
+    "testcases/test_users.py": """
+        from apis.mock.apis import GetUsersAPI
+
+        class TestUsers:
+            def test_list(self):
+                assert GetUsersAPI
+
+            def test_other(self):
+                assert True
+    """,
+    "testcases/test_orders.py": """
+        def test_create(order_client):
+            assert order_client
+    """,
+    "conf/config.yaml": "env: test\n",
+}
+
+
+def _git(root, *args):
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+
+def _write(root, path, content):
+    target = root / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(textwrap.dedent(content), encoding="utf-8")
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    root = tmp_path / "repo"
+    for path, content in FILES.items():
+        _write(root, path, content)
+    _git(root, "init", "-q")
+    _git(root, "add", ".")
+    _git(root, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+    for name in (FULL_RUN_ENV, DIFF_BASE_ENV, "GITHUB_EVENT_NAME"):
+        monkeypatch.delenv(name, raising=False)
+    return root
+
+
+@allure.epic("测试工具")
+@allure.feature("增量运行")
+class TestImpact:
+
+    @allure.title("只改一个接口定义时只选中引用它的用例")
+    @pytest.mark.tools
+    def test_select_by_symbol(self, project):
+        store = ImpactStore(project.parent / "impact.db")
+        _write(project, "apis/mock/apis.py", FILES["apis/mock/apis.py"].replace("response = User", "response = None"))
+        selection = select_tests("HEAD", root=str(project), store=store)
+        assert not selection.full
+        assert selection.nodeids == ["testcases/test_users.py::TestUsers::test_list"]
+
+        # 模型改动经 API 类传递；fixture 依赖经 conftest 传递
+        _git(project, "checkout", "apis/mock/apis.py")
+        _write(project, "apis/mock/models.py", FILES["apis/mock/models.py"].replace("id: int", "id: str"))
+        assert select_tests("HEAD", root=str(project), store=store).nodeids == ["testcases/test_orders.py::test_create"]
+
+        # 文档与基准脚本改动不选中任何用例
+        _git(project, "checkout", "apis/mock/models.py")
+        _write(project, "README.md", "# doc\n")
+        assert select_tests("HEAD", root=str(project), store=store).nodeids == []
+        store.close()
+
+    @allure.title("运行时记录的 API 调用映射参与选择，只保留匹配运行标记的用例")
+    @pytest.mark.tools
+    def test_dynamic_mapping(self, project, monkeypatch):
+        store = ImpactStore(project.parent / "impact.db")
+        # test_other 在运行时通过其他途径调用了 GetUsersAPI
+        store.replace("dynamic", {"testcases/test_users.py::TestUsers::test_other": {
+            "apis/mock/apis.py::GetUsersAPI", "endpoint:get_users_api_users_get"}})
+        _write(project, "apis/mock/apis.py", FILES["apis/mock/apis.py"].replace("response = User", "response = None"))
+        selection = select_tests("HEAD", root=str(project), store=store)
+        assert selection.nodeids == ["testcases/test_users.py::TestUsers::test_list",
+                                     "testcases/test_users.py::TestUsers::test_other"]
+        assert "apis/mock/apis.py::GetUsersAPI" in store.targets("testcases/test_users.py::TestUsers::test_list")["static"]
+
+        # 运行时带 -m order：不匹配的用例会被 pytest 取消，选择时就去掉；都不匹配时没有用例可运行
+        monkeypatch.setenv("PYTEST_DISABLE_PLUGIN_AUTOLOAD", "1")
+        _write(project, "testcases/test_users.py", FILES["testcases/test_users.py"].replace(
+            "def test_other", "@pytest.mark.order\n            def test_other").replace("from apis", "import pytest\n        from apis"))
+        selection = select_tests("HEAD", root=str(project), store=store, markexpr="order")
+        assert selection.nodeids == ["testcases/test_users.py::TestUsers::test_other"]
+        assert "1 个受影响用例不匹配 -m order" in selection.reason
+        assert select_tests("HEAD", root=str(project), store=store, markexpr="smoke").nodeids == []
+        store.close()
+
+    @allure.title("配置、hooks.py 改动、定时任务时全量运行")
+    @pytest.mark.tools
+    def test_full_run(self, project, monkeypatch):
+        store = ImpactStore(project.parent / "impact.db")
+        _write(project, "conf/config.yaml", "env: prod\n")
+        assert select_tests("HEAD", root=str(project), store=store).full
+        _git(project, "checkout", "conf/config.yaml")
+        # hooks.py 由 aomaker 在会话开始时加载，影响所有用例
+        _write(project, "hooks.py", "from aomaker.hook_manager import session_hook\n")
+        assert select_tests("HEAD", root=str(project), store=store).full
+        (project / "hooks.py").unlink()
+        monkeypatch.setenv("GITHUB_EVENT_NAME", "schedule")
+        assert select_tests("HEAD", root=str(project), store=store).full
+        monkeypatch.delenv("GITHUB_EVENT_NAME")
+        assert select_tests("0000000", root=str(project), store=store).full
+        assert select_tests("no-such-ref", root=str(project), store=store).full
+        store.close()
@@ -0,0 +1,74 @@
+import json
+import tracemalloc
+
+import pytest
+import allure
+from aomaker.core.http_client import HTTPClient
+
+from apis.mock.apis import GetCommentsAPI, GetOrdersAPI
+from apis.mock.models import Comment, CommentListResponse, OrderListResponse
+from benchmarks.bench_deserialize import make_payloads
+from Tools.deserializers import structure
+from Tools.json_stream import ArrayStreamParser, iter_array_items
+from Tools.stub_server import StubServer
+
+
+def _chunks(raw: bytes, size: int):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+@allure.epic("测试工具")
+@allure.feature("流式JSON解析")
+class TestJsonStream:
+
+    @allure.title("任意分块边界下解析结果与 json.loads 一致")
+    @pytest.mark.tools
+    @pytest.mark.parametrize("size", [1, 3, 17, 4096])
+    def test_chunk_boundaries(self, size):
+        doc = {"ret_code": 0, "message": "成功", "total": 4,
+               "data": [{"id": 1, "text": "含 ] 与 \" 的字符串"}, 3.14159, -12e3, None]}
+        raw = json.dumps(doc, ensure_ascii=False, indent=1).encode("utf-8")
+        meta = {}
+        assert list(iter_array_items(_chunks(raw, size), meta=meta)) == doc["data"]
+        assert meta == {"ret_code": 0, "message": "成功", "total": 4}
+
+    @allure.title("不完整或非法的响应体抛出异常")
+    @pytest.mark.tools
+    @pytest.mark.parametrize("raw", [b'{"data": [1, 2', b'{"data": [1 2]}', b'[1, 2]'])
+    def test_invalid_body(self, raw):
+        parser = ArrayStreamParser()
+        with pytest.raises(ValueError):
+            parser.feed(raw)
+            parser.close()
+
+    @allure.title("列表API流式返回模型实例")
+    @pytest.mark.tools
+    @pytest.mark.parametrize("api_cls, response_cls, path", [
+        (GetCommentsAPI, CommentListResponse, "/api/comments"),
+        (GetOrdersAPI, OrderListResponse, "/api/orders"),
+    ])
+    def test_api_stream(self, api_cls, response_cls, path):
+        payload = make_payloads(500, 50)[response_cls]
+        raw = json.dumps(payload).encode("utf-8")
+        server = StubServer()
+        server.route("GET", path)(lambda request: (200, raw))
+        with server:
+            items = api_cls(base_url=server.url, http_client=HTTPClient()).stream(chunk_size=1024)
+            result = list(items)
+        assert result == structure(payload, response_cls).data
+        assert items.meta["total"] == 500
+
+    @allure.title("流式解析的峰值内存远小于响应体")
+    @pytest.mark.tools
+    def test_peak_memory(self):
+        raw = json.dumps(make_payloads(60000, 60000)[CommentListResponse]).encode("utf-8")
+        server = StubServer()
+        server.route("GET", "/api/comments")(lambda request: (200, raw))
+        with server:
+            api = GetCommentsAPI(base_url=server.url, http_client=HTTPClient())
+            tracemalloc.start()
+            count = sum(1 for comment in api.stream() if isinstance(comment, Comment))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        assert count == 60000
+        assert peak < len(raw) / 4
@@ -0,0 +1,49 @@
+import pytest
+import allure
+import requests
+
+from Tools.load_test import run_open_loop, run_closed_loop, classify_result
+from Tools.stub_server import apex_stub_server
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    with apex_stub_server() as server:
+        yield server
+
+
+def make_sender(server, symbol="BTC-USDT"):
+    session = requests.Session()
+
+    def send():
+        return session.post(f"{server.url}/api/v3/order", data={"symbol": symbol, "side": "BUY"}).json()
+
+    return send
+
+
+@allure.epic("测试工具")
+@allure.feature("下单压测")
+class TestLoadGenerator:
+
+    @allure.title("开环模式按目标速率发单")
+    @pytest.mark.tools
+    def test_open_loop_rate(self, stub_server):
+        report = run_open_loop(make_sender(stub_server), rate=50, duration=1)
+        data = report.to_dict()
+        assert data["total"] == 50
+        assert not data["errors"]
+        assert 0 < data["latency"]["p50_ms"] <= data["latency"]["p99_ms"] <= data["latency"]["p999_ms"]
+
+    @allure.title("闭环模式固定并发")
+    @pytest.mark.tools
+    def test_closed_loop_concurrency(self, stub_server):
+        report = run_closed_loop(make_sender(stub_server), concurrency=4, duration=0.5)
+        assert report.total > 0
+        assert sum(row["ok"] for row in report.to_dict()["per_second"]) == report.total
+
+    @allure.title("业务错误码计入错误分布")
+    @pytest.mark.tools
+    def test_error_breakdown(self, stub_server):
+        report = run_closed_loop(make_sender(stub_server, symbol=""), concurrency=2, duration=0.2)
+        assert report.errors["code 3"] == report.total
+        assert classify_result({"data": {"id": "1"}}) is None
@@ -0,0 +1,91 @@
+import json
+import socket
+import time
+from datetime import datetime
+
+import pytest
+import allure
+from aomaker.core.http_client import HTTPClient
+
+from apis.mock.apis import (CreateOrderAPI, DeleteCommentAPI, GetOrdersAPI, GetProductDetailAPI, GetUsersAPI,
+                            UpdateOrderStatusAPI)
+from Tools.mock_server import FaultConfig, MockServer
+
+
+@pytest.fixture
+def http_client():
+    client = HTTPClient()
+    client.middlewares = []
+    return client
+
+
+def raw_requests(server: MockServer, requests: list) -> list:
+    """同一连接上管线化发送多个请求，按顺序读取响应状态码与响应体"""
+    with socket.create_connection(("127.0.0.1", server.port)) as sock:
+        sock.sendall(b"".join(f"GET {path} HTTP/1.1\r\nHost: mock\r\n\r\n".encode() for path in requests))
+        buffer, responses = b"", []
+        while len(responses) < len(requests):
+            buffer += sock.recv(65536)
+            while b"\r\n\r\n" in buffer:
+                head, _, rest = buffer.partition(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                if len(rest) < length:
+                    break
+                responses.append((int(head.split(b" ")[1]), json.loads(rest[:length])))
+                buffer = rest[length:]
+    return responses
+
+
+@allure.epic("测试工具")
+@allure.feature("mock服务")
+class TestMockServer:
+
+    @allure.title("由路由声明生成的接口可查询、过滤、写入与删除")
+    @pytest.mark.tools
+    def test_generated_routes(self, http_client):
+        with MockServer(seed=1, size=20) as server:
+            kwargs = dict(base_url=server.url, http_client=http_client)
+            users = GetUsersAPI(query_params=GetUsersAPI.QueryParams(offset=5, limit=3), **kwargs).send()
+            assert users.response_model.total == 20
+            assert [user.id for user in users.response_model.data] == [6, 7, 8]
+
+            detail = GetProductDetailAPI(path_params=GetProductDetailAPI.PathParams(product_id=4), **kwargs).send()
+            assert detail.response_model.data.basic_info.id == 4
+
+            order = CreateOrderAPI(request_body=CreateOrderAPI.RequestBodyModel(
+                id=1000, user_id=7, products=[{"product_id": 1, "quantity": 2}], total_price=9.9, status="pending",
+                created_at=datetime(2024, 6, 1)), **kwargs).send()
+            assert order.response_model.data.id == 1000
+            UpdateOrderStatusAPI(path_params=UpdateOrderStatusAPI.PathParams(order_id=1000),
+                                 request_body=UpdateOrderStatusAPI.RequestBodyModel(status="paid"), **kwargs).send()
+            orders = GetOrdersAPI(query_params=GetOrdersAPI.QueryParams(user_id=7, status="paid"), **kwargs).send()
+            assert 1000 in [order.id for order in orders.response_model.data]
+            assert all(order.user_id == 7 and order.status == "paid" for order in orders.response_model.data)
+
+            delete = DeleteCommentAPI(path_params=DeleteCommentAPI.PathParams(comment_id=3), **kwargs)
+            assert delete.send().response_model.ret_code == 0
+            assert delete.send().response_model.ret_code == 404
+
+        with MockServer(seed=1, size=20) as again:
+            # 同一种子生成相同的数据
+            assert raw_requests(again, ["/api/orders?limit=5"]) == raw_requests(again, ["/api/orders?limit=5"])
+            assert raw_requests(again, ["/api/users/0", "/api/users/x", "/api/nothing"]) == [
+                (404, {"ret_code": 404, "message": "user not found"}),
+                (422, {"ret_code": 422, "message": "invalid request: invalid literal for int() with base 10: 'x'"}),
+                (404, {"ret_code": 404, "message": "no mock route for GET /api/nothing"})]
+
+    @allure.title("注入的延迟不打乱管线化响应的顺序，错误按路由注入")
+    @pytest.mark.tools
+    def test_fault_injection(self):
+        faults = {"GET /api/users/{user_id}": FaultConfig(latency=0.05),
+                  "GET /api/products/{product_id}": FaultConfig(error_rate=1.0, error_status=503)}
+        with MockServer(seed=1, faults=faults) as server:
+            start = time.perf_counter()
+            responses = raw_requests(server, ["/api/users/1", "/api/product_details/1", "/api/users/2",
+                                              "/api/products/1"])
+            elapsed = time.perf_counter() - start
+        assert [status for status, _ in responses] == [200, 200, 200, 503]
+        assert [responses[0][1]["data"]["id"], responses[2][1]["data"]["id"]] == [1, 2]
+        # 两个慢请求的延迟并行计时
+        assert 0.05 <= elapsed < 0.5
+        assert responses[3][1] == {"ret_code": 503, "message": "mock injected error"}
@@ -0,0 +1,103 @@
+import pytest
+import allure
+
+from Tools.notifier import FAILED, SENT, FeishuSink, NotificationStore, Notifier, WeChatSink, main
+from Tools.stub_server import StubServer
+
+
+@pytest.fixture
+def webhook():
+    """本地桩 webhook：按 responses 依次返回，用完后返回成功"""
+    with StubServer() as server:
+        server.received = []
+        server.responses = []
+
+        @server.route("POST", "/feishu")
+        def feishu(request):
+            server.received.append(("feishu", request.json()))
+            return server.responses.pop(0) if server.responses else (200, {"code": 0, "msg": "success"})
+
+        @server.route("POST", "/wechat")
+        def wechat(request):
+            server.received.append(("wechat", request.json()))
+            return server.responses.pop(0) if server.responses else (200, {"errcode": 0, "errmsg": "ok"})
+
+        yield server
+
+
+def _statuses(db_path) -> dict:
+    store = NotificationStore(db_path)
+    try:
+        return {row["key"]: row["status"] for row in store.query(f"SELECT * FROM {store.table}")}
+    finally:
+        store.close()
+
+
+@allure.epic("测试工具")
+@allure.feature("消息通知")
+class TestNotifier:
+
+    @allure.title("同 key 消息合并发送，失败按退避重试")
+    @pytest.mark.tools
+    def test_coalesce_and_retry(self, webhook, tmp_path):
+        db_path = tmp_path / "aomaker.db"
+        webhook.responses = [(500, {"msg": "busy"}), (200, {"code": 11232, "msg": "frequency limited"})]
+        notifier = Notifier({"feishu": FeishuSink(f"{webhook.url}/feishu")}, db_path=db_path,
+                            coalesce_window=0.3, backoff=0.01).start()
+        for i in range(5):
+            notifier.notify("feishu", {"n": i}, key="report:run-1")
+        # 另一个进程写入同一张卡片
+        other = NotificationStore(db_path)
+        other.put("feishu", "report:run-1", {"n": "other"})
+        other.close()
+
+        assert notifier.close(timeout=10)
+        # 两次失败 + 一次成功，都是最后一次写入的内容
+        assert [body for _, body in webhook.received] == [{"n": "other"}] * 3
+        assert set(_statuses(db_path).values()) == {SENT}
+
+        # 不传 key 时不合并
+        notifier = Notifier({"feishu": FeishuSink(f"{webhook.url}/feishu")}, db_path=db_path, coalesce_window=0)
+        notifier.notify("feishu", {"n": "single"})
+        notifier.notify("feishu", {"n": "single"})
+        assert notifier.close(timeout=10)
+        assert [body for _, body in webhook.received].count({"n": "single"}) == 2
+
+    @allure.title("发送失败的消息落盘，可重新投递")
+    @pytest.mark.tools
+    def test_failed_outbox_and_retry(self, webhook, tmp_path, monkeypatch):
+        db_path = tmp_path / "aomaker.db"
+        webhook.responses = [(200, {"code": 19001, "msg": "param invalid"})] + \
+                            [(200, {"errcode": 45009, "errmsg": "api freq out of limit"})] * 3
+        notifier = Notifier({"feishu": FeishuSink(f"{webhook.url}/feishu"),
+                             "wechat": WeChatSink(f"{webhook.url}/wechat")},
+                            db_path=db_path, coalesce_window=0, backoff=0.01, max_attempts=3)
+        notifier.notify("feishu", {"card": 1}, key="feishu-card")
+        notifier.flush(timeout=10)
+        notifier.notify("wechat", {"markdown": 1}, key="wechat-md")
+        assert notifier.close(timeout=10)
+        # 参数错误不重试；限流错误重试到上限
+        assert [sink for sink, _ in webhook.received] == ["feishu"] + ["wechat"] * 3
+        assert _statuses(db_path) == {"feishu-card": FAILED, "wechat-md": FAILED}
+
+        monkeypatch.setenv("FEISHU_WEBHOOK_URL", f"{webhook.url}/feishu")
+        monkeypatch.setenv("WECHAT_WEBHOOK_URL", f"{webhook.url}/wechat")
+        assert main(["--db", str(db_path), "retry", "--timeout", "10"]) == 0
+        assert webhook.received[-2:] in ([("feishu", {"card": 1}), ("wechat", {"markdown": 1})],
+                                         [("wechat", {"markdown": 1}), ("feishu", {"card": 1})])
+        assert set(_statuses(db_path).values()) == {SENT}
+
+    @allure.title("超时未发出的消息转入失败，不阻塞调用方")
+    @pytest.mark.tools
+    def test_close_timeout(self, tmp_path):
+        db_path = tmp_path / "aomaker.db"
+        with StubServer(latency=1.0) as server:
+            @server.route("POST", "/feishu")
+            def feishu(request):
+                return 200, {"code": 0}
+
+            notifier = Notifier({"feishu": FeishuSink(f"{server.url}/feishu", timeout=0.2)}, db_path=db_path,
+                                coalesce_window=0, backoff=5)
+            notifier.notify("feishu", {"card": 1}, key="slow")
+            assert not notifier.close(timeout=0.5)
+        assert _statuses(db_path) == {"slow": FAILED}
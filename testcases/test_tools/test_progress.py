@@ -0,0 +1,125 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+import allure
+
+from middlewares.timing_middleware import TimingStats
+from Tools.notifier import FEISHU_APP_ENVS, FeishuAppSink, FeishuSink, Notifier
+from Tools.progress import INTERVAL_ENV, ProgressAggregator, ProgressReporter, merge_progress, progress_enabled
+from Tools.stub_server import StubServer
+from Tools.transport import RequestPhases
+
+
+def _finish(aggregator: ProgressAggregator, nodeid: str, call: str = "passed", setup: str = "passed",
+            teardown: str = "passed", error: type = AssertionError):
+    """依次传入一个用例 setup/call/teardown 的报告，setup 未通过时没有 call 阶段"""
+    phases = [("setup", setup)] + ([("call", call)] if setup == "passed" else []) + [("teardown", teardown)]
+    for when, outcome in phases:
+        report = SimpleNamespace(nodeid=nodeid, when=when, outcome=outcome, passed=outcome == "passed",
+                                 failed=outcome == "failed", skipped=outcome == "skipped", duration=0.01)
+        excinfo = SimpleNamespace(errisinstance=lambda kind: issubclass(error, kind)) if outcome == "failed" else None
+        aggregator.record(report, SimpleNamespace(start=time.time(), excinfo=excinfo))
+
+
+def _worker(directory, name: str, tests: list, latencies: dict) -> ProgressAggregator:
+    stats = TimingStats()
+    for endpoint_id, seconds in latencies.items():
+        for _ in range(10):
+            stats.record(endpoint_id, RequestPhases(), seconds)
+    aggregator = ProgressAggregator(str(directory), interval=3600, stats=stats, name=name)
+    for index, phases in enumerate(tests):
+        _finish(aggregator, f"test_{name}.py::test_{index}", **phases)
+    aggregator.dump()
+    return aggregator
+
+
+@pytest.fixture
+def feishu_app():
+    """本地桩飞书开放平台：获取 token、发送消息、更新消息"""
+    with StubServer() as server:
+        server.received = []
+
+        @server.route("POST", "/open-apis/auth/v3/tenant_access_token/internal")
+        def token(request):
+            return 200, {"code": 0, "tenant_access_token": "t-stub", "expire": 7200}
+
+        @server.route("POST", "/open-apis/im/v1/messages")
+        def create(request):
+            server.received.append(("create", request.query, json.loads(request.json()["content"])))
+            return 200, {"code": 0, "data": {"message_id": "om_1"}}
+
+        @server.route("PATCH", "/open-apis/im/v1/messages/om_1")
+        def update(request):
+            assert request.headers["Authorization"] == "Bearer t-stub"
+            server.received.append(("update", request.query, json.loads(request.json()["content"])))
+            return 200, {"code": 0}
+
+        yield server
+
+
+@allure.epic("测试工具")
+@allure.feature("运行进度")
+class TestProgress:
+
+    @allure.title("按 allure 的方式判定用例状态，合并各进程的进度快照")
+    @pytest.mark.tools
+    def test_merge_snapshots(self, tmp_path):
+        # 断言失败为 failed，其它异常与 teardown 出错为 broken
+        _worker(tmp_path, "1", [{}, {"call": "failed"}, {"call": "failed", "error": ValueError},
+                                {"teardown": "failed"}],
+                {"get_users": 0.010, "create_order": 0.200})
+        _worker(tmp_path, "2", [{}, {"setup": "failed"}, {"setup": "skipped"}],
+                {"get_users": 0.030})
+
+        progress = merge_progress(str(tmp_path))
+        assert progress.counts == {"passed": 2, "failed": 1, "broken": 3, "skipped": 1}
+        assert progress.finished == 7 and progress.calls == 30
+        slowest = progress.slowest()
+        assert [row["endpoint_id"] for row in slowest] == ["create_order", "get_users"]
+        assert slowest[1]["calls"] == 20 and slowest[1]["p99_ms"] == pytest.approx(30, rel=0.02)
+
+    @allure.title("进度卡片原地更新，结束时置为已完成；只有 webhook 时不推送进度")
+    @pytest.mark.tools
+    def test_update_card_in_place(self, feishu_app, tmp_path, monkeypatch):
+        monkeypatch.setenv("APEX_RUN_ID", "run-1")
+        notifier = Notifier({"feishu_app": FeishuAppSink("app", "secret", "oc_1", base_url=feishu_app.url)},
+                            db_path=tmp_path / "aomaker.db", coalesce_window=0)
+        directory = tmp_path / "progress"
+        reporter = ProgressReporter(notifier, interval=3600, directory=str(directory)).start()
+        worker = _worker(directory, "1", [{}], {"get_users": 0.010})
+        reporter.publish()
+        assert notifier.flush(timeout=10)
+
+        _finish(worker, "test_1.py::test_1", call="failed")
+        worker.dump()
+        reporter.stop()
+        assert notifier.close(timeout=10)
+
+        kinds = [kind for kind, _, _ in feishu_app.received]
+        assert kinds == ["create", "update"]
+        assert feishu_app.received[0][1] == {"receive_id_type": "chat_id"}
+        first, last = feishu_app.received[0][2], feishu_app.received[1][2]
+        assert first["header"]["title"]["content"] == "⏳ 测试运行中"
+        assert last["header"]["title"]["content"] == "✅ 测试运行已完成"
+        assert "已完成** 2" in json.dumps(last, ensure_ascii=False)
+        assert "get_users" in json.dumps(last, ensure_ascii=False)
+
+        webhook = Notifier({"feishu": FeishuSink(feishu_app.url)}, db_path=tmp_path / "webhook.db")
+        reporter = ProgressReporter(webhook, interval=60, directory=str(directory)).start()
+        assert not reporter.enabled and reporter.sink is None
+        reporter.stop()
+        assert webhook.store.pending(webhook.sinks) == 0
+        webhook.store.close()
+
+        # 测试进程同样只在配置了应用凭证时写快照
+        for name in FEISHU_APP_ENVS:
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(INTERVAL_ENV, raising=False)
+        assert not progress_enabled()
+        for name in FEISHU_APP_ENVS:
+            monkeypatch.setenv(name, "x")
+        assert progress_enabled()
+        monkeypatch.setenv(INTERVAL_ENV, "0")
+        assert not progress_enabled()
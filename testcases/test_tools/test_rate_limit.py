@@ -0,0 +1,106 @@
+import io
+import multiprocessing
+import time
+
+import pytest
+import allure
+import requests
+from requests.adapters import BaseAdapter
+
+from Tools import rate_limit
+from Tools.rate_limit import ORDER, PRIVATE, PUBLIC, RateLimitedAdapter, RateLimiter, SharedBuckets, classify
+
+
+def take_tokens(path: str, count: int, results):
+    limiter = RateLimiter({ORDER: (40.0, 1.0)}, path)
+    times = []
+    for _ in range(count):
+        limiter.acquire(ORDER)
+        times.append(time.time())
+    results.put(times)
+
+
+class ThrottledAdapter(BaseAdapter):
+    """前 throttled 次返回 429，之后返回 200"""
+
+    def __init__(self, throttled: int):
+        super().__init__()
+        self.throttled = throttled
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = 429 if self.calls <= self.throttled else 200
+        response.headers["Retry-After"] = "0.05"
+        response.raw = io.BytesIO(b"{}")
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@allure.epic("测试工具")
+@allure.feature("限流")
+class TestRateLimit:
+
+    @allure.title("多个进程共享同一令牌桶，按预约顺序交替取得令牌")
+    @pytest.mark.tools
+    def test_shared_bucket_across_processes(self, tmp_path):
+        path = str(tmp_path / "rate_limit.bin")
+        RateLimiter({ORDER: (40.0, 1.0)}, path)
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        start = time.time()
+        workers = [ctx.Process(target=take_tokens, args=(path, 10, results)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        grants = [results.get(timeout=30) for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.time() - start
+
+        # 30 个令牌、每秒 40 个、无突发：至少 29 个间隔
+        assert elapsed >= 29 / 40
+        times = sorted(t for worker_times in grants for t in worker_times)
+        # 公平：每个进程的最后一个令牌都在整体的后段取得，没有进程被饿住或独占
+        assert all(worker_times[-1] >= times[0] + 0.6 * (times[-1] - times[0]) for worker_times in grants)
+        stats = SharedBuckets(path).read()[ORDER]
+        assert stats["acquired"] == 30
+        assert stats["waited"] >= 27 and stats["wait_total_s"] > 0
+
+    @allure.title("按路径归类，429 时推迟并重新排队，记录等待时间；限流器按 API key 共享")
+    @pytest.mark.tools
+    def test_adapter_retries_throttled(self, tmp_path, monkeypatch):
+        assert classify("POST", "/api/v3/order") == ORDER
+        assert classify("GET", "/api/v3/history-orders?limit=10") == PRIVATE
+        assert classify("GET", "/api/v3/symbols") == PUBLIC
+
+        limiter = RateLimiter({ORDER: (100.0, 5.0)}, str(tmp_path / "rate_limit.bin"))
+        inner = ThrottledAdapter(throttled=2)
+        session = requests.Session()
+        session.mount("http://", RateLimitedAdapter(limiter, inner))
+        start = time.perf_counter()
+        response = session.post("http://apex.test/api/v3/order", data={"symbol": "BTC-USDT"})
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200 and inner.calls == 3
+        # 两次 Retry-After 0.05 秒
+        assert elapsed >= 0.1
+        waits = limiter.stats()[ORDER]
+        assert waits["count"] == 3 and waits["wait_total_ms"] >= 90
+
+        # 超过重试次数时返回 429
+        inner.calls, inner.throttled = 0, 10
+        assert session.post("http://apex.test/api/v3/order").status_code == 429
+        assert inner.calls == 4
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(rate_limit, "_limiters", {"held": limiter})
+        monkeypatch.delenv(rate_limit.LIMITS_ENV, raising=False)
+        first = rate_limit.get_rate_limiter("key-a")
+        assert rate_limit.get_rate_limiter("key-a") is first
+        second = rate_limit.get_rate_limiter("key-b")
+        assert second is not first and second.buckets.path == rate_limit.state_path("key-b")
+        second.acquire(ORDER)
+        assert rate_limit.rate_limit_stats()[ORDER]["count"] == limiter.stats()[ORDER]["count"] + 1
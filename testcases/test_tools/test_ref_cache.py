@@ -0,0 +1,62 @@
+import pytest
+import allure
+from aomaker.storage import Cache
+
+from Tools.ref_cache import ReferenceCache, enable_reference_cache
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = {"configs_v3": 0, "get_account_v3": 0}
+
+    def configs_v3(self, **kwargs):
+        self.calls["configs_v3"] += 1
+        return {"data": {"contractConfig": {}}}
+
+    def get_account_v3(self, **kwargs):
+        self.calls["get_account_v3"] += 1
+        return {"id": "1", "ethereumAddress": "0xabc"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Cache(db_path=tmp_path / "aomaker.db")
+
+
+@allure.epic("测试工具")
+@allure.feature("参考数据缓存")
+class TestReferenceCache:
+
+    @allure.title("命中缓存时不再请求且同步客户端属性")
+    @pytest.mark.tools
+    def test_cache_hit(self, store):
+        client = FakeClient()
+        enable_reference_cache(client, ReferenceCache(store=store))
+        for _ in range(3):
+            client.configs_v3()
+            client.get_account_v3()
+        assert client.calls == {"configs_v3": 1, "get_account_v3": 1}
+        assert client.accountV3["id"] == "1" and client.configV3 == {"contractConfig": {}}
+
+    @allure.title("跨worker共享与显式失效")
+    @pytest.mark.tools
+    def test_shared_and_invalidate(self, store):
+        first, second = FakeClient(), FakeClient()
+        enable_reference_cache(first, ReferenceCache(store=store))
+        enable_reference_cache(second, ReferenceCache(store=store))
+        first.configs_v3()
+        second.configs_v3()
+        assert second.calls["configs_v3"] == 0
+
+        second.ref_cache.invalidate("configs_v3")
+        second.configs_v3()
+        assert second.calls["configs_v3"] == 1
+
+    @allure.title("过期后重新请求")
+    @pytest.mark.tools
+    def test_ttl_expiry(self, store):
+        client = FakeClient()
+        enable_reference_cache(client, ReferenceCache(ttls={"get_account_v3": 0}, store=store))
+        client.get_account_v3()
+        client.get_account_v3()
+        assert client.calls["get_account_v3"] == 2
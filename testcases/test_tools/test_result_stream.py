@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import pytest
+import allure
+
+from Tools.result_stream import STREAM_ENV, ResultAggregator, ResultRing
+
+SAMPLE_TESTS = '''
+import pytest
+
+
+@pytest.fixture
+def broken_fixture():
+    raise RuntimeError("setup")
+
+
+def test_passed():
+    assert True
+
+
+def test_failed():
+    assert 1 == 2
+
+
+def test_broken():
+    raise KeyError("call")
+
+
+def test_setup_error(broken_fixture):
+    pass
+
+
+@pytest.mark.skip(reason="skip")
+def test_skipped():
+    pass
+'''
+
+
+def _publish(path: str, worker: int, count: int):
+    ring = ResultRing(path)
+    for i in range(count):
+        assert ring.publish(f"test_{worker}.py::test_{i}", "failed" if i == 0 else "passed", 1700000000.0 + i, 0.5)
+
+
+@allure.epic("测试工具")
+@allure.feature("结果实时汇总")
+class TestResultStream:
+
+    @allure.title("多个进程写入小容量环形缓冲区，写满时等待取出，汇总不丢不重")
+    @pytest.mark.tools
+    def test_ring_across_processes(self, tmp_path):
+        with ResultAggregator(str(tmp_path / "results.ring"), capacity=4, interval=0.01) as aggregator:
+            assert os.environ[STREAM_ENV] == aggregator.path
+            context = multiprocessing.get_context("fork")
+            processes = [context.Process(target=_publish, args=(aggregator.path, worker, 20)) for worker in range(3)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            assert [process.exitcode for process in processes] == [0, 0, 0]
+        summary = aggregator.summary()
+        assert STREAM_ENV not in os.environ and not os.path.exists(aggregator.path)
+        assert summary["stats"]["total"] == 60 and summary["stats"]["failed"] == 3
+        assert summary["workers"] == 3 and summary["dropped"] == 0
+        assert sorted(summary["failures"]) == [f"test_{worker}.py::test_0" for worker in range(3)]
+        assert summary["time"]["duration_ms"] == 19500 and summary["time"]["sum_duration_ms"] == 30000
+
+        ring = ResultRing(str(tmp_path / "full.ring"), capacity=1)
+        assert ring.publish("a", "passed", 0.0, 0.0)
+        assert not ring.publish("b", "passed", 0.0, 0.0, timeout=0.01)
+        assert ring.dropped() == 1
+        assert [record["nodeid"] for record in ring.consume()] == ["a"]
+
+    @allure.title("pytest 插件按 allure 的规则上报用例状态")
+    @pytest.mark.tools
+    def test_writer_plugin(self, tmp_path):
+        (tmp_path / "test_sample.py").write_text(SAMPLE_TESTS, encoding="utf-8")
+        code = ("import sys, pytest; from Tools.result_stream import ResultStreamWriter; "
+                "sys.exit(pytest.main(sys.argv[1:], plugins=[ResultStreamWriter()]))")
+        with ResultAggregator(str(tmp_path / "results.ring")) as aggregator:
+            env = dict(os.environ, PYTEST_DISABLE_PLUGIN_AUTOLOAD="1", PYTHONPATH=os.getcwd())
+            subprocess.run([sys.executable, "-c", code, str(tmp_path), "-q", "-p", "no:cacheprovider"],
+                           env=env, cwd=str(tmp_path), stdout=subprocess.DEVNULL)
+        summary = aggregator.summary()
+        assert summary["stats"] == {"passed": 1, "failed": 1, "broken": 2, "skipped": 1, "unknown": 0, "total": 5}
+        assert sorted(nodeid.split("::")[1] for nodeid in summary["failures"]) == \
+            ["test_broken", "test_failed", "test_setup_error"]
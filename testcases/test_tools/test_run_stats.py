@@ -0,0 +1,59 @@
+import pytest
+import allure
+
+from middlewares.timing_middleware import TimingStats
+from Tools.run_stats import RunStats, compare_runs, main
+from Tools.transport import RequestPhases
+
+
+def _run(latencies: dict) -> TimingStats:
+    stats = TimingStats()
+    for endpoint_id, (seconds, count) in latencies.items():
+        for _ in range(count):
+            stats.record(endpoint_id, RequestPhases(), seconds, bytes_in=100, bytes_out=20,
+                         package="mock", api_name=endpoint_id.title())
+    return stats
+
+
+@allure.epic("测试工具")
+@allure.feature("运行统计")
+class TestRunStats:
+
+    @allure.title("按运行写入 statistics 表并读回直方图")
+    @pytest.mark.tools
+    def test_save_and_load_run(self, tmp_path):
+        store = RunStats(tmp_path / "aomaker.db")
+        store.set(package="mock", api_name="GetUsersAPI")
+        store.save_run("run-1", _run({"get_users": (0.010, 50)}))
+        # 同一运行重复写入时覆盖
+        store.save_run("run-1", _run({"get_users": (0.010, 100), "create_order": (0.020, 10)}))
+
+        assert [row["run_id"] for row in store.runs()] == ["run-1"]
+        loaded = store.load_run("run-1")
+        users = loaded.endpoints["get_users"]
+        assert users.calls == 100 and users.bytes_in == 10000 and users.bytes_out == 2000
+        assert users.package == "mock"
+        assert users.phases["total"].percentile(99) == pytest.approx(0.010, rel=0.02)
+        # aomaker 原有的接口清单行不受影响
+        assert store.get({"api_name": "GetUsersAPI"})[0]["run_id"] is None
+        store.close()
+
+    @allure.title("对比两次运行标出 p99 退化")
+    @pytest.mark.tools
+    def test_compare_runs(self, tmp_path):
+        db = tmp_path / "aomaker.db"
+        store = RunStats(db)
+        store.save_run("nightly-1", _run({"create_order_api_orders_post": (0.010, 200), "get_users": (0.005, 200)}))
+        store.save_run("nightly-2", _run({"create_order_api_orders_post": (0.015, 200), "get_users": (0.005, 200)}))
+
+        diffs = compare_runs(store.load_run("nightly-1"), store.load_run("nightly-2"))
+        store.close()
+        assert diffs[0].endpoint_id == "create_order_api_orders_post"
+        assert diffs[0].change == pytest.approx(0.5, rel=0.05)
+        assert diffs[0].is_regression(threshold=0.1, min_delta_ms=1)
+        assert not diffs[1].is_regression(threshold=0.1, min_delta_ms=1)
+
+        assert main(["--db", str(db), "compare", "nightly-1", "nightly-2"]) == 0
+        assert main(["--db", str(db), "compare", "nightly-1", "nightly-2", "--fail-on-regression"]) == 1
+        assert main(["--db", str(db), "compare", "nightly-1", "nightly-2", "--fail-on-regression",
+                     "--endpoint", "get_users"]) == 0
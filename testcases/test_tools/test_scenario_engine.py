@@ -0,0 +1,55 @@
+import pytest
+import allure
+
+from Tools.scenario import (CANCELLED, OPEN, Lifecycle, OrderBook, OrderRecord, ScenarioError, Step, check_book)
+
+
+def make_book(*records) -> OrderBook:
+    """records: (订单号, 请求序号, 确认序号, 状态)"""
+    book = OrderBook("BTC-USDT", 0)
+    for order_id, sent, acked, status in records:
+        record = book.orders[order_id] = OrderRecord(order_id, sent)
+        record.acked, record.status = acked, status
+    return book
+
+
+@allure.epic("测试工具")
+@allure.feature("订单场景引擎")
+class TestScenarioEngine:
+
+    @allure.title("订单簿快照校验发现丢单、重复、状态不符与先后顺序颠倒")
+    @pytest.mark.tools
+    def test_check_book(self):
+        # 1 在 2 发出前已确认，3 与 2 并发
+        book = make_book((1, 0, 1, OPEN), (2, 2, 4, CANCELLED), (3, 3, 5, OPEN))
+        assert check_book(book, [1, 2, 3], [OPEN, CANCELLED, OPEN]) == []
+        assert check_book(book, [1, 3, 2], [OPEN, OPEN, CANCELLED]) == []
+
+        violations = check_book(book, [2, 1, 3, 3, 99], [CANCELLED, OPEN, OPEN, OPEN, OPEN])
+        assert any("1 先于订单 2" in violation for violation in violations)
+        assert any("3 重复" in violation for violation in violations)
+        assert any("未下过的订单 99" in violation for violation in violations)
+        violations = check_book(book, [1, 2], [OPEN, OPEN])
+        assert any("3 丢失" in violation for violation in violations)
+        assert any("最后确认的状态为 cancelled" in violation for violation in violations)
+
+        # 结果未知的订单不参与校验
+        book.orders[3].uncertain = True
+        assert check_book(book, [1, 2], [OPEN, CANCELLED]) == []
+
+    @allure.title("生命周期定义按状态机校验")
+    @pytest.mark.tools
+    def test_lifecycle_validation(self):
+        place = Step("place", price=1.5, quantity=3)
+        Lifecycle("ok", [place, Step("fill", quantity=1), Step("amend", price=1.4), Step("fill", quantity=2),
+                         Step("query", expect="filled")])
+        with pytest.raises(ScenarioError, match="超过剩余数量"):
+            Lifecycle("overfill", [place, Step("fill", quantity=2), Step("amend", price=1.4), Step("fill", quantity=2)])
+        with pytest.raises(ScenarioError, match="不能再 fill"):
+            Lifecycle("after_cancel", [place, Step("cancel"), Step("fill", quantity=1)])
+        with pytest.raises(ScenarioError, match="需要先 place"):
+            Lifecycle("no_place", [Step("cancel")])
+        with pytest.raises(ScenarioError, match="不会是 filled"):
+            Lifecycle("expect", [place, Step("query", expect="filled")])
+        with pytest.raises(ScenarioError):
+            Step.from_dict({"action": "fill", "qty": 1})
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+import allure
+
+from Tools.scheduler import (DurationStore, TestUnit, WorkStealingQueues, build_units, collect_nodeids,
+                             list_schedule_makespan, lpt_schedule, makespan, run_schedule)
+
+
+@allure.epic("测试工具")
+@allure.feature("LPT 调度")
+class TestScheduler:
+
+    @allure.title("历史耗时按 EWMA 合并")
+    @pytest.mark.tools
+    def test_duration_store(self, tmp_path):
+        store = DurationStore(tmp_path / "aomaker.db")
+        store.update({"testcases/test_a.py::test_1": 2.0})
+        store.update({"testcases/test_a.py::test_1": 4.0, "testcases/test_b.py::test_2": 1.0})
+        assert store.all() == {"testcases/test_a.py::test_1": 3.0, "testcases/test_b.py::test_2": 1.0}
+        store.close()
+
+    @allure.title("LPT 装箱优于按文件顺序的静态分配，慢文件拆段且不漏用例")
+    @pytest.mark.tools
+    def test_lpt_and_split(self):
+        history = {f"testcases/test_slow.py::test_{i}": 10.0 for i in range(6)}
+        history.update({f"testcases/test_f{i}.py::test": 1.0 + i for i in range(6)})
+        files = ["testcases/test_slow.py"] + [f"testcases/test_f{i}.py" for i in range(6)] + ["testcases/test_new.py"]
+
+        whole = build_units(files, history, workers=3, split_slow_files=False)
+        assert list_schedule_makespan(whole, 3) == 60.0
+        units = build_units(files, history, workers=3, default_duration=2.0)
+        slow = [unit for unit in units if unit.name.startswith("testcases/test_slow.py[")]
+        assert len(slow) == 3
+        # 前几段按 nodeid 执行，最后一段跑整个文件并排除前面已分配的用例
+        assert slow[-1].args[0] == "testcases/test_slow.py"
+        assigned = {arg for unit in slow[:-1] for arg in unit.args}
+        assert set(slow[-1].args[2::2]) == assigned and len(assigned) == 4
+        bins = lpt_schedule(units, 3)
+        assert makespan(bins) == pytest.approx(sum(u.predicted for u in units) / 3, rel=0.1)
+        assert makespan(bins) < list_schedule_makespan(whole, 3)
+
+    @allure.title("拆段只使用当前仍存在的用例，单元退出码异常时列出")
+    @pytest.mark.tools
+    def test_stale_history_and_exit_codes(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PYTEST_DISABLE_PLUGIN_AUTOLOAD", "1")
+        # nodeid 相对于 rootdir，与项目内运行时一样使用相对路径
+        monkeypatch.chdir(tmp_path)
+        path = "test_chunks.py"
+        (tmp_path / path).write_text("def test_a(): pass\ndef test_b(): pass\ndef test_c(): pass\n")
+        history = {f"{path}::test_{name}": 10.0 for name in ("a", "b", "gone")}
+        history["testcases/test_other.py::test"] = 1.0
+        files = [path, "testcases/test_other.py"]
+        current = collect_nodeids([path])
+        assert f"{path}::test_a" in current and f"{path}::test_gone" not in current
+
+        units = build_units(files, history, workers=3, collect=lambda paths: current)
+        args = [arg for unit in units if unit.name.startswith(path) for arg in unit.args]
+        assert f"{path}::test_gone" not in args and f"{path}::test_a" in args
+        # 收集失败时不拆段，整个文件作为一个单元
+        units = build_units(files, history, workers=3, collect=lambda paths: None)
+        assert [unit.args for unit in units if unit.name.startswith(path)] == [[path]]
+
+        report = run_schedule([[TestUnit("ok", [], 0.0), TestUnit("not_found", [], 0.0)]],
+                              lambda unit: 4 if unit.name == "not_found" else 1)
+        assert [unit["name"] for unit in report.errors] == ["not_found"]
+
+    @allure.title("预估不准时空闲 worker 窃取任务")
+    @pytest.mark.tools
+    def test_work_stealing(self):
+        # worker 0 的第一个任务实际很慢，其余任务应被 worker 1 窃取
+        slow = TestUnit("slow", ["slow"], 0.01)
+        bins = [[slow] + [TestUnit(f"a{i}", [], 0.01) for i in range(4)], [TestUnit("b", [], 0.01)]]
+        actual = {"slow": 0.2}
+        report = run_schedule(bins, lambda unit: time.sleep(actual.get(unit.name, 0.01)))
+        assert report.steals >= 3
+        assert report.predicted_makespan == pytest.approx(0.05)
+        assert report.actual_makespan < 0.2 + 0.05
+        assert sorted(u["name"] for u in report.units) == sorted(u.name for b in bins for u in b)
+        queues = WorkStealingQueues([[], []])
+        assert queues.take(0) is None
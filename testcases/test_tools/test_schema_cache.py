@@ -0,0 +1,88 @@
+import copy
+
+import pytest
+import allure
+from aomaker.core.api_object import BaseAPIObject
+from aomaker.storage import Schema
+from apischema.json_schema import deserialization_schema
+
+from apis.mock.models import GenericDataResponse, ProductDetailResponse
+from benchmarks.bench_schema_validation import payload
+from Tools.schema_cache import CompiledValidator, SchemaCache, compile_schema, opted_in
+
+
+def _mutations(data: dict):
+    variants = [copy.deepcopy(data) for _ in range(8)]
+    variants[1]["extra"] = 1
+    variants[2]["ret_code"] = True
+    variants[3]["ret_code"] = 1.0
+    variants[4]["data"]["comments"][0].pop("id")
+    variants[5]["data"]["basic_info"]["description"] = None
+    variants[6]["data"]["related_products"].append("a")
+    variants[7]["data"] = None
+    return variants
+
+
+@allure.epic("测试工具")
+@allure.feature("schema 校验缓存")
+class TestSchemaCache:
+
+    @allure.title("编译的校验器与 jsonschema 判定一致，错误信息与 aomaker 相同，未支持的关键字回退到 jsonschema")
+    @pytest.mark.tools
+    def test_compiled_matches_jsonschema(self):
+        from jsonschema.validators import validator_for
+        schema = deserialization_schema(ProductDetailResponse)
+        validator = CompiledValidator(schema)
+        assert validator.compiled
+        reference = validator_for(schema)(schema)
+        for data in _mutations(payload(1, 3)):
+            assert validator.check(data) is reference.is_valid(data)
+
+        invalid = _mutations(payload(1, 3))[4]
+        with pytest.raises(AssertionError) as expected:
+            BaseAPIObject.schema_validate(None, invalid, schema)
+        with pytest.raises(AssertionError) as actual:
+            validator.validate(invalid)
+        assert str(actual.value) == str(expected.value)
+
+        constrained = {"type": "object", "properties": {
+            "name": {"type": "string", "minLength": 2, "pattern": "^[a-z]+$"},
+            "level": {"type": "integer", "minimum": 1, "exclusiveMaximum": 5},
+            "side": {"enum": ["BUY", "SELL"]}}}
+        check = compile_schema(constrained)
+        assert check({"name": "ab", "level": 4, "side": "BUY"})
+        assert not check({"name": "a"}) and not check({"name": "AB"})
+        assert not check({"level": 5}) and not check({"side": "HOLD"})
+        assert compile_schema({"$ref": "#/$defs/x", "$defs": {"x": {}}}) is None
+
+    @allure.title("校验器按 schema 名与 updated_at 缓存，版本变化时重新编译，抽样模式每 N 个响应校验 1 个")
+    @pytest.mark.tools
+    def test_cache_by_version_and_sampling(self, tmp_path):
+        store = Schema(str(tmp_path / "aomaker.db"))
+        cache = SchemaCache(store, size=1, refresh_interval=0)
+        assert opted_in(ProductDetailResponse) and not opted_in(GenericDataResponse)
+
+        data = payload(1, 3)
+        first = cache.validator(ProductDetailResponse)
+        assert cache.validator(ProductDetailResponse) is first
+        assert store.get_schema("ProductDetailResponse") == deserialization_schema(ProductDetailResponse)
+        assert cache.validate(ProductDetailResponse, data)
+        assert cache.stats["compiled"] == 1
+
+        store.execute_sql(f"UPDATE {store.table} SET updated_at = ? WHERE schema_name = ?",
+                          ("2099-01-01 00:00:00.000", "ProductDetailResponse"))
+        assert cache.validator(ProductDetailResponse) is not first
+        # LRU 容量为 1，另一个模型的校验器挤出当前版本
+        cache.validator(GenericDataResponse)
+        assert cache.validator(ProductDetailResponse) is not first
+        assert cache.stats["compiled"] == 4
+
+        sampled = SchemaCache(store, sample=3)
+        invalid = dict(data, extra=1)
+        with pytest.raises(AssertionError):
+            sampled.validate(ProductDetailResponse, invalid)
+        assert not sampled.validate(ProductDetailResponse, invalid)
+        assert not sampled.validate(ProductDetailResponse, invalid)
+        with pytest.raises(AssertionError):
+            sampled.validate(ProductDetailResponse, invalid)
+        assert sampled.stats == {"validated": 0, "skipped": 2, "compiled": 1, "hits": 1}
@@ -0,0 +1,100 @@
+import pytest
+import allure
+
+from Tools import signing
+from Tools.signing import OrderSigner, SigningPool, enable_signing_engine, order_context
+from Tools.stub_server import STUB_CREDENTIALS, _apex_account, _apex_symbols
+
+SEEDS = STUB_CREDENTIALS["APEX_SEEDS"]
+
+# apexpro HttpPrivateSign.create_order_v3 对桩服务的 configs_v3/get_account_v3 录制的订单体(_post 的 data)：
+# create_order_v3(symbol="BTC-USDT", side="BUY", type="LIMIT", size="0.001", price="100000",
+#                 clientId="123456789", timestampSeconds=1700000000)，SELL 时只有签名不同
+RECORDED_BODY = {
+    "symbol": "BTC-USDT", "side": "BUY", "type": "LIMIT", "timeInForce": "GOOD_TIL_CANCEL", "size": "0.001",
+    "price": "100000", "limitFee": "0.0500", "expiration": 1702419200, "triggerPrice": None,
+    "triggerPriceType": None, "trailingPercent": None, "clientId": "123456789",
+    "signature": "0x26e6dfbdf00ca462796b85812ff040125e47ff93fc24b89d25948283bf0c791912a67a7ed3059516a563d46b0ab18b0f"
+                 "fd09cfbff37509538a3a05047bc03005",
+    "reduceOnly": False, "isPositionTpsl": False, "isOpenTpslOrder": False, "isSetOpenSl": False,
+    "isSetOpenTp": False, "slClientOrderId": None, "slPrice": None, "slSide": None, "slSize": None,
+    "slTriggerPrice": None, "slTriggerPriceType": None, "slExpiration": None, "slLimitFee": "None",
+    "slSignature": None, "tpClientOrderId": None, "tpPrice": None, "tpSide": None, "tpSize": None,
+    "tpTriggerPrice": None, "tpTriggerPriceType": None, "tpExpiration": None, "tpLimitFee": "None",
+    "tpSignature": None, "sourceFlag": None, "brokerId": None,
+}
+RECORDED_SELL_SIGNATURE = ("0x70052318ead675af73be8b1d8a6688517d0ec2eae218e1673cfc5b0b625e6d04af06f97f6ddbf465a6016219"
+                           "256cc46fcc0096bd1503667104f91d2eeccb8f04")
+
+
+def make_order(client_id: str, side: str = "BUY", price: str = "100000") -> dict:
+    return {"symbol": "BTC-USDT", "side": side, "type": "LIMIT", "size": "0.001", "price": price,
+            "clientId": client_id, "timestampSeconds": 1700000000}
+
+
+@allure.epic("测试工具")
+@allure.feature("下单签名")
+class TestSigning:
+
+    @allure.title("缓存的签名密钥与重新派生的结果一致，重复订单命中签名缓存")
+    @pytest.mark.tools
+    def test_cached_signer(self):
+        context = order_context(_apex_symbols()["data"], _apex_account()["data"], "BTCUSDT")
+        signer = OrderSigner(SEEDS)
+        first = signer.sign(context, make_order("1"))
+        assert signer.sign(context, make_order("1")) == first
+        assert (signer.signed, signer.cache_hits) == (1, 1)
+        assert OrderSigner(SEEDS).signer is signer.signer
+
+        signing._signers.clear()
+        fresh = OrderSigner(SEEDS)
+        assert fresh.signer is not signer.signer
+        assert fresh.sign(context, make_order("1")) == first
+        # clientId 决定 nonce，签名随之变化
+        assert signer.sign(context, make_order("2"))["signature"] != first["signature"]
+        assert first["expiration"] == 1700000000 + signing.EXPIRATION_OFFSET
+        assert first["limitFee"] == "0.0500"
+        with pytest.raises(ValueError):
+            signer.sign(context, make_order("3", price="100000.05"))
+
+    @allure.title("进程池批量签名结果与进程内一致且保持顺序，在途批次满时提交阻塞")
+    @pytest.mark.tools
+    def test_signing_pool(self):
+        context = order_context(_apex_symbols()["data"], _apex_account()["data"], "BTC-USDT")
+        orders = [make_order(str(i), side="BUY" if i % 2 else "SELL") for i in range(20)]
+        expected = OrderSigner(SEEDS).sign_batch(context, orders)
+        with SigningPool(SEEDS, workers=2, max_pending=1, batch_size=8) as pool:
+            pool.warm_up()
+            assert pool.sign_batch(context, orders) == expected
+
+            pending = pool.submit(context, orders * 5)
+            with pytest.raises(TimeoutError):
+                pool.submit(context, orders[:1], timeout=0.01)
+            assert pending.result() == expected * 5
+
+    @allure.title("订单体与 apexpro create_order_v3 录制的结果逐字段一致，按位置传参时走原实现")
+    @pytest.mark.tools
+    def test_matches_create_order_v3(self):
+        context = order_context(_apex_symbols()["data"], _apex_account()["data"], "BTC-USDT")
+        signer = OrderSigner(SEEDS)
+        body = signer.sign(context, make_order("123456789"))
+        assert body == RECORDED_BODY
+        assert list(body) == list(RECORDED_BODY)
+        sell = signer.sign(context, make_order("123456789", side="SELL"))
+        assert sell == dict(RECORDED_BODY, side="SELL", signature=RECORDED_SELL_SIGNATURE)
+
+        calls = []
+
+        class Client:
+            zk_seeds = SEEDS
+            configV3 = _apex_symbols()["data"]
+            accountV3 = _apex_account()["data"]
+
+            def create_order_v3(self, *args, **kwargs):
+                calls.append((args, kwargs))
+                return {"data": "original"}
+
+        client = Client()
+        enable_signing_engine(client, signer)
+        assert client.create_order_v3("BTC-USDT", "BUY", "LIMIT", "0.001", price="100000") == {"data": "original"}
+        assert calls == [(("BTC-USDT", "BUY", "LIMIT", "0.001"), {"price": "100000"})]
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+
+import pytest
+import allure
+
+from Tools import startup
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        420 | yaml
+import time:       500 |        500 |     yaml.reader
+import time:       200 |        900 |   yaml.loader
+import time:       100 |       1000 | yaml.cyaml
+"""
+
+
+def _exit_if_not_loaded(name: str):
+    sys.exit(0 if name in sys.modules else 1)
+
+
+@allure.epic("测试工具")
+@allure.feature("启动耗时")
+class TestStartup:
+
+    @allure.title("解析 -X importtime 输出并按顶层包汇总自身耗时，导入客户端模块不加载 apexpro")
+    @pytest.mark.tools
+    def test_import_profile(self):
+        records = startup.parse_importtime(IMPORTTIME)
+        assert [record["module"] for record in records] == ["_io", "yaml", "yaml.reader", "yaml.loader", "yaml.cyaml"]
+        assert [record["depth"] for record in records] == [1, 0, 2, 1, 0]
+        profile = startup.summarize(records)
+        assert profile["total_us"] == 1220
+        assert profile["packages"]["yaml"] == {"self_us": 1100, "modules": 4}
+        assert profile["slowest"][0]["module"] == "yaml.cyaml"
+
+        code = "import sys, Tools.apex_client; sys.exit('apexpro' in sys.modules)"
+        assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+    @allure.title("worker 由预加载了重模块的 forkserver 启动，直接继承已导入的模块")
+    @pytest.mark.tools
+    def test_forkserver_worker(self, monkeypatch):
+        monkeypatch.setenv(startup.START_METHOD_ENV, startup.SPAWN)
+        assert startup.worker_context().get_start_method() == "spawn"
+        monkeypatch.setenv(startup.START_METHOD_ENV, startup.FORKSERVER)
+        if startup.start_method() != startup.FORKSERVER:
+            pytest.skip("当前平台不支持 forkserver")
+
+        context = startup.worker_context()
+        assert context.get_start_method() == "forkserver"
+        # aiohttp 只由 forkserver 预加载，worker 反序列化本模块时不会导入它
+        process = context.Process(target=_exit_if_not_loaded, args=("aiohttp",))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
@@ -0,0 +1,105 @@
+import multiprocessing
+import sqlite3
+import threading
+
+import pytest
+import allure
+from aomaker.database.sqlite import SQLiteDB
+from aomaker.storage import Cache
+
+from Tools import storage
+
+
+class KeyValueStore(SQLiteDB):
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path)
+        self.execute_sql("CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v TEXT)")
+
+    def put(self, key: str, value: str):
+        self.upsert_data("kv", {"k": key, "v": value}, "k")
+
+
+def _count(db_path: str) -> int:
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def _write_in_child(db_path: str, store: KeyValueStore, parent_connection: int):
+    KeyValueStore(db_path).put("child", "1")
+    assert id(store.connection) != parent_connection
+
+
+@pytest.fixture
+def shared_storage():
+    installed = bool(storage._original)
+    storage.install()
+    yield storage
+    if not installed:
+        storage.uninstall()
+
+
+@allure.epic("测试工具")
+@allure.feature("数据库访问层")
+class TestStorage:
+
+    @allure.title("同一进程共用一个 WAL 连接，batch 内的写入只提交一次，fork 后的子进程重新连接")
+    @pytest.mark.tools
+    def test_shared_connection_and_batch(self, shared_storage, tmp_path):
+        db_path = str(tmp_path / "shared.db")
+        first, second = KeyValueStore(db_path), KeyValueStore(db_path)
+        assert first.connection is second.connection
+        assert first.query("PRAGMA journal_mode")[0]["journal_mode"] == "wal"
+
+        commits = storage.storage_stats["commits"]
+        with storage.batch(db_path):
+            for i in range(50):
+                (first if i % 2 else second).put(f"k{i}", str(i))
+            # 其它连接在提交前看不到这批写入
+            assert _count(db_path) == 0
+        assert _count(db_path) == 50
+        assert storage.storage_stats["commits"] == commits + 1
+
+        with pytest.raises(KeyError):
+            with storage.batch(db_path):
+                first.put("rolled_back", "1")
+                raise KeyError("abort")
+        assert first.select_data("kv", where={"k": "rolled_back"}) == []
+
+        process = multiprocessing.get_context("fork").Process(target=_write_in_child, args=(db_path, first, id(first.connection)))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+        assert first.select_data("kv", "v", {"k": "child"}, is_fetch_all=False) == {"v": "1"}
+
+    @allure.title("数据库被锁时退避重试，进度写入合并后批量提交")
+    @pytest.mark.tools
+    def test_busy_retry_and_deferred_progress(self, shared_storage, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage, "BUSY_TIMEOUT_MS", 20)
+        db_path = str(tmp_path / "busy.db")
+        store = KeyValueStore(db_path)
+        blocker = sqlite3.connect(db_path, check_same_thread=False)
+        blocker.execute("BEGIN IMMEDIATE")
+        timer = threading.Timer(0.3, blocker.commit)
+        timer.start()
+        retries = storage.storage_stats["busy_retries"]
+        store.put("after_lock", "1")
+        timer.join()
+        blocker.close()
+        assert storage.storage_stats["busy_retries"] > retries
+        assert _count(db_path) == 1
+
+        monkeypatch.setattr(Cache, "worker", property(lambda self: "gw0"))
+        monkeypatch.setattr(storage, "FLUSH_INTERVAL", 3600)
+        cache = Cache(db_path)
+        for completed in range(100):
+            cache.upsert("_progress.gw0", {"completed": completed})
+        cache.upsert("headers", {"token": "x"})
+        # 首次写入立即提交，之后的进度在间隔内合并
+        assert cache.get("_progress.gw0") == {"completed": 0}
+        assert cache.get("headers") == {"token": "x"}
+        assert storage.flush_pending(db_path) == 1
+        assert cache.get("_progress.gw0") == {"completed": 99}
@@ -0,0 +1,56 @@
+import pytest
+import allure
+from aomaker.core.http_client import HTTPClient
+
+from apis.mock.apis import GetUsersAPI, GetCommentsAPI
+from middlewares.timing_middleware import (TimingStats, timing_stats, export_timings, merge_timing_exports,
+                                           timing_middleware)
+from Tools.stub_server import StubServer
+from Tools.transport import RequestPhases
+
+
+@allure.epic("测试工具")
+@allure.feature("计时中间件")
+class TestTimingMiddleware:
+
+    @allure.title("按 endpoint_id 记录分阶段耗时")
+    @pytest.mark.tools
+    def test_records_phases_per_endpoint(self):
+        server = StubServer()
+        server.route("GET", "/api/users")(lambda request: (200, {"data": [], "total": 0}))
+        server.route("GET", "/api/comments")(lambda request: (500, {"detail": "boom"}))
+        http_client = HTTPClient()
+        assert timing_middleware in http_client.middlewares
+        timing_stats.reset()
+        with server:
+            base_url = server.url.replace("127.0.0.1", "localhost")
+            for _ in range(5):
+                GetUsersAPI(base_url=base_url, http_client=http_client, enable_schema_validation=False).send()
+            GetCommentsAPI(base_url=base_url, http_client=http_client, response=None).send()
+
+        users = timing_stats.endpoints[GetUsersAPI.__attrs_attrs__.endpoint_id.default]
+        assert users.calls == 5 and users.errors == 0
+        assert users.package == "mock" and users.api_name == "GetUsersAPI"
+        assert users.bytes_in == 5 * len(b'{"data": [], "total": 0}') and users.bytes_out == 0
+        assert users.new_connections == 1
+        assert users.phases["dns"].total == 1 and users.phases["connect"].total == 1
+        assert users.phases["tls"].total == 0
+        assert users.phases["ttfb"].total == 5
+        assert users.phases["ttfb"].max <= users.phases["total"].max
+        comments = timing_stats.endpoints["get_comments_api_comments_get"]
+        assert comments.calls == 1 and comments.errors == 1 and comments.new_connections == 0
+
+    @allure.title("各worker导出的计时数据合并")
+    @pytest.mark.tools
+    def test_export_and_merge(self, tmp_path):
+        for worker in ("gw0", "gw1"):
+            stats = TimingStats()
+            phases = RequestPhases()
+            phases.ttfb = 0.002
+            stats.record("get_users_api_users_get", phases, 0.003)
+            export_timings(str(tmp_path), stats, name=worker)
+        merged = merge_timing_exports(str(tmp_path), str(tmp_path / "timing.json"))
+        assert merged.endpoints["get_users_api_users_get"].calls == 2
+        summary = merged.summary()["get_users_api_users_get"]
+        assert summary["total"]["p50_ms"] == pytest.approx(3, rel=0.02)
+        assert (tmp_path / "timing.json").exists()
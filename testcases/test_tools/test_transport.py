@@ -0,0 +1,26 @@
+import pytest
+import allure
+import requests
+
+from Tools.stub_server import apex_stub_server
+from Tools.transport import mount_pooled_transport, pool_stats
+
+
+@allure.epic("测试工具")
+@allure.feature("连接池")
+class TestPooledTransport:
+
+    @allure.title("同一session内的请求复用连接")
+    @pytest.mark.tools
+    def test_connection_reuse(self):
+        session = requests.Session()
+        mount_pooled_transport(session, pool_size=2)
+        pool_stats.reset()
+        with apex_stub_server() as server:
+            for _ in range(10):
+                assert session.get(f"{server.url}/api/v3/symbols").status_code == 200
+        stats = pool_stats.to_dict()
+        assert stats["requests"] == 10
+        assert stats["misses"] == 1
+        assert stats["hits"] == 9
+        assert stats["connect_time_total_ms"] > 0